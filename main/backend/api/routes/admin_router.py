@@ -7,9 +7,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 
 from core.database import get_db
-from core.security import get_current_user
+from core.security import get_current_user, user_cache
 from models.db import User, Question
 from models.schema import QuestionResponse
+from services.question_bank import question_bank
 
 router = APIRouter()
 
@@ -46,6 +47,9 @@ async def create_question(
     db.add(question)
     await db.commit()
     await db.refresh(question)
+
+    # 同步题库索引
+    question_bank.add(question.id, question.module, question.difficulty)
     return question
 
 
@@ -63,11 +67,17 @@ async def update_question(
     if not question:
         raise HTTPException(status_code=404, detail="题目不存在")
 
+    old_module, old_difficulty = question.module, question.difficulty
     for key, value in question_data.items():
         setattr(question, key, value)
 
     await db.commit()
     await db.refresh(question)
+
+    # 模块或难度变更时同步题库索引
+    question_bank.move(
+        question.id, old_module, old_difficulty, question.module, question.difficulty
+    )
     return question
 
 
@@ -86,4 +96,13 @@ async def delete_question(
 
     await db.execute(delete(Question).where(Question.id == question_id))
     await db.commit()
+
+    # 同步题库索引
+    question_bank.remove(question_id, question.module, question.difficulty)
     return {"message": "题目已删除"}
+
+
+@router.get("/admin/cache-stats")
+async def get_cache_stats(admin: User = Depends(get_admin_user)):
+    """进程内缓存命中率统计"""
+    return {"user_cache": user_cache.stats()}
@@ -64,7 +64,7 @@ async def start_alarm(
     """
     try:
         # 开始学习会话
-        await AlarmService.start_session(current_user.id, db)
+        await AlarmService.start_session(current_user.id, current_user.nickname, db)
 
         # 返回当前状态
         status = await AlarmService.get_current_status(current_user.id, db)
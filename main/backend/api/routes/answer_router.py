@@ -8,6 +8,7 @@ from core.database import get_db
 from core.security import get_current_user
 from models.db import User
 from models.schema import AnswerRequest, AnswerResponse
+from services.answer_ingest import answer_ingestor
 from services.progress_service import ProgressService
 
 
@@ -24,4 +25,6 @@ async def submit_answer(
     提交答案
     提交用户的答案并返回结果和奖励信息
     """
+    if answer_ingestor.running:
+        return await answer_ingestor.submit_answer(request, current_user, db)
     return await ProgressService.submit_answer(request, current_user, db)
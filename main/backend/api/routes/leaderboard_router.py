@@ -0,0 +1,50 @@
+"""
+排行榜 API 路由
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_db
+from core.security import get_current_claims
+from models.schema import LeaderboardResponse, LeaderboardMeResponse
+from services.leaderboard import GLOBAL, SPEED_QUIZ, WEEKLY, leaderboard, module_scope
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+
+
+def resolve_scope(scope: str, module: Optional[str]) -> str:
+    """scope=global/weekly/speed_quiz/module（module 需同时传入模块名）"""
+    if scope in (GLOBAL, WEEKLY, SPEED_QUIZ):
+        return scope
+    if scope == "module" and module:
+        return module_scope(module)
+    raise HTTPException(status_code=400, detail="Invalid leaderboard scope")
+
+
+@router.get("", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    scope: str = Query(GLOBAL, description="global/module/weekly/speed_quiz"),
+    module: Optional[str] = Query(None, description="scope=module 时的模块: vocabulary/grammar/reading"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_claims)
+):
+    """排行榜前 N 名"""
+    resolved = resolve_scope(scope, module)
+    total, entries = await leaderboard.top(db, resolved, limit)
+    return LeaderboardResponse(scope=resolved, total=total, entries=entries)
+
+
+@router.get("/me", response_model=LeaderboardMeResponse)
+async def get_my_rank(
+    scope: str = Query(GLOBAL, description="global/module/weekly/speed_quiz"),
+    module: Optional[str] = Query(None, description="scope=module 时的模块: vocabulary/grammar/reading"),
+    k: int = Query(5, ge=0, le=50, description="前后各显示的人数"),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_claims)
+):
+    """我的排名及前后各 k 名"""
+    resolved = resolve_scope(scope, module)
+    total, rank, score, neighbours = await leaderboard.around(db, resolved, current_user.id, k)
+    return LeaderboardMeResponse(scope=resolved, total=total, rank=rank, score=score, neighbours=neighbours)
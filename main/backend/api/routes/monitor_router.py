@@ -16,11 +16,13 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
 from typing import List, Optional
 from datetime import datetime, timedelta
+import asyncio
 import json
 
+from core.config import settings
+
 from models.monitor_schema import (
     IntelligenceTrendResponse,
-    IntelligenceScore,
     Milestone,
     EvolutionStreamResponse,
     DiagnosisResponse,
@@ -30,16 +32,17 @@ from models.monitor_schema import (
     AgentPerformanceResponse,
     KnowledgeGraphResponse
 )
-from services.monitor_intelligence import IntelligenceCalculator
+from services.intelligence_snapshot import intelligence_snapshot
 from services.monitor_diagnosis import DiagnosisService
 from services.monitor_service import MonitorService
+from services.evolution_bus import EvolutionEventBus, evolution_bus
 
 
 # 创建路由器
 router = APIRouter(prefix="/monitor", tags=["监控"])
 
 # 初始化服务
-intelligence_calculator = IntelligenceCalculator()
+intelligence_calculator = intelligence_snapshot.calculator
 diagnosis_service = DiagnosisService()
 monitor_service = MonitorService()
 
@@ -47,84 +50,100 @@ monitor_service = MonitorService()
 # ==================== WebSocket 连接管理器 ====================
 
 class ConnectionManager:
-    """WebSocket 连接管理器"""
-
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """
+    WebSocket 连接管理器
 
-    async def connect(self, websocket: WebSocket):
-        """接受新连接"""
-        await websocket.accept()
-        self.active_connections.append(websocket)
+    每个连接订阅进化事件总线并由独立的发送任务推送，广播不等待任何客户端；
+    发送队列写满的慢客户端由总线断开。
+    """
 
-    def disconnect(self, websocket: WebSocket):
-        """断开连接"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+    # 慢消费者被断开时的关闭码（1013: Try Again Later）
+    SLOW_CONSUMER_CLOSE_CODE = 1013
 
-    async def broadcast(self, message: dict):
-        """广播消息到所有连接"""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                # 连接已断开，标记移除
-                disconnected.append(connection)
+    def __init__(self, bus: EvolutionEventBus):
+        self.bus = bus
 
-        # 移除断开的连接
-        for conn in disconnected:
-            self.disconnect(conn)
+    async def connect(self, websocket: WebSocket, last_event_id: Optional[str] = None) -> asyncio.Task:
+        """接受新连接，补发 last_event_id 之后的事件，返回发送任务"""
+        await websocket.accept()
+        # 先订阅再补发，补发期间发布的事件在队列中等待，不会遗漏
+        subscriber = self.bus.subscribe()
+        backlog = await self._backlog(last_event_id) if last_event_id else []
+        if backlog is None:
+            # 续传点已不可追溯或错过的事件超过补发上限，通知客户端全量刷新
+            await websocket.send_json({"type": "resync"})
+            backlog = []
+        return asyncio.create_task(self._sender(websocket, subscriber, backlog))
+
+    async def _backlog(self, last_event_id: str) -> Optional[List[dict]]:
+        """续传消息：优先取总线缓冲区，超出范围时回退到数据库"""
+        backlog = self.bus.replay_after(last_event_id)
+        if backlog is None:
+            backlog = await monitor_service.get_events_after(last_event_id, settings.EVOLUTION_REPLAY_BUFFER)
+        return backlog
+
+    async def _sender(self, websocket: WebSocket, subscriber, backlog: List[dict]):
+        """发送任务：先补发，再消费订阅队列"""
+        sent = set()
+        try:
+            for message in backlog:
+                await websocket.send_json(message)
+                sent.add(message["data"]["id"])
+            while True:
+                message = await subscriber.get()
+                if message is None:
+                    await websocket.close(code=self.SLOW_CONSUMER_CLOSE_CODE)
+                    return
+                if sent and message.get("data", {}).get("id") in sent:
+                    continue
+                await websocket.send_json(message)
+        except Exception:
+            # 连接已断开，由接收循环负责清理
+            pass
+        finally:
+            self.bus.unsubscribe(subscriber)
+
+    async def broadcast(self, message: dict, event_id: Optional[str] = None):
+        """广播消息到所有连接（只入队，不等待发送）"""
+        self.bus.publish(message, event_id=event_id)
 
 
 # 全局连接管理器
-manager = ConnectionManager()
+manager = ConnectionManager(evolution_bus)
 
 
 # ==================== REST API 接口 ====================
 
 @router.get("/intelligence-trend", response_model=IntelligenceTrendResponse)
-async def get_intelligence_trend(days: Optional[str] = Query("7", description="时间范围: 7/30/all")):
+async def get_intelligence_trend(
+    days: Optional[str] = Query("7", description="时间范围: 7/30/all"),
+    bucket: str = Query("auto", description="降采样时间桶: hour/day/week/auto")
+):
     """
     获取智能水平走势数据
 
     Args:
         days: 时间范围，默认 7 天，可选 7/30/all
+        bucket: 时间桶，默认按范围自动选择
 
     Returns:
         IntelligenceTrendResponse: 智能水平走势数据
     """
     try:
-        # 计算当前智能水平
-        current_score = intelligence_calculator.calculate_intelligence_score()
-
-        # 模拟历史数据（实际应从数据库查询）
-        # 这里简化处理，生成最近 7 天的数据
-        trend_data = []
-        days_count = 7 if days == "7" else (30 if days == "30" else 90)
-
-        for i in range(days_count, 0, -1):
-            timestamp = datetime.now() - timedelta(days=i)
-            # 模拟历史分数（实际应从数据库查询）
-            score_variation = (i % 3) * 0.1
-            trend_data.append(IntelligenceScore(
-                timestamp=timestamp,
-                intelligence_score=max(current_score.intelligence_score - score_variation, 0),
-                strategy_weight=max(current_score.strategy_weight - score_variation * 0.1, 0),
-                knowledge_richness=max(current_score.knowledge_richness - score_variation * 0.1, 0),
-                quality_trend=max(current_score.quality_trend - score_variation * 0.1, 0),
-                evolution_frequency=max(current_score.evolution_frequency - score_variation * 0.1, 0)
-            ))
-
-        # 添加当前数据
-        trend_data.append(current_score)
+        # 从快照表按时间桶降采样
+        trend_data, bucket = await monitor_service.get_intelligence_trend(days=days, bucket=bucket)
+
+        # 尚无快照时返回当前智能水平
+        if not trend_data:
+            trend_data = [intelligence_snapshot.current()]
 
         # 识别里程碑
         milestones = intelligence_calculator.identify_milestones()
 
         return IntelligenceTrendResponse(
             trend=trend_data,
-            milestones=milestones
+            milestones=milestones,
+            bucket=bucket
         )
 
     except Exception as e:
@@ -134,7 +153,13 @@ async def get_intelligence_trend(days: Optional[str] = Query("7", description="
 @router.get("/evolution-stream", response_model=EvolutionStreamResponse)
 async def get_evolution_stream(
     limit: int = Query(50, description="每页数量"),
-    offset: int = Query(0, description="偏移量")
+    offset: int = Query(0, description="偏移量（提供 cursor 时忽略）"),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的 next_cursor"),
+    include_total: bool = Query(True, description="是否返回总数（仅首页计算）"),
+    since: Optional[datetime] = Query(None, description="只返回该时间之后的事件（增量拉取）"),
+    agent: Optional[str] = Query(None, description="按 Agent 名称过滤"),
+    strategy: Optional[str] = Query(None, description="按策略类型过滤"),
+    include_diff: bool = Query(True, description="是否返回进化对比详情")
 ):
     """
     获取进化事件流
@@ -142,12 +167,23 @@ async def get_evolution_stream(
     Args:
         limit: 每页数量，默认 50
         offset: 偏移量，默认 0
+        cursor: 分页游标
+        include_total: 是否返回总数
+        since: 增量拉取起点（不含）
+        agent: Agent 名称过滤
+        strategy: 策略类型过滤
+        include_diff: 是否返回进化对比详情
 
     Returns:
         EvolutionStreamResponse: 进化事件流数据
     """
     try:
-        return await monitor_service.get_evolution_stream(limit=limit, offset=offset)
+        return await monitor_service.get_evolution_stream(
+            limit=limit, offset=offset, cursor=cursor, include_total=include_total,
+            since=since, agent=agent, strategy=strategy, include_diff=include_diff
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取进化事件流失败: {str(e)}")
 
@@ -161,11 +197,11 @@ async def get_diagnosis():
         DiagnosisResponse: 诊断结果
     """
     try:
-        # 执行诊断
+        # 执行诊断（只重新分析有变化的文件）
         issues = await diagnosis_service.run_diagnosis()
 
         # 计算下次诊断时间（每小时执行一次）
-        now = datetime.now()
+        now = diagnosis_service.last_run_at or datetime.now()
         next_diagnosis_time = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
         return DiagnosisResponse(
@@ -190,9 +226,8 @@ async def fix_issue(request: FixRequest):
         FixResult: 修复结果
     """
     try:
-        # 先获取问题详情
-        issues = await diagnosis_service.run_diagnosis()
-        issue = next((i for i in issues if i.id == request.issue_id), None)
+        # 按 ID 直接查找问题详情（ID 按内容生成，跨诊断稳定）
+        issue = await diagnosis_service.get_issue(request.issue_id)
 
         if not issue:
             raise HTTPException(status_code=404, detail=f"问题不存在: {request.issue_id}")
@@ -201,6 +236,8 @@ async def fix_issue(request: FixRequest):
         result = await diagnosis_service.auto_fix_issue(request.issue_id, issue)
         return result
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -249,7 +286,10 @@ async def get_knowledge_graph(
 # ==================== WebSocket 接口 ====================
 
 @router.websocket("/ws/evolution")
-async def websocket_evolution_stream(websocket: WebSocket):
+async def websocket_evolution_stream(
+    websocket: WebSocket,
+    last_event_id: Optional[str] = Query(None, description="断线重连时传入最后收到的事件 ID")
+):
     """
     WebSocket 实时进化事件推送
 
@@ -257,14 +297,17 @@ async def websocket_evolution_stream(websocket: WebSocket):
 
     Args:
         websocket: WebSocket 连接
+        last_event_id: 最后收到的事件 ID，服务端先补发其后的事件
 
     说明:
     - 客户端可以发送 {"type": "ping"} 心跳消息
     - 服务端会响应 {"type": "pong"}
     - 服务端会主动推送进化事件 {"type": "evolution_event", "data": {...}}
+    - 无法续传时推送 {"type": "resync"}，客户端应重新拉取 /evolution-stream
+    - 接收过慢被断开时关闭码为 1013，客户端应带 last_event_id 重连
     """
     # 接受连接（允许 guest 用户）
-    await manager.connect(websocket)
+    sender = await manager.connect(websocket, last_event_id)
 
     try:
         while True:
@@ -277,10 +320,11 @@ async def websocket_evolution_stream(websocket: WebSocket):
                 await websocket.send_json({"type": "pong"})
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
+        pass
     except Exception as e:
         print(f"WebSocket 错误: {e}")
-        manager.disconnect(websocket)
+    finally:
+        sender.cancel()
 
 
 # ==================== 辅助函数 ====================
@@ -289,10 +333,13 @@ async def broadcast_evolution_event(event: dict):
     """
     广播进化事件到所有 WebSocket 连接
 
+    monitor_evolution_events 的插入由事件轮询器（本进程插入在提交后立即）发布，
+    此函数用于推送未落库的事件。
+
     Args:
         event: 进化事件数据
     """
     await manager.broadcast({
         "type": "evolution_event",
         "data": event
-    })
+    }, event_id=event.get("id"))
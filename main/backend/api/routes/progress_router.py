@@ -3,21 +3,21 @@
 """
 
 from typing import Optional
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, text
+from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
-from datetime import datetime, timedelta
+from datetime import date, datetime
 
 from core.database import get_db
-from core.security import get_current_user
+from core.pagination import keyset_before, next_cursor
+from core.security import get_current_user, get_current_claims, TokenClaims
 from models.db import (
     User,
     WrongQuestion,
     Question,
-    UserProgress,
-    Achievement,
     UserAchievement,
+    UserDailyActivity,
 )
 from models.schema import (
     ProgressResponse,
@@ -26,6 +26,8 @@ from models.schema import (
     StudyRecordsResponse,
     StudyRecordResponse,
 )
+from services.achievement_engine import achievement_engine
+from services.progress_service import ProgressService
 
 
 router = APIRouter()
@@ -33,86 +35,40 @@ router = APIRouter()
 
 @router.get("/progress", response_model=ProgressResponse)
 async def get_progress(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     获取用户学习进度
     返回：总答题数、正确数、正确率、连击数、今日完成数
-    """
-    # 总答题数
-    result = await db.execute(
-        select(func.count(UserProgress.id)).where(
-            UserProgress.user_id == current_user.id
-        )
-    )
-    total_questions = result.scalar() or 0
 
-    # 正确数
-    result = await db.execute(
-        select(func.count(UserProgress.id)).where(
-            and_(
-                UserProgress.user_id == current_user.id, UserProgress.is_correct == True
-            )
-        )
-    )
-    correct_answers = result.scalar() or 0
-
-    # 正确率
-    accuracy = (
-        round(correct_answers / total_questions * 100, 1)
-        if total_questions > 0
-        else 0.0
-    )
-
-    # 连击数（获取最近一次连续答对的数量）
-    result = await db.execute(
-        select(UserProgress)
-        .where(UserProgress.user_id == current_user.id)
-        .order_by(UserProgress.answered_at.desc())
-        .limit(100)
-    )
-    progress_list = result.scalars().all()
-
-    streak = 0
-    for p in progress_list:
-        if p.is_correct:
-            streak += 1
-        else:
-            break
-
-    # 今日完成数
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    result = await db.execute(
-        select(func.count(UserProgress.id)).where(
-            and_(
-                UserProgress.user_id == current_user.id,
-                UserProgress.answered_at >= today_start,
-            )
-        )
-    )
-    completed_today = result.scalar() or 0
+    支持 If-None-Match：进度未变化时返回 304，只按主键读取一次用户行、不执行汇总查询。
+    ETag 和连击取自数据库而不是 current_user（可能来自用户缓存）
+    """
+    updated_at, streak = await ProgressService.read_progress_state(current_user.id, db)
+    etag = ProgressService.progress_etag(current_user.id, updated_at)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag})
 
-    return ProgressResponse(
-        total_questions=total_questions,
-        correct_answers=correct_answers,
-        accuracy=accuracy,
-        streak=streak,
-        daily_goal=20,
-        completed_today=completed_today,
-    )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return await ProgressService.get_progress_summary(current_user, db, streak=streak)
 
 
 @router.get("/achievements", response_model=list)
 async def get_achievements(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    current_user: TokenClaims = Depends(get_current_claims), db: AsyncSession = Depends(get_db)
 ):
     """
     获取用户成就列表
     返回：所有成就及解锁状态
     """
-    # 获取所有成就
-    result = await db.execute(select(Achievement))
-    all_achievements = result.scalars().all()
+    # 获取所有成就（成就引擎缓存的定义）
+    await achievement_engine.ensure_loaded(db)
+    all_achievements = achievement_engine.all_achievements()
 
     # 获取用户已解锁的成就ID
     result = await db.execute(
@@ -142,34 +98,48 @@ async def get_achievements(
 
 @router.get("/wrong-questions", response_model=WrongQuestionsListResponse)
 async def get_wrong_questions(
-    page: int = Query(1, ge=1, description="页码"),
+    page: int = Query(1, ge=1, description="页码（兼容旧分页，提供 cursor 时忽略）"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="分页游标，取上一页返回的 next_cursor"),
+    include_total: bool = Query(True, description="是否返回总数（仅首页计算）"),
+    current_user: TokenClaims = Depends(get_current_claims),
     db: AsyncSession = Depends(get_db),
 ):
     """
     获取用户错题本
     返回：错题列表及分页信息
+
+    按 (last_wrong_at, id) 倒序游标分页，翻页深度不影响查询耗时
     """
-    # 获取总数量
-    result = await db.execute(
-        select(func.count(WrongQuestion.id)).where(
-            WrongQuestion.user_id == current_user.id
+    conditions = [WrongQuestion.user_id == current_user.id]
+    after = keyset_before(WrongQuestion.last_wrong_at, WrongQuestion.id, cursor)
+    if after is not None:
+        conditions.append(after)
+
+    # 获取总数（只在首页计算）
+    total = None
+    if include_total and cursor is None:
+        result = await db.execute(
+            select(func.count(WrongQuestion.id)).where(
+                WrongQuestion.user_id == current_user.id
+            )
         )
-    )
-    total = result.scalar() or 0
+        total = result.scalar() or 0
 
-    # 获取错题列表
-    offset = (page - 1) * page_size
-    result = await db.execute(
+    # 获取错题列表（多取一行判断是否还有下一页）
+    query = (
         select(WrongQuestion)
         .options(selectinload(WrongQuestion.question))
-        .where(WrongQuestion.user_id == current_user.id)
-        .order_by(WrongQuestion.last_wrong_at.desc())
-        .offset(offset)
-        .limit(page_size)
+        .where(*conditions)
+        .order_by(WrongQuestion.last_wrong_at.desc(), WrongQuestion.id.desc())
+        .limit(page_size + 1)
     )
+    if cursor is None and page > 1:
+        query = query.offset((page - 1) * page_size)
+    result = await db.execute(query)
     wrong_questions = result.scalars().all()
+    cursor_token = next_cursor(wrong_questions, page_size, "last_wrong_at")
+    wrong_questions = wrong_questions[:page_size]
 
     # 转换为响应模型
     items = []
@@ -194,7 +164,7 @@ async def get_wrong_questions(
         )
 
     return WrongQuestionsListResponse(
-        items=items, total=total, page=page, page_size=page_size
+        items=items, total=total, page=page, page_size=page_size, next_cursor=cursor_token
     )
 
 
@@ -202,83 +172,57 @@ async def get_wrong_questions(
 async def get_study_records(
     year: int = Query(None, description="年份，默认今年"),
     month: int = Query(None, description="月份，默认今年"),
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_current_claims),
     db: AsyncSession = Depends(get_db),
 ):
     """
     获取用户学习记录（用于日历展示）
     返回：每日学习记录、總學習天數、連續學習天數
-    """
-    import calendar
 
+    数据来自答题时维护的 user_daily_activity 日汇总表
+    """
     now = datetime.utcnow()
     target_year = year or now.year
     target_month = month or now.month
 
     # 获取当月的学习记录
-    month_start = datetime(target_year, target_month, 1)
+    month_start = date(target_year, target_month, 1)
     month_end = (
-        datetime(target_year, target_month + 1, 1)
+        date(target_year, target_month + 1, 1)
         if target_month < 12
-        else datetime(target_year + 1, 1, 1)
+        else date(target_year + 1, 1, 1)
     )
 
     result = await db.execute(
-        select(
-            func.date(UserProgress.answered_at).label("date"),
-            func.count(UserProgress.id).label("count"),
-            func.sum(text("CASE WHEN is_correct THEN 1 ELSE 0 END")).label("correct"),
-        )
+        select(UserDailyActivity)
         .where(
             and_(
-                UserProgress.user_id == current_user.id,
-                UserProgress.answered_at >= month_start,
-                UserProgress.answered_at < month_end,
+                UserDailyActivity.user_id == current_user.id,
+                UserDailyActivity.activity_date >= month_start,
+                UserDailyActivity.activity_date < month_end,
             )
         )
-        .group_by(func.date(UserProgress.answered_at))
+        .order_by(UserDailyActivity.activity_date)
     )
-    daily_records = result.all()
+    daily_records = result.scalars().all()
 
     # 构建响应
-    records = []
-    total_score = 0
-    for date, count, correct in daily_records:
-        records.append(
-            StudyRecordResponse(
-                date=date.strftime("%Y-%m-%d")
-                if isinstance(date, datetime)
-                else str(date),
-                questions_completed=count,
-                total_score=correct * 10 if correct else 0,  # 简化计分
-            )
+    records = [
+        StudyRecordResponse(
+            date=activity.activity_date.strftime("%Y-%m-%d"),
+            questions_completed=activity.questions_completed,
+            total_score=activity.correct_count * 10,  # 简化计分
         )
-        total_score += correct * 10 if correct else 0
+        for activity in daily_records
+    ]
 
     # 计算学习天数
     total_days = len(records)
 
-    # 计算连续学习天数
-    consecutive_days = 0
-    if records:
-        # 检查今天是否学习
-        today_str = now.strftime("%Y-%m-%d")
-        has_today = any(r.date == today_str for r in records)
-
-        if has_today:
-            consecutive_days = 1
-            # 向前计算连续天数
-            check_date = now
-            while True:
-                check_date = check_date - timedelta(days=1)
-                date_str = check_date.strftime("%Y-%m-%d")
-                has_record = any(r.date == date_str for r in records)
-                if has_record:
-                    consecutive_days += 1
-                else:
-                    break
-        else:
-            consecutive_days = 0
+    # 计算连续学习天数（可跨月）
+    consecutive_days = await ProgressService.count_consecutive_days(
+        current_user.id, now.date(), db
+    )
 
     return StudyRecordsResponse(
         records=records, total_days=total_days, consecutive_days=consecutive_days
@@ -6,8 +6,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
-from core.security import get_current_user
-from models.db import User
+from core.security import get_current_claims, TokenClaims
 from models.schema import QuestionResponse
 from services.question_service import QuestionService
 
@@ -19,7 +18,7 @@ router = APIRouter()
 async def get_random_question(
     module: Optional[str] = Query(None, description="模块: vocabulary/grammar/reading"),
     difficulty: Optional[int] = Query(None, ge=1, le=5, description="难度等级 1-5"),
-    current_user: User = Depends(get_current_user),
+    current_user: TokenClaims = Depends(get_current_claims),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1,18 +1,21 @@
 """
 抢答模式 API 路由
 """
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import get_db
-from core.security import get_current_user
+from core.security import get_current_user, get_current_claims, get_ws_claims
 from models.schema import (
     SpeedQuizStartRequest,
     SpeedQuizSubmitRequest,
     SpeedQuizStartResponse,
     SpeedQuizSubmitResponse,
     SpeedQuizStatsResponse,
-    SpeedQuizHistoryResponse
+    SpeedQuizHistoryResponse,
+    SpeedQuizRoomResponse
 )
 from services.speed_quiz_service import SpeedQuizService
 
@@ -49,7 +52,7 @@ async def submit_answer(
 @router.get("/stats", response_model=SpeedQuizStatsResponse)
 async def get_stats(
     db: AsyncSession = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_claims)
 ):
     """获取战绩统计"""
     return await service.get_stats(db, current_user.id)
@@ -59,8 +62,87 @@ async def get_stats(
 async def get_history(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
     db: AsyncSession = Depends(get_db),
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_claims)
 ):
-    """获取历史记录"""
-    return await service.get_history(db, current_user.id, page, page_size)
+    """获取历史记录（cursor 为上一页返回的 next_cursor）"""
+    return await service.get_history(
+        db, current_user.id, page, page_size, cursor=cursor, include_total=include_total
+    )
+
+
+@router.post("/rooms", response_model=SpeedQuizRoomResponse)
+async def create_room(
+    request: SpeedQuizStartRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_claims)
+):
+    """创建多人抢答房间（创建者为房主）"""
+    try:
+        return await service.create_room(db, current_user.id, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.websocket("/rooms/{room_id}/ws")
+async def room_websocket(
+    websocket: WebSocket,
+    room_id: str,
+    token: Optional[str] = Query(None, description="访问令牌（WebSocket 无法携带 Authorization 头）")
+):
+    """
+    多人抢答房间 WebSocket
+
+    客户端消息:
+    - {"type": "start"}：房主开始对战
+    - {"type": "answer", "question_id": 1, "answer": "A"}：抢答，答题时间由服务端计算
+    - {"type": "ping"}：心跳
+
+    服务端消息:
+    - joined / left：房间成员变化
+    - question：下发题目（不含正确答案）
+    - buzz_ack：抢答回执，含服务端计算的 answer_time 和作答顺序
+    - round_result：回合结果（正确答案、获胜者、各玩家作答和比分）
+    - finished：最终排名
+    - error：请求无效（含无法解析或不是 JSON 对象的消息，连接保持）
+
+    Token 无效或房间不存在时以 1008 关闭；接收过慢被断开时关闭码为 1013。
+    """
+    claims = await get_ws_claims(token)
+    room = service.rooms.get(room_id)
+    if claims is None or room is None:
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    try:
+        player = room.join(claims.id, claims.nickname, websocket)
+    except ValueError as e:
+        await websocket.send_json({"type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+                if not isinstance(message, dict):
+                    raise ValueError("消息格式无效")
+                kind = message.get("type")
+                if kind == "answer":
+                    room.submit(claims.id, message.get("question_id"), message.get("answer"))
+                elif kind == "start":
+                    room.start(claims.id)
+                elif kind == "ping":
+                    room.send_to(player, {"type": "pong"})
+            except json.JSONDecodeError:
+                room.send_to(player, {"type": "error", "detail": "消息格式无效"})
+            except ValueError as e:
+                room.send_to(player, {"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        room.leave(player)
@@ -1,31 +1,184 @@
 """
 数据库连接和会话管理
+
+DATABASE_URL 为 postgresql+asyncpg 时使用带连接池的服务器数据库引擎；
+为 SQLite 时有两种模式（settings.DATABASE_MODE）：
+- development: 单连接 StaticPool，适合本地开发和测试
+- production: 连接时设置 WAL、synchronous=NORMAL、busy_timeout、mmap_size；
+  读语句走读连接池，写语句走单连接写引擎（写入串行化，读不被写阻塞）
 """
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import StaticPool
-from typing import AsyncGenerator
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from typing import AsyncGenerator, Optional, Tuple
 
 from core.config import settings
 from models.db import Base, User, Question, Achievement
 from tasks.ai_digest.models import AiDigest
 
 
-# 创建异步引擎
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
-    poolclass=StaticPool if "sqlite" in settings.DATABASE_URL else None,
+def _apply_sqlite_pragmas(sync_engine, journal_wal: bool) -> None:
+    """在每个新连接上设置 SQLite pragma"""
+
+    @event.listens_for(sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if journal_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.close()
+
+
+def _build_server_engine(database_url: str, echo: bool):
+    """服务器数据库引擎（PostgreSQL 等），连接池参数来自配置"""
+    connect_args = {}
+    if database_url.startswith("postgresql+asyncpg"):
+        # asyncpg 自身的语句缓存与 SQLAlchemy 方言层的预编译语句缓存
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return create_async_engine(
+        database_url,
+        echo=echo,
+        connect_args=connect_args,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+
+def build_engines(database_url: str, mode: str = "development", echo: bool = False) -> Tuple:
+    """
+    按模式创建引擎
+
+    Returns:
+        (读引擎, 写引擎)；development 模式下写引擎为 None，读写共用一个引擎
+    """
+    if "sqlite" not in database_url:
+        return _build_server_engine(database_url, echo), None
+
+    connect_args = {"check_same_thread": False}
+    if mode != "production" or ":memory:" in database_url:
+        engine = create_async_engine(
+            database_url,
+            echo=echo,
+            connect_args=connect_args,
+            poolclass=StaticPool,
+        )
+        return engine, None
+
+    # 写引擎：单连接，持有期间其他写事务排队等待
+    writer = create_async_engine(
+        database_url,
+        echo=echo,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITER_TIMEOUT_SECONDS,
+    )
+    _apply_sqlite_pragmas(writer.sync_engine, journal_wal=True)
+
+    # 读引擎：连接池，WAL 下读不阻塞写、也不被写阻塞
+    reader = create_async_engine(
+        database_url,
+        echo=echo,
+        connect_args=connect_args,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.SQLITE_READER_POOL_SIZE,
+        max_overflow=0,
+    )
+    _apply_sqlite_pragmas(reader.sync_engine, journal_wal=False)
+    return reader, writer
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    INSERT/UPDATE/DELETE、flush 以及非 SELECT 的文本 SQL 走写引擎；
+    一旦本事务写过，后续语句都留在写引擎上，保证读到自己的未提交写入。
+    事务提交或回滚后标记清除，之后的 SELECT 重新走读引擎。
+    其余 SELECT 走读引擎。
+    """
+
+    reader = None
+    writer = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.writer is None:
+            return self.reader
+        if self.info.get("wrote") or self._flushing or self._is_write(clause):
+            self.info["wrote"] = True
+            return self.writer
+        return self.reader
+
+    @staticmethod
+    def _is_write(clause) -> bool:
+        if clause is None:
+            return False
+        if isinstance(clause, UpdateBase):
+            return True
+        text_sql: Optional[str] = getattr(clause, "text", None)
+        if isinstance(text_sql, str):
+            return not text_sql.lstrip().upper().startswith(("SELECT", "WITH", "PRAGMA"))
+        return False
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_write_flag(session: Session, transaction) -> None:
+    """最外层事务结束（提交或回滚）后不再固定使用写引擎"""
+    if transaction.parent is None:
+        session.info.pop("wrote", None)
+
+
+def build_session_factory(reader, writer=None) -> async_sessionmaker:
+    """创建会话工厂（提供写引擎时启用读写分离）"""
+    routing_session = type(
+        "BoundRoutingSession",
+        (RoutingSession,),
+        {
+            "reader": reader.sync_engine,
+            "writer": writer.sync_engine if writer is not None else None,
+        },
+    )
+    return async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=routing_session,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+# 创建异步引擎（engine 为读引擎，writer_engine 仅 production 模式存在）
+engine, writer_engine = build_engines(
+    settings.DATABASE_URL, settings.DATABASE_MODE, echo=settings.DEBUG
 )
 
 # 创建会话工厂
-AsyncSessionLocal = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+AsyncSessionLocal = build_session_factory(engine, writer_engine)
+
+
+def dialect_insert(db: AsyncSession, table):
+    """
+    按当前数据库方言返回 insert 构造
+
+    SQLite 与 PostgreSQL 的 insert 都支持 on_conflict_do_update / on_conflict_do_nothing，
+    用于实现单语句 UPSERT。
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -41,7 +194,7 @@ async def init_db():
     """初始化数据库"""
     from core.security import get_password_hash
 
-    async with engine.begin() as conn:
+    async with (writer_engine or engine).begin() as conn:
         # 创建所有表
         await conn.run_sync(Base.metadata.create_all)
 
@@ -209,6 +362,27 @@ async def init_db():
                 requirement_type="total_questions",
                 requirement_value=50
             ),
+            Achievement(
+                name="坚持不懈",
+                description="累计学习7天",
+                badge_icon="/badges/persistent.png",
+                requirement_type="daily_login",
+                requirement_value=7
+            ),
+            Achievement(
+                name="神射手",
+                description="答题20道以上且正确率达到90%",
+                badge_icon="/badges/sharpshooter.png",
+                requirement_type="accuracy",
+                requirement_value=90
+            ),
+            Achievement(
+                name="词汇达人",
+                description="词汇模块累计答对30题",
+                badge_icon="/badges/vocabulary.png",
+                requirement_type="module_mastery:vocabulary",
+                requirement_value=30
+            ),
         ]
 
         for achievement in achievements:
@@ -0,0 +1,72 @@
+"""
+游标（keyset）分页
+
+按 (排序列, id) 倒序分页：下一页条件为 (排序列, id) < 上一页最后一行，
+配合 (排序列, id) 复合索引，任意深度的翻页都只扫描 limit 行。
+OFFSET 分页需要先跳过前面所有行，越往后越慢。
+
+游标是不透明的 base64 字符串，客户端只需原样回传 next_cursor。
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from core.exceptions import ValidationException
+
+
+class InvalidCursorError(ValidationException):
+    """游标无法解析（400）"""
+
+    def __init__(self):
+        super().__init__("无效的分页游标")
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """把 (排序值, id) 编码为游标"""
+    if isinstance(sort_value, datetime):
+        sort_value = {"dt": sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """解析游标为 (排序值, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value["dt"])
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursorError() from exc
+
+
+def keyset_before(sort_column, id_column, cursor: Optional[str]):
+    """
+    倒序分页的"下一页"条件；cursor 为空时返回 None
+
+    额外的 sort_column <= 值 条件让数据库可以直接走索引范围扫描。
+    """
+    if not cursor:
+        return None
+    sort_value, row_id = decode_cursor(cursor)
+    return and_(
+        sort_column <= sort_value,
+        or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id)),
+    )
+
+
+def next_cursor(rows, limit: int, sort_attr: str, id_attr: str = "id") -> Optional[str]:
+    """
+    根据本页结果生成下一页游标
+
+    查询时应多取一行（limit + 1）：多出的一行存在才说明还有下一页，
+    调用方需自行截掉这一行。
+    """
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(getattr(last, sort_attr), getattr(last, id_attr))
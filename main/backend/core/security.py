@@ -8,10 +8,10 @@ from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from core.config import settings
-from core.database import get_db
+from core.database import AsyncSessionLocal, get_db
+from core.user_cache import UserCache
 from models.db import User
 
 
@@ -21,6 +21,29 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # HTTP Bearer认证
 security = HTTPBearer()
 
+# 已认证用户缓存
+user_cache = UserCache(
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+    max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
+
+class TokenClaims:
+    """
+    当前用户的身份声明
+
+    只读接口只需要用户ID/角色/昵称时使用，Token 携带声明时无需查询数据库。
+    """
+
+    def __init__(self, id: int, role: str, nickname: str):
+        self.id = id
+        self.role = role
+        self.nickname = nickname
+
+    @classmethod
+    def from_user(cls, user: User) -> "TokenClaims":
+        return cls(id=user.id, role=user.role, nickname=user.nickname)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
@@ -49,38 +72,82 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    """获取当前登录用户"""
-    credentials_exception = HTTPException(
+def create_user_token(user: User) -> str:
+    """
+    为用户签发访问令牌
+
+    开启 TOKEN_EMBED_CLAIMS 时附带 role/nickname 声明（签发后不可变，
+    角色变更要等 Token 过期才会反映到声明中，权限校验仍应使用 get_current_user）
+    """
+    data = {"sub": user.id}
+    if settings.TOKEN_EMBED_CLAIMS:
+        data.update({"role": user.role, "nickname": user.nickname})
+    return create_access_token(data=data)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭证",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _decode_token(credentials: HTTPAuthorizationCredentials) -> dict:
+    """解码 Token，返回 payload（sub 已转换为 int）"""
+    return decode_access_token(credentials.credentials)
+
+
+def decode_access_token(token: str) -> dict:
+    """解码 Token 字符串，返回 payload（sub 已转换为 int），无效时抛出 401"""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id_str: str = payload.get("sub")
         if user_id_str is None:
-            raise credentials_exception
+            raise _credentials_exception()
         # Convert string back to int
-        user_id = int(user_id_str)
-    except JWTError as exc:
-        raise credentials_exception from exc
+        payload["sub"] = int(user_id_str)
+    except (JWTError, ValueError) as exc:
+        raise _credentials_exception() from exc
+    return payload
 
-    # 从数据库获取用户
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """获取当前登录用户（优先读取进程内用户缓存）"""
+    payload = _decode_token(credentials)
+
+    user = await user_cache.get(db, payload["sub"])
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
 
+async def get_current_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> TokenClaims:
+    """
+    获取当前用户的身份声明（只读接口使用）
+
+    Token 携带 role/nickname 时直接返回，不访问数据库；
+    否则退回到 get_current_user 的缓存/查询路径。
+    """
+    payload = _decode_token(credentials)
+
+    if "role" in payload and "nickname" in payload:
+        user_cache.claims_hits += 1
+        return TokenClaims(id=payload["sub"], role=payload["role"], nickname=payload["nickname"])
+
+    user = await user_cache.get(db, payload["sub"])
+    if user is None:
+        raise _credentials_exception()
+    return TokenClaims.from_user(user)
+
+
 async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
     """获取当前管理员用户"""
     if current_user.role != "admin":
@@ -89,3 +156,25 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
             detail="权限不足"
         )
     return current_user
+
+
+async def get_ws_claims(token: Optional[str]) -> Optional[TokenClaims]:
+    """
+    WebSocket 连接的身份声明（浏览器 WebSocket 无法携带 Authorization 头，Token 通过查询参数传入）
+
+    Token 无效或用户不存在时返回 None；未携带声明时只在握手时短暂使用一个数据库会话。
+    """
+    if not token:
+        return None
+    try:
+        payload = decode_access_token(token)
+    except HTTPException:
+        return None
+
+    if "role" in payload and "nickname" in payload:
+        user_cache.claims_hits += 1
+        return TokenClaims(id=payload["sub"], role=payload["role"], nickname=payload["nickname"])
+
+    async with AsyncSessionLocal() as db:
+        user = await user_cache.get(db, payload["sub"])
+    return TokenClaims.from_user(user) if user is not None else None
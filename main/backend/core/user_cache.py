@@ -0,0 +1,94 @@
+"""
+已认证用户缓存
+
+get_current_user 每次请求都要按 ID 查询 users 表。这里在进程内按用户 ID
+缓存用户行的列值快照（短 TTL + LRU 上限），命中时把快照重新挂到当前会话，
+不再查询数据库。
+
+- 缓存的是列值快照而不是 ORM 对象，避免跨会话共享实例
+- 修改 total_score、role 等用户字段的代码在提交后必须调用 user_cache.invalidate()
+  或用 put() 写入新快照（目前只有 ProgressService 和 AnswerIngestor 会修改这些字段）
+- 多进程部署时其他进程的缓存最多滞后 TTL 秒
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from models.db import User
+
+
+class UserCache:
+    """进程内用户快照缓存（TTL + LRU）"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # user_id -> (过期时间, 列值快照)
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.claims_hits = 0
+        self.invalidations = 0
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """
+        获取用户并挂到当前会话
+
+        命中时不查询数据库；未命中或过期时查询并写入缓存。
+        用户不存在返回 None。
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return await self._attach(db, entry[1])
+
+        self.misses += 1
+        user = await db.get(User, user_id)
+        if user is None:
+            self._entries.pop(user_id, None)
+            return None
+
+        self.put(user)
+        return user
+
+    def put(self, user: User) -> None:
+        """写入（或刷新）用户快照"""
+        snapshot = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, snapshot)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        """使某个用户的缓存失效"""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "claims_hits": self.claims_hits,
+            "invalidations": self.invalidations,
+        }
+
+    @staticmethod
+    async def _attach(db: AsyncSession, snapshot: Dict[str, Any]) -> User:
+        """把快照构造成已持久化状态的 User 并合并进会话（load=False 不发查询）"""
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
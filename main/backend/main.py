@@ -7,7 +7,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from core.config import settings
-from core.database import init_db
+from core.database import init_db, AsyncSessionLocal
+from services.question_bank import question_bank
+from services.achievement_engine import achievement_engine
+from services.answer_ingest import answer_ingestor
+from services.intelligence_snapshot import intelligence_snapshot
+from services.battle_rooms import battle_rooms
+from services.battle_sessions import battle_sessions
+from services.leaderboard import leaderboard
+from services.alarm_service import alarm_rules
+from services.evolution_bus import evolution_tailer
 from utils.middleware import RequestLoggingMiddleware, configure_logging
 
 
@@ -16,7 +25,37 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     configure_logging("DEBUG" if settings.DEBUG else "INFO")
     await init_db()
+
+    # 加载内存题库索引、成就定义、排行榜和闹钟规则
+    async with AsyncSessionLocal() as db:
+        await question_bank.load(db)
+        await achievement_engine.load(db)
+        await leaderboard.load(db)
+        await alarm_rules.load(db)
+
+    # 答题批量写入管道
+    if settings.ANSWER_INGEST_MODE == "batched":
+        answer_ingestor.start()
+
+    # 智能水平定时快照
+    intelligence_snapshot.start()
+    # 抢答对战会话清扫
+    battle_sessions.start()
+    # 排行榜定时快照
+    leaderboard.start()
+    # 进化事件轮询（推送其他进程写入的事件）
+    await evolution_tailer.start()
     yield
+    await evolution_tailer.stop()
+    await battle_rooms.stop()
+    await battle_sessions.stop()
+    await leaderboard.stop()
+    await intelligence_snapshot.stop()
+    await answer_ingestor.stop()
+
+    # 诊断进程池
+    from api.routes.monitor_router import diagnosis_service
+    diagnosis_service.close()
 
 
 # 创建FastAPI应用
@@ -54,6 +93,7 @@ from api.routes.admin_router import router as admin_router
 from api.routes.speed_quiz_router import router as speed_quiz_router
 from api.routes.monitor_router import router as monitor_router
 from api.routes.alarm_router import router as alarm_router
+from api.routes.leaderboard_router import router as leaderboard_router
 from tasks.ai_digest.router import router as ai_digest_router
 
 app.include_router(auth_router, prefix="/api/v1", tags=["认证"])
@@ -65,6 +105,7 @@ app.include_router(speed_quiz_router, prefix="/api/v1", tags=["抢答"])
 app.include_router(monitor_router, prefix="/api/v1", tags=["监控"])
 app.include_router(ai_digest_router, tags=["AI 日报"])
 app.include_router(alarm_router, prefix="/api/v1", tags=["闹钟"])
+app.include_router(leaderboard_router, prefix="/api/v1", tags=["排行榜"])
 
 
 @app.get("/")
@@ -0,0 +1,48 @@
+"""
+数据库迁移脚本 - 添加进化事件过滤索引
+
+功能：
+为进化事件流按 agent / strategy 过滤后的倒序分页创建复合索引：
+1. monitor_evolution_events (agent, timestamp, id)
+2. monitor_evolution_events (strategy, timestamp, id)
+
+执行方式：
+python main/backend/migrations/add_evolution_filter_indexes.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+INDEXES = [
+    ("ix_monitor_evolution_events_agent_timestamp", "monitor_evolution_events", "agent, timestamp, id"),
+    ("ix_monitor_evolution_events_strategy_timestamp", "monitor_evolution_events", "strategy, timestamp, id"),
+]
+
+
+def create_indexes():
+    """创建进化事件过滤索引（已存在则跳过）"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        for name, table, columns in INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+            print(f"✅ 创建索引: {name}")
+        conn.commit()
+
+    print("\n🎉 进化事件过滤索引迁移完成")
+
+
+if __name__ == "__main__":
+    try:
+        create_indexes()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
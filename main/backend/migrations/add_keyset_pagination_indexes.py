@@ -0,0 +1,50 @@
+"""
+数据库迁移脚本 - 添加游标分页复合索引
+
+功能：
+为按 (排序列, id) 倒序的游标分页创建复合索引：
+1. wrong_questions (user_id, last_wrong_at, id)
+2. speed_quiz_battles (user_id, created_at, id)
+3. monitor_evolution_events (timestamp, id)
+
+执行方式：
+python main/backend/migrations/add_keyset_pagination_indexes.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+INDEXES = [
+    ("ix_wrong_questions_user_last_wrong", "wrong_questions", "user_id, last_wrong_at, id"),
+    ("ix_speed_quiz_battles_user_created", "speed_quiz_battles", "user_id, created_at, id"),
+    ("ix_monitor_evolution_events_timestamp_id", "monitor_evolution_events", "timestamp, id"),
+]
+
+
+def create_indexes():
+    """创建游标分页索引（已存在则跳过）"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        for name, table, columns in INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+            print(f"✅ 创建索引: {name}")
+        conn.commit()
+
+    print("\n🎉 游标分页索引迁移完成")
+
+
+if __name__ == "__main__":
+    try:
+        create_indexes()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
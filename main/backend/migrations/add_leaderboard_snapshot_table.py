@@ -0,0 +1,56 @@
+"""
+数据库迁移脚本 - 添加排行榜快照表
+
+功能：
+1. 创建 leaderboard_snapshots 表（内存排行榜中模块榜、周榜的定期快照）
+2. 创建 (scope, period, user_id) 唯一索引，各进程按此累加增量
+
+总榜和抢答胜场榜启动时由 users / speed_quiz_stats 重建，不需要快照；
+模块榜和周榜的得分历史没有逐题落库，上线后从空榜开始累计。
+
+执行方式：
+python main/backend/migrations/add_leaderboard_snapshot_table.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def create_snapshot_table():
+    """创建排行榜快照表"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope VARCHAR(40) NOT NULL,            -- weekly / module:<模块>
+                period VARCHAR(10) NOT NULL DEFAULT '', -- 周榜的 ISO 周，其他榜单为空
+                user_id INTEGER NOT NULL,              -- 用户ID
+                score INTEGER NOT NULL,                -- 分数
+                taken_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """))
+        print("✅ 创建表: leaderboard_snapshots")
+        conn.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_leaderboard_snapshot
+            ON leaderboard_snapshots (scope, period, user_id)
+        """))
+        print("✅ 创建索引: uq_leaderboard_snapshot")
+        conn.commit()
+
+
+if __name__ == "__main__":
+    try:
+        create_snapshot_table()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
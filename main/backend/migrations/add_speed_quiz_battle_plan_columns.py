@@ -0,0 +1,63 @@
+"""
+数据库迁移脚本 - 抢答对战记录题目计划和结束时间
+
+功能：
+1. 为 speed_quiz_battles 表添加 question_ids（开始时抽好的题目ID，逗号分隔）列，
+   会话不在本进程内存时据此重建，多 worker 部署无需粘性路由
+2. 添加 finished_at（战绩汇总计入时间）列，保证每场对战只计入一次战绩
+3. 已有对战全部视为已结束：finished_at 回填为 created_at
+
+执行方式：
+python main/backend/migrations/add_speed_quiz_battle_plan_columns.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def add_plan_columns(conn):
+    """添加题目计划和结束时间列（已存在则跳过）"""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(speed_quiz_battles)"))}
+
+    for column, column_type in (("question_ids", "TEXT"), ("finished_at", "DATETIME")):
+        if column in columns:
+            print(f"⏭️  列已存在: speed_quiz_battles.{column}")
+            continue
+        conn.execute(text(f"ALTER TABLE speed_quiz_battles ADD COLUMN {column} {column_type}"))
+        print(f"✅ 添加列: speed_quiz_battles.{column}")
+
+
+def backfill_finished_at(conn) -> int:
+    """已有对战没有题目计划，无法重建会话，全部标记为已结束"""
+    result = conn.execute(text(
+        "UPDATE speed_quiz_battles SET finished_at = created_at "
+        "WHERE finished_at IS NULL AND question_ids IS NULL"
+    ))
+    return result.rowcount
+
+
+def migrate():
+    """执行迁移"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        add_plan_columns(conn)
+        count = backfill_finished_at(conn)
+        conn.commit()
+
+    print(f"\n🎉 抢答对战题目计划迁移完成，已标记 {count} 场历史对战为已结束")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
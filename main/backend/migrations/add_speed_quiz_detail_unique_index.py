@@ -0,0 +1,75 @@
+"""
+数据库迁移脚本 - 抢答明细按 (battle_id, question_id) 唯一
+
+功能：
+1. 删除同一场对战同一道题的重复明细（保留最早写入的一条）
+2. 创建唯一索引 uq_speed_quiz_details_battle_question：
+   多个进程持有同一场对战时，重复作答的回合在写入时被丢弃
+3. 按明细重算受影响对战的统计（user_correct / ai_correct / user_wins / ai_wins）
+
+执行方式：
+python main/backend/migrations/add_speed_quiz_detail_unique_index.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def remove_duplicates(conn) -> list:
+    """删除重复明细，返回受影响的对战ID"""
+    battle_ids = [row[0] for row in conn.execute(text(
+        "SELECT DISTINCT battle_id FROM speed_quiz_details "
+        "GROUP BY battle_id, question_id HAVING COUNT(*) > 1"
+    ))]
+    conn.execute(text(
+        "DELETE FROM speed_quiz_details WHERE id NOT IN ("
+        "SELECT MIN(id) FROM speed_quiz_details GROUP BY battle_id, question_id)"
+    ))
+    return battle_ids
+
+
+def recount_battles(conn, battle_ids: list) -> None:
+    """按剩余明细重算对战统计"""
+    for battle_id in battle_ids:
+        conn.execute(text(
+            "UPDATE speed_quiz_battles SET "
+            "user_correct = (SELECT COUNT(*) FROM speed_quiz_details d "
+            "WHERE d.battle_id = :id AND d.user_answer = d.correct_answer), "
+            "ai_correct = (SELECT COUNT(*) FROM speed_quiz_details d "
+            "WHERE d.battle_id = :id AND d.ai_answer = d.correct_answer), "
+            "user_wins = (SELECT COUNT(*) FROM speed_quiz_details d WHERE d.battle_id = :id AND d.winner = 'user'), "
+            "ai_wins = (SELECT COUNT(*) FROM speed_quiz_details d WHERE d.battle_id = :id AND d.winner = 'ai') "
+            "WHERE id = :id"
+        ), {"id": battle_id})
+
+
+def migrate():
+    """执行迁移"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        battle_ids = remove_duplicates(conn)
+        recount_battles(conn, battle_ids)
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_speed_quiz_details_battle_question "
+            "ON speed_quiz_details (battle_id, question_id)"
+        ))
+        print("✅ 创建唯一索引: uq_speed_quiz_details_battle_question")
+        conn.commit()
+
+    print(f"\n🎉 抢答明细唯一索引迁移完成，{len(battle_ids)} 场对战删除了重复明细并重算统计")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
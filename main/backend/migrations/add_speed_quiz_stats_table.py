@@ -0,0 +1,64 @@
+"""
+数据库迁移脚本 - 添加抢答战绩汇总表
+
+功能：
+1. 创建 speed_quiz_stats 表（每用户一行的抢答战绩汇总）
+2. 按 speed_quiz_battles 历史回填汇总数据（连胜需按对战顺序计算，由
+   services.speed_quiz_stats.backfill_speed_quiz_stats 流式读取对战表完成）
+
+重复执行时按对战表重新计算并覆盖；回填期间结束的对战可能未计入，可在低峰期再执行一次。
+
+执行方式：
+python main/backend/migrations/add_speed_quiz_stats_table.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+from core.database import AsyncSessionLocal
+from services.speed_quiz_stats import backfill_speed_quiz_stats
+
+
+def create_stats_table():
+    """创建抢答战绩汇总表"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS speed_quiz_stats (
+                user_id INTEGER PRIMARY KEY,               -- 用户ID
+                total_battles INTEGER NOT NULL DEFAULT 0,  -- 已结束的对战数
+                wins INTEGER NOT NULL DEFAULT 0,           -- 胜场
+                losses INTEGER NOT NULL DEFAULT 0,         -- 负场
+                fastest_time INTEGER,                      -- 答对题目的最快用时（毫秒）
+                current_streak INTEGER NOT NULL DEFAULT 0, -- 当前连胜
+                max_streak INTEGER NOT NULL DEFAULT 0,     -- 最长连胜
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """))
+        print("✅ 创建表: speed_quiz_stats")
+        conn.commit()
+
+
+async def backfill():
+    """从对战历史回填"""
+    async with AsyncSessionLocal() as db:
+        users = await backfill_speed_quiz_stats(db)
+    print(f"✅ 回填用户数: {users}")
+
+
+if __name__ == "__main__":
+    try:
+        create_stats_table()
+        asyncio.run(backfill())
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
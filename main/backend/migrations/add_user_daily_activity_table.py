@@ -0,0 +1,83 @@
+"""
+数据库迁移脚本 - 添加每日学习汇总表
+
+功能：
+1. 创建 user_daily_activity 表（每用户每天一行的答题汇总）
+2. 从 user_progress 历史重建汇总数据
+
+重复执行即为重建：先清空再按 user_progress 重新汇总，
+可用于修复汇总表与答题记录不一致的情况。
+
+执行方式：
+python main/backend/migrations/add_user_daily_activity_table.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def create_daily_activity_table(conn):
+    """创建每日学习汇总表（已存在则跳过）"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS user_daily_activity (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,                       -- 用户ID
+            activity_date DATE NOT NULL,                    -- 学习日期（UTC）
+            questions_completed INTEGER NOT NULL DEFAULT 0, -- 当天答题数
+            correct_count INTEGER NOT NULL DEFAULT 0,       -- 当天答对数
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            CONSTRAINT uq_user_daily_activity UNIQUE (user_id, activity_date)
+        )
+    """))
+    print("✅ 创建表: user_daily_activity")
+
+
+def rebuild_daily_activity(conn) -> int:
+    """
+    从 user_progress 重建每日汇总
+
+    Returns:
+        int: 写入的 (用户, 日期) 行数
+    """
+    conn.execute(text("DELETE FROM user_daily_activity"))
+    result = conn.execute(text("""
+        INSERT INTO user_daily_activity
+            (user_id, activity_date, questions_completed, correct_count, updated_at)
+        SELECT
+            user_id,
+            date(answered_at),
+            COUNT(*),
+            SUM(CASE WHEN is_correct THEN 1 ELSE 0 END),
+            CURRENT_TIMESTAMP
+        FROM user_progress
+        GROUP BY user_id, date(answered_at)
+    """))
+    return result.rowcount
+
+
+def migrate():
+    """执行迁移"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        create_daily_activity_table(conn)
+        count = rebuild_daily_activity(conn)
+        conn.commit()
+
+    print(f"\n🎉 每日学习汇总迁移完成，已写入 {count} 行")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
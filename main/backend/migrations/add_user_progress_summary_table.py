@@ -0,0 +1,65 @@
+"""
+数据库迁移脚本 - 添加学习进度汇总表
+
+功能：
+1. 创建 user_progress_summary 表（每用户一行的答题汇总）
+2. 从 user_progress 历史一次性回填汇总数据
+
+执行方式：
+python main/backend/migrations/add_user_progress_summary_table.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def create_summary_table():
+    """创建进度汇总表并回填"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS user_progress_summary (
+                user_id INTEGER PRIMARY KEY,                -- 用户ID
+                total_questions INTEGER NOT NULL DEFAULT 0, -- 累计答题数
+                correct_answers INTEGER NOT NULL DEFAULT 0, -- 累计答对数
+                last_answer_date DATE,                      -- 最近答题日期（UTC）
+                completed_today INTEGER NOT NULL DEFAULT 0, -- 最近答题日期当天的答题数
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users(id)
+            )
+        """))
+        print("✅ 创建表: user_progress_summary")
+
+        # 回填（重复执行时覆盖为最新汇总）
+        result = conn.execute(text("""
+            INSERT OR REPLACE INTO user_progress_summary
+                (user_id, total_questions, correct_answers, last_answer_date, completed_today, updated_at)
+            SELECT
+                user_id,
+                COUNT(*),
+                SUM(CASE WHEN is_correct THEN 1 ELSE 0 END),
+                MAX(date(answered_at)),
+                SUM(CASE WHEN date(answered_at) = date('now') THEN 1 ELSE 0 END),
+                CURRENT_TIMESTAMP
+            FROM user_progress
+            GROUP BY user_id
+        """))
+        print(f"✅ 回填用户数: {result.rowcount}")
+
+        conn.commit()
+
+
+if __name__ == "__main__":
+    try:
+        create_summary_table()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
@@ -0,0 +1,93 @@
+"""
+数据库迁移脚本 - 添加用户连击计数器
+
+功能：
+1. 为 users 表添加 current_streak（当前连击）和 best_streak（最佳连击）列
+2. 一次性回填：按答题时间顺序扫描 user_progress 历史，计算每个用户的连击
+
+执行方式：
+python main/backend/migrations/add_user_streak_columns.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+def add_streak_columns(conn):
+    """添加连击计数列（已存在则跳过）"""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(users)"))}
+
+    for column in ("current_streak", "best_streak"):
+        if column in columns:
+            print(f"⏭️  列已存在: users.{column}")
+            continue
+        conn.execute(text(f"ALTER TABLE users ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+        print(f"✅ 添加列: users.{column}")
+
+
+def backfill_streaks(conn) -> int:
+    """
+    回填历史连击
+
+    单次按 (user_id, answered_at, id) 顺序流式扫描 user_progress，
+    不受原实现"最近 100 条"的上限限制。
+
+    Returns:
+        int: 回填的用户数量
+    """
+    rows = conn.execution_options(stream_results=True).execute(text("""
+        SELECT user_id, is_correct
+        FROM user_progress
+        ORDER BY user_id, answered_at, id
+    """))
+
+    streaks = {}
+    current_user_id = None
+    current = best = 0
+    for user_id, is_correct in rows:
+        if user_id != current_user_id:
+            if current_user_id is not None:
+                streaks[current_user_id] = (current, best)
+            current_user_id = user_id
+            current = best = 0
+
+        current = current + 1 if is_correct else 0
+        best = max(best, current)
+
+    if current_user_id is not None:
+        streaks[current_user_id] = (current, best)
+
+    for user_id, (current, best) in streaks.items():
+        conn.execute(
+            text("UPDATE users SET current_streak = :current, best_streak = :best WHERE id = :id"),
+            {"current": current, "best": best, "id": user_id},
+        )
+
+    return len(streaks)
+
+
+def migrate():
+    """执行迁移"""
+    engine = create_engine(settings.DATABASE_URL.replace("+aiosqlite", ""))
+
+    with engine.connect() as conn:
+        add_streak_columns(conn)
+        count = backfill_streaks(conn)
+        conn.commit()
+
+    print(f"\n🎉 连击计数器迁移完成，已回填 {count} 个用户")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
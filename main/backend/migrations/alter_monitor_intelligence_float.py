@@ -0,0 +1,59 @@
+"""
+数据库迁移脚本 - monitor_intelligence 分数列改为浮点
+
+功能：
+intelligence_score / strategy_weight / knowledge_richness / quality_trend / evolution_frequency
+原为 Integer，但写入的是 0-1（总分 0-10）的小数。
+- SQLite：列类型只是亲和性，已存的小数不受影响，无需修改
+- PostgreSQL：ALTER COLUMN ... TYPE DOUBLE PRECISION
+
+执行方式：
+python main/backend/migrations/alter_monitor_intelligence_float.py
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到 Python 路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root / "main" / "backend"))
+
+from sqlalchemy import create_engine, text
+from core.config import settings
+
+
+COLUMNS = [
+    "intelligence_score",
+    "strategy_weight",
+    "knowledge_richness",
+    "quality_trend",
+    "evolution_frequency",
+]
+
+
+def migrate():
+    """修改分数列类型"""
+    url = settings.DATABASE_URL.replace("+aiosqlite", "").replace("+asyncpg", "")
+    engine = create_engine(url)
+
+    if engine.dialect.name == "sqlite":
+        print("ℹ️  SQLite 无需修改列类型")
+        return
+
+    with engine.connect() as conn:
+        for column in COLUMNS:
+            conn.execute(text(
+                f"ALTER TABLE monitor_intelligence ALTER COLUMN {column} TYPE DOUBLE PRECISION"
+            ))
+            print(f"✅ 修改列类型: monitor_intelligence.{column}")
+        conn.commit()
+
+    print("\n🎉 monitor_intelligence 迁移完成")
+
+
+if __name__ == "__main__":
+    try:
+        migrate()
+    except Exception as e:
+        print(f"\n❌ 迁移失败: {e}")
+        sys.exit(1)
@@ -2,7 +2,7 @@
 SQLAlchemy数据库模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, Boolean, Text, Date, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -17,6 +17,8 @@ class User(Base):
     role = Column(String(20), default="student")  # student/admin
     password_hash = Column(String(255), nullable=True)  # 管理员密码
     total_score = Column(Integer, default=0)
+    current_streak = Column(Integer, nullable=False, default=0)  # 当前连续答对数（答题时原子更新）
+    best_streak = Column(Integer, nullable=False, default=0)  # 历史最佳连击
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -64,6 +66,39 @@ class UserProgress(Base):
     question = relationship("Question", back_populates="progress")
 
 
+class UserProgressSummary(Base):
+    """用户学习进度汇总表
+
+    答题时增量维护，GET /progress 按主键读取一行即可，不再扫描 user_progress。
+    """
+    __tablename__ = "user_progress_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_questions = Column(Integer, nullable=False, default=0)  # 累计答题数
+    correct_answers = Column(Integer, nullable=False, default=0)  # 累计答对数
+    last_answer_date = Column(Date, nullable=True)  # 最近答题日期（UTC）
+    completed_today = Column(Integer, nullable=False, default=0)  # last_answer_date 当天的答题数
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UserDailyActivity(Base):
+    """用户每日学习汇总表
+
+    答题时增量维护，学习日历和连续学习天数通过 (user_id, activity_date) 唯一索引范围扫描获取。
+    """
+    __tablename__ = "user_daily_activity"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    activity_date = Column(Date, nullable=False)  # 学习日期（UTC）
+    questions_completed = Column(Integer, nullable=False, default=0)  # 当日答题数
+    correct_count = Column(Integer, nullable=False, default=0)  # 当日答对数
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # 唯一约束（同时作为按用户+日期范围扫描的索引）
+    __table_args__ = (UniqueConstraint('user_id', 'activity_date', name='uq_user_daily_activity'),)
+
+
 class Achievement(Base):
     """成就表"""
     __tablename__ = "achievements"
@@ -72,7 +107,7 @@ class Achievement(Base):
     name = Column(String(50), nullable=False)
     description = Column(Text, nullable=True)
     badge_icon = Column(String(255), nullable=True)
-    requirement_type = Column(String(50), nullable=False)  # total_questions/streak/daily_login
+    requirement_type = Column(String(50), nullable=False)  # total_questions/streak/daily_login/accuracy/module_mastery:<module>
     requirement_value = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -107,8 +142,11 @@ class WrongQuestion(Base):
     wrong_count = Column(Integer, default=1)
     last_wrong_at = Column(DateTime, default=datetime.utcnow)
 
-    # 唯一约束
-    __table_args__ = (UniqueConstraint('user_id', 'question_id', name='uq_user_wrong_question'),)
+    # 唯一约束；(user_id, last_wrong_at, id) 用于错题本游标分页
+    __table_args__ = (
+        UniqueConstraint('user_id', 'question_id', name='uq_user_wrong_question'),
+        Index('ix_wrong_questions_user_last_wrong', 'user_id', 'last_wrong_at', 'id'),
+    )
 
     # 关系
     user = relationship("User", back_populates="wrong_questions")
@@ -128,8 +166,15 @@ class SpeedQuizBattle(Base):
     ai_correct = Column(Integer, default=0)
     user_wins = Column(Integer, default=0)
     ai_wins = Column(Integer, default=0)
+    question_ids = Column(Text, nullable=True)  # 开始时抽好的题目ID（逗号分隔），其他进程据此重建会话
+    finished_at = Column(DateTime, nullable=True)  # 战绩汇总计入时间，非空表示对战已结束
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+    # (user_id, created_at, id) 用于历史记录游标分页
+    __table_args__ = (
+        Index('ix_speed_quiz_battles_user_created', 'user_id', 'created_at', 'id'),
+    )
+
     # 关系
     details = relationship("SpeedQuizDetail", back_populates="battle")
 
@@ -149,10 +194,49 @@ class SpeedQuizDetail(Base):
     winner = Column(String(10), nullable=False)  # user/ai/tie
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # 每场对战每道题只有一条明细：多个进程持有同一场对战时，重复作答的回合写入时被丢弃
+    __table_args__ = (
+        UniqueConstraint('battle_id', 'question_id', name='uq_speed_quiz_details_battle_question'),
+    )
+
     # 关系
     battle = relationship("SpeedQuizBattle", back_populates="details")
 
 
+class SpeedQuizStats(Base):
+    """抢答战绩汇总表
+
+    对战结束写入明细时在同一事务中增量维护，GET /speed-quiz/stats 按主键读取一行即可。
+    """
+    __tablename__ = "speed_quiz_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_battles = Column(Integer, nullable=False, default=0)  # 已结束的对战数
+    wins = Column(Integer, nullable=False, default=0)  # 胜场（user_wins > ai_wins）
+    losses = Column(Integer, nullable=False, default=0)  # 负场（user_wins < ai_wins）
+    fastest_time = Column(Integer, nullable=True)  # 答对题目的最快用时（毫秒）
+    current_streak = Column(Integer, nullable=False, default=0)  # 当前连胜
+    max_streak = Column(Integer, nullable=False, default=0)  # 最长连胜
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LeaderboardSnapshot(Base):
+    """排行榜快照表
+
+    内存排行榜中无法从其他表重算的榜单（模块榜、周榜）：各进程定期按 (scope, period, user_id)
+    累加本进程的新增得分，所有进程定期从这里重新加载，重启后据此恢复。
+    """
+    __tablename__ = "leaderboard_snapshots"
+    __table_args__ = (UniqueConstraint('scope', 'period', 'user_id', name='uq_leaderboard_snapshot'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(40), nullable=False)  # weekly / module:<模块>
+    period = Column(String(10), nullable=False, default="")  # 周榜的 ISO 周（如 2024-W05），其他榜单为空
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    score = Column(Integer, nullable=False)
+    taken_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
 class AlarmRule(Base):
     """闹钟规则表"""
     __tablename__ = "alarm_rules"
@@ -197,11 +281,11 @@ class MonitorIntelligence(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     timestamp = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)  # 记录时间（带索引）
-    intelligence_score = Column(Integer, nullable=False)  # 智能水平总分 (0-10)
-    strategy_weight = Column(Integer, nullable=False)  # 策略权重 (0-1)
-    knowledge_richness = Column(Integer, nullable=False)  # 知识丰富度 (0-1)
-    quality_trend = Column(Integer, nullable=False)  # 质量趋势 (0-1)
-    evolution_frequency = Column(Integer, nullable=False)  # 进化频率 (0-1)
+    intelligence_score = Column(Float, nullable=False)  # 智能水平总分 (0-10)
+    strategy_weight = Column(Float, nullable=False)  # 策略权重 (0-1)
+    knowledge_richness = Column(Float, nullable=False)  # 知识丰富度 (0-1)
+    quality_trend = Column(Float, nullable=False)  # 质量趋势 (0-1)
+    evolution_frequency = Column(Float, nullable=False)  # 进化频率 (0-1)
     milestone_event = Column(Text, nullable=True)  # 里程碑事件（可选）
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
@@ -271,3 +355,10 @@ class MonitorEvolutionEvent(Base):
     diff_after = Column(Text, nullable=True)  # 改进后的做法
     diff_impact = Column(Text, nullable=True)  # 改进带来的影响
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # (timestamp, id) 用于事件流游标分页；按 agent/strategy 过滤时走对应前缀索引
+    __table_args__ = (
+        Index('ix_monitor_evolution_events_timestamp_id', 'timestamp', 'id'),
+        Index('ix_monitor_evolution_events_agent_timestamp', 'agent', 'timestamp', 'id'),
+        Index('ix_monitor_evolution_events_strategy_timestamp', 'strategy', 'timestamp', 'id'),
+    )
@@ -34,6 +34,11 @@ class IntelligenceScore(BaseModel):
     knowledge_richness: float = Field(..., ge=0, le=1, description="知识丰富度 (0-1)")
     quality_trend: float = Field(..., ge=0, le=1, description="质量趋势 (0-1)")
     evolution_frequency: float = Field(..., ge=0, le=1, description="进化频率 (0-1)")
+    # 以下字段仅在走势按时间桶降采样时返回：各维度为桶内最后一条快照，总分另附桶内统计
+    score_min: Optional[float] = Field(None, description="桶内总分最小值")
+    score_max: Optional[float] = Field(None, description="桶内总分最大值")
+    score_avg: Optional[float] = Field(None, description="桶内总分平均值")
+    samples: Optional[int] = Field(None, description="桶内快照数量")
 
 
 class Milestone(BaseModel):
@@ -46,6 +51,7 @@ class Milestone(BaseModel):
 class IntelligenceTrendResponse(BaseModel):
     """智能水平走势响应"""
     trend: List[IntelligenceScore] = Field(..., description="智能水平历史数据")
+    bucket: Optional[str] = Field(None, description="降采样时间桶: hour/day/week")
     milestones: List[Milestone] = Field(default=[], description="学习路径里程碑")
 
 
@@ -71,8 +77,9 @@ class EvolutionEvent(BaseModel):
 
 class EvolutionStreamResponse(BaseModel):
     """进化事件流响应"""
-    total: int = Field(..., description="总事件数")
+    total: Optional[int] = Field(None, description="总事件数（仅首页且 include_total 时返回）")
     events: List[EvolutionEvent] = Field(..., description="事件列表")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多")
 
 
 # ==================== 诊断相关 ====================
@@ -151,6 +158,10 @@ class KnowledgeItem(BaseModel):
     source: str = Field(..., description="来源文件路径")
     updated_at: datetime = Field(..., description="更新时间")
     tags: List[str] = Field(default=[], description="标签列表")
+    score: Optional[float] = Field(None, description="检索相关度得分（仅搜索时返回）")
+    highlight: Optional[Dict[str, str]] = Field(
+        None, description="命中高亮片段 {title, description}，<mark> 标记命中部分（仅搜索时返回）"
+    )
 
 
 class KnowledgeCategory(BaseModel):
@@ -159,9 +159,10 @@ class WrongQuestionsListResponse(BaseModel):
     """错题列表响应"""
 
     items: List[WrongQuestionResponse]
-    total: int
+    total: Optional[int] = None  # 仅首页且 include_total 时返回
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多
 
 
 class StudyRecordResponse(BaseModel):
@@ -214,6 +215,15 @@ class SpeedQuizSubmitResponse(BaseModel):
     next_question: Optional[QuestionResponse]
 
 
+class SpeedQuizRoomResponse(BaseModel):
+    """多人抢答房间响应（客户端随后连接 /speed-quiz/rooms/{room_id}/ws）"""
+    room_id: str
+    host_id: int
+    rounds: int
+    round_seconds: float
+    max_players: int
+
+
 class SpeedQuizStatsResponse(BaseModel):
     """抢答战绩响应"""
     total_battles: int
@@ -240,14 +250,39 @@ class SpeedQuizBattleResponse(BaseModel):
 class SpeedQuizHistoryResponse(BaseModel):
     """抢答历史响应"""
     battles: List[SpeedQuizBattleResponse]
-    total: int
+    total: Optional[int] = None  # 仅首页且 include_total 时返回
     page: int
     page_size: int
+    next_cursor: Optional[str] = None  # 下一页游标，为空表示没有更多
 
 
 # ============ 通用响应模型 ============
 
 
+class LeaderboardEntry(BaseModel):
+    """排行榜条目"""
+    rank: int
+    user_id: int
+    nickname: str
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    """排行榜前 N 名响应"""
+    scope: str
+    total: int = Field(..., description="上榜人数")
+    entries: List[LeaderboardEntry]
+
+
+class LeaderboardMeResponse(BaseModel):
+    """我的排名响应"""
+    scope: str
+    total: int = Field(..., description="上榜人数")
+    rank: Optional[int] = Field(None, description="名次，未上榜为 None")
+    score: int
+    neighbours: List[LeaderboardEntry] = Field(..., description="我及前后各 k 名")
+
+
 class ApiResponse(BaseModel):
     """统一API响应格式"""
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+闹钟生效规则解析基准测试
+
+N 条个性化规则 + 1 条全局规则（临时 SQLite），对比每次解析生效规则的查询数与耗时：
+- legacy: 原实现（查用户 -> 按昵称查个性化规则 -> 查全局规则，三次顺序查询）
+- index:  内存规则索引（昵称字典 + 全局槽位）
+
+执行方式：
+python main/backend/scripts/benchmark_alarm_rules.py
+python main/backend/scripts/benchmark_alarm_rules.py --rules 100 10000 --iterations 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import and_, event, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.db import AlarmRule, Base, User
+from services.alarm_service import AlarmRuleIndex
+
+USERS = 1000
+
+
+def populate(db_path: str, rules: int) -> None:
+    """写入用户、个性化规则（部分用户有）和一条全局规则"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, ?, 'student', 0, 0, 0)",
+        ((user_id, f"user{user_id}") for user_id in range(1, max(USERS, rules) + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO alarm_rules (rule_type, student_nickname, study_duration, rest_duration, is_active, "
+        "created_at, updated_at) VALUES ('personal', ?, 30, 5, 1, datetime('now'), datetime('now'))",
+        ((f"user{i}",) for i in range(1, rules + 1, 2)),
+    )
+    conn.execute(
+        "INSERT INTO alarm_rules (rule_type, study_duration, rest_duration, is_active, created_at, updated_at) "
+        "VALUES ('global', 25, 5, 1, datetime('now'), datetime('now'))"
+    )
+    conn.commit()
+    conn.close()
+
+
+async def legacy_rule(db, user_id: int):
+    """原 get_effective_rule 实现的查询序列"""
+    user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+    rule = (await db.execute(
+        select(AlarmRule).where(and_(
+            AlarmRule.rule_type == "personal",
+            AlarmRule.student_nickname == user.nickname,
+            AlarmRule.is_active == True
+        ))
+    )).scalar_one_or_none()
+    if rule is None:
+        rule = (await db.execute(
+            select(AlarmRule).where(and_(AlarmRule.rule_type == "global", AlarmRule.is_active == True))
+        )).scalar_one_or_none()
+    db.expunge_all()
+    return rule
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def run_size(rules: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, rules)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        rng = random.Random(7)
+        targets = [rng.randint(1, max(USERS, rules)) for _ in range(iterations)]
+
+        index = AlarmRuleIndex(refresh_seconds=0)
+        async with session_factory() as db:
+            start = time.perf_counter()
+            await index.load(db)
+            load_elapsed = time.perf_counter() - start
+
+        query_count = 0
+
+        def count_query(*args):
+            nonlocal query_count
+            query_count += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+        async def indexed(db, user_id):
+            await index.ensure_loaded(db)
+            return index.effective(f"user{user_id}")
+
+        results = {}
+        async with session_factory() as db:
+            for name, resolve in (("legacy", legacy_rule), ("index", indexed)):
+                samples = []
+                query_count = 0
+                for user_id in targets:
+                    start = time.perf_counter()
+                    await resolve(db, user_id)
+                    samples.append(time.perf_counter() - start)
+                results[name] = (query_count / iterations, samples)
+        await engine.dispose()
+
+    print(f"\n规则数: {rules:,}（索引加载 {load_elapsed * 1000:.1f}ms）")
+    print(f"  {'路径':<9}{'查询/请求':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    for name, (queries, samples) in results.items():
+        print(
+            f"  {name:<9}{queries:>10.1f}{percentile(samples, 0.50):>12.4f}"
+            f"{percentile(samples, 0.99):>12.4f}{statistics.mean(samples) * 1000:>12.4f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="闹钟生效规则解析基准测试")
+    parser.add_argument("--rules", type=int, nargs="+", default=[100, 10_000])
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    for rules in args.rules:
+        await run_size(rules, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
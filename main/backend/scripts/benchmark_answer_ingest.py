@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+答题写入吞吐基准测试
+
+N 个学生并发提交答案，对比三种写入方式的答题/秒与延迟：
+- direct:   ProgressService.submit_answer，每题一个事务（每题一次提交/fsync）
+- commit:   批量管道，请求等待所在批次组提交后返回
+- buffered: 批量管道，入队即返回（durability 最弱）
+
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_answer_ingest.py
+python main/backend/scripts/benchmark_answer_ingest.py --students 200 --answers 20 --db-mode development
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.database import Base, build_engines, build_session_factory
+from models.db import User
+from models.schema import AnswerRequest
+from services.achievement_engine import achievement_engine
+from services.answer_ingest import AnswerIngestor
+from services.progress_service import ProgressService
+
+QUESTION_COUNT = 200
+
+
+def populate(db_path: str, students: int) -> None:
+    """写入学生和题目"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, ?, 'student', 0, 0, 0)",
+        ((i, f"student{i}") for i in range(1, students + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO questions (id, module, difficulty, question_text, option_a, option_b, "
+        "option_c, option_d, correct_answer) VALUES (?, 'vocabulary', 1, 'q', 'a', 'b', 'c', 'd', 'A')",
+        ((i,) for i in range(1, QUESTION_COUNT + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def student(session_factory, ingestor, user_id: int, answers: int, samples: list) -> None:
+    """单个学生连续答题"""
+    for _ in range(answers):
+        request = AnswerRequest(
+            question_id=random.randint(1, QUESTION_COUNT),
+            answer=random.choice("AB"),
+            answer_time=random.randint(3, 20),
+        )
+        start = time.perf_counter()
+        async with session_factory() as db:
+            user = await db.get(User, user_id)
+            if ingestor is None:
+                await ProgressService.submit_answer(request, user, db)
+            else:
+                await ingestor.submit_answer(request, user, db)
+        samples.append(time.perf_counter() - start)
+
+
+async def run_pipeline(pipeline: str, students: int, answers: int, db_mode: str, flush_ms: float) -> None:
+    """对单种写入方式执行基准测试"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        reader, writer = build_engines(f"sqlite+aiosqlite:///{db_path}", db_mode)
+        async with (writer or reader).begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, students)
+
+        session_factory = build_session_factory(reader, writer)
+        async with session_factory() as db:
+            await achievement_engine.load(db)
+
+        ingestor = None
+        if pipeline != "direct":
+            ingestor = AnswerIngestor(
+                flush_ms=flush_ms, durability=pipeline, session_factory=session_factory
+            )
+            ingestor.start()
+
+        samples = []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            student(session_factory, ingestor, user_id, answers, samples)
+            for user_id in range(1, students + 1)
+        ))
+        if ingestor is not None:
+            await ingestor.stop()
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(db_path)
+        stored = conn.execute("SELECT COUNT(*) FROM user_progress").fetchone()[0]
+        conn.close()
+
+        for engine in (reader, writer):
+            if engine is not None:
+                await engine.dispose()
+
+    batches = ingestor.batches if ingestor is not None else stored
+    print(
+        f"  {pipeline:<10}{len(samples) / elapsed:>10.1f}{percentile(samples, 0.50):>12.1f}"
+        f"{percentile(samples, 0.99):>12.1f}{statistics.mean(samples) * 1000:>12.1f}"
+        f"{batches:>8}{stored:>8}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="答题写入吞吐基准测试")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--answers", type=int, default=10, help="每个学生的答题数")
+    parser.add_argument("--db-mode", default="production", help="development / production")
+    parser.add_argument("--flush-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(
+        f"\n并发学生数: {args.students}，每人答题 {args.answers} 次，"
+        f"数据库模式 {args.db_mode}，flush {args.flush_ms}ms"
+    )
+    print(f"  {'写入方式':<8}{'答题/秒':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}{'提交数':>8}{'落库':>8}")
+    for pipeline in ("direct", "commit", "buffered"):
+        await run_pipeline(pipeline, args.students, args.answers, args.db_mode, args.flush_ms)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+数据库并发基准测试
+
+模拟 N 个学生同时答题：每个学生循环执行"提交答案 + 若干次读取进度汇总"，
+对比两种数据库模式的吞吐量、延迟和失败数：
+- development: 单连接 StaticPool（所有并发请求共用一个连接）
+- production:  WAL + 读连接池 + 单连接串行写引擎
+
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_db_concurrency.py
+python main/backend/scripts/benchmark_db_concurrency.py --students 50 200 --answers 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from core.database import Base, build_engines, build_session_factory
+from models.db import User
+from models.schema import AnswerRequest
+from services.achievement_engine import achievement_engine
+from services.progress_service import ProgressService
+
+QUESTION_COUNT = 200
+
+
+def populate(db_path: str, students: int) -> None:
+    """写入学生和题目"""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, ?, 'student', 0, 0, 0)",
+        ((i, f"student{i}") for i in range(1, students + 1)),
+    )
+    conn.executemany(
+        "INSERT INTO questions (id, module, difficulty, question_text, option_a, option_b, "
+        "option_c, option_d, correct_answer) VALUES (?, 'vocabulary', 1, 'q', 'a', 'b', 'c', 'd', 'A')",
+        ((i,) for i in range(1, QUESTION_COUNT + 1)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def student(
+    session_factory, user_id: int, answers: int, reads: int, samples: list, errors: list
+) -> None:
+    """单个学生：连续答题，每题后读取 reads 次进度"""
+    for _ in range(answers):
+        start = time.perf_counter()
+        try:
+            async with session_factory() as db:
+                user = await db.get(User, user_id)
+                request = AnswerRequest(
+                    question_id=random.randint(1, QUESTION_COUNT),
+                    answer=random.choice("AB"),
+                    answer_time=random.randint(3, 20),
+                )
+                await ProgressService.submit_answer(request, user, db)
+            for _ in range(reads):
+                async with session_factory() as db:
+                    user = await db.get(User, user_id)
+                    await ProgressService.get_progress_summary(user, db)
+        except Exception as exc:
+            errors.append(type(exc).__name__)
+            continue
+        samples.append(time.perf_counter() - start)
+
+
+async def run_mode(mode: str, students: int, answers: int, reads: int) -> None:
+    """对单个模式执行基准测试"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        reader, writer = build_engines(f"sqlite+aiosqlite:///{db_path}", mode)
+        async with (writer or reader).begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, students)
+
+        session_factory = build_session_factory(reader, writer)
+        async with session_factory() as db:
+            await achievement_engine.load(db)
+
+        samples, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            student(session_factory, user_id, answers, reads, samples, errors)
+            for user_id in range(1, students + 1)
+        ))
+        elapsed = time.perf_counter() - start
+
+        for engine in (reader, writer):
+            if engine is not None:
+                await engine.dispose()
+
+    throughput = len(samples) / elapsed if elapsed else 0
+    if samples:
+        print(
+            f"  {mode:<12}{throughput:>10.1f}{percentile(samples, 0.50):>12.1f}"
+            f"{percentile(samples, 0.99):>12.1f}{statistics.mean(samples) * 1000:>12.1f}{len(errors):>8}"
+        )
+    else:
+        print(f"  {mode:<12}{'-':>10}{'-':>12}{'-':>12}{'-':>12}{len(errors):>8}")
+    if errors:
+        kinds = sorted(set(errors))
+        print(f"  {'':<12}失败类型: {', '.join(kinds)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="数据库并发基准测试")
+    parser.add_argument("--students", type=int, nargs="+", default=[20, 100])
+    parser.add_argument("--answers", type=int, default=10, help="每个学生的答题数")
+    parser.add_argument("--reads", type=int, default=3, help="每次答题后的进度读取次数")
+    parser.add_argument("--modes", nargs="+", default=["development", "production"])
+    args = parser.parse_args()
+
+    for students in args.students:
+        print(f"\n并发学生数: {students}，每人答题 {args.answers} 次，每题读取进度 {args.reads} 次")
+        print(f"  {'模式':<10}{'答题/秒':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}{'失败':>8}")
+        for mode in args.modes:
+            await run_mode(mode, students, args.answers, args.reads)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
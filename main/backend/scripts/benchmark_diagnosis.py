@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+代码诊断基准测试
+
+在临时目录生成 N 个合成 Python 文件（main/backend 结构），对比：
+- regex:       原实现，四个检测方法各自 rglob 并读取全部文件，逐个正则匹配
+- ast x1:      AST 检测器框架，单进程冷启动全量分析
+- ast xN:      AST 检测器框架，进程池（--workers）冷启动全量分析
+- warm:        无文件变化时再次扫描（只 stat）
+- touch:       修改 --changed 个文件后增量扫描
+
+另统计 N+1 检测的行号准确率：合成文件中每个循环内查询的真实行号已知，
+原实现只能报告文件中第一个包含 "for" 的行。
+
+执行方式：
+python main/backend/scripts/benchmark_diagnosis.py
+python main/backend/scripts/benchmark_diagnosis.py --files 1000 --workers 8
+"""
+
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.monitor_diagnosis import DiagnosisService
+
+HEADER = '''"""合成模块 {index}"""
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from models.db import Answer, User
+
+'''
+
+N_PLUS_ONE = '''
+
+async def load_scores_{n}(db, user_ids) -> list:
+    """逐个用户查询（N+1）"""
+    scores = []
+    for user_id in user_ids:
+        result = await db.execute(select(Answer).where(Answer.user_id == user_id))
+        scores.append(result.scalars().all())
+    return scores
+'''
+
+BATCHED = '''
+
+async def load_users_{n}(db, user_ids) -> list:
+    """一次性查询"""
+    stmt = select(User).where(User.id.in_(user_ids)).order_by(User.id).limit(500)
+    result = await db.execute(stmt)
+    return result.scalars().all()
+'''
+
+UNBOUNDED = '''
+
+async def list_answers_{n}(db):
+    result = await db.execute(select(Answer).order_by(Answer.created_at.desc()))
+    latest = (await db.execute(select(Answer).order_by(Answer.id.desc()))).scalars().first()
+    total = await db.scalar(select(func.count(Answer.id)))
+    return result.scalars().all(), latest, total
+'''
+
+SYNC_IO = '''
+
+async def read_config_{n}(path: Path) -> str:
+    text = path.read_text()
+    return text.strip()
+'''
+
+PLAIN = '''
+
+def helper_{n}(values: list) -> int:
+    total = 0
+    for value in values:
+        total += value * 2
+    return total
+'''
+
+TEMPLATES = [N_PLUS_ONE, BATCHED, UNBOUNDED, SYNC_IO, PLAIN, PLAIN]
+
+
+def make_tree(root: Path, count: int, functions: int) -> dict:
+    """生成合成文件；返回 {文件: [N+1 查询真实行号]}"""
+    rng = random.Random(42)
+    package = root / "main" / "backend" / "synthetic"
+    expected = {}
+    for index in range(count):
+        subdir = package / f"pkg_{index // 100:02d}"
+        subdir.mkdir(parents=True, exist_ok=True)
+        content = HEADER.format(index=index)
+        lines = []
+        for n in range(functions):
+            template = rng.choice(TEMPLATES)
+            if template is N_PLUS_ONE:
+                offset = content.count("\n") + template.format(n=n).split("\n").index(
+                    "        result = await db.execute(select(Answer).where(Answer.user_id == user_id))"
+                ) + 1
+                lines.append(offset)
+            content += template.format(n=n)
+        path = subdir / f"module_{index:04d}.py"
+        path.write_text(content, encoding="utf-8")
+        expected[path] = lines
+    return expected
+
+
+def legacy_scan(root: Path) -> list:
+    """原实现：每个检测维度单独遍历并读取全部文件"""
+    backend = root / "main" / "backend"
+    issues = []
+
+    def find_line(content, keyword):
+        for i, line in enumerate(content.split("\n"), 1):
+            if keyword in line:
+                return i
+        return 1
+
+    for py_file in backend.rglob("*.py"):
+        content = py_file.read_text(encoding="utf-8")
+        if re.search(r"for\s+\w+\s+in\s+.+:\s*\n\s+.*session\.(query|get|execute)", content):
+            issues.append(("n+1", py_file, find_line(content, "for")))
+        if "read_text()" in content and "Path" in content and "encoding" not in content:
+            issues.append(("encoding", py_file, find_line(content, "read_text")))
+
+    patterns = [
+        r'SECRET_KEY\s*=\s*["\']([^"\']{10,})["\']',
+        r'API_KEY\s*=\s*["\']([^"\']{10,})["\']',
+        r'PASSWORD\s*=\s*["\']([^"\']+)["\']',
+    ]
+    for py_file in backend.rglob("*.py"):
+        content = py_file.read_text(encoding="utf-8")
+        for pattern in patterns:
+            for match in re.finditer(pattern, content, re.IGNORECASE):
+                issues.append(("secret", py_file, content[:match.start()].count("\n") + 1))
+
+    for py_file in backend.rglob("*.py"):
+        content = py_file.read_text(encoding="utf-8")
+        for match in re.finditer(r"def\s+(\w+)\([^)]*\):", content):
+            if match.group(1).startswith("__"):
+                continue
+            if "->" not in content[match.start():match.end() + 50]:
+                issues.append(("quality", py_file, content[:match.start()].count("\n") + 1))
+
+    list(root.rglob("test_*.py"))
+    return issues
+
+
+def accuracy(found: dict, expected: dict) -> str:
+    """N+1 行号命中率：found 为 {文件: {行号}}"""
+    total = sum(len(lines) for lines in expected.values())
+    hits = sum(len(set(lines) & found.get(path, set())) for path, lines in expected.items())
+    return f"{hits}/{total}"
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="代码诊断基准测试")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--functions", type=int, default=20, help="每个文件的函数数")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--changed", type=int, default=10, help="增量扫描时修改的文件数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        expected = make_tree(root, args.files, args.functions)
+        print(f"\n合成文件 {args.files} 个，每个 {args.functions} 个函数，进程池 {args.workers}")
+        print(f"  {'方式':<10}{'耗时 (ms)':>12}{'问题数':>10}{'N+1 行号命中':>16}")
+
+        legacy, elapsed = timed(lambda: legacy_scan(root))
+        found = {}
+        for kind, path, line in legacy:
+            if kind == "n+1":
+                found.setdefault(path, set()).add(line)
+        print(f"  {'regex':<10}{elapsed * 1000:>12.1f}{len(legacy):>10}{accuracy(found, expected):>16}")
+
+        for label, workers in (("ast x1", 1), (f"ast x{args.workers}", args.workers)):
+            service = DiagnosisService(project_root=root, workers=workers)
+            _, elapsed = timed(service.scan)
+            issues = service.issues
+            found = {}
+            for issue in issues:
+                if issue.title == "可能存在 N+1 查询问题":
+                    path, _, line = issue.location.rpartition(":")
+                    found.setdefault(Path(path), set()).add(int(line))
+            print(f"  {label:<10}{elapsed * 1000:>12.1f}{len(issues):>10}{accuracy(found, expected):>16}")
+
+        _, elapsed = timed(service.scan)
+        print(f"  {'warm':<10}{elapsed * 1000:>12.1f}{len(service.issues):>10}{'-':>16}")
+
+        for path in list(expected)[:args.changed]:
+            path.write_text(path.read_text(encoding="utf-8") + PLAIN.format(n=999), encoding="utf-8")
+        parsed = service.parsed_files
+        _, elapsed = timed(service.scan)
+        print(
+            f"  {'touch':<10}{elapsed * 1000:>12.1f}{len(service.issues):>10}{'-':>16}"
+            f"  （重新分析 {service.parsed_files - parsed} 个文件）"
+        )
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
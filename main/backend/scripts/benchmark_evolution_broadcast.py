@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+进化事件广播基准测试
+
+N 个模拟 WebSocket 客户端（其中一部分为慢客户端），连续广播若干事件，对比：
+- sequential: 原 ConnectionManager.broadcast，逐个 await send_json
+- bus:        进化事件总线，每客户端有界队列 + 独立发送任务，慢客户端被断开
+
+指标：
+- 发布耗时：发布方被阻塞的时间
+- 送达延迟：快客户端从发布到收到的时间（p50/p99）
+- 断开数：被判定为慢消费者而断开的客户端数
+
+执行方式：
+python main/backend/scripts/benchmark_evolution_broadcast.py
+python main/backend/scripts/benchmark_evolution_broadcast.py --clients 5000 --events 200 --slow-ratio 0.02
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from api.routes.monitor_router import ConnectionManager
+from services.evolution_bus import EvolutionEventBus
+
+
+class SimulatedWebSocket:
+    """模拟客户端：每次发送耗时 latency 秒，记录快客户端的送达延迟"""
+
+    def __init__(self, latency: float, samples: list):
+        self.latency = latency
+        self.samples = samples
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message: dict):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+        if self.samples is not None:
+            self.samples.append(time.perf_counter() - message["data"]["sent_at"])
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+def make_clients(count: int, slow_ratio: float, slow_latency: float, samples: list):
+    slow_every = int(1 / slow_ratio) if slow_ratio > 0 else 0
+    return [
+        SimulatedWebSocket(slow_latency, None) if slow_every and i % slow_every == 0
+        else SimulatedWebSocket(0, samples)
+        for i in range(count)
+    ]
+
+
+async def sequential_broadcast(clients, message: dict) -> None:
+    """原实现：逐个等待发送"""
+    for client in clients:
+        try:
+            await client.send_json(message)
+        except Exception:
+            pass
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+def event(i: int) -> dict:
+    return {"type": "evolution_event", "data": {"id": f"evt_{i}", "sent_at": time.perf_counter()}}
+
+
+async def run_sequential(args) -> None:
+    samples = []
+    clients = make_clients(args.clients, args.slow_ratio, args.slow_latency, samples)
+    publish = []
+    start = time.perf_counter()
+    for i in range(args.events):
+        began = time.perf_counter()
+        await sequential_broadcast(clients, event(i))
+        publish.append(time.perf_counter() - began)
+        await asyncio.sleep(args.interval_ms / 1000)
+    elapsed = time.perf_counter() - start
+    report("sequential", publish, samples, 0, elapsed)
+
+
+async def run_bus(args) -> None:
+    samples = []
+    clients = make_clients(args.clients, args.slow_ratio, args.slow_latency, samples)
+    bus = EvolutionEventBus(queue_size=args.queue_size, replay_size=args.events)
+    manager = ConnectionManager(bus)
+    senders = [await manager.connect(client) for client in clients]
+
+    publish = []
+    start = time.perf_counter()
+    for i in range(args.events):
+        message = event(i)
+        began = time.perf_counter()
+        await manager.broadcast(message, event_id=message["data"]["id"])
+        publish.append(time.perf_counter() - began)
+        await asyncio.sleep(args.interval_ms / 1000)
+
+    # 等快客户端把队列发完
+    fast_total = sum(1 for c in clients if c.samples is not None) * args.events
+    while len(samples) < fast_total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+
+    for sender in senders:
+        sender.cancel()
+    await asyncio.gather(*senders, return_exceptions=True)
+    report("bus", publish, samples, bus.dropped, elapsed)
+
+
+def report(label: str, publish, samples, dropped: int, elapsed: float) -> None:
+    print(
+        f"  {label:<12}{statistics.mean(publish) * 1000:>14.2f}{percentile(samples, 0.50):>12.1f}"
+        f"{percentile(samples, 0.99):>12.1f}{dropped:>8}{elapsed:>10.2f}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="进化事件广播基准测试")
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--interval-ms", type=float, default=10.0, help="事件发布间隔")
+    parser.add_argument("--slow-ratio", type=float, default=0.01, help="慢客户端比例")
+    parser.add_argument("--slow-latency", type=float, default=0.05, help="慢客户端每次发送耗时（秒）")
+    parser.add_argument("--queue-size", type=int, default=10, help="每客户端发送队列上限")
+    args = parser.parse_args()
+
+    print(
+        f"\n客户端 {args.clients}（慢客户端 {args.slow_ratio:.0%}，每次发送 {args.slow_latency * 1000:.0f}ms），"
+        f"广播 {args.events} 个事件，间隔 {args.interval_ms}ms"
+    )
+    print(f"  {'方式':<10}{'发布耗时 (ms)':>14}{'p50 (ms)':>12}{'p99 (ms)':>12}{'断开':>8}{'总耗时 (s)':>10}")
+    await run_sequential(args)
+    await run_bus(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
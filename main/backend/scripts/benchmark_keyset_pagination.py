@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+游标分页基准测试
+
+在百万行表上对比第 N 页的查询耗时：
+- offset: ORDER BY ... LIMIT page_size OFFSET (N-1)*page_size（原实现）
+- keyset: WHERE (排序列, id) < 游标 ORDER BY ... LIMIT page_size
+
+覆盖三张表：
+- wrong_questions (user_id, last_wrong_at, id)
+- speed_quiz_battles (user_id, created_at, id)
+- monitor_evolution_events (timestamp, id)
+
+按用户过滤的两张表中，目标用户持有 --user-rows 行，其余行分散给其他用户。
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_keyset_pagination.py
+python main/backend/scripts/benchmark_keyset_pagination.py --rows 200000 --page 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import select, desc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.pagination import encode_cursor, keyset_before
+from models.db import Base, WrongQuestion, SpeedQuizBattle, MonitorEvolutionEvent
+
+TARGET_USER = 1
+
+
+def populate(db_path: str, rows: int, user_rows: int) -> None:
+    """写入三张表的数据"""
+    conn = sqlite3.connect(db_path)
+    start = datetime(2024, 1, 1)
+    other_users = max(rows // 1000, 1)
+
+    def ts(seconds: int) -> str:
+        # 与 SQLAlchemy 在 SQLite 中存储 DateTime 的格式一致（含微秒），否则字符串比较会错位
+        return (start + timedelta(seconds=seconds)).isoformat(sep=" ", timespec="microseconds")
+
+    def owner(i: int) -> int:
+        return TARGET_USER if i < user_rows else random.randint(2, other_users + 1)
+
+    conn.executemany(
+        "INSERT INTO wrong_questions (user_id, question_id, wrong_count, last_wrong_at) VALUES (?, ?, 1, ?)",
+        ((owner(i), i + 1, ts(random.randint(0, 10**8))) for i in range(rows)),
+    )
+    conn.executemany(
+        "INSERT INTO speed_quiz_battles (user_id, difficulty, module, total_questions, user_wins, ai_wins, "
+        "created_at) VALUES (?, 1, 'vocabulary', 5, 3, 2, ?)",
+        ((owner(i), ts(i * 7)) for i in range(rows)),
+    )
+    conn.executemany(
+        "INSERT INTO monitor_evolution_events (event_id, timestamp, agent, strategy, description, reward, "
+        "diff_before, diff_after, diff_impact, created_at) VALUES (?, ?, 'agent', 'strategy', ?, 5, ?, ?, ?, ?)",
+        (
+            (
+                f"evt_{i}", ts(i * 3), "description " * 10,
+                "before " * 40, "after " * 40, "impact " * 20, ts(0),
+            )
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def timed(conn, query, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await conn.execute(query)
+        result.all()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="游标分页基准测试")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="每张表的行数")
+    parser.add_argument("--user-rows", type=int, default=50_000, help="目标用户持有的行数")
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    offset = (args.page - 1) * args.page_size
+    tables = [
+        ("wrong_questions", WrongQuestion, WrongQuestion.last_wrong_at,
+         WrongQuestion.user_id == TARGET_USER),
+        ("speed_quiz_battles", SpeedQuizBattle, SpeedQuizBattle.created_at,
+         SpeedQuizBattle.user_id == TARGET_USER),
+        ("monitor_evolution_events", MonitorEvolutionEvent, MonitorEvolutionEvent.timestamp, None),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        print(f"写入数据：每表 {args.rows:,} 行 ...")
+        populate(db_path, args.rows, args.user_rows)
+
+        print(f"\n第 {args.page} 页（每页 {args.page_size} 行，OFFSET {offset:,}）")
+        print(f"  {'表':<26}{'方式':<8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'mean (ms)':>11}")
+        async with engine.connect() as conn:
+            for name, model, sort_column, condition in tables:
+                base = select(model)
+                if condition is not None:
+                    base = base.where(condition)
+                ordered = base.order_by(desc(sort_column), desc(model.id))
+
+                # 上一页最后一行作为游标（不计时）
+                anchor = (await conn.execute(
+                    select(sort_column, model.id)
+                    .where(*([condition] if condition is not None else []))
+                    .order_by(desc(sort_column), desc(model.id))
+                    .offset(offset - 1).limit(1)
+                )).one()
+                cursor = encode_cursor(anchor[0], anchor[1])
+
+                offset_query = ordered.offset(offset).limit(args.page_size)
+                keyset_query = ordered.where(keyset_before(sort_column, model.id, cursor)).limit(args.page_size)
+
+                offset_rows = (await conn.execute(offset_query)).all()
+                keyset_rows = (await conn.execute(keyset_query)).all()
+                assert [r.id for r in offset_rows] == [r.id for r in keyset_rows], "两种分页结果不一致"
+
+                for label, query in (("offset", offset_query), ("keyset", keyset_query)):
+                    samples = await timed(conn, query, args.iterations)
+                    print(
+                        f"  {name:<26}{label:<8}{percentile(samples, 0.50):>10.2f}"
+                        f"{percentile(samples, 0.99):>10.2f}{statistics.mean(samples) * 1000:>11.2f}"
+                    )
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+知识图谱检索基准测试
+
+生成 N 条中英文混合的知识条目，对比单次查询耗时：
+- substring: 原实现，逐条对标题和描述做小写子串匹配
+- bm25:      倒排索引 + BM25 排序取前 50（不含高亮）
+- bm25+hl:   BM25 排序取前 50 并生成高亮片段
+
+另报告全量建索引耗时和单条增量更新耗时。
+
+执行方式：
+python main/backend/scripts/benchmark_knowledge_search.py
+python main/backend/scripts/benchmark_knowledge_search.py --items 10000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from services.knowledge_search import SearchIndex, highlight
+
+# 常用汉字与英文技术词，随机组合成词表
+CJK_CHARS = (
+    "数据库索引查询缓存并发事务连接池异步接口前端组件渲染测试部署日志监控告警重构规范审查"
+    "性能优化分页游标批量写入提交锁超时重试幂等校验权限认证令牌会话路由中间件配置环境变量"
+    "容器镜像构建发布回滚灰度流量限流熔断降级队列消息订阅推送广播心跳断线续传压缩序列化"
+)
+ENGLISH = [
+    "async", "await", "fastapi", "sqlalchemy", "redis", "docker", "websocket", "pydantic",
+    "vue", "pinia", "vite", "pytest", "keyset", "upsert", "bm25", "etag", "jwt", "cors",
+]
+
+
+def make_vocabulary(rng: random.Random, size: int):
+    words = set(ENGLISH)
+    while len(words) < size:
+        words.add("".join(rng.choices(CJK_CHARS, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_items(count: int, vocabulary):
+    rng = random.Random(42)
+    return [
+        (
+            f"kb_{i:06d}",
+            " ".join(rng.choices(vocabulary, k=3)),
+            "，".join(rng.choices(vocabulary, k=rng.randint(12, 30))),
+        )
+        for i in range(count)
+    ]
+
+
+def substring_search(items, keyword: str):
+    keyword = keyword.lower()
+    return [item for item in items if keyword in item[1].lower() or keyword in item[2].lower()]
+
+
+def bm25_search(index: SearchIndex, by_id, query: str, with_highlight: bool):
+    ranked = index.search(query, limit=50)
+    if not with_highlight:
+        return ranked
+    terms = SearchIndex.query_terms(query)
+    return [
+        (highlight(by_id[doc_id][1], terms), highlight(by_id[doc_id][2], terms), score)
+        for doc_id, score in ranked
+    ]
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+def measure(fn, queries, iterations: int):
+    samples = []
+    for i in range(iterations):
+        query = queries[i % len(queries)]
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="知识图谱检索基准测试")
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=400)
+    parser.add_argument("--vocabulary", type=int, default=3000, help="词表大小")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    items = make_items(args.items, vocabulary)
+    queries = [" ".join(rng.sample(vocabulary, k=rng.randint(1, 2))) for _ in range(50)]
+    by_id = {item[0]: item for item in items}
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    for doc_id, title, description in items:
+        index.add(doc_id, title, description)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for doc_id, title, description in items[:100]:
+        index.add(doc_id, title + " 更新", description)
+    update_us = (time.perf_counter() - start) / 100 * 1_000_000
+
+    print(f"\n条目数: {args.items}，词表 {args.vocabulary}，建索引 {build_ms:.1f}ms，单条增量更新 {update_us:.1f}µs")
+    print("注：中文子串匹配只能命中完全连续的查询串，BM25 按二元组打分并排序，命中数不同")
+    print(f"  {'方式':<10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    cases = [
+        ("substring", lambda q: substring_search(items, q)),
+        ("bm25", lambda q: bm25_search(index, by_id, q, False)),
+        ("bm25+hl", lambda q: bm25_search(index, by_id, q, True)),
+    ]
+    for label, fn in cases:
+        samples = measure(fn, queries, args.iterations)
+        print(
+            f"  {label:<10}{percentile(samples, 0.50):>12.3f}{percentile(samples, 0.99):>12.3f}"
+            f"{statistics.mean(samples) * 1000:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+排行榜基准测试
+
+N 个用户（临时 SQLite），对比"前 10 名 + 我的排名 ± 5"一次请求的耗时：
+- sql:    ORDER BY total_score LIMIT 10 + COUNT(*) 求名次 + 前后各 5 名两次范围查询
+          （total_score 无索引，每次都是全表扫描）
+- memory: 内存有序榜单 bisect 定位 + 切片
+
+另报告内存榜单每次加分（删除旧位置 + 插入新位置）的耗时和启动时整体加载的耗时。
+
+执行方式：
+python main/backend/scripts/benchmark_leaderboard.py
+python main/backend/scripts/benchmark_leaderboard.py --users 10000 100000 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.db import Base, User
+from services.leaderboard import RankedBoard
+
+
+def populate(db_path: str, users: int) -> dict:
+    """写入用户及随机总分，返回 {用户ID: 总分}"""
+    rng = random.Random(42)
+    scores = {user_id: rng.randint(0, 100_000) for user_id in range(1, users + 1)}
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, ?, 'student', ?, 0, 0)",
+        ((user_id, f"user{user_id}", score) for user_id, score in scores.items()),
+    )
+    conn.commit()
+    conn.close()
+    return scores
+
+
+async def sql_request(db, user_id: int, k: int = 5) -> None:
+    """每请求直接查库：前 10 名 + 名次 + 前后各 k 名"""
+    await db.execute(select(User.id, User.total_score).order_by(User.total_score.desc(), User.id).limit(10))
+    score = (await db.execute(select(User.total_score).where(User.id == user_id))).scalar()
+    ahead = or_(User.total_score > score, and_(User.total_score == score, User.id < user_id))
+    behind = or_(User.total_score < score, and_(User.total_score == score, User.id > user_id))
+    await db.execute(select(func.count()).select_from(User).where(ahead))
+    await db.execute(
+        select(User.id, User.total_score).where(ahead)
+        .order_by(User.total_score.asc(), User.id.desc()).limit(k)
+    )
+    await db.execute(
+        select(User.id, User.total_score).where(behind)
+        .order_by(User.total_score.desc(), User.id).limit(k)
+    )
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def run_size(users: int, iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        scores = populate(db_path, users)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        rng = random.Random(7)
+        targets = [rng.randint(1, users) for _ in range(iterations)]
+
+        sql_samples = []
+        async with session_factory() as db:
+            for user_id in targets:
+                start = time.perf_counter()
+                await sql_request(db, user_id)
+                sql_samples.append(time.perf_counter() - start)
+        await engine.dispose()
+
+    board = RankedBoard()
+    start = time.perf_counter()
+    board.load(scores)
+    load_elapsed = time.perf_counter() - start
+
+    memory_samples = []
+    for user_id in targets:
+        start = time.perf_counter()
+        board.top(10)
+        board.rank(user_id)
+        board.around(user_id, 5)
+        memory_samples.append(time.perf_counter() - start)
+
+    update_samples = []
+    for _ in range(iterations * 10):
+        user_id = rng.randint(1, users)
+        start = time.perf_counter()
+        board.add(user_id, rng.randint(1, 50))
+        update_samples.append(time.perf_counter() - start)
+
+    print(f"\n用户数: {users:,}（内存榜单整体加载 {load_elapsed * 1000:.0f}ms）")
+    print(f"  {'路径':<9}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    for name, samples in (("sql", sql_samples), ("memory", memory_samples), ("update", update_samples)):
+        print(
+            f"  {name:<9}{percentile(samples, 0.50):>12.4f}"
+            f"{percentile(samples, 0.99):>12.4f}{statistics.mean(samples) * 1000:>12.4f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="排行榜基准测试")
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    for users in args.users:
+        await run_size(users, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+GET /progress 汇总基准测试
+
+对比三种路径在大答题量用户上的每请求查询数与延迟：
+- legacy: 原实现（总数、正确数、最近 100 条、今日数共 4 次查询）
+- summary: 按主键读取答题时维护的汇总表 + 用户表连击计数器
+- etag:   If-None-Match 命中，按主键读取 updated_at 后直接 304（一次查询）
+
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_progress_summary.py
+python main/backend/scripts/benchmark_progress_summary.py --answers 10000 50000 --iterations 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import select, func, and_, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from models.db import Base, User, UserProgress
+from services.progress_service import ProgressService
+
+
+def populate(db_path: str, answers: int) -> None:
+    """写入一个目标用户和若干干扰用户的答题记录"""
+    conn = sqlite3.connect(db_path)
+    now = datetime.utcnow()
+    conn.execute(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak, "
+        "created_at, updated_at) VALUES (1, 'bench', 'student', 0, 3, 10, ?, ?)",
+        (now, now),
+    )
+    conn.executemany(
+        "INSERT INTO users (nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, 'student', 0, 0, 0)",
+        ((f"user{i}",) for i in range(50)),
+    )
+    rows = (
+        (
+            1 if i % 5 else random.randint(2, 51),
+            1,
+            random.random() < 0.8,
+            now - timedelta(minutes=answers - i),
+        )
+        for i in range(answers * 5 // 4)
+    )
+    conn.executemany(
+        "INSERT INTO user_progress (user_id, question_id, is_correct, answered_at) VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    conn.execute(
+        "INSERT INTO user_progress_summary (user_id, total_questions, correct_answers, "
+        "last_answer_date, completed_today) SELECT user_id, COUNT(*), "
+        "SUM(CASE WHEN is_correct THEN 1 ELSE 0 END), MAX(date(answered_at)), "
+        "SUM(CASE WHEN date(answered_at) = date('now') THEN 1 ELSE 0 END) "
+        "FROM user_progress GROUP BY user_id"
+    )
+    conn.commit()
+    conn.close()
+
+
+async def legacy_progress(user: User, db) -> None:
+    """原 get_progress 实现的查询序列"""
+    await db.execute(select(func.count(UserProgress.id)).where(UserProgress.user_id == user.id))
+    await db.execute(
+        select(func.count(UserProgress.id)).where(
+            and_(UserProgress.user_id == user.id, UserProgress.is_correct == True)
+        )
+    )
+    result = await db.execute(
+        select(UserProgress)
+        .where(UserProgress.user_id == user.id)
+        .order_by(UserProgress.answered_at.desc())
+        .limit(100)
+    )
+    result.scalars().all()
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    await db.execute(
+        select(func.count(UserProgress.id)).where(
+            and_(UserProgress.user_id == user.id, UserProgress.answered_at >= today_start)
+        )
+    )
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def run_size(answers: int, iterations: int) -> None:
+    """对单个答题量执行基准测试"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, answers)
+
+        query_count = 0
+
+        def count_query(*args):
+            nonlocal query_count
+            query_count += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with session_factory() as db:
+            user = await db.get(User, 1)
+            etag = ProgressService.progress_etag(user.id, user.updated_at)
+
+            async def legacy():
+                await legacy_progress(user, db)
+
+            async def summary():
+                await ProgressService.get_progress_summary(user, db)
+                # 避免 identity map 命中，确保每次都真实读取汇总行
+                db.expunge_all()
+                db.add(user)
+
+            async def etag_hit():
+                # 路由层按主键读取 updated_at 后比较 ETag，命中即返回 304
+                updated_at, _ = await ProgressService.read_progress_state(user.id, db)
+                assert ProgressService.progress_etag(user.id, updated_at) == etag
+
+            results = {}
+            for name, func_ in (("legacy", legacy), ("summary", summary), ("etag", etag_hit)):
+                samples = []
+                query_count = 0
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await func_()
+                    samples.append(time.perf_counter() - start)
+                results[name] = (query_count / iterations, samples)
+
+        await engine.dispose()
+
+    print(f"\n用户答题数: {answers:,}")
+    print(f"  {'路径':<9}{'查询/请求':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    for name, (queries, samples) in results.items():
+        print(
+            f"  {name:<9}{queries:>10.1f}{percentile(samples, 0.50):>12.3f}"
+            f"{percentile(samples, 0.99):>12.3f}{statistics.mean(samples) * 1000:>12.3f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="GET /progress 汇总基准测试")
+    parser.add_argument("--answers", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    for answers in args.answers:
+        await run_size(answers, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
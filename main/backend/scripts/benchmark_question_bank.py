@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+题库随机抽题基准测试
+
+对比两种抽题方式的 p50/p99 延迟：
+- legacy: SELECT ... ORDER BY random() LIMIT 1（原实现）
+- bank:   内存题库索引 O(1) 抽取 ID + 主键读取整行
+
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_question_bank.py
+python main/backend/scripts/benchmark_question_bank.py --sizes 1000 100000 --iterations 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from models.db import Base, Question
+from services.question_bank import QuestionBank
+
+
+MODULES = ["vocabulary", "grammar", "reading"]
+
+
+def populate(db_path: str, size: int) -> None:
+    """用 sqlite3 批量写入测试题目"""
+    conn = sqlite3.connect(db_path)
+    rows = (
+        (
+            MODULES[i % len(MODULES)],
+            i % 5 + 1,
+            f"Question {i}",
+            "A", "B", "C", "D", "A",
+        )
+        for i in range(size)
+    )
+    conn.executemany(
+        "INSERT INTO questions (module, difficulty, question_text, option_a, option_b, "
+        "option_c, option_d, correct_answer) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * pct), len(ordered) - 1)
+    return ordered[index] * 1000
+
+
+async def run_size(size: int, iterations: int) -> None:
+    """对单个题库规模执行基准测试"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, size)
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        bank = QuestionBank()
+
+        async with session_factory() as db:
+            start = time.perf_counter()
+            await bank.load(db)
+            load_ms = (time.perf_counter() - start) * 1000
+
+            legacy, indexed = [], []
+            for _ in range(iterations):
+                module = random.choice(MODULES)
+                difficulty = random.randint(1, 5)
+
+                start = time.perf_counter()
+                result = await db.execute(
+                    select(Question)
+                    .where(Question.module == module, Question.difficulty == difficulty)
+                    .order_by(func.random())
+                    .limit(1)
+                )
+                result.scalar_one_or_none()
+                legacy.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                question_id = bank.pick(module, difficulty)
+                await db.get(Question, question_id)
+                indexed.append(time.perf_counter() - start)
+                db.expunge_all()
+
+        await engine.dispose()
+
+    print(f"\n题库规模: {size:,}（索引加载 {load_ms:.0f} ms）")
+    print(f"  {'方式':<8}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    for name, samples in (("legacy", legacy), ("bank", indexed)):
+        print(
+            f"  {name:<8}{percentile(samples, 0.50):>12.3f}"
+            f"{percentile(samples, 0.99):>12.3f}{statistics.mean(samples) * 1000:>12.3f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="题库随机抽题基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=100, help="每种方式的抽题次数")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        await run_size(size, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
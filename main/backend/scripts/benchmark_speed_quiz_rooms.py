@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+多人抢答房间压测
+
+单个事件循环中模拟 R 个房间 × P 名玩家同时对战（模拟 WebSocket，不经过网络栈）：
+- 房主开始后每个房间的任务逐回合下发题目
+- 每名玩家收到题目后思考随机时长再抢答，收到 buzz_ack 视为抢答完成
+- --net-ms 模拟单向网络延迟（下行发送和上行抢答各加一次）
+
+指标：
+- 题目送达：从房间下发题目到玩家收到（p50/p99）
+- 抢答回执：玩家发出答案到收到 buzz_ack 的端到端延迟（p50/p99）
+- 事件循环延迟：每 10ms 的定时器实际被唤醒的滞后（p99/max），反映单 worker 是否过载
+- 断开数：发送队列写满被断开的慢玩家
+
+执行方式：
+python main/backend/scripts/benchmark_speed_quiz_rooms.py
+python main/backend/scripts/benchmark_speed_quiz_rooms.py --rooms 500 --players 8 --rounds 5 --net-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from models.schema import QuestionResponse
+from services.battle_rooms import RoomManager
+from services.battle_sessions import RoundQuestion
+
+
+def make_questions(count: int):
+    return [
+        RoundQuestion(
+            QuestionResponse(
+                id=i, module="grammar", difficulty=2,
+                question_text=f"Choose the correct form of the verb in sentence {i}.",
+                option_a="go", option_b="goes", option_c="went", option_d="gone",
+            ),
+            random.choice("ABCD"),
+            2,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+class SimulatedPlayer:
+    """模拟玩家的 WebSocket：收到题目后思考再抢答，记录送达和回执延迟"""
+
+    def __init__(self, user_id: int, args, metrics: dict):
+        self.user_id = user_id
+        self.args = args
+        self.metrics = metrics
+        self.room = None
+        self.buzzed_at = 0.0
+        self.tasks = set()
+
+    async def send_text(self, payload: str):
+        if self.args.net_ms:
+            await asyncio.sleep(self.args.net_ms / 1000)
+        else:
+            await asyncio.sleep(0)
+        message = json.loads(payload)
+        kind = message["type"]
+        if kind == "question":
+            self.metrics["delivery"].append(time.monotonic() - self.room.round_started_at)
+            task = asyncio.create_task(self.answer(message["question"]["id"]))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        elif kind == "buzz_ack":
+            self.metrics["ack"].append(time.perf_counter() - self.buzzed_at)
+        elif kind == "finished":
+            self.metrics["finished"] += 1
+
+    async def answer(self, question_id: int):
+        await asyncio.sleep(random.uniform(self.args.think_min, self.args.think_max))
+        self.buzzed_at = time.perf_counter()
+        if self.args.net_ms:
+            await asyncio.sleep(self.args.net_ms / 1000)
+        try:
+            self.room.submit(self.user_id, question_id, random.choice("ABCD"))
+        except ValueError:
+            # 回合已被别人答对或超时结束
+            self.metrics["late"] += 1
+
+    async def close(self, code: int = 1000):
+        if code != 1000:
+            self.metrics["closed_slow"] += 1
+
+
+async def loop_lag(samples: list, stop: asyncio.Event):
+    """每 10ms 唤醒一次，记录实际唤醒的滞后"""
+    interval = 0.01
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - expected))
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def run(args) -> None:
+    metrics = {"delivery": [], "ack": [], "finished": 0, "late": 0, "closed_slow": 0}
+    manager = RoomManager(
+        round_seconds=args.round_seconds,
+        max_players=args.players,
+        idle_seconds=60,
+        queue_size=args.queue_size,
+        intermission=args.intermission,
+    )
+
+    rooms = []
+    user_id = 0
+    for _ in range(args.rooms):
+        host_id = user_id + 1
+        room = manager.create(host_id, make_questions(args.rounds))
+        for _ in range(args.players):
+            user_id += 1
+            player = SimulatedPlayer(user_id, args, metrics)
+            player.room = room
+            room.join(user_id, f"player{user_id}", player)
+        rooms.append(room)
+
+    lag = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(lag, stop))
+
+    start = time.perf_counter()
+    for room in rooms:
+        room.start(room.host_id)
+    while len(manager):
+        await asyncio.sleep(0.05)
+    # 等待最后的结果消息发送完
+    await asyncio.sleep(args.net_ms / 1000 + 0.05)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+
+    dropped = sum(room.dropped for room in rooms)
+    print(f"  题目送达  p50 {percentile(metrics['delivery'], 0.50):>8.2f} ms   p99 {percentile(metrics['delivery'], 0.99):>8.2f} ms")
+    print(f"  抢答回执  p50 {percentile(metrics['ack'], 0.50):>8.2f} ms   p99 {percentile(metrics['ack'], 0.99):>8.2f} ms")
+    print(f"  循环延迟  p99 {percentile(lag, 0.99):>8.2f} ms   max {max(lag, default=0) * 1000:>8.2f} ms")
+    print(
+        f"  抢答 {len(metrics['ack'])} 次（回合结束后被拒 {metrics['late']}），"
+        f"完成房间 {metrics['finished'] // args.players}/{args.rooms}，断开 {dropped}，总耗时 {elapsed:.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="多人抢答房间压测")
+    parser.add_argument("--rooms", type=int, default=300)
+    parser.add_argument("--players", type=int, default=6, help="每个房间的玩家数")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--round-seconds", type=float, default=3.0)
+    parser.add_argument("--intermission", type=float, default=0.2, help="回合间隔（秒）")
+    parser.add_argument("--think-min", type=float, default=0.2, help="最短思考时间（秒）")
+    parser.add_argument("--think-max", type=float, default=1.5, help="最长思考时间（秒）")
+    parser.add_argument("--net-ms", type=float, default=0.0, help="模拟单向网络延迟（毫秒）")
+    parser.add_argument("--queue-size", type=int, default=32, help="每名玩家的发送队列上限")
+    args = parser.parse_args()
+
+    random.seed(42)
+    print(
+        f"\n房间 {args.rooms} × 玩家 {args.players}，每房 {args.rounds} 回合，"
+        f"回合时限 {args.round_seconds}s，网络延迟 {args.net_ms}ms"
+    )
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
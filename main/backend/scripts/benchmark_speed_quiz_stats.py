@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+GET /speed-quiz/stats 基准测试
+
+对比大对战量用户的每请求查询数与延迟：
+- legacy:  原实现（加载全部对战行 + 全部对战 ID 的 IN 查询最快用时 + Python 排序算连胜）
+- summary: 按主键读取对战结束时增量维护的 speed_quiz_stats 一行
+
+另报告回填（backfill_speed_quiz_stats）全部用户的耗时。
+使用临时 SQLite 文件，不影响业务数据库。
+
+执行方式：
+python main/backend/scripts/benchmark_speed_quiz_stats.py
+python main/backend/scripts/benchmark_speed_quiz_stats.py --battles 1000 10000 --iterations 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加后端目录到 Python 路径
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from models.db import Base, SpeedQuizBattle, SpeedQuizDetail
+from services.speed_quiz_service import SpeedQuizService
+from services.speed_quiz_stats import backfill_speed_quiz_stats
+
+ROUNDS = 10
+
+
+def populate(db_path: str, battles: int) -> None:
+    """写入一个目标用户（battles 场）和若干干扰用户的对战及明细"""
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO users (id, nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (1, 'bench', 'student', 0, 0, 0)"
+    )
+    conn.executemany(
+        "INSERT INTO users (nickname, role, total_score, current_streak, best_streak) "
+        "VALUES (?, 'student', 0, 0, 0)",
+        ((f"user{i}",) for i in range(50)),
+    )
+    start = datetime.utcnow() - timedelta(days=365)
+    battle_rows = []
+    detail_rows = []
+    for battle_id in range(1, battles * 5 // 4 + 1):
+        user_id = 1 if battle_id % 5 else rng.randint(2, 51)
+        user_wins = rng.randint(0, ROUNDS)
+        battle_rows.append((
+            battle_id, user_id, 2, "grammar", ROUNDS, user_wins, ROUNDS - user_wins,
+            user_wins, ROUNDS - user_wins, start + timedelta(minutes=battle_id),
+        ))
+        for _ in range(ROUNDS):
+            answer = rng.choice("AB")
+            detail_rows.append((battle_id, 1, answer, rng.randint(800, 15000), "B", 6000, "A", "user"))
+    conn.executemany(
+        "INSERT INTO speed_quiz_battles (id, user_id, difficulty, module, total_questions, user_correct, "
+        "ai_correct, user_wins, ai_wins, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        battle_rows,
+    )
+    conn.executemany(
+        "INSERT INTO speed_quiz_details (battle_id, question_id, user_answer, user_time, ai_answer, "
+        "ai_time, correct_answer, winner) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        detail_rows,
+    )
+    conn.commit()
+    conn.close()
+
+
+async def legacy_stats(db, user_id: int) -> None:
+    """原 get_stats 实现的查询序列和计算"""
+    result = await db.execute(select(SpeedQuizBattle).where(SpeedQuizBattle.user_id == user_id))
+    battles = result.scalars().all()
+    battle_ids = [b.id for b in battles]
+    await db.execute(
+        select(func.min(SpeedQuizDetail.user_time)).where(
+            SpeedQuizDetail.battle_id.in_(battle_ids),
+            SpeedQuizDetail.user_answer == SpeedQuizDetail.correct_answer
+        )
+    )
+    streak = best = 0
+    for battle in sorted(battles, key=lambda b: b.created_at):
+        streak = streak + 1 if battle.user_wins > battle.ai_wins else 0
+        best = max(best, streak)
+    db.expunge_all()
+
+
+def percentile(samples, pct: float) -> float:
+    """计算百分位数（毫秒）"""
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+async def run_size(battles: int, iterations: int) -> None:
+    """对单个对战量执行基准测试"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "bench.db")
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        populate(db_path, battles)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with session_factory() as db:
+            began = time.perf_counter()
+            users = await backfill_speed_quiz_stats(db)
+            backfill_elapsed = time.perf_counter() - began
+
+        query_count = 0
+
+        def count_query(*args):
+            nonlocal query_count
+            query_count += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+        service = SpeedQuizService()
+
+        async with session_factory() as db:
+            async def summary():
+                await service.get_stats(db, 1)
+                # 避免 identity map 命中，确保每次都真实读取汇总行
+                db.expunge_all()
+
+            results = {}
+            for name, func_ in (("legacy", lambda: legacy_stats(db, 1)), ("summary", summary)):
+                samples = []
+                query_count = 0
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await func_()
+                    samples.append(time.perf_counter() - start)
+                results[name] = (query_count / iterations, samples)
+
+        await engine.dispose()
+
+    print(f"\n目标用户对战数: {battles:,}（回填 {users} 个用户 {backfill_elapsed * 1000:.0f}ms）")
+    print(f"  {'路径':<9}{'查询/请求':>10}{'p50 (ms)':>12}{'p99 (ms)':>12}{'mean (ms)':>12}")
+    for name, (queries, samples) in results.items():
+        print(
+            f"  {name:<9}{queries:>10.1f}{percentile(samples, 0.50):>12.3f}"
+            f"{percentile(samples, 0.99):>12.3f}{statistics.mean(samples) * 1000:>12.3f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="GET /speed-quiz/stats 基准测试")
+    parser.add_argument("--battles", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    for battles in args.battles:
+        await run_size(battles, args.iterations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
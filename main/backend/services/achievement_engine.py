@@ -0,0 +1,311 @@
+"""
+成就评估引擎
+
+- 成就定义常驻内存，按 requirement_type 分组并按阈值升序排列
+- 每个用户维护答题累计值（总题数、正确数、各模块正确数、学习天数）和已解锁集合
+- 每次答题只检查每种类型"下一个未达成的阈值"，不再逐题查询成就表和 COUNT(*)
+
+用户状态在首次答题时用一次聚合查询水合，之后只做内存增量更新。
+多 worker 部署时每个进程只看到自己处理的答题，因此：
+- 总题数、正确数由调用方从 user_progress_summary 的 UPSERT ... RETURNING 传入，每题都是准确值
+- 模块正确数、学习天数等其余累计值超过 ACHIEVEMENT_STATE_TTL_SECONDS 后重新水合，
+  其他进程处理的答题最多延迟一个周期计入
+
+支持的 requirement_type：
+- total_questions: 累计答题数
+- streak: 当前连击数
+- daily_login: 累计学习天数（有答题记录的天数）
+- accuracy: 正确率百分比（答题数达到 ACCURACY_MIN_QUESTIONS 后才评估）
+- module_mastery:<module>: 指定模块的累计答对数，如 module_mastery:vocabulary
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import dialect_insert
+from models.db import Achievement, UserAchievement, UserDailyActivity, UserProgress, Question
+from models.schema import AchievementResponse
+
+
+# 评估正确率成就所需的最少答题数，避免答 1 题全对就解锁
+ACCURACY_MIN_QUESTIONS = 20
+
+# 模块精通类成就的类型前缀
+MODULE_MASTERY_PREFIX = "module_mastery:"
+
+
+class UserAchievementState:
+    """单个用户的成就累计状态"""
+
+    def __init__(self):
+        self.total_questions = 0
+        self.correct_answers = 0
+        self.module_correct: Dict[str, int] = {}
+        self.active_days = 0
+        self.last_active_date: Optional[date] = None
+        self.streak = 0
+        self.unlocked: Set[int] = set()
+        # 水合时间（time.monotonic），用于判断是否需要重新水合
+        self.hydrated_at = 0.0
+        # requirement_type -> 下一个待检查阈值在定义列表中的下标
+        self.cursors: Dict[str, int] = {}
+
+    def record_answer(self, is_correct: bool, module: str, streak: int, answered_on: date) -> None:
+        """把一次答题计入累计值"""
+        self.total_questions += 1
+        if is_correct:
+            self.correct_answers += 1
+            self.module_correct[module] = self.module_correct.get(module, 0) + 1
+        if answered_on != self.last_active_date:
+            self.active_days += 1
+            self.last_active_date = answered_on
+        self.streak = streak
+
+    def metric(self, requirement_type: str) -> Optional[float]:
+        """返回某类成就对应的当前指标值，未知类型返回 None"""
+        if requirement_type == "total_questions":
+            return self.total_questions
+        if requirement_type == "streak":
+            return self.streak
+        if requirement_type == "daily_login":
+            return self.active_days
+        if requirement_type == "accuracy":
+            if self.total_questions < ACCURACY_MIN_QUESTIONS:
+                return None
+            return self.correct_answers * 100 / self.total_questions
+        if requirement_type.startswith(MODULE_MASTERY_PREFIX):
+            return self.module_correct.get(requirement_type[len(MODULE_MASTERY_PREFIX):], 0)
+        return None
+
+
+class AchievementEngine:
+    """成就评估引擎"""
+
+    # 内存中最多保留的用户状态数量（LRU 淘汰）
+    MAX_USER_STATES = 10000
+
+    def __init__(self, state_ttl_seconds: float = 60.0):
+        # 用户状态超过该秒数后重新水合，<= 0 时不过期
+        self.state_ttl_seconds = state_ttl_seconds
+        # requirement_type -> [(阈值, 成就)]，按阈值升序
+        self._definitions: Dict[str, List[Tuple[int, AchievementResponse]]] = {}
+        self._all: List[AchievementResponse] = []
+        self._states: "OrderedDict[int, UserAchievementState]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.loaded = False
+
+    async def load(self, db: AsyncSession) -> None:
+        """加载成就定义（成就表变更后需重新调用）"""
+        async with self._lock:
+            result = await db.execute(select(Achievement).order_by(Achievement.id))
+            achievements = result.scalars().all()
+
+            definitions: Dict[str, List[Tuple[int, AchievementResponse]]] = {}
+            for achievement in achievements:
+                definitions.setdefault(achievement.requirement_type, []).append(
+                    (achievement.requirement_value, AchievementResponse.model_validate(achievement))
+                )
+            for items in definitions.values():
+                items.sort(key=lambda item: (item[0], item[1].id))
+
+            self._definitions = definitions
+            self._all = [AchievementResponse.model_validate(a) for a in achievements]
+            # 定义变化后游标失效
+            self._states.clear()
+            self.loaded = True
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """未加载时加载成就定义"""
+        if not self.loaded:
+            await self.load(db)
+
+    def all_achievements(self) -> List[AchievementResponse]:
+        """全部成就定义"""
+        return list(self._all)
+
+    def forget(self, user_id: int) -> None:
+        """丢弃用户状态（事务回滚等导致内存与数据库不一致时调用）"""
+        self._states.pop(user_id, None)
+
+    async def evaluate(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        is_correct: bool,
+        module: str,
+        streak: int,
+        answered_at: Optional[datetime] = None,
+        totals: Optional[Tuple[int, int]] = None
+    ) -> List[AchievementResponse]:
+        """
+        记录一次答题并返回新解锁的成就
+
+        调用时本题的答题记录和汇总已写入当前事务（已 flush）。
+        新解锁的成就会以 INSERT ... ON CONFLICT DO NOTHING 写入 user_achievements，
+        多个进程对同一用户重复判定解锁也不会违反唯一约束。
+
+        Args:
+            db: 数据库会话（调用方负责提交）
+            user_id: 用户ID
+            is_correct: 本题是否答对
+            module: 本题所属模块
+            streak: 答题后的当前连击
+            answered_at: 答题时间，默认当前 UTC 时间
+            totals: 含本题在内的 (总题数, 正确数)，来自进度汇总的 UPSERT ... RETURNING
+
+        Returns:
+            List[AchievementResponse]: 新解锁的成就
+        """
+        unlocked = await self.record(
+            db, user_id, is_correct, module, streak, answered_at, totals=totals, persisted=True
+        )
+        await self.persist_unlocks(db, user_id, [a.id for a in unlocked])
+        return unlocked
+
+    async def record(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        is_correct: bool,
+        module: str,
+        streak: int,
+        answered_at: Optional[datetime] = None,
+        totals: Optional[Tuple[int, int]] = None,
+        persisted: bool = False,
+        refresh: bool = True
+    ) -> List[AchievementResponse]:
+        """
+        只更新内存累计值并返回新解锁的成就，不写数据库
+
+        批量写入模式使用：解锁记录随答题批次一起由 persist_unlocks 落库。
+        首次遇到某用户或状态过期时读取数据库水合。
+
+        Args:
+            totals: 含本题在内的 (总题数, 正确数)，已知时直接覆盖内存值
+            persisted: 本题是否已写入数据库（水合结果已包含本题，不再重复累加）
+            refresh: 状态过期时是否重新水合；还有答题未落库时传 False，避免水合结果漏掉它们
+        """
+        await self.ensure_loaded(db)
+        state, hydrated = await self._get_state(db, user_id, refresh)
+        if hydrated and persisted:
+            state.streak = streak
+        else:
+            state.record_answer(is_correct, module, streak, (answered_at or datetime.utcnow()).date())
+        if totals is not None:
+            state.total_questions, state.correct_answers = totals
+        return self._advance(state)
+
+    @staticmethod
+    async def persist_unlocks(db: AsyncSession, user_id: int, achievement_ids: List[int]) -> None:
+        """写入解锁记录（INSERT ... ON CONFLICT DO NOTHING），调用方负责提交"""
+        if not achievement_ids:
+            return
+        await db.execute(
+            dialect_insert(db, UserAchievement.__table__)
+            .values([
+                {"user_id": user_id, "achievement_id": achievement_id, "unlocked_at": datetime.utcnow()}
+                for achievement_id in achievement_ids
+            ])
+            .on_conflict_do_nothing(index_elements=["user_id", "achievement_id"])
+        )
+
+    def _advance(self, state: UserAchievementState) -> List[AchievementResponse]:
+        """推进每种类型的游标，返回本次达成的成就"""
+        unlocked = []
+        for requirement_type, items in self._definitions.items():
+            value = state.metric(requirement_type)
+            if value is None:
+                continue
+
+            cursor = state.cursors.get(requirement_type, 0)
+            while cursor < len(items) and value >= items[cursor][0]:
+                achievement = items[cursor][1]
+                if achievement.id not in state.unlocked:
+                    state.unlocked.add(achievement.id)
+                    unlocked.append(achievement)
+                cursor += 1
+            state.cursors[requirement_type] = cursor
+        return unlocked
+
+    def _expired(self, state: UserAchievementState) -> bool:
+        return self.state_ttl_seconds > 0 and time.monotonic() - state.hydrated_at >= self.state_ttl_seconds
+
+    async def _get_state(
+        self, db: AsyncSession, user_id: int, refresh: bool = True
+    ) -> Tuple[UserAchievementState, bool]:
+        """
+        获取用户状态，不存在或已过期时从数据库水合
+
+        Returns:
+            (状态, 是否本次水合)
+        """
+        state = self._states.get(user_id)
+        if state is not None and not (refresh and self._expired(state)):
+            self._states.move_to_end(user_id)
+            return state, False
+
+        fresh = await self._hydrate(db, user_id)
+        current = self._states.get(user_id)
+        if current is not None and current is not state:
+            # 水合期间并发请求已建立新状态，以先到者为准
+            self._states.move_to_end(user_id)
+            return current, False
+        self._states[user_id] = fresh
+        self._states.move_to_end(user_id)
+        while len(self._states) > self.MAX_USER_STATES:
+            self._states.popitem(last=False)
+        return fresh, True
+
+    async def _hydrate(self, db: AsyncSession, user_id: int) -> UserAchievementState:
+        """用聚合查询构建用户累计状态（首次遇到用户和状态过期时执行）"""
+        state = UserAchievementState()
+        state.hydrated_at = time.monotonic()
+
+        result = await db.execute(
+            select(
+                Question.module,
+                func.count(UserProgress.id),
+                func.sum(case((UserProgress.is_correct == True, 1), else_=0)),
+            )
+            .join(Question, Question.id == UserProgress.question_id)
+            .where(UserProgress.user_id == user_id)
+            .group_by(Question.module)
+        )
+        for module, total, correct in result.all():
+            state.total_questions += total
+            state.correct_answers += correct or 0
+            state.module_correct[module] = correct or 0
+
+        result = await db.execute(
+            select(
+                func.count(UserDailyActivity.id),
+                func.max(UserDailyActivity.activity_date),
+            ).where(UserDailyActivity.user_id == user_id)
+        )
+        active_days, last_active_date = result.one()
+        state.active_days = active_days or 0
+        state.last_active_date = last_active_date
+
+        result = await db.execute(
+            select(UserAchievement.achievement_id).where(UserAchievement.user_id == user_id)
+        )
+        state.unlocked = set(result.scalars().all())
+
+        # 初始化游标：跳过已解锁的前缀
+        for requirement_type, items in self._definitions.items():
+            cursor = 0
+            while cursor < len(items) and items[cursor][1].id in state.unlocked:
+                cursor += 1
+            state.cursors[requirement_type] = cursor
+
+        return state
+
+
+# 全局成就引擎
+achievement_engine = AchievementEngine(state_ttl_seconds=settings.ACHIEVEMENT_STATE_TTL_SECONDS)
@@ -1,70 +1,149 @@
 """
 闹钟服务 - 学习闹钟业务逻辑
+
+闹钟规则常驻内存索引（个性化规则按学生昵称索引 + 一个全局规则槽位），
+规则增删改、启停时同步更新；解析生效规则和查询会话对应的规则都不再查库。
+索引只存在于本进程，距上次加载超过 ALARM_RULE_REFRESH_SECONDS 秒时整体重新加载，
+多 worker 部署时其他进程的规则变更最多延迟一个刷新周期生效。
 """
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_
 
-from models.db import AlarmRule, AlarmSession, User
+from core.config import settings
+from models.db import AlarmRule, AlarmSession
 from models.schema import AlarmRuleCreate, AlarmRuleUpdate, AlarmRuleResponse, AlarmStatusResponse, AlarmValidateResponse
 
 
+class AlarmRuleIndex:
+    """闹钟规则内存索引"""
+
+    def __init__(self, refresh_seconds: float = 60.0):
+        self.refresh_seconds = refresh_seconds
+        self._rules: Dict[int, AlarmRuleResponse] = {}
+        self._personal: Dict[str, AlarmRuleResponse] = {}
+        self._global: Optional[AlarmRuleResponse] = None
+        self._lock = asyncio.Lock()
+        self._loaded_at: Optional[float] = None
+        # 每次 put/remove 递增，用于发现加载期间发生的变更
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    @property
+    def stale(self) -> bool:
+        if self._loaded_at is None:
+            return True
+        return self.refresh_seconds > 0 and time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        从数据库全量加载规则
+
+        Returns:
+            int: 加载的规则数量
+        """
+        async with self._lock:
+            return await self._load(db)
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """未加载或已过刷新周期时重新加载；并发调用只有第一个会查询"""
+        if not self.stale:
+            return
+        async with self._lock:
+            # 等锁期间其他协程可能已完成加载
+            if self.stale:
+                await self._load(db)
+
+    async def _load(self, db: AsyncSession) -> int:
+        """全量加载（调用方持有 _lock）"""
+        version = self._version
+        result = await db.execute(select(AlarmRule))
+        rules = {rule.id: AlarmRuleResponse.model_validate(rule) for rule in result.scalars().all()}
+        if version != self._version:
+            # 查询期间有规则变更，结果可能是旧的：保留当前索引，下次访问再加载
+            return len(self._rules)
+        self._rules = rules
+        self._reindex()
+        self._loaded_at = time.monotonic()
+        return len(self._rules)
+
+    def get(self, rule_id: int) -> Optional[AlarmRuleResponse]:
+        return self._rules.get(rule_id)
+
+    def effective(self, nickname: Optional[str]) -> Optional[AlarmRuleResponse]:
+        """生效的规则（个性化优先于全局）"""
+        if nickname is not None:
+            rule = self._personal.get(nickname)
+            if rule is not None:
+                return rule
+        return self._global
+
+    def put(self, rule: AlarmRule) -> AlarmRuleResponse:
+        """新增或更新一条规则"""
+        snapshot = AlarmRuleResponse.model_validate(rule)
+        self._rules[snapshot.id] = snapshot
+        self._version += 1
+        self._reindex()
+        return snapshot
+
+    def remove(self, rule_id: int) -> None:
+        """删除一条规则"""
+        if self._rules.pop(rule_id, None) is not None:
+            self._version += 1
+            self._reindex()
+
+    def _reindex(self) -> None:
+        """重建昵称索引和全局槽位；同一槽位有多条启用规则时取最新创建的一条"""
+        personal: Dict[str, AlarmRuleResponse] = {}
+        global_rule = None
+        for rule in sorted(self._rules.values(), key=lambda r: r.id):
+            if not rule.is_active:
+                continue
+            if rule.rule_type == "personal":
+                if rule.student_nickname:
+                    personal[rule.student_nickname] = rule
+            elif rule.rule_type == "global":
+                global_rule = rule
+        self._personal = personal
+        self._global = global_rule
+
+
+# 全局闹钟规则索引（应用启动时 load）
+alarm_rules = AlarmRuleIndex(refresh_seconds=settings.ALARM_RULE_REFRESH_SECONDS)
+
+
 class AlarmService:
     """闹钟服务类"""
 
     @staticmethod
-    async def get_effective_rule(user_id: int, db: AsyncSession) -> Optional[AlarmRule]:
+    async def get_effective_rule(nickname: Optional[str], db: AsyncSession) -> Optional[AlarmRuleResponse]:
         """
         获取生效的规则（个性化优先于全局）
 
         Args:
-            user_id: 用户ID
-            db: 数据库会话
+            nickname: 学生昵称
+            db: 数据库会话（仅在索引未加载或需要刷新时使用）
 
         Returns:
             生效的规则，如果没有则返回 None
         """
-        # 获取用户信息
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if not user:
-            return None
-
-        # 优先查找个性化规则
-        result = await db.execute(
-            select(AlarmRule).where(
-                and_(
-                    AlarmRule.rule_type == "personal",
-                    AlarmRule.student_nickname == user.nickname,
-                    AlarmRule.is_active == True
-                )
-            )
-        )
-        personal_rule = result.scalar_one_or_none()
-        if personal_rule:
-            return personal_rule
-
-        # 查找全局规则
-        result = await db.execute(
-            select(AlarmRule).where(
-                and_(
-                    AlarmRule.rule_type == "global",
-                    AlarmRule.is_active == True
-                )
-            )
-        )
-        global_rule = result.scalar_one_or_none()
-        return global_rule
+        await alarm_rules.ensure_loaded(db)
+        return alarm_rules.effective(nickname)
 
     @staticmethod
-    async def start_session(user_id: int, db: AsyncSession) -> AlarmSession:
+    async def start_session(user_id: int, nickname: Optional[str], db: AsyncSession) -> AlarmSession:
         """
         开始学习会话
 
         Args:
             user_id: 用户ID
+            nickname: 学生昵称（匹配个性化规则）
             db: 数据库会话
 
         Returns:
@@ -76,7 +155,7 @@ class AlarmService:
         3. 自动创建下一个 resting 会话
         """
         # 获取生效的规则
-        rule = await AlarmService.get_effective_rule(user_id, db)
+        rule = await AlarmService.get_effective_rule(nickname, db)
         if not rule:
             raise ValueError("没有找到生效的闹钟规则")
 
@@ -130,7 +209,7 @@ class AlarmService:
                     AlarmSession.start_time <= now,
                     AlarmSession.end_time > now
                 )
-            ).options(selectinload(AlarmSession.rule))
+            )
         )
         current_session = result.scalar_one_or_none()
 
@@ -151,13 +230,20 @@ class AlarmService:
         # 判断是否被阻止操作
         is_blocked = current_session.session_type == "resting"
 
+        # 会话对应的规则从内存索引读取，索引中没有（其他进程刚创建）时回查一次
+        await alarm_rules.ensure_loaded(db)
+        rule = alarm_rules.get(current_session.rule_id)
+        if rule is None:
+            rule_row = await db.get(AlarmRule, current_session.rule_id)
+            rule = alarm_rules.put(rule_row) if rule_row is not None else None
+
         return AlarmStatusResponse(
             session_type=current_session.session_type,
             start_time=current_session.start_time,
             end_time=current_session.end_time,
             remaining_seconds=max(0, remaining_seconds),
             is_blocked=is_blocked,
-            rule=AlarmRuleResponse.model_validate(current_session.rule) if current_session.rule else None
+            rule=rule
         )
 
     @staticmethod
@@ -214,6 +300,7 @@ class AlarmService:
         db.add(rule)
         await db.commit()
         await db.refresh(rule)
+        alarm_rules.put(rule)
 
         return rule
 
@@ -247,6 +334,7 @@ class AlarmService:
 
         await db.commit()
         await db.refresh(rule)
+        alarm_rules.put(rule)
 
         return rule
 
@@ -266,6 +354,7 @@ class AlarmService:
 
         await db.delete(rule)
         await db.commit()
+        alarm_rules.remove(rule_id)
 
     @staticmethod
     async def toggle_rule(rule_id: int, db: AsyncSession) -> AlarmRule:
@@ -289,6 +378,7 @@ class AlarmService:
 
         await db.commit()
         await db.refresh(rule)
+        alarm_rules.put(rule)
 
         return rule
 
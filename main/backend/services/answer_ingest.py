@@ -0,0 +1,373 @@
+"""
+答题批量写入管道
+
+POST /answers 在 batched 模式下不再每题一个事务：
+- 得分、连击、总分、成就由进程内状态同步计算并立即返回
+- 排行榜在答题所在批次提交成功后才累加得分，写入失败的得分不会上榜
+- UserProgress 插入、用户计数器、进度/每日汇总、错题、成就解锁放入 asyncio 队列，
+  后台任务每隔 flush_ms 毫秒把队列中的答题合并成一个事务提交（组提交）
+
+持久性（durability）：
+- commit:   请求等待所在批次提交后才返回，崩溃不丢已响应的答题；一批只付一次 fsync
+- buffered: 入队即返回，最多丢失最近 flush_ms 毫秒内的答题，换取最低延迟
+
+进程内状态以本进程写入为准，batched 模式要求同一用户的答题只由一个 worker 处理
+（单进程部署或按用户粘性路由）。
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.security import user_cache
+from models.db import User, Question, UserProgress
+from models.schema import AnswerRequest, AnswerResponse
+from core.exceptions import NotFoundException
+from services.achievement_engine import achievement_engine
+from services.leaderboard import leaderboard
+from services.progress_service import ProgressService
+
+logger = logging.getLogger(__name__)
+
+
+class UserScoreState:
+    """单个用户的计分状态（连击、最佳连击、总分、待写入数量）"""
+
+    __slots__ = ("current_streak", "best_streak", "total_score", "pending", "stale")
+
+    def __init__(self, current_streak: int, best_streak: int, total_score: int):
+        self.current_streak = current_streak
+        self.best_streak = best_streak
+        self.total_score = total_score
+        self.pending = 0
+        # 有答题写入失败：待写入的答题全部落库后丢弃状态，下次从数据库重新读取
+        self.stale = False
+
+
+class PendingAnswer:
+    """等待写入的一次答题"""
+
+    __slots__ = (
+        "user_id", "nickname", "question_id", "module", "is_correct", "answer_time", "answered_at",
+        "score", "achievement_ids", "future",
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        question_id: int,
+        is_correct: bool,
+        answer_time: int,
+        score: int,
+        achievement_ids: List[int],
+        future: Optional[asyncio.Future] = None,
+        nickname: Optional[str] = None,
+        module: str = ""
+    ):
+        self.user_id = user_id
+        self.nickname = nickname
+        self.question_id = question_id
+        self.module = module
+        self.is_correct = is_correct
+        self.answer_time = answer_time
+        self.answered_at = datetime.utcnow()
+        self.score = score
+        self.achievement_ids = achievement_ids
+        self.future = future
+
+
+class AnswerIngestor:
+    """答题批量写入器"""
+
+    # 内存中最多保留的用户计分状态数量（仅淘汰没有待写入答题的用户）
+    MAX_USER_STATES = 10000
+
+    def __init__(
+        self,
+        flush_ms: float = 5.0,
+        max_batch: int = 500,
+        durability: str = "commit",
+        session_factory=None
+    ):
+        if durability not in ("commit", "buffered"):
+            raise ValueError(f"未知的 durability: {durability}")
+        self.flush_ms = flush_ms
+        self.max_batch = max_batch
+        self.durability = durability
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._states: "OrderedDict[int, UserScoreState]" = OrderedDict()
+        self.batches = 0
+        self.flushed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动后台写入任务"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务，队列中剩余的答题写完后返回"""
+        if self._task is None:
+            return
+        # None 作为停止标记排在所有已入队答题之后
+        self._queue.put_nowait(None)
+        await self._task
+        self._task = None
+
+    async def submit_answer(
+        self,
+        request: AnswerRequest,
+        user: User,
+        db: AsyncSession
+    ) -> AnswerResponse:
+        """
+        提交答案：同步计算结果，写入交给批量管道
+
+        只读取题目（以及用户首次答题时的计分状态），不在请求事务中写库。
+        """
+        question = await db.get(Question, request.question_id)
+        if not question:
+            raise NotFoundException("question", request.question_id)
+
+        is_correct = request.answer == question.correct_answer
+        state = await self._get_state(db, user.id)
+
+        # 连击与得分（与 ProgressService.submit_answer 相同的规则）
+        score = 0
+        if is_correct:
+            state.current_streak += 1
+            state.best_streak = max(state.best_streak, state.current_streak)
+            score = ProgressService._calculate_score(request.answer_time, state.current_streak)
+            state.total_score += score
+        else:
+            state.current_streak = 0
+        streak = state.current_streak
+
+        # 处理中的答题也计入 pending：等待成就评估期间状态不会被淘汰或丢弃
+        state.pending += 1
+        try:
+            # 本进程还有该用户的其他答题未落库时不重新水合成就状态，避免漏计
+            new_achievements = await achievement_engine.record(
+                db, user.id, is_correct, question.module, streak, refresh=state.pending == 1
+            )
+        except Exception:
+            # 未入队：扣回得分；连击可能已被并发请求在此基础上前移，无法还原，标记为待重新读取
+            state.total_score -= score
+            state.stale = True
+            self._release(user.id)
+            raise
+
+        future = asyncio.get_running_loop().create_future() if self.durability == "commit" else None
+        self._queue.put_nowait(PendingAnswer(
+            user_id=user.id,
+            question_id=question.id,
+            is_correct=is_correct,
+            answer_time=request.answer_time,
+            score=score,
+            achievement_ids=[a.id for a in new_achievements],
+            future=future,
+            nickname=user.nickname,
+            module=question.module,
+        ))
+        if future is not None:
+            await future
+
+        return AnswerResponse(
+            is_correct=is_correct,
+            correct_answer=question.correct_answer,
+            explanation=question.explanation,
+            score=score,
+            streak=streak,
+            total_score=state.total_score,
+            new_achievements=new_achievements,
+            encouragement=ProgressService._generate_encouragement(is_correct, streak, score)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        """写入统计"""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "flushed": self.flushed,
+            "failed": self.failed,
+            "user_states": len(self._states),
+        }
+
+    async def _get_state(self, db: AsyncSession, user_id: int) -> UserScoreState:
+        """获取用户计分状态，首次从用户表读取"""
+        state = self._states.get(user_id)
+        if state is not None:
+            self._states.move_to_end(user_id)
+            return state
+
+        result = await db.execute(
+            select(User.current_streak, User.best_streak, User.total_score).where(User.id == user_id)
+        )
+        current_streak, best_streak, total_score = result.one()
+        state = self._states.setdefault(
+            user_id, UserScoreState(current_streak or 0, best_streak or 0, total_score or 0)
+        )
+        self._states.move_to_end(user_id)
+        self._evict()
+        return state
+
+    def _evict(self) -> None:
+        """超出上限时淘汰最久未用且没有待写入答题的用户"""
+        if len(self._states) <= self.MAX_USER_STATES:
+            return
+        for user_id in list(self._states):
+            if len(self._states) <= self.MAX_USER_STATES:
+                break
+            if self._states[user_id].pending == 0:
+                del self._states[user_id]
+
+    async def _run(self) -> None:
+        """后台循环：等到第一条答题后再攒 flush_ms 毫秒，整批提交；遇到停止标记时写完退出"""
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                break
+            await asyncio.sleep(self.flush_ms / 1000)
+            batch = [first]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[PendingAnswer]) -> None:
+        """在一个事务中写入一批答题"""
+        try:
+            async with self._session_factory() as db:
+                await self._write_batch(db, batch)
+                await db.commit()
+        except Exception as exc:
+            logger.exception("答题批量写入失败，丢弃 %d 条", len(batch))
+            self.failed += len(batch)
+            # 内存状态已前移：扣回丢弃的得分，连击无法还原，标记为待重新读取
+            for item in batch:
+                state = self._states.get(item.user_id)
+                if state is not None:
+                    state.total_score -= item.score
+                    state.stale = True
+                self._release(item.user_id)
+                if item.future is not None and not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        self.batches += 1
+        self.flushed += len(batch)
+        for item in batch:
+            self._release(item.user_id)
+            # 已落库才计入排行榜（总榜按增量累加：同步时从 users.total_score 重建）
+            leaderboard.record_score(item.user_id, item.nickname, item.module, item.score)
+            if item.future is not None and not item.future.done():
+                item.future.set_result(None)
+        for user_id in {item.user_id for item in batch}:
+            user_cache.invalidate(user_id)
+
+    def _release(self, user_id: int) -> None:
+        """
+        一条答题已处理完（写入、丢弃或入队前失败）
+
+        标记为待重新读取的状态在该用户没有排队中的答题后才丢弃：
+        提前丢弃会让重新读取的状态漏掉仍在队列中的答题
+        """
+        state = self._states.get(user_id)
+        if state is None:
+            return
+        state.pending -= 1
+        if state.pending == 0 and state.stale:
+            del self._states[user_id]
+            achievement_engine.forget(user_id)
+
+    async def _write_batch(self, db: AsyncSession, batch: List[PendingAnswer]) -> None:
+        """合并同一用户/同一天的计数后写入"""
+        await db.execute(insert(UserProgress), [
+            {
+                "user_id": item.user_id,
+                "question_id": item.question_id,
+                "is_correct": item.is_correct,
+                "answer_time": item.answer_time,
+                "answered_at": item.answered_at,
+            }
+            for item in batch
+        ])
+
+        # (用户, 日期) -> [答题数, 答对数]，按日期顺序写入汇总
+        daily: "OrderedDict[Tuple[int, date], List[int]]" = OrderedDict()
+        score_delta: Dict[int, int] = {}
+        unlocks: Dict[int, List[int]] = {}
+        wrong: List[Tuple[int, int, int, datetime]] = []
+        for item in batch:
+            counts = daily.setdefault((item.user_id, item.answered_at.date()), [0, 0])
+            counts[0] += 1
+            counts[1] += 1 if item.is_correct else 0
+            score_delta[item.user_id] = score_delta.get(item.user_id, 0) + item.score
+            if item.achievement_ids:
+                unlocks.setdefault(item.user_id, []).extend(item.achievement_ids)
+            if not item.is_correct:
+                wrong.append((item.user_id, item.question_id, 1, item.answered_at))
+
+        # 连击以内存状态为准直接写入，总分按批内增量原子累加（executemany）
+        users = User.__table__
+        user_rows = []
+        for user_id, delta in score_delta.items():
+            state = self._states.get(user_id)
+            if state is None or state.stale:
+                # 前一批写入失败，内存中的连击不可信，只累加总分
+                await db.execute(
+                    update(users).where(users.c.id == user_id).values(total_score=users.c.total_score + delta)
+                )
+                continue
+            user_rows.append({
+                "uid": user_id,
+                "delta": delta,
+                "streak": state.current_streak,
+                "best": state.best_streak,
+            })
+        if user_rows:
+            await db.execute(
+                update(users)
+                .where(users.c.id == bindparam("uid"))
+                .values(
+                    total_score=users.c.total_score + bindparam("delta"),
+                    current_streak=bindparam("streak"),
+                    best_streak=bindparam("best"),
+                ),
+                user_rows,
+            )
+
+        await ProgressService.record_wrong_questions(wrong, db)
+
+        deltas = [(user_id, day, answered, correct) for (user_id, day), (answered, correct) in daily.items()]
+        await ProgressService._update_summaries(deltas, db)
+        await ProgressService._update_daily_activities(deltas, db)
+
+        for user_id, achievement_ids in unlocks.items():
+            await achievement_engine.persist_unlocks(db, user_id, achievement_ids)
+
+
+# 全局答题写入器（ANSWER_INGEST_MODE=batched 时在应用启动时 start）
+answer_ingestor = AnswerIngestor(
+    flush_ms=settings.ANSWER_INGEST_FLUSH_MS,
+    max_batch=settings.ANSWER_INGEST_MAX_BATCH,
+    durability=settings.ANSWER_INGEST_DURABILITY,
+)
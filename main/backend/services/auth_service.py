@@ -6,7 +6,7 @@ from sqlalchemy import select
 
 from models.db import User
 from models.schema import StudentLoginRequest, AdminLoginRequest, LoginResponse, UserResponse
-from core.security import verify_password, create_access_token
+from core.security import verify_password, create_user_token
 from core.config import settings
 from core.exceptions import UnauthorizedException
 
@@ -38,7 +38,7 @@ class AuthService:
             await db.refresh(user)
 
         # 生成JWT Token
-        token = create_access_token(data={"sub": user.id})
+        token = create_user_token(user)
 
         return LoginResponse(
             user=UserResponse.model_validate(user),
@@ -72,7 +72,7 @@ class AuthService:
             raise UnauthorizedException("用户名或密码错误")
 
         # 生成JWT Token
-        token = create_access_token(data={"sub": admin.id})
+        token = create_user_token(admin)
 
         return LoginResponse(
             user=UserResponse.model_validate(admin),
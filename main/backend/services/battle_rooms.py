@@ -0,0 +1,424 @@
+"""
+多人抢答房间
+
+N 个学生通过 WebSocket 加入同一房间抢答，答题时间全部以服务端时间为准：
+- 创建房间时一次性抽好全部题目（含正确答案），对战过程不访问数据库
+- 每个房间一个 asyncio 任务推进回合：下发题目时记录服务端单调时钟，
+  收到答案时先打时间戳再判定，答题时间 = 收到时间 - 下发时间，客户端上报的时间不参与
+- 同一进程内所有消息在事件循环中按收到顺序处理，第一个答对的玩家赢得该回合；
+  有人答对、全员作答或超时即结束回合
+- 广播只序列化一次，逐个玩家 put_nowait 到有界发送队列，由各玩家的发送任务并发发送；
+  队列写满的慢玩家被断开（关闭码 1013），不拖慢同房间的其他玩家和其他房间
+
+房间只存在于创建它的进程，多 worker 部署需要按房间粘性路由；
+多人对战的结果只推送给房间内玩家，不写入单人对战（对 AI）的战绩表。
+"""
+import asyncio
+import json
+import logging
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from services.battle_sessions import RoundQuestion
+
+logger = logging.getLogger(__name__)
+
+# 正常结束 / 慢消费者断开的关闭码
+NORMAL_CLOSE_CODE = 1000
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+VALID_ANSWERS = frozenset("ABCD")
+
+
+class RoomPlayer:
+    """房间中的一名玩家：有界发送队列 + 独立发送任务"""
+
+    __slots__ = (
+        "user_id", "nickname", "websocket", "queue", "queue_size", "sender",
+        "connected", "close_code", "wins", "correct", "total_time",
+    )
+
+    def __init__(self, user_id: int, nickname: str, websocket, queue_size: int):
+        self.user_id = user_id
+        self.nickname = nickname
+        self.websocket = websocket
+        # 多留一个位置给关闭标记 None，正常关闭时不必丢弃已入队的消息
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size + 1)
+        self.queue_size = queue_size
+        self.sender: Optional[asyncio.Task] = None
+        self.connected = True
+        self.close_code = NORMAL_CLOSE_CODE
+        # 赢得的回合数、答对题数、答对题目的累计用时（毫秒）
+        self.wins = 0
+        self.correct = 0
+        self.total_time = 0
+
+    def send(self, payload: str) -> bool:
+        """入队一条已序列化的消息（不阻塞）；队列已满返回 False"""
+        if not self.connected:
+            return True
+        if self.queue.qsize() >= self.queue_size:
+            return False
+        self.queue.put_nowait(payload)
+        return True
+
+    def disconnect(self, code: int) -> None:
+        """
+        断开连接：放入 None 唤醒发送任务关闭连接
+
+        正常关闭时已入队的消息先发完；慢消费者丢弃积压直接关闭。
+        """
+        if not self.connected:
+            return
+        self.connected = False
+        self.close_code = code
+        if code == SLOW_CONSUMER_CLOSE_CODE:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def run_sender(self) -> None:
+        """发送任务：逐条发送队列中的消息，取到 None 时关闭连接"""
+        try:
+            while True:
+                payload = await self.queue.get()
+                if payload is None:
+                    await self.websocket.close(code=self.close_code)
+                    return
+                await self.websocket.send_text(payload)
+        except Exception:
+            # 连接已断开，由接收循环负责清理
+            self.connected = False
+
+    def score(self) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "nickname": self.nickname,
+            "wins": self.wins,
+            "correct": self.correct,
+            "total_time": self.total_time,
+        }
+
+
+class BattleRoom:
+    """一个多人抢答房间"""
+
+    # 回合结果公布后到下一题下发的间隔（秒）
+    INTERMISSION_SECONDS = 2.0
+
+    def __init__(
+        self,
+        room_id: str,
+        host_id: int,
+        questions: List[RoundQuestion],
+        round_seconds: float = 20.0,
+        max_players: int = 50,
+        idle_seconds: float = 300.0,
+        queue_size: int = 32,
+        intermission: Optional[float] = None,
+    ):
+        self.room_id = room_id
+        self.host_id = host_id
+        self.questions = questions
+        self.round_seconds = round_seconds
+        self.max_players = max_players
+        self.idle_seconds = idle_seconds
+        self.queue_size = queue_size
+        self.intermission = self.INTERMISSION_SECONDS if intermission is None else intermission
+        # waiting -> playing -> finished
+        self.state = "waiting"
+        self.players: Dict[int, RoomPlayer] = {}
+        self._started = asyncio.Event()
+        self._round_done = asyncio.Event()
+        # 当前回合：序号、下发时间（time.monotonic）、已作答 {user_id: (答案, 用时毫秒)}、获胜者
+        self.round = -1
+        self.round_started_at = 0.0
+        self.buzzes: Dict[int, tuple] = {}
+        self.round_winner: Optional[int] = None
+        self.dropped = 0
+
+    @property
+    def current(self) -> Optional[RoundQuestion]:
+        if self.state != "playing" or not 0 <= self.round < len(self.questions):
+            return None
+        return self.questions[self.round]
+
+    def connected_count(self) -> int:
+        return sum(1 for p in self.players.values() if p.connected)
+
+    # ==================== 玩家 ====================
+
+    def join(self, user_id: int, nickname: str, websocket) -> RoomPlayer:
+        """
+        玩家加入（同一用户重连时替换旧连接并保留成绩）
+
+        Raises:
+            ValueError: 房间已结束、已开始或已满
+        """
+        existing = self.players.get(user_id)
+        if self.state == "finished":
+            raise ValueError("Room finished")
+        if existing is None:
+            if self.state != "waiting":
+                raise ValueError("Room already started")
+            if len(self.players) >= self.max_players:
+                raise ValueError("Room is full")
+
+        player = RoomPlayer(user_id, nickname, websocket, self.queue_size)
+        if existing is not None:
+            existing.disconnect(NORMAL_CLOSE_CODE)
+            player.wins, player.correct, player.total_time = existing.wins, existing.correct, existing.total_time
+        self.players[user_id] = player
+        player.sender = asyncio.create_task(player.run_sender())
+        self.broadcast({"type": "joined", "room": self.snapshot()})
+        return player
+
+    def leave(self, player: RoomPlayer) -> None:
+        """玩家连接断开；对战开始前移出房间，开始后保留成绩"""
+        player.disconnect(NORMAL_CLOSE_CODE)
+        if self.players.get(player.user_id) is not player:
+            return
+        if self.state == "waiting":
+            del self.players[player.user_id]
+            if player.user_id == self.host_id and self.players:
+                self.host_id = next(iter(self.players))
+            self.broadcast({"type": "left", "room": self.snapshot()})
+        elif self.state == "playing" and len(self.buzzes) >= self.connected_count():
+            self._round_done.set()
+        if not self.connected_count():
+            # 所有人都离开：提前结束房间任务
+            self._started.set()
+            self._round_done.set()
+
+    def start(self, user_id: int) -> None:
+        """房主开始对战"""
+        if user_id != self.host_id:
+            raise ValueError("Only the host can start")
+        if self.state != "waiting":
+            raise ValueError("Room already started")
+        self._started.set()
+
+    # ==================== 广播 ====================
+
+    def broadcast(self, message: Dict[str, Any]) -> None:
+        """广播到全部在线玩家：只序列化一次，只入队不等待发送"""
+        payload = json.dumps(message, ensure_ascii=False)
+        slow = [p for p in self.players.values() if not p.send(payload)]
+        for player in slow:
+            self.dropped += 1
+            player.disconnect(SLOW_CONSUMER_CLOSE_CODE)
+
+    def send_to(self, player: RoomPlayer, message: Dict[str, Any]) -> None:
+        """单独发送给一名玩家"""
+        if not player.send(json.dumps(message, ensure_ascii=False)):
+            self.dropped += 1
+            player.disconnect(SLOW_CONSUMER_CLOSE_CODE)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "room_id": self.room_id,
+            "host_id": self.host_id,
+            "state": self.state,
+            "rounds": len(self.questions),
+            "players": [
+                {"user_id": p.user_id, "nickname": p.nickname}
+                for p in self.players.values() if p.connected
+            ],
+        }
+
+    # ==================== 抢答 ====================
+
+    def submit(self, user_id: int, question_id: int, answer: str) -> Dict[str, Any]:
+        """
+        处理一次抢答：先记录服务端收到时间，再判定
+
+        Returns:
+            dict: 回执 {"type": "buzz_ack", ...}，同时已入队发送给该玩家
+
+        Raises:
+            ValueError: 不在房间、不是当前题目、答案无效或本回合已作答
+        """
+        received_at = time.monotonic()
+        player = self.players.get(user_id)
+        if player is None:
+            raise ValueError("Not in room")
+        current = self.current
+        if current is None or current.question.id != question_id or self._round_done.is_set():
+            raise ValueError("Question not open")
+        # 答案来自客户端 JSON，可能是列表/对象（不可哈希），先检查类型
+        if not isinstance(answer, str) or answer not in VALID_ANSWERS:
+            raise ValueError("Invalid answer")
+        if user_id in self.buzzes:
+            raise ValueError("Already answered")
+
+        answer_time = int((received_at - self.round_started_at) * 1000)
+        self.buzzes[user_id] = (answer, answer_time)
+        ack = {
+            "type": "buzz_ack",
+            "question_id": question_id,
+            "answer_time": answer_time,
+            "order": len(self.buzzes),
+        }
+        self.send_to(player, ack)
+
+        if answer == current.correct_answer and self.round_winner is None:
+            self.round_winner = user_id
+            self._round_done.set()
+        elif len(self.buzzes) >= self.connected_count():
+            self._round_done.set()
+        return ack
+
+    async def run(self) -> None:
+        """房间任务：等待房主开始，逐回合下发题目、收集抢答、公布结果"""
+        try:
+            try:
+                await asyncio.wait_for(self._started.wait(), self.idle_seconds)
+            except asyncio.TimeoutError:
+                self.broadcast({"type": "closed", "reason": "idle"})
+                return
+            if not self.connected_count():
+                return
+
+            self.state = "playing"
+            total = len(self.questions)
+            for index, current in enumerate(self.questions):
+                self.round = index
+                self.buzzes = {}
+                self.round_winner = None
+                self._round_done.clear()
+                self.round_started_at = time.monotonic()
+                self.broadcast({
+                    "type": "question",
+                    "round": index + 1,
+                    "total": total,
+                    "time_limit": int(self.round_seconds * 1000),
+                    "question": current.question.model_dump(),
+                })
+                try:
+                    await asyncio.wait_for(self._round_done.wait(), self.round_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                # 回合已结束，迟到的答案被拒绝
+                self._round_done.set()
+                self.broadcast(self._round_result(index, current))
+                if not self.connected_count():
+                    return
+                if self.intermission and index + 1 < total:
+                    await asyncio.sleep(self.intermission)
+
+            self.state = "finished"
+            self.broadcast({"type": "finished", "ranking": self.ranking()})
+        finally:
+            self.state = "finished"
+            for player in self.players.values():
+                player.disconnect(NORMAL_CLOSE_CODE)
+
+    def _round_result(self, index: int, current: RoundQuestion) -> Dict[str, Any]:
+        """结算本回合并生成结果消息"""
+        buzzes = []
+        for user_id, (answer, answer_time) in sorted(self.buzzes.items(), key=lambda item: item[1][1]):
+            is_correct = answer == current.correct_answer
+            player = self.players[user_id]
+            if is_correct:
+                player.correct += 1
+                player.total_time += answer_time
+            buzzes.append({
+                "user_id": user_id,
+                "answer": answer,
+                "answer_time": answer_time,
+                "is_correct": is_correct,
+            })
+        if self.round_winner is not None:
+            self.players[self.round_winner].wins += 1
+        return {
+            "type": "round_result",
+            "round": index + 1,
+            "question_id": current.question.id,
+            "correct_answer": current.correct_answer,
+            "winner": self.round_winner,
+            "buzzes": buzzes,
+            "scores": [p.score() for p in self.players.values()],
+        }
+
+    def ranking(self) -> List[Dict[str, Any]]:
+        """排名：赢得回合数 > 答对数 > 答对总用时"""
+        players = sorted(self.players.values(), key=lambda p: (-p.wins, -p.correct, p.total_time))
+        return [dict(p.score(), rank=rank) for rank, p in enumerate(players, 1)]
+
+
+class RoomManager:
+    """房间管理：创建房间并为每个房间启动一个任务，任务结束后移除房间"""
+
+    def __init__(
+        self,
+        round_seconds: float = 20.0,
+        max_players: int = 50,
+        idle_seconds: float = 300.0,
+        queue_size: int = 32,
+        intermission: Optional[float] = None,
+    ):
+        self.round_seconds = round_seconds
+        self.max_players = max_players
+        self.idle_seconds = idle_seconds
+        self.queue_size = queue_size
+        self.intermission = intermission
+        self._rooms: Dict[str, BattleRoom] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def create(self, host_id: int, questions: List[RoundQuestion]) -> BattleRoom:
+        """创建房间并启动房间任务"""
+        room_id = secrets.token_urlsafe(6)
+        while room_id in self._rooms:
+            room_id = secrets.token_urlsafe(6)
+        room = BattleRoom(
+            room_id,
+            host_id,
+            questions,
+            round_seconds=self.round_seconds,
+            max_players=self.max_players,
+            idle_seconds=self.idle_seconds,
+            queue_size=self.queue_size,
+            intermission=self.intermission,
+        )
+        self._rooms[room_id] = room
+        task = asyncio.create_task(room.run())
+        self._tasks[room_id] = task
+        task.add_done_callback(lambda t, rid=room_id: self._remove(rid, t))
+        return room
+
+    def get(self, room_id: str) -> Optional[BattleRoom]:
+        return self._rooms.get(room_id)
+
+    def _remove(self, room_id: str, task: asyncio.Task) -> None:
+        self._rooms.pop(room_id, None)
+        self._tasks.pop(room_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("抢答房间 %s 异常结束", room_id, exc_info=task.exception())
+
+    async def stop(self) -> None:
+        """取消全部房间任务（应用关闭时调用）"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rooms": len(self._rooms),
+            "players": sum(room.connected_count() for room in self._rooms.values()),
+            "dropped": sum(room.dropped for room in self._rooms.values()),
+        }
+
+
+# 全局房间管理器
+battle_rooms = RoomManager(
+    round_seconds=settings.SPEED_QUIZ_ROUND_SECONDS,
+    max_players=settings.SPEED_QUIZ_ROOM_MAX_PLAYERS,
+    idle_seconds=settings.SPEED_QUIZ_ROOM_IDLE_SECONDS,
+    queue_size=settings.SPEED_QUIZ_ROOM_QUEUE_SIZE,
+)
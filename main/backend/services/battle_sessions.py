@@ -0,0 +1,451 @@
+"""
+抢答对战会话存储
+
+对战进行中的状态全部放在内存，按 battle_id 索引：
+- 开始对战时一次性抽好全部题目（含正确答案和难度），之后每回合的判定不读库
+- 回合计数在内存中前移，每回合的明细追加到会话
+- 对战结束时用一个事务写入：批量插入全部明细 + 按明细重算对战行的统计 + 增量更新战绩汇总
+- 超过 ttl_seconds 未提交答案的会话由后台任务定期清扫，按同样方式写入已完成的回合；
+  会话数超过上限时淘汰最久未活动的会话并写入；应用关闭时写入全部会话
+- 写入失败的会话放回待写队列由清扫重试，超过 MAX_PERSIST_ATTEMPTS 次后放弃并记录日志
+
+多 worker 部署时，回合请求落到没有该会话的进程会按对战行上的题目计划（question_ids）
+和已落库的明细重建会话，并按题目ID定位回合：
+- 重建的会话每回合立即写入明细；(battle_id, question_id) 唯一，已由其他进程写入的回合被拒绝
+- 原进程内存中尚未写入的回合对重建方不可见，写入时与已落库的回合冲突的明细被丢弃
+- 对战行统计每次写入后按已落库的明细重算（UPDATE ... RETURNING），不依赖各进程的内存计数
+- 战绩汇总由 finished_at 认领：明细数等于 total_questions 时才认领，每场对战只计入一次，
+  胜负取认领时数据库中的统计
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import case, func, select, update
+
+from core.config import settings
+from core.database import AsyncSessionLocal, dialect_insert
+from models.db import Question, SpeedQuizBattle, SpeedQuizDetail
+from models.schema import QuestionResponse
+from services.leaderboard import leaderboard
+from services.speed_quiz_stats import BattleOutcome, record_battles
+
+logger = logging.getLogger(__name__)
+
+
+class RoundQuestion(NamedTuple):
+    """一回合的题目：下发给客户端的内容 + 服务端判定所需的答案和难度"""
+    question: QuestionResponse
+    correct_answer: str
+    difficulty: int
+
+    @classmethod
+    def from_question(cls, question: Question) -> "RoundQuestion":
+        return cls(QuestionResponse.from_orm(question), question.correct_answer, question.difficulty)
+
+
+class BattleSession:
+    """一场进行中的对战"""
+
+    __slots__ = (
+        "battle_id", "user_id", "difficulty", "module", "questions", "round",
+        "details", "touched_at", "write_through", "attempts",
+    )
+
+    def __init__(
+        self,
+        battle_id: int,
+        user_id: int,
+        difficulty: int,
+        module: str,
+        questions: List[RoundQuestion]
+    ):
+        self.battle_id = battle_id
+        self.user_id = user_id
+        self.difficulty = difficulty
+        self.module = module
+        self.questions = questions
+        # 当前回合（从 0 开始），等于已完成的回合数
+        self.round = 0
+        # 待写入的明细（speed_quiz_details 的列值）
+        self.details: List[Dict] = []
+        self.touched_at = time.monotonic()
+        # 从数据库重建的会话：对战可能同时在其他进程进行，每回合立即写入
+        self.write_through = False
+        # 写入失败次数
+        self.attempts = 0
+
+    @classmethod
+    def restore(
+        cls,
+        battle: SpeedQuizBattle,
+        questions: List[RoundQuestion],
+        answered: Set[int]
+    ) -> "BattleSession":
+        """按对战行和已落库明细的题目ID重建会话，从最后一道已答题目之后继续"""
+        session = cls(battle.id, battle.user_id, battle.difficulty, battle.module, questions)
+        session.write_through = True
+        for index, question in enumerate(questions):
+            if question.question.id in answered:
+                session.round = index + 1
+        return session
+
+    @property
+    def current(self) -> Optional[RoundQuestion]:
+        """当前回合的题目，全部答完时为 None"""
+        return self.questions[self.round] if self.round < len(self.questions) else None
+
+    @property
+    def finished(self) -> bool:
+        return self.round >= len(self.questions)
+
+    def seek(self, question_id: int) -> bool:
+        """
+        定位到题目所在的回合
+
+        中间跳过的回合由其他进程处理；已经过去的回合和不属于本场的题目返回 False
+        """
+        for index in range(self.round, len(self.questions)):
+            if self.questions[index].question.id == question_id:
+                self.round = index
+                return True
+        return False
+
+    def record_round(
+        self,
+        user_answer: str,
+        user_time: int,
+        ai_answer: str,
+        ai_time: int,
+        winner: str
+    ) -> None:
+        """把当前回合的结果计入会话并进入下一回合"""
+        current = self.current
+        self.details.append({
+            "battle_id": self.battle_id,
+            "question_id": current.question.id,
+            "user_answer": user_answer,
+            "user_time": user_time,
+            "ai_answer": ai_answer,
+            "ai_time": ai_time,
+            "correct_answer": current.correct_answer,
+            "winner": winner,
+            "created_at": datetime.utcnow(),
+        })
+        self.round += 1
+
+    def undo_round(self) -> None:
+        """撤销最后一回合（立即写入失败或该回合已由其他进程写入）"""
+        self.details.pop()
+        self.round -= 1
+
+
+class BattleSessionStore:
+    """对战会话存储"""
+
+    # 后台清扫间隔（秒）
+    SWEEP_INTERVAL = 30.0
+    # 单场对战的最大写入尝试次数
+    MAX_PERSIST_ATTEMPTS = 5
+
+    def __init__(self, ttl_seconds: float = 900.0, max_sessions: int = 10000, session_factory=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._session_factory = session_factory or AsyncSessionLocal
+        # 按最近活动时间排序（最久未活动的在前）
+        self._sessions: "OrderedDict[int, BattleSession]" = OrderedDict()
+        # 因超出上限被淘汰或写入失败、等待后台写入的会话
+        self._evicted: List[BattleSession] = []
+        self._task: Optional[asyncio.Task] = None
+        self.persisted = 0
+        self.failed = 0
+        self.restored = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动后台清扫任务"""
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止清扫任务，并写入全部未结束的会话"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        sessions = self._evicted + list(self._sessions.values())
+        self._evicted = []
+        self._sessions.clear()
+        await self._persist_with_new_session(sessions)
+        if self._evicted:
+            self.failed += len(self._evicted)
+            logger.error("应用关闭时仍有 %d 场抢答对战未能写入", len(self._evicted))
+            self._evicted = []
+
+    def add(self, session: BattleSession) -> None:
+        """登记新会话，超出上限时淘汰最久未活动的会话"""
+        self._sessions[session.battle_id] = session
+        while len(self._sessions) > self.max_sessions:
+            _, oldest = self._sessions.popitem(last=False)
+            self._evicted.append(oldest)
+
+    def get(self, battle_id: int, user_id: int) -> Optional[BattleSession]:
+        """取出用户自己的会话并刷新活动时间"""
+        session = self._sessions.get(battle_id)
+        if session is None or session.user_id != user_id:
+            return None
+        session.touched_at = time.monotonic()
+        self._sessions.move_to_end(battle_id)
+        return session
+
+    async def resolve(self, db, battle_id: int, user_id: int) -> Optional[BattleSession]:
+        """
+        取出用户自己的会话；本进程内存中没有时从数据库重建
+
+        对战不存在、不属于该用户、已结束或没有题目计划时返回 None
+        """
+        session = self.get(battle_id, user_id)
+        if session is not None:
+            return session
+
+        battle = await db.get(SpeedQuizBattle, battle_id)
+        if battle is None or battle.user_id != user_id or battle.finished_at is not None or not battle.question_ids:
+            return None
+        planned = [int(question_id) for question_id in battle.question_ids.split(",")]
+        result = await db.execute(select(Question).where(Question.id.in_(planned)))
+        questions = {q.id: q for q in result.scalars().all()}
+        result = await db.execute(
+            select(SpeedQuizDetail.question_id).where(SpeedQuizDetail.battle_id == battle_id)
+        )
+        answered = set(result.scalars().all())
+
+        # 重建期间可能有并发请求已建立会话，以先到者为准
+        session = self.get(battle_id, user_id)
+        if session is not None:
+            return session
+        session = BattleSession.restore(
+            battle, [RoundQuestion.from_question(questions[q]) for q in planned if q in questions], answered
+        )
+        self.add(session)
+        self.restored += 1
+        return session
+
+    async def save_round(self, db, session: BattleSession) -> bool:
+        """
+        重建的会话立即写入刚记录的回合（其他会话的回合留在内存，返回 True）
+
+        Returns:
+            bool: 该回合已由其他进程写入时撤销并返回 False
+
+        Raises:
+            写入失败时撤销该回合并抛出原异常
+        """
+        if not session.write_through or not session.details:
+            return True
+        table = SpeedQuizDetail.__table__
+        stmt = (
+            dialect_insert(db, table)
+            .values(session.details[-1])
+            .on_conflict_do_nothing(index_elements=["battle_id", "question_id"])
+            .returning(table.c.id)
+        )
+        try:
+            if (await db.execute(stmt)).first() is None:
+                await db.rollback()
+                session.undo_round()
+                return False
+            await self._settle(db, [session.battle_id])
+        except Exception:
+            await db.rollback()
+            session.undo_round()
+            raise
+        session.details = []
+        return True
+
+    async def finish(self, db, session: BattleSession) -> None:
+        """对战结束：移出内存并写入；写入失败时交给后台清扫重试"""
+        self._sessions.pop(session.battle_id, None)
+        try:
+            await self.persist(db, [session])
+        except Exception:
+            logger.exception("抢答对战 %s 写入失败，稍后重试", session.battle_id)
+            await db.rollback()
+            self._retry_later([session])
+
+    async def sweep(self, now: Optional[float] = None) -> int:
+        """
+        写入并移除过期会话和被淘汰的会话
+
+        Returns:
+            int: 写入的会话数
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        # 有序字典最前面是最久未活动的会话，遇到未过期的即可停止
+        while self._sessions:
+            battle_id, session = next(iter(self._sessions.items()))
+            if now - session.touched_at < self.ttl_seconds:
+                break
+            del self._sessions[battle_id]
+            expired.append(session)
+        sessions = self._evicted + expired
+        self._evicted = []
+        await self._persist_with_new_session(sessions)
+        return len(sessions)
+
+    async def persist(self, db, sessions: List[BattleSession]) -> None:
+        """
+        一个事务写入若干会话：批量插入明细 + 重算对战行统计 + 认领并增量更新战绩汇总
+
+        与已落库回合冲突的明细（其他进程已写入同一题）被丢弃，统计按落库的明细重算，不会重复计入。
+
+        Args:
+            db: 数据库会话
+            sessions: 要写入的对战会话
+        """
+        if not sessions:
+            return
+        details = [detail for s in sessions for detail in s.details]
+        if details:
+            table = SpeedQuizDetail.__table__
+            await db.execute(
+                dialect_insert(db, table).on_conflict_do_nothing(index_elements=["battle_id", "question_id"]),
+                details
+            )
+            await self._settle(db, sorted({detail["battle_id"] for detail in details}))
+        self.persisted += len(sessions)
+
+    async def _settle(self, db, battle_ids: List[int]) -> None:
+        """
+        按已落库的明细重算对战行统计，认领明细已齐的对战并计入战绩汇总，然后提交
+
+        胜负取 UPDATE ... RETURNING 返回的数据库统计、最快用时取已落库的明细，与各进程内存中的回合无关
+        """
+        battles = SpeedQuizBattle.__table__
+        details = SpeedQuizDetail.__table__
+
+        def count(*conditions):
+            return (
+                select(func.count())
+                .where(details.c.battle_id == battles.c.id, *conditions)
+                .scalar_subquery()
+            )
+
+        user_correct = details.c.user_answer == details.c.correct_answer
+        result = await db.execute(
+            update(battles)
+            .where(battles.c.id.in_(battle_ids))
+            .values(
+                user_correct=count(user_correct),
+                ai_correct=count(details.c.ai_answer == details.c.correct_answer),
+                user_wins=count(details.c.winner == "user"),
+                ai_wins=count(details.c.winner == "ai"),
+            )
+            .returning(
+                battles.c.id, battles.c.user_id, battles.c.user_wins, battles.c.ai_wins,
+                battles.c.total_questions, battles.c.finished_at,
+            )
+        )
+        totals = {row.id: row for row in result.all() if row.finished_at is None}
+
+        # 尚未结束的对战：已落库的回合数和答对题目的最快用时
+        progress = {}
+        if totals:
+            result = await db.execute(
+                select(
+                    details.c.battle_id,
+                    func.count(),
+                    func.min(case((user_correct, details.c.user_time))),
+                )
+                .where(details.c.battle_id.in_(list(totals)))
+                .group_by(details.c.battle_id)
+            )
+            progress = {battle_id: (answered, fastest) for battle_id, answered, fastest in result.all()}
+        candidates = {}
+        for battle_id, row in totals.items():
+            answered, fastest = progress.get(battle_id, (0, None))
+            if answered >= row.total_questions:
+                candidates[battle_id] = BattleOutcome(
+                    user_id=row.user_id,
+                    win=row.user_wins > row.ai_wins,
+                    loss=row.user_wins < row.ai_wins,
+                    fastest_time=fastest,
+                )
+
+        # 认领：明细已齐且 finished_at 仍为空的对战才计入战绩，其他进程已计入的跳过
+        claimed = set()
+        if candidates:
+            result = await db.execute(
+                update(battles)
+                .where(battles.c.id.in_(list(candidates)), battles.c.finished_at.is_(None))
+                .values(finished_at=datetime.utcnow())
+                .returning(battles.c.id)
+            )
+            claimed = set(result.scalars().all())
+        # 按 battle_id（即开始顺序）累计连胜
+        outcomes = [candidates[battle_id] for battle_id in sorted(claimed)]
+        await record_battles(db, outcomes)
+        await db.commit()
+        for outcome in outcomes:
+            if outcome.win:
+                leaderboard.record_battle_win(outcome.user_id)
+
+    async def _persist_with_new_session(self, sessions: List[BattleSession]) -> None:
+        if not sessions:
+            return
+        try:
+            async with self._session_factory() as db:
+                await self.persist(db, sessions)
+            return
+        except Exception:
+            logger.exception("抢答对战会话写入失败（%d 场）", len(sessions))
+        if len(sessions) == 1:
+            self._retry_later(sessions)
+            return
+        # 逐场重试，避免一场写不进去的对战拖累同批的其他对战
+        for session in sessions:
+            try:
+                async with self._session_factory() as db:
+                    await self.persist(db, [session])
+            except Exception:
+                logger.exception("抢答对战 %s 写入失败", session.battle_id)
+                self._retry_later([session])
+
+    def _retry_later(self, sessions: List[BattleSession]) -> None:
+        """放回待写队列，由下一次清扫重试；超过尝试上限的放弃"""
+        for session in sessions:
+            session.attempts += 1
+            if session.attempts < self.MAX_PERSIST_ATTEMPTS:
+                self._evicted.append(session)
+            else:
+                self.failed += 1
+                logger.error(
+                    "抢答对战 %s 连续 %d 次写入失败，放弃写入（%d 个回合）",
+                    session.battle_id, session.attempts, len(session.details)
+                )
+
+    async def _run(self) -> None:
+        """后台循环：定期清扫过期会话"""
+        while True:
+            await asyncio.sleep(self.SWEEP_INTERVAL)
+            await self.sweep()
+
+
+# 全局会话存储（应用启动时 start）
+battle_sessions = BattleSessionStore(
+    ttl_seconds=settings.SPEED_QUIZ_SESSION_TTL_SECONDS,
+    max_sessions=settings.SPEED_QUIZ_MAX_SESSIONS,
+)
@@ -0,0 +1,530 @@
+"""
+诊断检测器框架
+
+每个文件只解析一次 AST，所有已注册的检测器在同一次遍历中被调用：
+- 检测器继承 Detector，实现 visit_<节点类型>(node) 方法，用 @register 注册
+- 遍历时维护作用域上下文：当前函数是否为 async、是否处于循环体内、
+  函数内由 select(...) 构造的查询语句及其执行结果变量（是否带 limit/order_by 等）
+- 检测结果为 Finding（可 pickle），analyze_source 是顶层函数，可直接提交到进程池；
+  进程池用 init_pool_worker 初始化 worker（关闭 GC）
+
+内置检测器：
+- AwaitInLoopQuery:   循环体内的数据库调用（N+1）
+- UnboundedAll:       未加 limit 的 .all() 全量加载
+- MissingLimit:       order_by 后取首行但未 .limit(1)
+- SyncIOInAsync:      async 函数中的同步 I/O
+- MissingEncoding:    read_text() 未指定编码（可自动修复）
+- MissingReturnType:  函数缺少返回类型注解
+- HardcodedSecret:    硬编码密钥/密码
+"""
+import ast
+import gc
+from typing import Callable, Dict, List, NamedTuple, Optional, Type
+
+
+class Finding(NamedTuple):
+    """单条检测结果（行号从 1 开始）"""
+    category: str
+    severity: str
+    title: str
+    line: int
+    description: str
+    suggestion: str
+    auto_fixable: bool = False
+    fix_code: Optional[str] = None
+
+
+class QueryInfo(NamedTuple):
+    """查询语句链上可见的特征"""
+    limit: bool
+    order_by: bool
+    group_by: bool
+    aggregate: bool
+    legacy: bool  # session.query(...) 旧式查询
+
+    @property
+    def single_row(self) -> bool:
+        """无 group_by 的聚合查询只返回一行"""
+        return self.aggregate and not self.group_by
+
+
+# 执行查询的会话方法
+EXECUTE_METHODS = {"execute", "scalars", "stream", "stream_scalars"}
+# 结果包装方法（不改变行数）
+RESULT_WRAPPERS = {"scalars", "mappings", "unique", "tuples"}
+# 循环内视为数据库往返的会话方法
+DB_CALL_METHODS = {"execute", "scalar", "scalars", "get", "query", "stream", "refresh"}
+# 会话变量名
+SESSION_NAMES = {"db", "session", "conn", "connection"}
+
+
+def receiver_name(node: ast.AST) -> str:
+    """属性调用接收者的末尾名称：db.execute -> db，self.session.get -> session"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def is_session(node: ast.AST) -> bool:
+    name = receiver_name(node).lower()
+    return name in SESSION_NAMES or name.endswith("session")
+
+
+def call_name(node: ast.Call) -> str:
+    """调用的完整名称：time.sleep、open、requests.get；其他情况为空"""
+    func = node.func
+    if isinstance(func, ast.Name):
+        return func.id
+    if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+        return f"{func.value.id}.{func.attr}"
+    return ""
+
+
+class Scope:
+    """函数作用域：循环深度、查询语句变量、查询结果变量"""
+
+    __slots__ = ("node", "loop_depth", "queries", "results")
+
+    def __init__(self, node: Optional[ast.AST]):
+        self.node = node
+        self.loop_depth = 0
+        self.queries: Dict[str, QueryInfo] = {}
+        self.results: Dict[str, QueryInfo] = {}
+
+
+class FileContext:
+    """单个文件的遍历上下文"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.findings: List[Finding] = []
+        self._scopes = [Scope(None)]
+
+    @property
+    def scope(self) -> Scope:
+        return self._scopes[-1]
+
+    @property
+    def in_async(self) -> bool:
+        return isinstance(self.scope.node, ast.AsyncFunctionDef)
+
+    @property
+    def in_loop(self) -> bool:
+        return self.scope.loop_depth > 0
+
+    def push(self, node: ast.AST) -> None:
+        self._scopes.append(Scope(node))
+
+    def pop(self) -> None:
+        self._scopes.pop()
+
+    def query_info(self, node: ast.AST) -> Optional[QueryInfo]:
+        """解析查询语句链；链根不是 select(...) / session.query(...) / 已知语句变量时返回 None"""
+        methods = set()
+        while isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            attr = node.func.attr
+            if attr == "query" and is_session(node.func.value):
+                return self._info(methods, legacy=True)
+            if attr == "select" and isinstance(node.func.value, ast.Name):
+                # sa.select(...)
+                return self._info(methods, aggregate=self._aggregate(node))
+            methods.add(attr)
+            node = node.func.value
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "select":
+            return self._info(methods, aggregate=self._aggregate(node))
+        if isinstance(node, ast.Name) and node.id in self.scope.queries:
+            return self._info(methods, base=self.scope.queries[node.id])
+        return None
+
+    def executed_query(self, node: ast.AST) -> Optional[QueryInfo]:
+        """查询执行结果对应的语句特征：await db.execute(stmt)、db.scalars(stmt) 或结果变量"""
+        while (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr in RESULT_WRAPPERS and not node.args
+        ):
+            node = node.func.value
+        if isinstance(node, ast.Await):
+            node = node.value
+        if isinstance(node, ast.Name):
+            return self.scope.results.get(node.id)
+        if (
+            isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr in EXECUTE_METHODS and node.args
+        ):
+            return self.query_info(node.args[0])
+        return None
+
+    def track_assign(self, node: ast.Assign) -> None:
+        """记录 stmt = select(...) 和 result = await db.execute(stmt) 两类赋值"""
+        if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            return
+        name = node.targets[0].id
+        scope = self.scope
+        scope.queries.pop(name, None)
+        scope.results.pop(name, None)
+        executed = self.executed_query(node.value)
+        if executed is not None:
+            scope.results[name] = executed
+            return
+        info = self.query_info(node.value)
+        if info is not None:
+            scope.queries[name] = info
+
+    @staticmethod
+    def _aggregate(select_call: ast.Call) -> bool:
+        """select(func.count(...)) 之类的聚合查询"""
+        return bool(select_call.args) and all(
+            isinstance(arg, ast.Call) and isinstance(arg.func, ast.Attribute)
+            and isinstance(arg.func.value, ast.Name) and arg.func.value.id == "func"
+            for arg in select_call.args
+        )
+
+    @staticmethod
+    def _info(methods, legacy: bool = False, aggregate: bool = False,
+              base: Optional[QueryInfo] = None) -> QueryInfo:
+        return QueryInfo(
+            limit=bool(methods & {"limit", "slice"}) or (base is not None and base.limit),
+            order_by="order_by" in methods or (base is not None and base.order_by),
+            group_by="group_by" in methods or (base is not None and base.group_by),
+            aggregate=aggregate or (base is not None and base.aggregate),
+            legacy=legacy or (base is not None and base.legacy),
+        )
+
+
+class Detector:
+    """
+    检测器基类
+
+    子类实现 visit_<节点类型>(self, node) 方法（如 visit_Call），
+    在同一次遍历中与其他检测器一起被调用；通过 self.ctx 读取作用域上下文。
+    """
+
+    def __init__(self, ctx: FileContext):
+        self.ctx = ctx
+
+    def report(self, node: ast.AST, category: str, severity: str, title: str,
+               description: str, suggestion: str, **fields) -> None:
+        self.ctx.findings.append(Finding(
+            category=category,
+            severity=severity,
+            title=title,
+            line=getattr(node, "lineno", 1),
+            description=description,
+            suggestion=suggestion,
+            **fields
+        ))
+
+
+DETECTORS: List[Type[Detector]] = []
+
+
+def register(cls: Type[Detector]) -> Type[Detector]:
+    """注册检测器（按注册顺序输出结果）"""
+    DETECTORS.append(cls)
+    return cls
+
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)
+LOOP_NODES = (ast.For, ast.AsyncFor)
+COMPREHENSION_NODES = (ast.ListComp, ast.SetComp, ast.GeneratorExp, ast.DictComp)
+
+
+def _leaf_classes() -> set:
+    """不含可检测内容的节点类型（表达式上下文、运算符），遍历时跳过"""
+    leaves = set()
+    pending = [ast.expr_context, ast.operator, ast.boolop, ast.unaryop, ast.cmpop]
+    while pending:
+        cls = pending.pop()
+        leaves.add(cls)
+        pending.extend(cls.__subclasses__())
+    return leaves
+
+
+LEAF_CLASSES = _leaf_classes()
+
+
+class Walker:
+    """单次遍历：先调用各检测器对当前节点的处理方法，再按作用域规则进入子节点"""
+
+    def __init__(self, ctx: FileContext, detectors: List[Type[Detector]]):
+        self.ctx = ctx
+        # 节点类型 -> 处理方法（按类型查表，避免逐个 isinstance）
+        self._handlers: Dict[type, List[Callable[[ast.AST], None]]] = {}
+        for detector_cls in detectors:
+            detector = detector_cls(ctx)
+            for attr in dir(detector):
+                if attr.startswith("visit_"):
+                    node_cls = getattr(ast, attr[6:])
+                    self._handlers.setdefault(node_cls, []).append(getattr(detector, attr))
+        self._special: Dict[type, Callable[[ast.AST], None]] = {}
+        for node_cls in FUNCTION_NODES:
+            self._special[node_cls] = self._walk_function
+        for node_cls in LOOP_NODES:
+            self._special[node_cls] = self._walk_for
+        self._special[ast.While] = self._walk_while
+        for node_cls in COMPREHENSION_NODES:
+            self._special[node_cls] = self._walk_comprehension
+        # 无处理方法的 Name / Constant 也不必进入
+        self._skip = LEAF_CLASSES | {ast.Name, ast.Constant} - set(self._handlers)
+
+    def walk(self, node: ast.AST) -> None:
+        cls = node.__class__
+        if cls is ast.Assign:
+            self.ctx.track_assign(node)
+        handlers = self._handlers.get(cls)
+        if handlers:
+            for handler in handlers:
+                handler(node)
+        special = self._special.get(cls)
+        if special is not None:
+            special(node)
+            return
+        skip = self._skip
+        for field in cls._fields:
+            value = getattr(node, field, None)
+            if value.__class__ is list:
+                for item in value:
+                    if item is not None and item.__class__ not in skip and isinstance(item, ast.AST):
+                        self.walk(item)
+            elif value is not None and value.__class__ not in skip and isinstance(value, ast.AST):
+                self.walk(value)
+
+    def _walk_function(self, node: ast.AST) -> None:
+        # 装饰器、默认值在外层作用域求值
+        self._walk_all(getattr(node, "decorator_list", ()))
+        self.walk(node.args)
+        self.ctx.push(node)
+        self._walk_all(node.body if isinstance(node.body, list) else [node.body])
+        self.ctx.pop()
+
+    def _walk_for(self, node: ast.AST) -> None:
+        self.walk(node.target)
+        self.walk(node.iter)
+        self._walk_loop(node.body)
+        self._walk_all(node.orelse)
+
+    def _walk_while(self, node: ast.While) -> None:
+        self._walk_loop([node.test] + node.body)
+        self._walk_all(node.orelse)
+
+    def _walk_comprehension(self, node: ast.AST) -> None:
+        first, *rest = node.generators
+        self.walk(first.iter)
+        inner: List[ast.AST] = [first.target, *first.ifs, *rest]
+        if isinstance(node, ast.DictComp):
+            inner.extend([node.key, node.value])
+        else:
+            inner.append(node.elt)
+        self._walk_loop(inner)
+
+    def _walk_loop(self, nodes: List[ast.AST]) -> None:
+        self.ctx.scope.loop_depth += 1
+        self._walk_all(nodes)
+        self.ctx.scope.loop_depth -= 1
+
+    def _walk_all(self, nodes) -> None:
+        for child in nodes:
+            self.walk(child)
+
+
+def analyze_source(filename: str, content: str) -> List[Finding]:
+    """
+    解析一个文件并运行全部检测器（顶层函数，可在进程池中执行）
+
+    Args:
+        filename: 文件名（用于描述）
+        content: 文件内容
+
+    Returns:
+        List[Finding]: 检测结果；语法错误的文件返回空列表
+    """
+    try:
+        tree = ast.parse(content, filename=filename)
+    except (SyntaxError, ValueError):
+        return []
+    ctx = FileContext(filename)
+    Walker(ctx, DETECTORS).walk(tree)
+    return ctx.findings
+
+
+def init_pool_worker() -> None:
+    """
+    诊断进程池的 worker 初始化函数
+
+    AST 节点之间没有循环引用，worker 进程只做解析和遍历，关闭分代 GC，
+    避免大量新建节点反复触发无效的 GC 扫描。只能在进程池 worker 中调用：
+    gc.disable() 作用于整个进程，在应用进程内调用会影响所有请求
+    """
+    gc.disable()
+
+
+# ==================== 内置检测器 ====================
+
+@register
+class AwaitInLoopQuery(Detector):
+    """循环体内逐条访问数据库（N+1 查询）"""
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if not (self.ctx.in_loop and isinstance(func, ast.Attribute)):
+            return
+        if func.attr not in DB_CALL_METHODS or not is_session(func.value):
+            return
+        self.report(
+            node, "performance", "Important", "可能存在 N+1 查询问题",
+            f"在 {self.ctx.filename}:{node.lineno} 的循环中调用 "
+            f"{receiver_name(func.value)}.{func.attr}()，每次迭代一次数据库往返",
+            "循环外一次性查询（in_ / joinedload / selectinload）后在内存中按键取用",
+        )
+
+
+@register
+class UnboundedAll(Detector):
+    """未加 limit 的 .all() 全量加载"""
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and func.attr in ("all", "fetchall") and not node.args):
+            return
+        info = self.ctx.executed_query(func.value)
+        if info is None:
+            info = self.ctx.query_info(func.value)
+            if info is not None and not info.legacy:
+                info = None
+        if info is None or info.limit or info.single_row:
+            return
+        self.report(
+            node, "performance", "Suggestion", "未限制行数的 .all() 加载",
+            f"在 {self.ctx.filename}:{node.lineno} 查询未加 limit 即一次性加载全部结果",
+            "加 .limit() 分页（参考 core.pagination 的游标分页），或改为流式/聚合查询",
+        )
+
+
+@register
+class MissingLimit(Detector):
+    """order_by 后只取首行但未加 .limit(1)"""
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if not isinstance(func, ast.Attribute) or func.attr not in ("first", "scalar"):
+            return
+        if node.args:
+            # db.scalar(stmt)
+            if func.attr != "scalar" or not is_session(func.value):
+                return
+            info = self.ctx.query_info(node.args[0])
+        else:
+            info = self.ctx.executed_query(func.value)
+        if info is None or info.legacy or info.limit or info.single_row or not info.order_by:
+            return
+        self.report(
+            node, "performance", "Suggestion", "取首行查询缺少 .limit(1)",
+            f"在 {self.ctx.filename}:{node.lineno} 排序后只取第一行，但 SQL 未带 LIMIT",
+            "在语句上加 .limit(1)，让数据库只返回一行",
+        )
+
+
+# async 函数中会阻塞事件循环的调用
+BLOCKING_CALLS = {
+    "open", "time.sleep", "os.system",
+    "requests.get", "requests.post", "requests.put", "requests.patch",
+    "requests.delete", "requests.head", "requests.request",
+    "subprocess.run", "subprocess.call", "subprocess.check_call",
+    "subprocess.check_output", "subprocess.Popen",
+}
+BLOCKING_METHODS = {"read_text", "write_text", "read_bytes", "write_bytes"}
+
+
+@register
+class SyncIOInAsync(Detector):
+    """async 函数中的同步 I/O"""
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if not self.ctx.in_async:
+            return
+        name = call_name(node)
+        if name not in BLOCKING_CALLS:
+            func = node.func
+            if not (isinstance(func, ast.Attribute) and func.attr in BLOCKING_METHODS):
+                return
+            name = f"{receiver_name(func.value) or '...'}.{func.attr}"
+        self.report(
+            node, "performance", "Important", "async 函数中的同步 I/O",
+            f"在 {self.ctx.filename}:{node.lineno} 的 async 函数中调用 {name}()，会阻塞事件循环",
+            "改用异步库（aiofiles / httpx.AsyncClient / asyncio.sleep），或放入 asyncio.to_thread",
+        )
+
+
+@register
+class MissingEncoding(Detector):
+    """read_text() 未指定编码"""
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and func.attr == "read_text"):
+            return
+        if node.args or node.keywords:
+            return
+        self.report(
+            node, "performance", "Suggestion", "文件读取未指定编码",
+            f"在 {self.ctx.filename}:{node.lineno} 文件读取未指定编码",
+            "使用 read_text(encoding='utf-8') 明确指定编码",
+            auto_fixable=True,
+            fix_code='read_text(encoding="utf-8")',
+        )
+
+
+@register
+class MissingReturnType(Detector):
+    """函数缺少返回类型注解（跳过特殊方法）"""
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        if node.returns is not None or node.name.startswith("__"):
+            return
+        self.report(
+            node, "quality", "Suggestion", f"函数 {node.name} 缺少返回类型注解",
+            f"在 {self.ctx.filename}:{node.lineno} 函数缺少类型注解",
+            "添加返回类型注解，如 def func() -> ReturnType:",
+        )
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+# (名称后缀, 最短长度, 标题)
+SECRET_NAMES = [
+    ("SECRET_KEY", 10, "硬编码 SECRET_KEY"),
+    ("API_KEY", 10, "硬编码 API_KEY"),
+    ("PASSWORD", 1, "硬编码密码"),
+]
+
+
+@register
+class HardcodedSecret(Detector):
+    """变量、属性或关键字参数被赋值为字符串字面量的密钥/密码"""
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            self._check(node, receiver_name(target), node.value)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        if node.value is not None:
+            self._check(node, receiver_name(node.target), node.value)
+
+    def visit_keyword(self, node: ast.keyword) -> None:
+        if node.arg:
+            self._check(node, node.arg, node.value)
+
+    def _check(self, node: ast.AST, name: str, value: ast.AST) -> None:
+        if not (isinstance(value, ast.Constant) and isinstance(value.value, str)):
+            return
+        upper = name.upper()
+        for suffix, min_length, title in SECRET_NAMES:
+            if upper.endswith(suffix) and len(value.value) >= min_length:
+                self.report(
+                    node, "security", "Critical", title,
+                    f"在 {self.ctx.filename}:{node.lineno} 发现硬编码敏感信息",
+                    "使用环境变量存储敏感信息（如 os.getenv('SECRET_KEY')）",
+                )
+                return
@@ -0,0 +1,275 @@
+"""
+进化事件总线（进程内发布/订阅）
+
+- 每个 worker 的 EvolutionTailer 按 (timestamp, id) 水位轮询新事件并发布，
+  其他进程（其他 worker、外部脚本）写入的事件也能推送到本 worker 的客户端
+- 本进程的 ORM 插入在事务提交后立即发布（快速路径），回滚则丢弃；
+  轮询再读到同一事件时按 event_id 去重
+- 每个订阅者（WebSocket 客户端）有一个有界发送队列，发布只做 put_nowait，
+  不等待任何客户端；各客户端由自己的发送任务并发消费
+- 队列满的慢消费者直接断开（关闭码 1013），客户端带 last_event_id 重连即可补齐
+- 最近 EVOLUTION_REPLAY_BUFFER 条事件保留在环形缓冲区中，用于断线续传；
+  更早的事件由调用方回退到数据库查询
+"""
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.db import MonitorEvolutionEvent
+
+logger = logging.getLogger(__name__)
+
+
+class EvolutionSubscriber:
+    """单个订阅者：有界发送队列 + 断开标记"""
+
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """取下一条消息；返回 None 表示已被总线断开"""
+        message = await self.queue.get()
+        if message is None or self.dropped:
+            return None
+        return message
+
+
+class EvolutionEventBus:
+    """进化事件总线"""
+
+    def __init__(self, queue_size: int = 100, replay_size: int = 500):
+        self.queue_size = queue_size
+        self._subscribers: Set[EvolutionSubscriber] = set()
+        # (event_id, message)，按发布顺序
+        self._recent: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=replay_size)
+        self._recent_ids: Set[str] = set()
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> EvolutionSubscriber:
+        """注册订阅者"""
+        subscriber = EvolutionSubscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: EvolutionSubscriber) -> None:
+        """注销订阅者"""
+        self._subscribers.discard(subscriber)
+
+    def publish(self, message: Dict[str, Any], event_id: Optional[str] = None) -> None:
+        """
+        发布消息到所有订阅者（不阻塞）
+
+        提供 event_id 的消息进入续传缓冲区，缓冲区中已有的 event_id 不重复发布；
+        队列已满的订阅者被断开。
+        """
+        if event_id is not None:
+            if event_id in self._recent_ids:
+                return
+            if len(self._recent) == self._recent.maxlen:
+                self._recent_ids.discard(self._recent[0][0])
+            self._recent.append((event_id, message))
+            self._recent_ids.add(event_id)
+        self.published += 1
+
+        slow = []
+        for subscriber in self._subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                slow.append(subscriber)
+        for subscriber in slow:
+            self._drop(subscriber)
+
+    def replay_after(self, event_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        返回缓冲区中 event_id 之后发布的消息
+
+        event_id 已不在缓冲区中时返回 None，调用方需回退到数据库查询。
+        """
+        for index, (recent_id, _) in enumerate(self._recent):
+            if recent_id == event_id:
+                return [message for _, message in list(self._recent)[index + 1:]]
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        """总线统计"""
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": self.dropped,
+            "buffered": len(self._recent),
+        }
+
+    def _drop(self, subscriber: EvolutionSubscriber) -> None:
+        """断开慢消费者：清空队列并放入 None 唤醒其发送任务"""
+        self._subscribers.discard(subscriber)
+        subscriber.dropped = True
+        self.dropped += 1
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+
+def event_message(row) -> Dict[str, Any]:
+    """把进化事件行（ORM 对象或列投影行）转换为推送消息"""
+    diff = None
+    if row.diff_before and row.diff_after:
+        diff = {"before": row.diff_before, "after": row.diff_after, "impact": row.diff_impact or ""}
+    return {
+        "type": "evolution_event",
+        "data": {
+            "id": row.event_id,
+            "timestamp": row.timestamp.isoformat(),
+            "agent": row.agent,
+            "strategy": row.strategy,
+            "description": row.description,
+            "reward": row.reward / 10.0,  # 转换回 0-10 范围
+            "diff": diff,
+        },
+    }
+
+
+# 全局进化事件总线
+evolution_bus = EvolutionEventBus(
+    queue_size=settings.EVOLUTION_WS_QUEUE_SIZE,
+    replay_size=settings.EVOLUTION_REPLAY_BUFFER,
+)
+
+
+class EvolutionTailer:
+    """
+    进化事件轮询器（每个 worker 一个）
+
+    按 (timestamp, id) 水位走 ix_monitor_evolution_events_timestamp_id 索引读取新事件并发布。
+    启动时水位取表中最新一条，历史事件不再推送；时间戳早于水位的补录事件
+    （如 populate_monitor_data.py 生成的历史数据）不推送，客户端刷新事件流即可看到。
+    """
+
+    # 每次查询最多读取的事件数，超出时继续下一页
+    PAGE_SIZE = 200
+
+    def __init__(
+        self,
+        interval_seconds: float = 2.0,
+        bus: Optional[EvolutionEventBus] = None,
+        session_factory=None
+    ):
+        self.interval_seconds = interval_seconds
+        self.bus = bus or evolution_bus
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._task: Optional[asyncio.Task] = None
+        self._watermark: Optional[Tuple[datetime, int]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """记录当前水位并启动后台轮询（间隔 <= 0 时不启动）"""
+        if self.running or self.interval_seconds <= 0:
+            return
+        await self.reset_watermark()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台轮询"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def reset_watermark(self) -> None:
+        """水位移到表中最新一条事件"""
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id)
+                .order_by(MonitorEvolutionEvent.timestamp.desc(), MonitorEvolutionEvent.id.desc())
+                .limit(1)
+            )
+            latest = result.first()
+        self._watermark = tuple(latest) if latest is not None else None
+
+    async def poll_once(self) -> int:
+        """发布水位之后的事件并前移水位，返回读取的事件数"""
+        table = MonitorEvolutionEvent
+        columns = (
+            table.id, table.event_id, table.timestamp, table.agent, table.strategy,
+            table.description, table.reward, table.diff_before, table.diff_after, table.diff_impact,
+        )
+        total = 0
+        async with self._session_factory() as db:
+            while True:
+                query = select(*columns).order_by(table.timestamp, table.id).limit(self.PAGE_SIZE)
+                if self._watermark is not None:
+                    timestamp, row_id = self._watermark
+                    query = query.where(
+                        table.timestamp >= timestamp,
+                        or_(table.timestamp > timestamp, table.id > row_id),
+                    )
+                rows = (await db.execute(query)).all()
+                for row in rows:
+                    self.bus.publish(event_message(row), event_id=row.event_id)
+                    self._watermark = (row.timestamp, row.id)
+                total += len(rows)
+                if len(rows) < self.PAGE_SIZE:
+                    return total
+
+    async def _run(self) -> None:
+        """后台循环：每 interval_seconds 秒轮询一次，单次失败不中断"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.poll_once()
+            except Exception:
+                logger.exception("进化事件轮询失败")
+
+
+# 全局进化事件轮询器（应用启动时 start）
+evolution_tailer = EvolutionTailer(interval_seconds=settings.EVOLUTION_TAIL_SECONDS)
+
+
+# ==================== ORM 插入 -> 发布（快速路径） ====================
+
+_PENDING_KEY = "evolution_events_pending"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_inserted_events(session, flush_context):
+    """flush 时记下新插入的进化事件（此时属性仍可读）"""
+    inserted = [obj for obj in session.new if isinstance(obj, MonitorEvolutionEvent)]
+    if inserted:
+        session.info.setdefault(_PENDING_KEY, []).extend(
+            (obj.event_id, event_message(obj)) for obj in inserted
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_events(session):
+    """提交成功后立即发布，不等待轮询"""
+    for event_id, message in session.info.pop(_PENDING_KEY, ()):
+        evolution_bus.publish(message, event_id=event_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_events(session):
+    """回滚则丢弃"""
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,116 @@
+"""
+智能水平快照写入
+
+后台任务按 INTELLIGENCE_SNAPSHOT_INTERVAL_SECONDS 周期计算智能水平并写入
+monitor_intelligence 表；接口读取最近一次快照，不再每个请求重新计算。
+
+启动时先读取表中最后一条快照的时间，距今不足一个周期则等到周期到点再写，
+避免每次重启都写入一条。
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import desc, select
+
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.db import MonitorIntelligence
+from models.monitor_schema import IntelligenceScore
+from services.monitor_intelligence import IntelligenceCalculator
+
+logger = logging.getLogger(__name__)
+
+
+class IntelligenceSnapshotWriter:
+    """智能水平快照写入器"""
+
+    def __init__(
+        self,
+        interval_seconds: float = 3600,
+        calculator: Optional[IntelligenceCalculator] = None,
+        session_factory=None
+    ):
+        self.interval_seconds = interval_seconds
+        self.calculator = calculator or IntelligenceCalculator()
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._task: Optional[asyncio.Task] = None
+        self.latest: Optional[IntelligenceScore] = None
+        self.written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动后台写入任务（间隔 <= 0 时不启动）"""
+        if self.running or self.interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def current(self) -> IntelligenceScore:
+        """当前智能水平：即时计算，各维度按输入文件签名缓存，输入未变化时不重新计算"""
+        return self.calculator.calculate_intelligence_score()
+
+    async def write_snapshot(self) -> IntelligenceScore:
+        """计算并写入一条快照"""
+        score = self.calculator.calculate_intelligence_score()
+        async with self._session_factory() as db:
+            db.add(MonitorIntelligence(
+                timestamp=score.timestamp,
+                intelligence_score=score.intelligence_score,
+                strategy_weight=score.strategy_weight,
+                knowledge_richness=score.knowledge_richness,
+                quality_trend=score.quality_trend,
+                evolution_frequency=score.evolution_frequency,
+            ))
+            await db.commit()
+        self.latest = score
+        self.written += 1
+        return score
+
+    async def _last_snapshot_time(self) -> Optional[datetime]:
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(MonitorIntelligence.timestamp).order_by(desc(MonitorIntelligence.timestamp)).limit(1)
+            )
+            return result.scalar()
+
+    async def _run(self) -> None:
+        """后台循环：到期写入，之后每个周期写一次"""
+        try:
+            last = await self._last_snapshot_time()
+        except Exception:
+            logger.exception("读取最近智能水平快照失败")
+            last = None
+
+        delay = 0.0
+        if last is not None:
+            elapsed = (datetime.now() - last).total_seconds()
+            delay = max(self.interval_seconds - elapsed, 0.0)
+
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.write_snapshot()
+            except Exception:
+                logger.exception("智能水平快照写入失败")
+            delay = self.interval_seconds
+
+
+# 全局快照写入器（应用启动时 start）
+intelligence_snapshot = IntelligenceSnapshotWriter(
+    interval_seconds=settings.INTELLIGENCE_SNAPSHOT_INTERVAL_SECONDS,
+)
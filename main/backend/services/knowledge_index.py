@@ -0,0 +1,246 @@
+"""
+知识图谱索引
+
+解析 .claude 下的规则、技能和最佳实践文件，结果常驻内存：
+- 每个源文件按 (mtime, size) 记录签名，签名不变的文件不再读取和正则解析
+- 目录最多每 CHECK_INTERVAL 秒重新 stat 一次，期间请求直接读内存索引
+- 条目 ID 由 (来源, 标题, 描述) 内容哈希生成，内容不变则 ID 不变，客户端可跨请求比对
+- 关键词搜索走 BM25 倒排索引（见 knowledge_search），随文件变化增量更新
+
+数据来源:
+- .claude/rules/*.md (策略规则)
+- .claude/project_standards.md (最佳实践)
+- .claude/skills/*/SKILL.md (技能知识)
+"""
+import hashlib
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.monitor_schema import KnowledgeCategory, KnowledgeGraphResponse, KnowledgeItem
+from services.knowledge_search import SearchIndex, highlight
+
+
+# 知识分类（响应中固定返回这些键）
+CATEGORIES = ("strategy", "best-practice", "template", "error-handling")
+
+INSIGHT_PATTERN = re.compile(
+    r"### (.+?)\n\n- \*\*Agent\*\*:\s*(.+?)\n- \*\*描述\*\*:\s*(.+?)(?=\n\n|\Z)", re.DOTALL
+)
+PRACTICE_PATTERN = re.compile(r"### (.+?)\n\n(.+?)(?=\n###|\Z)", re.DOTALL)
+SKILL_TITLE_PATTERN = re.compile(r"# (.+)")
+SKILL_DESC_PATTERN = re.compile(r"##.+?\n\n(.+?)(?=\n##|\Z)", re.DOTALL)
+
+# 解析结果：(分类, 标题, 描述, 标签)
+ParsedEntry = Tuple[str, str, str, List[str]]
+
+
+def parse_rule_file(path: Path, content: str) -> List[ParsedEntry]:
+    """解析策略规则中的洞察"""
+    return [
+        ("strategy", f"{agent.strip()} - {insight_type.strip()}", description.strip()[:200],
+         [agent.strip(), "strategy"])
+        for insight_type, agent, description in INSIGHT_PATTERN.findall(content)
+    ]
+
+
+def parse_standards_file(path: Path, content: str) -> List[ParsedEntry]:
+    """解析最佳实践章节"""
+    return [
+        ("best-practice", title.strip(), description.strip()[:200], ["best-practice"])
+        for title, description in PRACTICE_PATTERN.findall(content)
+        if "最佳实践" in title or "Best Practice" in title
+    ]
+
+
+def parse_skill_file(path: Path, content: str) -> List[ParsedEntry]:
+    """解析技能标题和第一段描述"""
+    title_match = SKILL_TITLE_PATTERN.search(content)
+    title = title_match.group(1).strip() if title_match else path.parent.name
+    desc_match = SKILL_DESC_PATTERN.search(content)
+    description = desc_match.group(1).strip()[:200] if desc_match else ""
+    return [("template", title, description, ["skill", "template"])]
+
+
+def content_id(source: str, title: str, description: str) -> str:
+    """按内容生成稳定的条目 ID"""
+    digest = hashlib.sha1(f"{source}\0{title}\0{description}".encode("utf-8")).hexdigest()
+    return f"kb_{digest[:12]}"
+
+
+class IndexedFile:
+    """单个源文件的签名和解析结果"""
+
+    __slots__ = ("signature", "items")
+
+    def __init__(self, signature: Tuple[int, int], items: List[Tuple[str, KnowledgeItem]]):
+        self.signature = signature
+        # (分类, 条目)
+        self.items = items
+
+
+class KnowledgeIndex:
+    """知识图谱内存索引"""
+
+    # 两次目录检查的最小间隔（秒）
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, project_root: Path):
+        self.claude_dir = project_root / ".claude"
+        self._files: Dict[Path, IndexedFile] = {}
+        self._by_category: Dict[str, List[KnowledgeItem]] = {cat: [] for cat in CATEGORIES}
+        # 条目 ID -> (分类, 条目)
+        self._items: Dict[str, Tuple[str, KnowledgeItem]] = {}
+        self.search_index = SearchIndex()
+        self._checked_at: Optional[float] = None
+        # 每次有文件变化时递增
+        self.version = 0
+        self.parsed_files = 0
+
+    def query(self, category: str = "all", search: str = "") -> KnowledgeGraphResponse:
+        """按分类和关键词从内存索引中筛选"""
+        self.refresh()
+
+        if category != "all":
+            selected = {category: self._by_category.get(category, [])}
+        else:
+            selected = self._by_category
+
+        if search:
+            selected = self._search(search, selected)
+
+        return KnowledgeGraphResponse(categories={
+            cat: KnowledgeCategory(count=len(items), items=items)
+            for cat, items in selected.items()
+        })
+
+    def _search(self, search: str, selected: Dict[str, List[KnowledgeItem]]) -> Dict[str, List[KnowledgeItem]]:
+        """BM25 检索，各分类内按得分降序，条目附带得分和高亮"""
+        terms = SearchIndex.query_terms(search)
+        if not terms:
+            # 查询中没有可检索的词（如纯标点），退回子串匹配
+            keyword = search.lower()
+            return {
+                cat: [
+                    item for item in items
+                    if keyword in item.title.lower() or keyword in item.description.lower()
+                ]
+                for cat, items in selected.items()
+            }
+
+        ranked: Dict[str, List[KnowledgeItem]] = {cat: [] for cat in selected}
+        for item_id, score in self.search_index.search(search):
+            category, item = self._items[item_id]
+            if category not in ranked:
+                continue
+            ranked[category].append(item.model_copy(update={
+                "score": round(score, 4),
+                "highlight": {
+                    "title": highlight(item.title, terms),
+                    "description": highlight(item.description, terms),
+                },
+            }))
+        return ranked
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        检查源文件变化并增量更新索引
+
+        Returns:
+            bool: 索引是否发生变化
+        """
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < self.CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+
+        seen = set()
+        changed = False
+        for path, parser in self._sources():
+            seen.add(path)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            indexed = self._files.get(path)
+            if indexed is not None and indexed.signature == signature:
+                continue
+            if indexed is not None:
+                self._unindex(indexed)
+            indexed = IndexedFile(signature, self._parse(path, parser, stat.st_mtime))
+            for _, item in indexed.items:
+                self.search_index.add(item.id, item.title, item.description)
+            self._files[path] = indexed
+            changed = True
+
+        for path in [p for p in self._files if p not in seen]:
+            self._unindex(self._files.pop(path))
+            changed = True
+
+        if changed:
+            self._rebuild()
+        return changed
+
+    def _unindex(self, indexed: IndexedFile) -> None:
+        """从检索索引中移除一个文件的全部条目"""
+        for _, item in indexed.items:
+            self.search_index.remove(item.id)
+
+    def _sources(self) -> List[Tuple[Path, Callable[[Path, str], List[ParsedEntry]]]]:
+        """列出当前存在的源文件及其解析函数"""
+        sources = []
+        rules_dir = self.claude_dir / "rules"
+        if rules_dir.exists():
+            sources.extend((path, parse_rule_file) for path in sorted(rules_dir.glob("*.md")))
+        standards_file = self.claude_dir / "project_standards.md"
+        if standards_file.exists():
+            sources.append((standards_file, parse_standards_file))
+        skills_dir = self.claude_dir / "skills"
+        if skills_dir.exists():
+            sources.extend((path, parse_skill_file) for path in sorted(skills_dir.glob("*/SKILL.md")))
+        return sources
+
+    def _parse(self, path: Path, parser, mtime: float) -> List[Tuple[str, KnowledgeItem]]:
+        """读取并解析单个文件；读取失败的文件记为空"""
+        self.parsed_files += 1
+        try:
+            entries = parser(path, path.read_text(encoding="utf-8"))
+        except Exception:
+            return []
+
+        source = str(path)
+        updated_at = datetime.fromtimestamp(mtime)
+        items = []
+        seen_ids = set()
+        for category, title, description, tags in entries:
+            item_id = content_id(source, title, description)
+            # 同一文件内完全相同的条目追加序号，保证 ID 唯一且稳定
+            suffix = 1
+            while item_id in seen_ids:
+                suffix += 1
+                item_id = f"{content_id(source, title, description)}_{suffix}"
+            seen_ids.add(item_id)
+            items.append((category, KnowledgeItem(
+                id=item_id,
+                title=title,
+                description=description,
+                source=source,
+                updated_at=updated_at,
+                tags=tags
+            )))
+        return items
+
+    def _rebuild(self) -> None:
+        """按分类重新汇总（文件顺序稳定）"""
+        by_category: Dict[str, List[KnowledgeItem]] = {cat: [] for cat in CATEGORIES}
+        items: Dict[str, Tuple[str, KnowledgeItem]] = {}
+        for path in sorted(self._files):
+            for category, item in self._files[path].items:
+                by_category.setdefault(category, []).append(item)
+                items[item.id] = (category, item)
+        self._by_category = by_category
+        self._items = items
+        self.version += 1
@@ -0,0 +1,172 @@
+"""
+知识图谱全文检索
+
+倒排索引 + BM25 排序：
+- 分词：英文/数字按词切分并转小写；连续中日韩字符切成二元组（bigram），
+  并额外索引单字，使单字查询也能命中
+- 标题词频加权（TITLE_WEIGHT 倍）后与描述合并为一个字段计分
+- 文档可单独增删，知识源文件变化时只更新该文件的条目
+- 查询只遍历命中词的倒排表，与条目总数无关；每个词的 BM25 归一化词频按需计算并缓存，
+  索引变化时失效
+
+检索结果附带高亮片段（<mark> 包裹命中部分，其余内容做 HTML 转义）。
+"""
+import heapq
+import html
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿가-힯]+")
+CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+# 标题词频权重
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str, for_query: bool = False) -> List[str]:
+    """
+    分词
+
+    文档侧对中日韩连续片段同时输出单字和二元组；
+    查询侧长度 >= 2 的片段只用二元组（更精确），单字片段用单字。
+    """
+    tokens = []
+    for run in TOKEN_PATTERN.findall(text.lower()):
+        if not CJK_PATTERN.match(run):
+            tokens.append(run)
+            continue
+        if len(run) == 1:
+            tokens.append(run)
+            continue
+        if not for_query:
+            tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def highlight(text: str, terms: Set[str]) -> str:
+    """用 <mark> 标出 text 中命中查询词的片段（其余内容转义）"""
+    if not terms:
+        return html.escape(text)
+    lowered = text.lower()
+    spans: List[Tuple[int, int]] = []
+    for term in terms:
+        start = lowered.find(term)
+        while start != -1:
+            spans.append((start, start + len(term)))
+            start = lowered.find(term, start + 1)
+    if not spans:
+        return html.escape(text)
+
+    # 合并重叠/相邻片段（中文二元组彼此重叠）
+    spans.sort()
+    merged = [list(spans[0])]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    parts = []
+    cursor = 0
+    for start, end in merged:
+        parts.append(html.escape(text[cursor:start]))
+        parts.append(f"<mark>{html.escape(text[start:end])}</mark>")
+        cursor = end
+    parts.append(html.escape(text[cursor:]))
+    return "".join(parts)
+
+
+def _rank_key(pair: Tuple[str, float]) -> Tuple[float, str]:
+    """得分降序，同分按 ID 升序"""
+    return -pair[1], pair[0]
+
+
+class SearchIndex:
+    """BM25 倒排索引"""
+
+    def __init__(self):
+        # 词 -> {文档 ID: 加权词频}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # 文档 ID -> (文档长度, 词集合)
+        self._docs: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+        self._total_length = 0
+        # 词 -> {文档 ID: BM25 归一化词频}，增删文档时整体失效（平均长度随之变化）
+        self._weights: Dict[str, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, doc_id: str, title: str, description: str) -> None:
+        """加入（或替换）一个文档"""
+        if doc_id in self._docs:
+            self.remove(doc_id)
+        counts = Counter(tokenize(description))
+        for token in tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        length = sum(counts.values())
+        for token, tf in counts.items():
+            self._postings.setdefault(token, {})[doc_id] = tf
+        self._docs[doc_id] = (length, tuple(counts))
+        self._total_length += length
+        self._weights.clear()
+
+    def remove(self, doc_id: str) -> None:
+        """删除文档（不存在时忽略）"""
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return
+        length, tokens = entry
+        self._total_length -= length
+        self._weights.clear()
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self._postings[token]
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """按 BM25 得分降序返回 (文档 ID, 得分)，limit 为空时返回全部命中"""
+        terms = set(tokenize(query, for_query=True))
+        if not terms or not self._docs:
+            return []
+
+        doc_count = len(self._docs)
+        scores: Dict[str, float] = {}
+        for term in terms:
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, weight in self._term_weights(term, posting).items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+
+        if limit is not None:
+            return heapq.nsmallest(limit, scores.items(), key=_rank_key)
+        return sorted(scores.items(), key=_rank_key)
+
+    def _term_weights(self, term: str, posting: Dict[str, int]) -> Dict[str, float]:
+        """词在各文档中的 BM25 归一化词频（缓存）"""
+        weights = self._weights.get(term)
+        if weights is None:
+            avg_length = self._total_length / len(self._docs)
+            docs = self._docs
+            weights = {
+                doc_id: tf * (K1 + 1) / (tf + K1 * (1 - B + B * docs[doc_id][0] / avg_length))
+                for doc_id, tf in posting.items()
+            }
+            self._weights[term] = weights
+        return weights
+
+    @staticmethod
+    def query_terms(query: str) -> Set[str]:
+        """查询词集合（用于高亮）"""
+        return set(tokenize(query, for_query=True))
@@ -0,0 +1,369 @@
+"""
+排行榜
+
+每个榜单在内存中维护一个按 (-分数, 用户ID) 排序的数组，用 bisect 定位：
+- global:        用户总分 users.total_score
+- module:<模块>:  各模块答题累计得分
+- weekly:        本周（UTC，ISO 周）答题累计得分，跨周自动清零
+- speed_quiz:    抢答对战胜场
+
+答题得分、对战结束时原地更新对应榜单；查询前 N 名和"我的排名 ± k"都只做二分查找和切片，
+不再对 users 表 ORDER BY 全表扫描。
+
+榜单在每个进程内各有一份，后台任务每 LEADERBOARD_SNAPSHOT_SECONDS 秒与数据库同步一次：
+- module / weekly 没有可重算的数据源：本进程的新增得分按 (scope, period, user_id) 累加写入
+  leaderboard_snapshots（各进程只写自己的增量，互不覆盖），上一周的周榜行随之清理
+- 写入后所有榜单重新加载：global / speed_quiz 从 users / speed_quiz_stats 重建，
+  module / weekly 从快照表加载再叠加本进程尚未写入的增量
+
+因此多 worker 部署时各进程的排名最多落后一个同步周期；重启后从快照恢复，
+最多丢失一个周期内尚未写入的增量，应用关闭时会再写一次。
+"""
+import asyncio
+import bisect
+import logging
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select
+
+from core.config import settings
+from core.database import AsyncSessionLocal, dialect_insert
+from models.db import LeaderboardSnapshot, SpeedQuizStats, User
+
+logger = logging.getLogger(__name__)
+
+GLOBAL = "global"
+WEEKLY = "weekly"
+SPEED_QUIZ = "speed_quiz"
+MODULE_PREFIX = "module:"
+
+
+def module_scope(module: str) -> str:
+    return f"{MODULE_PREFIX}{module}"
+
+
+def current_week(now: Optional[datetime] = None) -> str:
+    """ISO 周标识，例如 2024-W05"""
+    year, week, _ = (now or datetime.utcnow()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class RankedEntry(NamedTuple):
+    rank: int
+    user_id: int
+    score: int
+
+
+class RankedBoard:
+    """
+    有序榜单
+
+    _keys 按 (-分数, 用户ID) 升序排列，第 i 个元素即第 i+1 名；同分按用户ID先后。
+    分数为 0 的用户不上榜。
+    """
+
+    __slots__ = ("_keys", "_scores")
+
+    def __init__(self):
+        self._keys: List[Tuple[int, int]] = []
+        self._scores: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def score(self, user_id: int) -> int:
+        return self._scores.get(user_id, 0)
+
+    def set(self, user_id: int, score: int) -> None:
+        """设置用户分数"""
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            index = bisect.bisect_left(self._keys, (-old, user_id))
+            del self._keys[index]
+            del self._scores[user_id]
+        if score > 0:
+            bisect.insort(self._keys, (-score, user_id))
+            self._scores[user_id] = score
+
+    def add(self, user_id: int, delta: int) -> None:
+        """累加用户分数"""
+        if delta:
+            self.set(user_id, self._scores.get(user_id, 0) + delta)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """用户名次（从 1 开始），未上榜返回 None"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._keys, (-score, user_id)) + 1
+
+    def top(self, limit: int) -> List[RankedEntry]:
+        """前 limit 名"""
+        return self._slice(0, limit)
+
+    def around(self, user_id: int, k: int) -> List[RankedEntry]:
+        """用户及其前后各 k 名；未上榜返回空列表"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(rank - 1 - k, 0)
+        return self._slice(start, rank + k)
+
+    def items(self) -> List[Tuple[int, int]]:
+        """[(用户ID, 分数)]，按名次排列"""
+        return [(user_id, -neg_score) for neg_score, user_id in self._keys]
+
+    def load(self, scores: Dict[int, int]) -> None:
+        """整体替换（一次排序）"""
+        self._scores = {user_id: score for user_id, score in scores.items() if score > 0}
+        self._keys = sorted((-score, user_id) for user_id, score in self._scores.items())
+
+    def _slice(self, start: int, stop: int) -> List[RankedEntry]:
+        return [
+            RankedEntry(rank, user_id, -neg_score)
+            for rank, (neg_score, user_id) in enumerate(self._keys[start:stop], start + 1)
+        ]
+
+
+class LeaderboardService:
+    """排行榜服务"""
+
+    def __init__(self, snapshot_seconds: float = 60.0, session_factory=None):
+        self.snapshot_seconds = snapshot_seconds
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._boards: Dict[str, RankedBoard] = {GLOBAL: RankedBoard(), WEEKLY: RankedBoard(), SPEED_QUIZ: RankedBoard()}
+        self.week = current_week()
+        # 用户昵称（展示用），缺失的在查询时批量补齐
+        self._nicknames: Dict[int, str] = {}
+        # 尚未写入快照表的增量：(scope, period) -> {用户ID: 增量}；_inflight 为正在写入的一批
+        self._pending: Dict[Tuple[str, str], Dict[int, int]] = {}
+        self._inflight: Dict[Tuple[str, str], Dict[int, int]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.snapshots = 0
+        self.refreshes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动定时同步任务（间隔 <= 0 时不启动）"""
+        if self.running or self.snapshot_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止定时同步任务并写入最后一次快照（未启动定时任务时也写入）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._snapshot_with_new_session()
+
+    # ==================== 更新 ====================
+
+    def board(self, scope: str) -> Optional[RankedBoard]:
+        if scope == WEEKLY:
+            self._roll_week()
+        return self._boards.get(scope)
+
+    def record_score(
+        self,
+        user_id: int,
+        nickname: Optional[str],
+        module: str,
+        delta: int,
+        total_score: Optional[int] = None
+    ) -> None:
+        """
+        记录一次答题得分
+
+        Args:
+            delta: 本次得分
+            total_score: 加分后的用户总分（已知时直接设置，避免与数据库漂移）
+        """
+        if nickname:
+            self._nicknames[user_id] = nickname
+        if delta <= 0:
+            return
+        if total_score is None:
+            self._boards[GLOBAL].add(user_id, delta)
+        else:
+            self._boards[GLOBAL].set(user_id, total_score)
+        scope = module_scope(module)
+        self._boards.setdefault(scope, RankedBoard()).add(user_id, delta)
+        self._roll_week()
+        self._boards[WEEKLY].add(user_id, delta)
+        for key in ((scope, ""), (WEEKLY, self.week)):
+            pending = self._pending.setdefault(key, {})
+            pending[user_id] = pending.get(user_id, 0) + delta
+
+    def record_battle_win(self, user_id: int) -> None:
+        """记录一场抢答对战胜利"""
+        self._boards[SPEED_QUIZ].add(user_id, 1)
+
+    def _roll_week(self) -> None:
+        week = current_week()
+        if week != self.week:
+            self.week = week
+            self._boards[WEEKLY] = RankedBoard()
+
+    # ==================== 查询 ====================
+
+    async def top(self, db, scope: str, limit: int) -> Tuple[int, List[dict]]:
+        """前 limit 名；返回 (上榜人数, 条目)"""
+        board = self.board(scope)
+        if board is None:
+            return 0, []
+        entries = board.top(limit)
+        return len(board), await self._with_nicknames(db, entries)
+
+    async def around(self, db, scope: str, user_id: int, k: int) -> Tuple[int, Optional[int], int, List[dict]]:
+        """用户排名及前后各 k 名；返回 (上榜人数, 名次, 分数, 条目)"""
+        board = self.board(scope)
+        if board is None:
+            return 0, None, 0, []
+        entries = board.around(user_id, k)
+        return len(board), board.rank(user_id), board.score(user_id), await self._with_nicknames(db, entries)
+
+    async def _with_nicknames(self, db, entries: List[RankedEntry]) -> List[dict]:
+        """补齐昵称：缓存中缺失的用户一次查询取回"""
+        missing = [e.user_id for e in entries if e.user_id not in self._nicknames]
+        if missing:
+            result = await db.execute(select(User.id, User.nickname).where(User.id.in_(missing)))
+            self._nicknames.update(result.all())
+        return [
+            {"rank": e.rank, "user_id": e.user_id, "nickname": self._nicknames.get(e.user_id, ""), "score": e.score}
+            for e in entries
+        ]
+
+    # ==================== 加载与快照 ====================
+
+    async def load(self, db) -> None:
+        """
+        从数据库加载全部榜单（启动时和每次同步时调用）
+
+        总分和抢答胜场按数据源重建；模块榜和周榜按快照表加载，再叠加本进程尚未写入的增量
+        """
+        result = await db.execute(
+            select(User.id, User.nickname, User.total_score).where(User.total_score > 0)
+        )
+        global_scores = {}
+        nicknames = {}
+        for user_id, nickname, total_score in result.all():
+            global_scores[user_id] = total_score
+            nicknames[user_id] = nickname
+
+        result = await db.execute(
+            select(SpeedQuizStats.user_id, SpeedQuizStats.wins).where(SpeedQuizStats.wins > 0)
+        )
+        wins = dict(result.all())
+
+        week = current_week()
+        result = await db.execute(
+            select(LeaderboardSnapshot.scope, LeaderboardSnapshot.user_id, LeaderboardSnapshot.score)
+            .where(or_(LeaderboardSnapshot.scope != WEEKLY, LeaderboardSnapshot.period == week))
+        )
+        restored: Dict[str, Dict[int, int]] = {}
+        for scope, user_id, score in result.all():
+            restored.setdefault(scope, {})[user_id] = score
+
+        # 以下不再 await：替换榜单期间不会插入新的得分
+        for pending in (self._inflight, self._pending):
+            for (scope, period), deltas in pending.items():
+                if scope == WEEKLY and period != week:
+                    continue
+                scores = restored.setdefault(scope, {})
+                for user_id, delta in deltas.items():
+                    scores[user_id] = scores.get(user_id, 0) + delta
+
+        self.week = week
+        boards = {GLOBAL: RankedBoard(), WEEKLY: RankedBoard(), SPEED_QUIZ: RankedBoard()}
+        boards[GLOBAL].load(global_scores)
+        boards[SPEED_QUIZ].load(wins)
+        for scope, scores in restored.items():
+            boards.setdefault(scope, RankedBoard()).load(scores)
+        self._boards = boards
+        self._nicknames.update(nicknames)
+        self.refreshes += 1
+        logger.debug(
+            "排行榜已加载：总榜 %d 人，模块榜/周榜 %d 个",
+            len(boards[GLOBAL]), len(restored)
+        )
+
+    async def snapshot(self, db) -> bool:
+        """
+        把本进程的新增得分累加写入快照表（UPSERT score = score + 增量），并清理上一周的周榜行
+
+        Returns:
+            bool: 自上次写入后没有新增得分时跳过，返回 False
+        """
+        if not self._pending:
+            return False
+        self._roll_week()
+        # 先取走待写增量：写入期间的新得分会在下一次快照中写入
+        batch, self._pending = self._pending, {}
+        self._inflight = batch
+        now = datetime.utcnow()
+        rows = [
+            {"scope": scope, "period": period, "user_id": user_id, "score": delta, "taken_at": now}
+            for (scope, period), deltas in batch.items()
+            for user_id, delta in deltas.items()
+        ]
+        table = LeaderboardSnapshot.__table__
+        stmt = dialect_insert(db, table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["scope", "period", "user_id"],
+            set_={"score": table.c.score + stmt.excluded.score, "taken_at": stmt.excluded.taken_at},
+        )
+        try:
+            await db.execute(stmt, rows)
+            await db.execute(
+                delete(LeaderboardSnapshot).where(
+                    and_(LeaderboardSnapshot.scope == WEEKLY, LeaderboardSnapshot.period != self.week)
+                )
+            )
+            await db.commit()
+        except Exception:
+            # 写入失败：增量放回待写队列
+            for key, deltas in batch.items():
+                pending = self._pending.setdefault(key, {})
+                for user_id, delta in deltas.items():
+                    pending[user_id] = pending.get(user_id, 0) + delta
+            raise
+        finally:
+            self._inflight = {}
+        self.snapshots += 1
+        return True
+
+    async def _snapshot_with_new_session(self) -> None:
+        try:
+            async with self._session_factory() as db:
+                await self.snapshot(db)
+        except Exception:
+            logger.exception("排行榜快照写入失败")
+
+    async def sync(self) -> None:
+        """写入本进程的增量并重新加载全部榜单"""
+        await self._snapshot_with_new_session()
+        try:
+            async with self._session_factory() as db:
+                await self.load(db)
+        except Exception:
+            logger.exception("排行榜重新加载失败")
+
+    async def _run(self) -> None:
+        """后台循环：定期与数据库同步"""
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            await self.sync()
+
+
+# 全局排行榜（应用启动时 load + start）
+leaderboard = LeaderboardService(snapshot_seconds=settings.LEADERBOARD_SNAPSHOT_SECONDS)
@@ -14,26 +14,95 @@
 - security: 安全风险（硬编码密钥、SQL 注入、XSS）
 - quality: 代码质量（复杂度、测试覆盖率、文档完整性）
 - architecture: 架构问题（耦合度、依赖循环、违反规范）
+
+增量诊断：
+- 每个文件按 (mtime, size) 记录签名，签名变化时才读取；内容哈希也未变则沿用上次结果
+- 文件级检测由 diagnosis_detectors 完成：每个文件解析一次 AST，全部检测器在同一次遍历中运行；
+  变化文件较多时分发到进程池并行分析
+- 问题 ID 由 (相对路径, 分类, 标题, 所在行内容) 哈希生成，内容不变则 ID 不变
+- 结果有变化时同步到 monitor_diagnosis 表：新增问题插入，消失的问题标记为 fixed
+- 修复请求按 ID 直接查内存索引（重启后查表），不再重新执行诊断
 """
 
-import re
-import uuid
-import json
+import asyncio
+import hashlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
 
+from core.config import settings
+from core.database import AsyncSessionLocal
+from models.db import MonitorDiagnosis
 from models.monitor_schema import DiagnosisIssue, FixResult, FixChange
+from services.diagnosis_detectors import Finding, analyze_source, init_pool_worker
+
+logger = logging.getLogger(__name__)
+
+# 问题分类输出顺序
+CATEGORY_ORDER = ("performance", "security", "quality", "architecture")
+CATEGORY_PREFIX = {
+    "performance": "perf",
+    "security": "sec",
+    "quality": "qual",
+    "architecture": "arch",
+}
+
+
+def issue_id(category: str, relative_path: str, title: str, line_text: str) -> str:
+    """按内容生成稳定的问题 ID"""
+    digest = hashlib.sha1(
+        f"{relative_path}\0{category}\0{title}\0{line_text.strip()}".encode("utf-8")
+    ).hexdigest()
+    return f"{CATEGORY_PREFIX[category]}_{digest[:12]}"
+
+
+class CachedFile:
+    """单个文件的签名、内容哈希和诊断结果"""
+
+    __slots__ = ("signature", "digest", "issues")
+
+    def __init__(self, signature: Tuple[int, int], digest: str, issues: List[DiagnosisIssue]):
+        self.signature = signature
+        self.digest = digest
+        self.issues = issues
 
 
 class DiagnosisService:
     """AI 诊断服务"""
 
-    def __init__(self):
+    # 两次扫描的最小间隔（秒），期间直接返回缓存结果
+    CHECK_INTERVAL = 1.0
+    # 变化文件少于该数量时在当前进程内分析（进程池分发有固定开销）
+    POOL_THRESHOLD = 16
+
+    def __init__(
+        self,
+        project_root: Optional[Path] = None,
+        session_factory=None,
+        workers: Optional[int] = None
+    ):
         """初始化诊断服务"""
-        self.project_root = Path(__file__).parent.parent.parent.parent
+        self.project_root = project_root or Path(__file__).parent.parent.parent.parent
+        self._session_factory = session_factory or AsyncSessionLocal
+        self.workers = settings.DIAGNOSIS_WORKERS if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
         # 注意：实际使用时需要配置 Anthropic API Key
         # self.client = anthropic.Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self._files: Dict[Path, CachedFile] = {}
+        self._architecture: List[DiagnosisIssue] = []
+        # 问题 ID -> 问题（按分类顺序）
+        self._issues: Dict[str, DiagnosisIssue] = {}
+        # 已写入表的问题 ID -> (状态, 位置)，首次同步时从表中加载
+        self._persisted: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.last_run_at: Optional[datetime] = None
+        self.parsed_files = 0
 
     async def run_diagnosis(self) -> List[DiagnosisIssue]:
         """
@@ -45,187 +114,253 @@ class DiagnosisService:
         3. 代码质量 (quality)
         4. 架构问题 (architecture)
 
-        Returns:
-            List[DiagnosisIssue]: 诊断问题列表
-        """
-        issues = []
-
-        # 1. 性能瓶颈检测
-        issues.extend(await self._detect_performance_issues())
-
-        # 2. 安全风险检测
-        issues.extend(await self._detect_security_issues())
-
-        # 3. 代码质量检测
-        issues.extend(await self._detect_quality_issues())
-
-        # 4. 架构问题检测
-        issues.extend(await self._detect_architecture_issues())
-
-        return issues
-
-    async def _detect_performance_issues(self) -> List[DiagnosisIssue]:
-        """
-        检测性能瓶颈
-
-        检测项：
-        - N+1 查询问题
-        - 大文件读取
-        - 重复计算
-        - 未使用索引的查询
+        只重新分析内容有变化的文件，结果有变化时同步到 monitor_diagnosis 表。
 
         Returns:
-            List[DiagnosisIssue]: 性能问题列表
+            List[DiagnosisIssue]: 诊断问题列表
         """
-        issues = []
-        backend_dir = self.project_root / "main" / "backend"
-
-        if not backend_dir.exists():
-            return issues
-
-        # 扫描 Python 文件
-        for py_file in backend_dir.rglob("*.py"):
-            try:
-                content = py_file.read_text(encoding="utf-8")
-
-                # 检测 N+1 查询问题（简化版，实际应使用 Claude API）
-                # 查找循环中的数据库查询
-                if re.search(r"for\s+\w+\s+in\s+.+:\s*\n\s+.*session\.(query|get|execute)", content):
-                    line_num = self._find_line_number(content, "for")
-                    issues.append(DiagnosisIssue(
-                        id=f"perf_{uuid.uuid4().hex[:8]}",
-                        severity="Important",
-                        category="performance",
-                        title="可能存在 N+1 查询问题",
-                        description=f"在 {py_file.name} 中检测到循环内的数据库查询",
-                        location=f"{py_file}:{line_num}",
-                        suggestion="使用 joinedload 或 selectinload 预加载关联数据",
-                        auto_fixable=False
-                    ))
-
-                # 检测大文件读取
-                if "read_text()" in content or "read()" in content:
-                    if "Path" in content and not "encoding" in content:
-                        line_num = self._find_line_number(content, "read_text")
-                        issues.append(DiagnosisIssue(
-                            id=f"perf_{uuid.uuid4().hex[:8]}",
-                            severity="Suggestion",
-                            category="performance",
-                            title="文件读取未指定编码",
-                            description=f"在 {py_file.name} 中文件读取未指定编码",
-                            location=f"{py_file}:{line_num}",
-                            suggestion="使用 read_text(encoding='utf-8') 明确指定编码",
-                            auto_fixable=True,
-                            fix_code='read_text(encoding="utf-8")'
-                        ))
-
-            except Exception:
-                continue
-
-        return issues
+        async with self._lock:
+            now = time.monotonic()
+            if self._checked_at is None or now - self._checked_at >= self.CHECK_INTERVAL:
+                self._checked_at = now
+                changed = await asyncio.to_thread(self.scan)
+                self.last_run_at = datetime.now()
+                if changed or self._persisted is None:
+                    try:
+                        await self._persist()
+                    except Exception:
+                        self._persisted = None
+                        logger.exception("诊断结果写入 monitor_diagnosis 失败")
+            return list(self._issues.values())
+
+    async def get_issue(self, issue_id: str) -> Optional[DiagnosisIssue]:
+        """按 ID 查找未修复的问题：先查内存索引，未命中（如重启后）再按唯一键查表"""
+        issue = self._issues.get(issue_id)
+        if issue is not None:
+            return issue
+        async with self._session_factory() as db:
+            row = (await db.execute(
+                select(MonitorDiagnosis).where(
+                    MonitorDiagnosis.issue_id == issue_id,
+                    MonitorDiagnosis.status == "open",
+                )
+            )).scalar_one_or_none()
+        if row is None:
+            return None
+        return DiagnosisIssue(
+            id=row.issue_id,
+            severity=row.severity,
+            category=row.category,
+            title=row.title,
+            description=row.description,
+            location=row.location,
+            suggestion=row.suggestion,
+            auto_fixable=bool(row.auto_fixable),
+            fix_code=row.fix_code,
+        )
 
-    async def _detect_security_issues(self) -> List[DiagnosisIssue]:
+    def scan(self) -> bool:
         """
-        检测安全风险
-
-        检测项：
-        - 硬编码密钥
-        - 硬编码密码
-        - SQL 注入风险
+        扫描源文件并增量更新结果（同步执行，不写表）
 
         Returns:
-            List[DiagnosisIssue]: 安全问题列表
+            bool: 问题集合是否发生变化
         """
-        issues = []
+        changed = False
         backend_dir = self.project_root / "main" / "backend"
-
-        if not backend_dir.exists():
-            return issues
-
-        # 检测硬编码密钥
-        for py_file in backend_dir.rglob("*.py"):
+        seen = set()
+        # (路径, 签名, 内容哈希, 内容)
+        pending: List[Tuple[Path, Tuple[int, int], str, str]] = []
+        if backend_dir.exists():
+            for py_file in sorted(backend_dir.rglob("*.py")):
+                seen.add(py_file)
+                entry = self._check_file(py_file)
+                if entry is not None:
+                    pending.append(entry)
+
+        for (py_file, signature, digest, content), findings in zip(pending, self._analyze_many(pending)):
+            self.parsed_files += 1
+            issues = self._file_issues(py_file, content, findings)
+            cached = self._files.get(py_file)
+            self._files[py_file] = CachedFile(signature, digest, issues)
+            if cached is None or cached.issues != issues:
+                changed = True
+
+        for path in [p for p in self._files if p not in seen]:
+            del self._files[path]
+            changed = True
+
+        architecture = self._detect_architecture_issues()
+        if architecture != self._architecture:
+            self._architecture = architecture
+            changed = True
+
+        if changed:
+            self._rebuild()
+        return changed
+
+    @property
+    def issues(self) -> List[DiagnosisIssue]:
+        """当前问题列表"""
+        return list(self._issues.values())
+
+    def close(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def _check_file(self, py_file: Path) -> Optional[Tuple[Path, Tuple[int, int], str, str]]:
+        """检查单个文件；内容有变化时返回待分析条目"""
+        try:
+            stat = py_file.stat()
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._files.get(py_file)
+        if cached is not None and cached.signature == signature:
+            return None
+
+        try:
+            data = py_file.read_bytes()
+        except OSError:
+            return None
+        digest = hashlib.sha1(data).hexdigest()
+        if cached is not None and cached.digest == digest:
+            # 只是 mtime 变了（如 touch / 检出），内容相同
+            cached.signature = signature
+            return None
+        return py_file, signature, digest, data.decode("utf-8", errors="replace")
+
+    def _analyze_many(self, pending: List[Tuple[Path, Tuple[int, int], str, str]]) -> List[List[Finding]]:
+        """分析待处理文件：数量少或未配置并行时在当前进程，否则分发到进程池"""
+        names = [entry[0].name for entry in pending]
+        contents = [entry[3] for entry in pending]
+        if self.workers > 1 and len(pending) >= self.POOL_THRESHOLD:
             try:
-                content = py_file.read_text(encoding="utf-8")
-
-                # 正则匹配常见密钥模式
-                patterns = [
-                    (r'SECRET_KEY\s*=\s*["\']([^"\']{10,})["\']', "硬编码 SECRET_KEY"),
-                    (r'API_KEY\s*=\s*["\']([^"\']{10,})["\']', "硬编码 API_KEY"),
-                    (r'PASSWORD\s*=\s*["\']([^"\']+)["\']', "硬编码密码"),
-                ]
-
-                for pattern, title in patterns:
-                    matches = re.finditer(pattern, content, re.IGNORECASE)
-                    for match in matches:
-                        line_num = content[:match.start()].count('\n') + 1
-                        issues.append(DiagnosisIssue(
-                            id=f"sec_{uuid.uuid4().hex[:8]}",
-                            severity="Critical",
-                            category="security",
-                            title=title,
-                            description=f"在 {py_file.name}:{line_num} 发现硬编码敏感信息",
-                            location=f"{py_file}:{line_num}",
-                            suggestion="使用环境变量存储敏感信息（如 os.getenv('SECRET_KEY')）",
-                            auto_fixable=False
-                        ))
-
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_pool_worker)
+                chunksize = max(1, len(pending) // (self.workers * 4))
+                return list(self._executor.map(analyze_source, names, contents, chunksize=chunksize))
             except Exception:
-                continue
-
-        return issues
-
-    async def _detect_quality_issues(self) -> List[DiagnosisIssue]:
-        """
-        检测代码质量问题
-
-        检测项：
-        - 缺少类型注解
-        - 缺少文档字符串
-        - 函数过长
-
-        Returns:
-            List[DiagnosisIssue]: 质量问题列表
-        """
+                logger.exception("诊断进程池执行失败，改为在当前进程分析")
+                self.close()
+        return [analyze_source(name, content) for name, content in zip(names, contents)]
+
+    def _file_issues(self, py_file: Path, content: str, findings: List[Finding]) -> List[DiagnosisIssue]:
+        """检测结果转为问题，同一文件内重复的 ID 追加序号"""
+        if not findings:
+            return []
+        relative_path = self._relative(py_file)
+        lines = content.split("\n")
         issues = []
-        backend_dir = self.project_root / "main" / "backend"
-
-        if not backend_dir.exists():
-            return issues
-
-        # 检测缺少类型注解
-        for py_file in backend_dir.rglob("*.py"):
-            try:
-                content = py_file.read_text(encoding="utf-8")
-
-                # 检测函数定义缺少返回类型注解
-                func_pattern = r"def\s+(\w+)\([^)]*\):"
-                matches = re.finditer(func_pattern, content)
-                for match in matches:
-                    func_name = match.group(1)
-                    # 跳过特殊方法
-                    if func_name.startswith("__"):
-                        continue
-
-                    # 检查是否有返回类型注解
-                    if "->" not in content[match.start():match.end() + 50]:
-                        line_num = content[:match.start()].count('\n') + 1
-                        issues.append(DiagnosisIssue(
-                            id=f"qual_{uuid.uuid4().hex[:8]}",
-                            severity="Suggestion",
-                            category="quality",
-                            title=f"函数 {func_name} 缺少返回类型注解",
-                            description=f"在 {py_file.name}:{line_num} 函数缺少类型注解",
-                            location=f"{py_file}:{line_num}",
-                            suggestion="添加返回类型注解，如 def func() -> ReturnType:",
-                            auto_fixable=False
-                        ))
-
-            except Exception:
-                continue
-
+        seen_ids = set()
+        for finding in findings:
+            line_text = lines[finding.line - 1] if 0 < finding.line <= len(lines) else ""
+            base_id = issue_id(finding.category, relative_path, finding.title, line_text)
+            unique_id = base_id
+            suffix = 1
+            while unique_id in seen_ids:
+                suffix += 1
+                unique_id = f"{base_id}_{suffix}"
+            seen_ids.add(unique_id)
+            issues.append(DiagnosisIssue(
+                id=unique_id,
+                severity=finding.severity,
+                category=finding.category,
+                title=finding.title,
+                description=finding.description,
+                location=f"{py_file}:{finding.line}",
+                suggestion=finding.suggestion,
+                auto_fixable=finding.auto_fixable,
+                fix_code=finding.fix_code,
+            ))
         return issues
 
-    async def _detect_architecture_issues(self) -> List[DiagnosisIssue]:
+    def _rebuild(self) -> None:
+        """按分类顺序（分类内按文件路径）重新汇总问题索引"""
+        issues = [issue for path in sorted(self._files) for issue in self._files[path].issues]
+        issues.extend(self._architecture)
+        issues.sort(key=lambda issue: CATEGORY_ORDER.index(issue.category))
+        self._issues = {issue.id: issue for issue in issues}
+
+    async def _persist(self) -> None:
+        """把当前问题集合同步到 monitor_diagnosis 表"""
+        async with self._session_factory() as db:
+            if self._persisted is None:
+                rows = await db.execute(
+                    select(MonitorDiagnosis.issue_id, MonitorDiagnosis.status, MonitorDiagnosis.location)
+                )
+                self._persisted = {row.issue_id: (row.status, row.location) for row in rows}
+            persisted = self._persisted
+            now = datetime.now()
+
+            new_rows = []
+            reopened = []
+            moved = []
+            for issue in self._issues.values():
+                previous = persisted.get(issue.id)
+                if previous is None:
+                    new_rows.append(MonitorDiagnosis(
+                        diagnosis_time=now,
+                        issue_id=issue.id,
+                        severity=issue.severity,
+                        category=issue.category,
+                        title=issue.title,
+                        description=issue.description,
+                        location=issue.location,
+                        suggestion=issue.suggestion,
+                        auto_fixable=issue.auto_fixable,
+                        fix_code=issue.fix_code,
+                        status="open",
+                    ))
+                elif previous[0] == "fixed":
+                    reopened.append(issue)
+                elif previous[1] != issue.location:
+                    moved.append(issue)
+            gone = [
+                item_id for item_id, (status, _) in persisted.items()
+                if status == "open" and item_id not in self._issues
+            ]
+
+            if new_rows:
+                db.add_all(new_rows)
+            for issue in reopened:
+                await db.execute(
+                    update(MonitorDiagnosis)
+                    .where(MonitorDiagnosis.issue_id == issue.id)
+                    .values(diagnosis_time=now, location=issue.location, status="open", fixed_at=None)
+                )
+            for issue in moved:
+                await db.execute(
+                    update(MonitorDiagnosis)
+                    .where(MonitorDiagnosis.issue_id == issue.id)
+                    .values(location=issue.location)
+                )
+            if gone:
+                await db.execute(
+                    update(MonitorDiagnosis)
+                    .where(MonitorDiagnosis.issue_id.in_(gone))
+                    .values(status="fixed", fixed_at=now)
+                )
+            await db.commit()
+
+        for row in new_rows:
+            persisted[row.issue_id] = ("open", row.location)
+        for issue in reopened:
+            persisted[issue.id] = ("open", issue.location)
+        for issue in moved:
+            persisted[issue.id] = (persisted[issue.id][0], issue.location)
+        for item_id in gone:
+            persisted[item_id] = ("fixed", persisted[item_id][1])
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.project_root).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _detect_architecture_issues(self) -> List[DiagnosisIssue]:
         """
         检测架构问题
 
@@ -233,6 +368,8 @@ class DiagnosisService:
         - 违反目录结构规范
         - 循环依赖
 
+        只看路径，不读取文件内容。
+
         Returns:
             List[DiagnosisIssue]: 架构问题列表
         """
@@ -240,11 +377,10 @@ class DiagnosisService:
 
         # 检测违反目录结构规范
         # 例如：测试文件不在 main/tests/ 目录
-        test_files = list(self.project_root.rglob("test_*.py"))
-        for test_file in test_files:
-            if "main/tests/" not in str(test_file):
+        for test_file in sorted(self.project_root.rglob("test_*.py")):
+            if "main/tests/" not in test_file.as_posix():
                 issues.append(DiagnosisIssue(
-                    id=f"arch_{uuid.uuid4().hex[:8]}",
+                    id=issue_id("architecture", self._relative(test_file), "测试文件位置不符合规范", ""),
                     severity="Important",
                     category="architecture",
                     title="测试文件位置不符合规范",
@@ -274,9 +410,11 @@ class DiagnosisService:
             raise ValueError("该问题不支持自动修复")
 
         # 解析文件路径和行号
-        location_parts = issue.location.split(":")
-        file_path = Path(location_parts[0])
-        line_num = int(location_parts[1]) if len(location_parts) > 1 else 1
+        file_part, _, line_part = issue.location.rpartition(":")
+        if not line_part.isdigit():
+            file_part, line_part = issue.location, "1"
+        file_path = Path(file_part)
+        line_num = int(line_part)
 
         if not file_path.exists():
             raise ValueError(f"文件不存在: {file_path}")
@@ -299,6 +437,14 @@ class DiagnosisService:
         # 写回文件
         file_path.write_text('\n'.join(lines), encoding="utf-8")
 
+        # 立即从索引中移除并标记为已修复；该文件下次扫描时按新内容重新分析
+        self._issues.pop(issue_id, None)
+        self._checked_at = None
+        try:
+            await self._mark_fixed(issue_id)
+        except Exception:
+            logger.exception("更新诊断问题状态失败: %s", issue_id)
+
         return FixResult(
             issue_id=issue_id,
             fixed=True,
@@ -310,19 +456,13 @@ class DiagnosisService:
             )]
         )
 
-    def _find_line_number(self, content: str, keyword: str) -> int:
-        """
-        查找关键词所在行号
-
-        Args:
-            content: 文件内容
-            keyword: 关键词
-
-        Returns:
-            int: 行号（从 1 开始）
-        """
-        lines = content.split('\n')
-        for i, line in enumerate(lines, 1):
-            if keyword in line:
-                return i
-        return 1
+    async def _mark_fixed(self, issue_id: str) -> None:
+        async with self._session_factory() as db:
+            await db.execute(
+                update(MonitorDiagnosis)
+                .where(MonitorDiagnosis.issue_id == issue_id)
+                .values(status="fixed", fixed_at=datetime.now())
+            )
+            await db.commit()
+        if self._persisted is not None and issue_id in self._persisted:
+            self._persisted[issue_id] = ("fixed", self._persisted[issue_id][1])
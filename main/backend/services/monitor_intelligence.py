@@ -15,16 +15,23 @@
 - .claude/skills/*/SKILL.md (技能知识)
 - .claude/project_standards.md (最佳实践)
 - main/docs/reviews/*.md (代码审查记录)
+
+各维度的计算结果按其输入文件的 (路径, mtime, size) 签名缓存：
+每次计算只 glob + stat，签名未变的维度直接复用上次结果，不再读取文件和正则扫描。
 """
 
 import re
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from models.monitor_schema import IntelligenceScore, Milestone
 
 
+# 一组输入文件的签名：((路径, mtime_ns, size), ...)
+FileSignature = Tuple[Tuple[str, int, int], ...]
+
+
 class IntelligenceCalculator:
     """
     智能水平计算器
@@ -38,9 +45,13 @@ class IntelligenceCalculator:
     ) * 10
     """
 
-    def __init__(self):
+    def __init__(self, project_root: Optional[Path] = None):
         """初始化计算器"""
-        self.project_root = Path(__file__).parent.parent.parent.parent
+        self.project_root = project_root or Path(__file__).parent.parent.parent.parent
+        # 维度名 -> (输入文件签名, 计算结果)
+        self._memo: Dict[str, Tuple[FileSignature, Any]] = {}
+        # 维度名 -> 实际重新计算的次数
+        self.recomputed: Dict[str, int] = {}
 
     def calculate_intelligence_score(self) -> IntelligenceScore:
         """
@@ -82,15 +93,15 @@ class IntelligenceCalculator:
         Returns:
             float: 策略权重分数
         """
-        rules_dir = self.project_root / ".claude" / "rules"
-        if not rules_dir.exists():
-            return 0.0
+        return self._memoized("strategy_weight", self._rule_files(), self._compute_strategy_weight)
 
+    @staticmethod
+    def _compute_strategy_weight(rule_files: List[Path]) -> float:
         total_rules = 0
         total_reward = 0.0
         file_count = 0
 
-        for rule_file in rules_dir.glob("*.md"):
+        for rule_file in rule_files:
             try:
                 content = rule_file.read_text(encoding="utf-8")
 
@@ -134,32 +145,35 @@ class IntelligenceCalculator:
         Returns:
             float: 知识丰富度分数
         """
-        # 统计 Agent 数量
-        agents_dir = self.project_root / ".claude" / "agents"
-        agents_count = len(list(agents_dir.glob("*.md"))) if agents_dir.exists() else 0
-
-        # 统计 Skill 数量
-        skills_dir = self.project_root / ".claude" / "skills"
-        skills_count = len(list(skills_dir.glob("*/SKILL.md"))) if skills_dir.exists() else 0
-
-        # 统计最佳实践数量
-        standards_file = self.project_root / ".claude" / "project_standards.md"
-        best_practices = 0
-        if standards_file.exists():
-            try:
-                content = standards_file.read_text(encoding="utf-8")
-                best_practices = len(re.findall(r"###.*最佳实践", content))
-            except Exception:
-                pass
-
-        # 计算知识丰富度
-        knowledge_score = (
-            agents_count * 10 +
-            skills_count * 20 +
-            best_practices * 5
-        ) / 500
-
-        return min(knowledge_score, 1.0)
+        claude_dir = self.project_root / ".claude"
+        agents_dir = claude_dir / "agents"
+        skills_dir = claude_dir / "skills"
+        agent_files = sorted(agents_dir.glob("*.md")) if agents_dir.exists() else []
+        skill_files = sorted(skills_dir.glob("*/SKILL.md")) if skills_dir.exists() else []
+        standards_file = self._standards_file()
+
+        def compute(_files: List[Path]) -> float:
+            # 统计最佳实践数量
+            best_practices = 0
+            if standards_file is not None:
+                try:
+                    content = standards_file.read_text(encoding="utf-8")
+                    best_practices = len(re.findall(r"###.*最佳实践", content))
+                except Exception:
+                    pass
+
+            # 计算知识丰富度
+            knowledge_score = (
+                len(agent_files) * 10 +
+                len(skill_files) * 20 +
+                best_practices * 5
+            ) / 500
+
+            return min(knowledge_score, 1.0)
+
+        # Agent/Skill 只计数量，签名包含其路径即可感知增删
+        inputs = agent_files + skill_files + ([standards_file] if standards_file is not None else [])
+        return self._memoized("knowledge_richness", inputs, compute)
 
     def _calculate_quality_trend(self) -> float:
         """
@@ -174,15 +188,21 @@ class IntelligenceCalculator:
         Returns:
             float: 质量趋势分数
         """
-        # 统计代码审查通过率
         reviews_dir = self.project_root / "main" / "docs" / "reviews"
         if not reviews_dir.exists():
             return 0.5  # 默认值
 
+        return self._memoized(
+            "quality_trend", sorted(reviews_dir.glob("*.md")), self._compute_quality_trend
+        )
+
+    @staticmethod
+    def _compute_quality_trend(review_files: List[Path]) -> float:
+        # 统计代码审查通过率
         total_reviews = 0
         passed_reviews = 0
 
-        for review_file in reviews_dir.glob("*.md"):
+        for review_file in review_files:
             try:
                 content = review_file.read_text(encoding="utf-8")
                 total_reviews += 1
@@ -208,24 +228,16 @@ class IntelligenceCalculator:
         数据来源: .claude/rules/*.md 文件的更新时间
         计算方法: 最近 7 天的进化记录数量 / 50
 
+        只依赖 mtime 和当前时间，直接用 stat 结果计算，无需读取文件。
+
         Returns:
             float: 进化频率分数
         """
-        rules_dir = self.project_root / ".claude" / "rules"
-        if not rules_dir.exists():
-            return 0.0
-
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        recent_updates = 0
-
-        for rule_file in rules_dir.glob("*.md"):
-            try:
-                mtime = datetime.fromtimestamp(rule_file.stat().st_mtime)
-                if mtime > seven_days_ago:
-                    recent_updates += 1
-            except Exception:
-                continue
-
+        seven_days_ago = (datetime.now() - timedelta(days=7)).timestamp()
+        recent_updates = sum(
+            1 for _, mtime_ns, _ in self._signature(self._rule_files())
+            if mtime_ns / 1e9 > seven_days_ago
+        )
         return min(recent_updates / 50, 1.0)
 
     def identify_milestones(self) -> List[Milestone]:
@@ -240,11 +252,17 @@ class IntelligenceCalculator:
         Returns:
             List[Milestone]: 里程碑列表
         """
+        standards_file = self._standards_file()
+        if standards_file is None:
+            return []
+        return list(self._memoized("milestones", [standards_file], self._compute_milestones))
+
+    @staticmethod
+    def _compute_milestones(files: List[Path]) -> List[Milestone]:
         milestones = []
 
         # 从 project_standards.md 解析进化历史
-        standards_file = self.project_root / ".claude" / "project_standards.md"
-        if standards_file.exists():
+        for standards_file in files:
             try:
                 content = standards_file.read_text(encoding="utf-8")
 
@@ -269,3 +287,37 @@ class IntelligenceCalculator:
                 pass
 
         return milestones
+
+    # ==================== 输入文件与缓存 ====================
+
+    def _rule_files(self) -> List[Path]:
+        rules_dir = self.project_root / ".claude" / "rules"
+        return sorted(rules_dir.glob("*.md")) if rules_dir.exists() else []
+
+    def _standards_file(self) -> Optional[Path]:
+        standards_file = self.project_root / ".claude" / "project_standards.md"
+        return standards_file if standards_file.exists() else None
+
+    @staticmethod
+    def _signature(paths: List[Path]) -> FileSignature:
+        """输入文件签名（stat 失败的文件视为不存在）"""
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _memoized(self, name: str, paths: List[Path], compute: Callable[[List[Path]], Any]) -> Any:
+        """输入文件签名未变时返回缓存结果，否则重新计算"""
+        signature = self._signature(paths)
+        cached = self._memo.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        value = compute(paths)
+        self._memo[name] = (signature, value)
+        self.recomputed[name] = self.recomputed.get(name, 0) + 1
+        return value
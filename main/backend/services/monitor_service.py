@@ -3,108 +3,331 @@
 
 功能：
 1. 解析进化事件流（从数据库读取）
+   智能水平走势（从快照表按时间桶降采样）
 2. 统计 Agent 性能
 3. 解析知识图谱
 4. 提供数据查询接口
 
 数据来源：
 - monitor_evolution_events 表（进化事件）
+- monitor_intelligence 表（智能水平快照）
 - .claude/rules/*.md (策略规则)
 - .claude/agents/*.md (Agent 配置)
 - .claude/skills/*/SKILL.md (技能知识)
 - .claude/project_standards.md (最佳实践)
 """
 
-import re
-import uuid
+import time
+from collections import OrderedDict
 from pathlib import Path
-from datetime import datetime
-from typing import List, Dict
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 
 from models.monitor_schema import (
     EvolutionEvent,
     EvolutionDiff,
     EvolutionStreamResponse,
+    IntelligenceScore,
     AgentPerformance,
     PerformanceMetrics,
-    KnowledgeItem,
-    KnowledgeCategory,
     KnowledgeGraphResponse
 )
-from models.db import MonitorEvolutionEvent
-from core.database import get_db
-from sqlalchemy import select, desc
+from models.db import MonitorEvolutionEvent, MonitorIntelligence
+from core.config import settings
+from core.database import AsyncSessionLocal
+from core.pagination import keyset_before, next_cursor
+from services.evolution_bus import event_message
+from services.knowledge_index import KnowledgeIndex
+from sqlalchemy import select, desc, func, or_, cast, Integer
+
+
+# 走势降采样时间桶（秒）
+TREND_BUCKETS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+# 周桶从周一开始（1970-01-01 是周四，偏移 3 天）
+TREND_BUCKET_OFFSETS = {"week": 3 * 86400}
+# 自动选择时间桶时走势点数上限
+MAX_TREND_POINTS = 200
 
 
 class MonitorService:
     """通用监控服务"""
 
-    def __init__(self):
+    # 总数缓存的最大条目数（LRU 淘汰），过滤参数来自客户端，不能无限增长
+    COUNT_CACHE_MAX_ENTRIES = 256
+
+    # 事件流列表需要的列（不含 diff 大文本列和 created_at）
+    _EVENT_COLUMNS = (
+        MonitorEvolutionEvent.id,
+        MonitorEvolutionEvent.event_id,
+        MonitorEvolutionEvent.timestamp,
+        MonitorEvolutionEvent.agent,
+        MonitorEvolutionEvent.strategy,
+        MonitorEvolutionEvent.description,
+        MonitorEvolutionEvent.reward,
+    )
+    _DIFF_COLUMNS = (
+        MonitorEvolutionEvent.diff_before,
+        MonitorEvolutionEvent.diff_after,
+        MonitorEvolutionEvent.diff_impact,
+    )
+
+    def __init__(self, session_factory=None, project_root: Optional[Path] = None):
         """初始化监控服务"""
-        self.project_root = Path(__file__).parent.parent.parent.parent
+        self._session_factory = session_factory or AsyncSessionLocal
+        self.project_root = project_root or Path(__file__).parent.parent.parent.parent
+        self.knowledge_index = KnowledgeIndex(self.project_root)
+        # (agent, strategy) -> (过期时间, 总数)，按最近使用排序
+        self._count_cache: "OrderedDict[Tuple[Optional[str], Optional[str]], Tuple[float, int]]" = OrderedDict()
 
     async def get_evolution_stream(
         self,
         limit: int = 50,
-        offset: int = 0
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        since: Optional[datetime] = None,
+        agent: Optional[str] = None,
+        strategy: Optional[str] = None,
+        include_diff: bool = True
     ) -> EvolutionStreamResponse:
         """
         获取进化事件流
 
         数据来源: monitor_evolution_events 表
 
+        按 (timestamp, id) 倒序游标分页；未提供 cursor 时兼容 offset 分页。
+        只查询响应需要的列，include_diff=False 时不读取 diff 大文本列。
+
         Args:
             limit: 每页数量
-            offset: 偏移量
+            offset: 偏移量（提供 cursor 时忽略）
+            cursor: 分页游标，取上一页返回的 next_cursor
+            include_total: 是否返回总数（仅首页计算）
+            since: 只返回该时间之后的事件（增量拉取）
+            agent: 按 Agent 名称过滤
+            strategy: 按策略类型过滤
+            include_diff: 是否返回进化对比详情
 
         Returns:
             EvolutionStreamResponse: 进化事件流响应
         """
+        filters = []
+        if since is not None:
+            filters.append(MonitorEvolutionEvent.timestamp > since)
+        if agent:
+            filters.append(MonitorEvolutionEvent.agent == agent)
+        if strategy:
+            filters.append(MonitorEvolutionEvent.strategy == strategy)
+
+        columns = self._EVENT_COLUMNS + (self._DIFF_COLUMNS if include_diff else ())
+
         events = []
 
         # 从数据库读取进化事件
-        async for db in get_db():
+        async with self._session_factory() as db:
             # 查询总数
-            count_query = select(MonitorEvolutionEvent)
-            result = await db.execute(count_query)
-            all_events = result.scalars().all()
-            total = len(all_events)
+            total = None
+            if include_total and cursor is None:
+                total = await self._count_events(db, filters, cacheable=since is None, key=(agent, strategy))
 
-            # 查询分页数据（按时间倒序）
+            # 查询分页数据（按时间倒序，多取一行判断是否还有下一页）
             query = (
-                select(MonitorEvolutionEvent)
-                .order_by(desc(MonitorEvolutionEvent.timestamp))
-                .limit(limit)
-                .offset(offset)
+                select(*columns)
+                .where(*filters)
+                .order_by(desc(MonitorEvolutionEvent.timestamp), desc(MonitorEvolutionEvent.id))
+                .limit(limit + 1)
             )
+            after = keyset_before(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id, cursor)
+            if after is not None:
+                query = query.where(after)
+            elif offset:
+                query = query.offset(offset)
             result = await db.execute(query)
-            db_events = result.scalars().all()
+            rows = result.all()
+            cursor_token = next_cursor(rows, limit, "timestamp")
+            rows = rows[:limit]
 
             # 转换为 Pydantic 模型
-            for db_event in db_events:
+            for row in rows:
                 # 构建 diff 对象（如果有）
                 diff = None
-                if db_event.diff_before and db_event.diff_after:
+                if include_diff and row.diff_before and row.diff_after:
                     diff = EvolutionDiff(
-                        before=db_event.diff_before,
-                        after=db_event.diff_after,
-                        impact=db_event.diff_impact or ""
+                        before=row.diff_before,
+                        after=row.diff_after,
+                        impact=row.diff_impact or ""
                     )
 
                 events.append(EvolutionEvent(
-                    id=db_event.event_id,
-                    timestamp=db_event.timestamp,
-                    agent=db_event.agent,
-                    strategy=db_event.strategy,
-                    description=db_event.description,
-                    reward=db_event.reward / 10.0,  # 转换回 0-10 范围
+                    id=row.event_id,
+                    timestamp=row.timestamp,
+                    agent=row.agent,
+                    strategy=row.strategy,
+                    description=row.description,
+                    reward=row.reward / 10.0,  # 转换回 0-10 范围
                     diff=diff
                 ))
 
             return EvolutionStreamResponse(
                 total=total,
-                events=events
+                events=events,
+                next_cursor=cursor_token
+            )
+
+    async def get_events_after(self, event_id: str, limit: int) -> Optional[List[dict]]:
+        """
+        按时间正序返回 event_id 之后的事件推送消息（WebSocket 断线续传的数据库回退）
+
+        event_id 不存在，或之后的事件超过 limit 条（补发不完整会留下缺口）时返回 None，
+        由调用方通知客户端全量刷新。
+        """
+        columns = self._EVENT_COLUMNS + self._DIFF_COLUMNS
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id)
+                .where(MonitorEvolutionEvent.event_id == event_id)
+            )
+            anchor = result.first()
+            if anchor is None:
+                return None
+
+            timestamp, row_id = anchor
+            result = await db.execute(
+                select(*columns)
+                .where(
+                    MonitorEvolutionEvent.timestamp >= timestamp,
+                    or_(MonitorEvolutionEvent.timestamp > timestamp, MonitorEvolutionEvent.id > row_id),
+                )
+                .order_by(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id)
+                .limit(limit + 1)
+            )
+            rows = result.all()
+            if len(rows) > limit:
+                return None
+            return [event_message(row) for row in rows]
+
+    async def _count_events(self, db, filters, cacheable: bool, key) -> int:
+        """
+        统计事件总数
+
+        COUNT 只走索引，不加载任何行；不带 since 的结果按 (agent, strategy)
+        缓存 EVOLUTION_COUNT_CACHE_SECONDS 秒（事件由外部脚本写入，无法在写入时失效），
+        最多保留 COUNT_CACHE_MAX_ENTRIES 个组合。
+        """
+        now = time.monotonic()
+        if cacheable:
+            cached = self._count_cache.get(key)
+            if cached is not None and cached[0] > now:
+                self._count_cache.move_to_end(key)
+                return cached[1]
+
+        result = await db.execute(select(func.count(MonitorEvolutionEvent.id)).where(*filters))
+        total = result.scalar() or 0
+
+        if cacheable and settings.EVOLUTION_COUNT_CACHE_SECONDS > 0:
+            self._count_cache[key] = (now + settings.EVOLUTION_COUNT_CACHE_SECONDS, total)
+            self._count_cache.move_to_end(key)
+            while len(self._count_cache) > self.COUNT_CACHE_MAX_ENTRIES:
+                self._count_cache.popitem(last=False)
+        return total
+
+    async def get_intelligence_trend(
+        self,
+        days: str = "7",
+        bucket: str = "auto"
+    ) -> Tuple[List[IntelligenceScore], str]:
+        """
+        获取智能水平走势
+
+        数据来源: monitor_intelligence 表（后台任务定时写入的快照）
+
+        按时间桶在数据库中聚合：每个桶返回最后一条快照的各维度，
+        并附带桶内总分的最小/最大/平均值和快照数量。
+        bucket=auto 时按时间跨度选择不超过 MAX_TREND_POINTS 个点的最细粒度，
+        "all" 范围的响应大小因此保持固定量级。
+
+        Args:
+            days: 时间范围 7/30/all
+            bucket: 时间桶 hour/day/week/auto
+
+        Returns:
+            (走势数据, 实际使用的时间桶)
+        """
+        now = datetime.now()
+        async with self._session_factory() as db:
+            if days == "all":
+                result = await db.execute(select(func.min(MonitorIntelligence.timestamp)))
+                start = result.scalar()
+                if start is None:
+                    return [], bucket if bucket in TREND_BUCKETS else "hour"
+            else:
+                start = now - timedelta(days=30 if days == "30" else 7)
+
+            if bucket not in TREND_BUCKETS:
+                bucket = self._pick_bucket((now - start).total_seconds())
+
+            bucket_key = self._bucket_expression(db, bucket)
+            window = {"partition_by": bucket_key}
+            ranked = (
+                select(
+                    MonitorIntelligence.timestamp,
+                    MonitorIntelligence.intelligence_score,
+                    MonitorIntelligence.strategy_weight,
+                    MonitorIntelligence.knowledge_richness,
+                    MonitorIntelligence.quality_trend,
+                    MonitorIntelligence.evolution_frequency,
+                    bucket_key.label("bucket"),
+                    func.row_number().over(
+                        order_by=(desc(MonitorIntelligence.timestamp), desc(MonitorIntelligence.id)), **window
+                    ).label("rn"),
+                    func.min(MonitorIntelligence.intelligence_score).over(**window).label("score_min"),
+                    func.max(MonitorIntelligence.intelligence_score).over(**window).label("score_max"),
+                    func.avg(MonitorIntelligence.intelligence_score).over(**window).label("score_avg"),
+                    func.count().over(**window).label("samples"),
+                )
+                .where(MonitorIntelligence.timestamp >= start)
+                .subquery()
+            )
+            result = await db.execute(
+                select(ranked).where(ranked.c.rn == 1).order_by(ranked.c.bucket)
             )
+            rows = result.all()
+
+        trend = [
+            IntelligenceScore(
+                timestamp=row.timestamp,
+                intelligence_score=row.intelligence_score,
+                strategy_weight=row.strategy_weight,
+                knowledge_richness=row.knowledge_richness,
+                quality_trend=row.quality_trend,
+                evolution_frequency=row.evolution_frequency,
+                score_min=row.score_min,
+                score_max=row.score_max,
+                score_avg=round(float(row.score_avg), 2),
+                samples=row.samples,
+            )
+            for row in rows
+        ]
+        return trend, bucket
+
+    @staticmethod
+    def _pick_bucket(span_seconds: float) -> str:
+        """选择点数不超过 MAX_TREND_POINTS 的最细时间桶"""
+        for name, width in TREND_BUCKETS.items():
+            if span_seconds / width <= MAX_TREND_POINTS:
+                return name
+        return "week"
+
+    @staticmethod
+    def _bucket_expression(db, bucket: str):
+        """时间桶编号：(epoch 秒 + 偏移) // 桶宽"""
+        width = TREND_BUCKETS[bucket]
+        offset = TREND_BUCKET_OFFSETS.get(bucket, 0)
+        column = MonitorIntelligence.timestamp
+        if db.get_bind().dialect.name == "postgresql":
+            return func.floor((func.extract("epoch", column) + offset) / width)
+        # 整数向下取整除法（SQLAlchemy 的 // 运算符）
+        return (cast(func.strftime("%s", column), Integer) + offset) // width
 
     async def get_agent_performance(
         self,
@@ -177,6 +400,8 @@ class MonitorService:
         - .claude/project_standards.md (最佳实践)
         - .claude/skills/*/SKILL.md (技能知识)
 
+        源文件解析结果缓存在 KnowledgeIndex 中，只有 mtime/size 变化的文件会重新解析。
+
         Args:
             category: 知识类型筛选
             search: 搜索关键词
@@ -184,112 +409,7 @@ class MonitorService:
         Returns:
             KnowledgeGraphResponse: 知识图谱响应
         """
-        categories: Dict[str, List[KnowledgeItem]] = {
-            "strategy": [],
-            "best-practice": [],
-            "template": [],
-            "error-handling": []
-        }
-
-        # 1. 解析策略规则
-        rules_dir = self.project_root / ".claude" / "rules"
-        if rules_dir.exists():
-            for rule_file in rules_dir.glob("*.md"):
-                try:
-                    content = rule_file.read_text(encoding="utf-8")
-
-                    # 提取洞察
-                    insight_pattern = r"### (.+?)\n\n- \*\*Agent\*\*:\s*(.+?)\n- \*\*描述\*\*:\s*(.+?)(?=\n\n|\Z)"
-                    insights = re.findall(insight_pattern, content, re.DOTALL)
-
-                    for insight_type, agent, description in insights:
-                        categories["strategy"].append(KnowledgeItem(
-                            id=f"kb_{uuid.uuid4().hex[:8]}",
-                            title=f"{agent.strip()} - {insight_type.strip()}",
-                            description=description.strip()[:200],
-                            source=str(rule_file),
-                            updated_at=datetime.fromtimestamp(rule_file.stat().st_mtime),
-                            tags=[agent.strip(), "strategy"]
-                        ))
-
-                except Exception:
-                    continue
-
-        # 2. 解析最佳实践
-        standards_file = self.project_root / ".claude" / "project_standards.md"
-        if standards_file.exists():
-            try:
-                content = standards_file.read_text(encoding="utf-8")
-
-                # 提取最佳实践章节
-                practice_pattern = r"### (.+?)\n\n(.+?)(?=\n###|\Z)"
-                practices = re.findall(practice_pattern, content, re.DOTALL)
-
-                for title, description in practices:
-                    if "最佳实践" in title or "Best Practice" in title:
-                        categories["best-practice"].append(KnowledgeItem(
-                            id=f"kb_{uuid.uuid4().hex[:8]}",
-                            title=title.strip(),
-                            description=description.strip()[:200],
-                            source=str(standards_file),
-                            updated_at=datetime.fromtimestamp(standards_file.stat().st_mtime),
-                            tags=["best-practice"]
-                        ))
-
-            except Exception:
-                pass
-
-        # 3. 解析技能知识
-        skills_dir = self.project_root / ".claude" / "skills"
-        if skills_dir.exists():
-            for skill_file in skills_dir.glob("*/SKILL.md"):
-                try:
-                    content = skill_file.read_text(encoding="utf-8")
-
-                    # 提取技能标题和描述
-                    title_match = re.search(r"# (.+)", content)
-                    title = title_match.group(1).strip() if title_match else skill_file.parent.name
-
-                    # 提取第一段作为描述
-                    desc_match = re.search(r"##.+?\n\n(.+?)(?=\n##|\Z)", content, re.DOTALL)
-                    description = desc_match.group(1).strip()[:200] if desc_match else ""
-
-                    categories["template"].append(KnowledgeItem(
-                        id=f"kb_{uuid.uuid4().hex[:8]}",
-                        title=title,
-                        description=description,
-                        source=str(skill_file),
-                        updated_at=datetime.fromtimestamp(skill_file.stat().st_mtime),
-                        tags=["skill", "template"]
-                    ))
-
-                except Exception:
-                    continue
-
-        # 类型筛选
-        if category != "all":
-            filtered_categories = {category: categories.get(category, [])}
-        else:
-            filtered_categories = categories
-
-        # 搜索筛选
-        if search:
-            for cat, items in filtered_categories.items():
-                filtered_categories[cat] = [
-                    item for item in items
-                    if search.lower() in item.title.lower() or
-                       search.lower() in item.description.lower()
-                ]
-
-        # 构建响应
-        response_categories = {}
-        for cat, items in filtered_categories.items():
-            response_categories[cat] = KnowledgeCategory(
-                count=len(items),
-                items=items
-            )
-
-        return KnowledgeGraphResponse(categories=response_categories)
+        return self.knowledge_index.query(category=category, search=search)
 
     def _get_agent_type(self, agent_name: str) -> str:
         """
@@ -1,14 +1,19 @@
 """
 进度服务 - 处理答题和进度统计
 """
-from datetime import datetime, timedelta
-from typing import List
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, and_, update, case
 
-from models.db import User, Question, UserProgress, Achievement, UserAchievement, WrongQuestion
-from models.schema import AnswerRequest, AnswerResponse, AchievementResponse
+from models.db import User, Question, UserProgress, UserProgressSummary, UserDailyActivity, WrongQuestion
+from models.schema import AnswerRequest, AnswerResponse, ProgressResponse
+from core.database import dialect_insert
 from core.exceptions import NotFoundException
+from core.security import user_cache
+from services.achievement_engine import achievement_engine
+from services.leaderboard import leaderboard
 
 
 class ProgressService:
@@ -43,28 +48,47 @@ class ProgressService:
             answer_time=request.answer_time
         )
         db.add(progress)
+        # 立即写入答题记录：成就状态水合时的聚合查询需包含本题
+        await db.flush()
 
-        # 计算连击
-        streak = await ProgressService._calculate_streak(user.id, is_correct, db)
+        # 更新连击计数器、进度汇总和每日学习汇总
+        streak = await ProgressService._update_streak(user.id, is_correct, db)
+        correct = 1 if is_correct else 0
+        totals = await ProgressService._update_summary(user.id, 1, correct, db)
+        await ProgressService._update_daily_activity(user.id, 1, correct, db)
 
         # 计算得分
         score = 0
         if is_correct:
             score = ProgressService._calculate_score(request.answer_time, streak)
-            # 更新用户总分
-            user.total_score += score
+            # 更新用户总分（原子自增，不依赖可能来自缓存的 user.total_score）
+            await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(total_score=User.total_score + score)
+            )
         else:
             # 记录错题
             await ProgressService._record_wrong_question(user.id, question.id, db)
 
-        # 检查成就
-        new_achievements = await ProgressService._check_achievements(user.id, streak, db)
+        # 检查成就（内存累计值，无逐题查询）
+        new_achievements = await achievement_engine.evaluate(
+            db, user.id, is_correct, question.module, streak, totals=totals
+        )
 
         # 生成鼓励语
         encouragement = ProgressService._generate_encouragement(is_correct, streak, score)
 
-        await db.commit()
+        try:
+            await db.commit()
+        except Exception:
+            # 提交失败时内存累计值已前移，丢弃以便下次重新水合
+            achievement_engine.forget(user.id)
+            raise
         await db.refresh(user)
+        # 总分、连击已变化，刷新用户缓存
+        user_cache.put(user)
+        leaderboard.record_score(user.id, user.nickname, question.module, score, user.total_score)
 
         return AnswerResponse(
             is_correct=is_correct,
@@ -73,37 +97,253 @@ class ProgressService:
             score=score,
             streak=streak,
             total_score=user.total_score,
-            new_achievements=[AchievementResponse.model_validate(a) for a in new_achievements],
+            new_achievements=new_achievements,
             encouragement=encouragement
         )
 
     @staticmethod
-    async def _calculate_streak(user_id: int, is_correct: bool, db: AsyncSession) -> int:
+    async def get_progress_summary(
+        user: User,
+        db: AsyncSession,
+        streak: Optional[int] = None
+    ) -> ProgressResponse:
         """
-        计算连击数
-        如果答对，连击+1；如果答错，连击归零
+        获取学习进度汇总
+
+        总答题数、正确数、今日完成数按主键读取汇总表一行，
+        连击读取用户表上的计数器：传入 streak（来自 read_progress_state）时直接使用，
+        否则取 user.current_streak（user 可能来自用户缓存，多 worker 下会滞后）
         """
-        if not is_correct:
-            return 0
+        summary = await db.get(UserProgressSummary, user.id)
+
+        total_questions = summary.total_questions if summary else 0
+        correct_answers = summary.correct_answers if summary else 0
+        completed_today = (
+            summary.completed_today
+            if summary and summary.last_answer_date == datetime.utcnow().date()
+            else 0
+        )
+
+        accuracy = (
+            round(correct_answers / total_questions * 100, 1)
+            if total_questions > 0
+            else 0.0
+        )
+
+        return ProgressResponse(
+            total_questions=total_questions,
+            correct_answers=correct_answers,
+            accuracy=accuracy,
+            streak=(user.current_streak if streak is None else streak) or 0,
+            daily_goal=20,
+            completed_today=completed_today,
+        )
 
-        # 获取最近的答题记录（按时间倒序）
+    @staticmethod
+    async def read_progress_state(user_id: int, db: AsyncSession) -> Tuple[Optional[datetime], int]:
+        """
+        按主键读取 users 行的 updated_at 和 current_streak
+
+        不使用 get_current_user 返回的实例：它可能来自用户缓存，
+        其他 worker 处理的答题在缓存过期前不可见，会返回过期的 304 或连击
+        """
         result = await db.execute(
-            select(UserProgress)
-            .where(UserProgress.user_id == user_id)
-            .order_by(UserProgress.answered_at.desc())
-            .limit(100)  # 限制查询数量
+            select(User.updated_at, User.current_streak).where(User.id == user_id)
         )
-        recent_progress = result.scalars().all()
+        updated_at, current_streak = result.one()
+        return updated_at, current_streak or 0
 
-        # 计算连续答对的题目数
-        streak = 1  # 当前这题答对了，至少是1
-        for p in recent_progress:
-            if p.is_correct:
-                streak += 1
-            else:
-                break
+    @staticmethod
+    def progress_etag(user_id: int, updated_at: Optional[datetime]) -> str:
+        """
+        进度汇总的 ETag
+
+        每次答题都会更新 users 行（连击、总分），updated_at 随之变化；
+        再加上当天日期，使"今日完成数"跨天时也会失效
+        """
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        raw = f"{user_id}:{updated_at.isoformat() if updated_at else ''}:{today}"
+        return f'W/"{hashlib.sha1(raw.encode()).hexdigest()[:16]}"'
+
+    @staticmethod
+    async def _update_summary(
+        user_id: int,
+        answered: int,
+        correct: int,
+        db: AsyncSession,
+        on_date: Optional[date] = None
+    ) -> Tuple[int, int]:
+        """
+        增量更新进度汇总（单条 UPSERT ... RETURNING）
+        跨天后今日完成数从本次答题数重新计数
 
-        return streak
+        Args:
+            answered: 本次计入的答题数
+            correct: 其中答对的数量
+            on_date: 答题日期，默认今天（UTC）
+
+        Returns:
+            更新后的 (总答题数, 总答对数)
+        """
+        summary = UserProgressSummary.__table__.c
+        stmt = ProgressService._summary_upsert(db).returning(summary.total_questions, summary.correct_answers)
+        row = ProgressService._summary_row(user_id, on_date or datetime.utcnow().date(), answered, correct)
+        result = await db.execute(stmt, row)
+        total_questions, correct_answers = result.one()
+        return total_questions, correct_answers
+
+    @staticmethod
+    async def _update_summaries(deltas: List[Tuple[int, date, int, int]], db: AsyncSession) -> None:
+        """
+        批量增量更新进度汇总（一条 UPSERT 语句，executemany）
+
+        Args:
+            deltas: [(用户ID, 答题日期, 答题数, 答对数)]，同一用户按日期升序
+        """
+        await db.execute(ProgressService._summary_upsert(db), [
+            ProgressService._summary_row(user_id, day, answered, correct)
+            for user_id, day, answered, correct in deltas
+        ])
+
+    @staticmethod
+    def _summary_upsert(db: AsyncSession):
+        """进度汇总的增量 UPSERT 语句"""
+        stmt = dialect_insert(db, UserProgressSummary.__table__)
+        summary = UserProgressSummary.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                "total_questions": summary.total_questions + stmt.excluded.total_questions,
+                "correct_answers": summary.correct_answers + stmt.excluded.correct_answers,
+                "completed_today": case(
+                    (
+                        summary.last_answer_date == stmt.excluded.last_answer_date,
+                        summary.completed_today + stmt.excluded.completed_today,
+                    ),
+                    else_=stmt.excluded.completed_today
+                ),
+                "last_answer_date": stmt.excluded.last_answer_date,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        return stmt
+
+    @staticmethod
+    def _summary_row(user_id: int, day: date, answered: int, correct: int) -> dict:
+        return {
+            "user_id": user_id,
+            "total_questions": answered,
+            "correct_answers": correct,
+            "last_answer_date": day,
+            "completed_today": answered,
+            "updated_at": datetime.utcnow(),
+        }
+
+    @staticmethod
+    async def _update_daily_activity(
+        user_id: int,
+        answered: int,
+        correct: int,
+        db: AsyncSession,
+        on_date: Optional[date] = None
+    ) -> None:
+        """增量更新当日学习汇总（单条 UPSERT）"""
+        await ProgressService._update_daily_activities(
+            [(user_id, on_date or datetime.utcnow().date(), answered, correct)], db
+        )
+
+    @staticmethod
+    async def _update_daily_activities(deltas: List[Tuple[int, date, int, int]], db: AsyncSession) -> None:
+        """
+        批量增量更新每日学习汇总（一条 UPSERT 语句，executemany）
+
+        Args:
+            deltas: [(用户ID, 日期, 答题数, 答对数)]
+        """
+        stmt = dialect_insert(db, UserDailyActivity.__table__)
+        activity = UserDailyActivity.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "activity_date"],
+            set_={
+                "questions_completed": activity.questions_completed + stmt.excluded.questions_completed,
+                "correct_count": activity.correct_count + stmt.excluded.correct_count,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        now = datetime.utcnow()
+        await db.execute(stmt, [
+            {
+                "user_id": user_id,
+                "activity_date": day,
+                "questions_completed": answered,
+                "correct_count": correct,
+                "updated_at": now,
+            }
+            for user_id, day, answered, correct in deltas
+        ])
+
+    @staticmethod
+    async def count_consecutive_days(
+        user_id: int,
+        today: date,
+        db: AsyncSession,
+        chunk_size: int = 62
+    ) -> int:
+        """
+        计算截至今天的连续学习天数（今天没有学习则为 0）
+
+        按日期倒序分块范围扫描日汇总表，遇到断档即停止，可跨月、跨年
+        """
+        consecutive_days = 0
+        expected = today
+        while True:
+            result = await db.execute(
+                select(UserDailyActivity.activity_date)
+                .where(
+                    and_(
+                        UserDailyActivity.user_id == user_id,
+                        UserDailyActivity.activity_date <= expected,
+                    )
+                )
+                .order_by(UserDailyActivity.activity_date.desc())
+                .limit(chunk_size)
+            )
+            dates = result.scalars().all()
+            for activity_date in dates:
+                if activity_date != expected:
+                    return consecutive_days
+                consecutive_days += 1
+                expected -= timedelta(days=1)
+            if len(dates) < chunk_size:
+                return consecutive_days
+
+    @staticmethod
+    async def _update_streak(user_id: int, is_correct: bool, db: AsyncSession) -> int:
+        """
+        原子更新连击计数器
+        如果答对，连击+1（同时刷新最佳连击）；如果答错，连击归零
+
+        单条 UPDATE ... RETURNING 完成读改写，并发提交不会丢失更新
+        """
+        if is_correct:
+            next_streak = User.current_streak + 1
+            values = {
+                "current_streak": next_streak,
+                "best_streak": case(
+                    (next_streak > User.best_streak, next_streak),
+                    else_=User.best_streak
+                ),
+            }
+        else:
+            values = {"current_streak": 0}
+
+        result = await db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(**values)
+            .returning(User.current_streak)
+        )
+        return result.scalar_one()
 
     @staticmethod
     def _calculate_score(answer_time: int, streak: int) -> int:
@@ -136,82 +376,59 @@ class ProgressService:
 
     @staticmethod
     async def _record_wrong_question(user_id: int, question_id: int, db: AsyncSession):
-        """记录错题"""
-        # 查询是否已存在
-        result = await db.execute(
-            select(WrongQuestion).where(
-                and_(
-                    WrongQuestion.user_id == user_id,
-                    WrongQuestion.question_id == question_id
-                )
-            )
-        )
-        wrong_question = result.scalar_one_or_none()
-
-        if wrong_question:
-            # 已存在，增加错误次数
-            wrong_question.wrong_count += 1
-            wrong_question.last_wrong_at = datetime.utcnow()
-        else:
-            # 不存在，创建新记录
-            wrong_question = WrongQuestion(
-                user_id=user_id,
-                question_id=question_id,
-                wrong_count=1
-            )
-            db.add(wrong_question)
+        """记录错题（单条 UPSERT，wrong_count 原子 +1）"""
+        await ProgressService.record_wrong_questions([(user_id, question_id, 1, datetime.utcnow())], db)
 
     @staticmethod
-    async def _check_achievements(
-        user_id: int,
-        streak: int,
-        db: AsyncSession
-    ) -> List[Achievement]:
+    async def record_wrong_questions(
+        entries: List[Tuple[int, int, int, datetime]],
+        db: AsyncSession,
+        chunk_size: int = 500
+    ) -> int:
         """
-        检查是否解锁新成就
-        """
-        new_achievements = []
+        批量记录错题（INSERT ... ON CONFLICT DO UPDATE，executemany）
 
-        # 获取所有成就
-        result = await db.execute(select(Achievement))
-        all_achievements = result.scalars().all()
+        用于批量写入管道和历史答题导入。同一 (用户, 题目) 先在内存中合并，
+        wrong_count 在数据库端原子累加，last_wrong_at 取较晚的时间，
+        因此并发提交和乱序导入都不会冲突或回退。调用方负责提交。
 
-        # 获取用户已解锁的成就
-        result = await db.execute(
-            select(UserAchievement.achievement_id).where(UserAchievement.user_id == user_id)
-        )
-        unlocked_ids = set(result.scalars().all())
+        Args:
+            entries: [(用户ID, 题目ID, 答错次数, 最近答错时间)]
+            chunk_size: 每条语句的参数行数
 
-        # 获取用户统计数据
-        result = await db.execute(
-            select(func.count(UserProgress.id))
-            .where(UserProgress.user_id == user_id)
-        )
-        total_questions = result.scalar() or 0
-
-        # 检查每个成就
-        for achievement in all_achievements:
-            # 如果已解锁，跳过
-            if achievement.id in unlocked_ids:
-                continue
-
-            # 检查是否满足条件
-            is_unlocked = False
-            if achievement.requirement_type == "total_questions":
-                is_unlocked = total_questions >= achievement.requirement_value
-            elif achievement.requirement_type == "streak":
-                is_unlocked = streak >= achievement.requirement_value
-
-            # 解锁成就
-            if is_unlocked:
-                user_achievement = UserAchievement(
-                    user_id=user_id,
-                    achievement_id=achievement.id
-                )
-                db.add(user_achievement)
-                new_achievements.append(achievement)
+        Returns:
+            int: 合并后写入的 (用户, 题目) 数量
+        """
+        merged: Dict[Tuple[int, int], List] = {}
+        for user_id, question_id, count, wrong_at in entries:
+            item = merged.get((user_id, question_id))
+            if item is None:
+                merged[(user_id, question_id)] = [count, wrong_at]
+            else:
+                item[0] += count
+                item[1] = max(item[1], wrong_at)
+        if not merged:
+            return 0
 
-        return new_achievements
+        stmt = dialect_insert(db, WrongQuestion.__table__)
+        wrong = WrongQuestion.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "question_id"],
+            set_={
+                "wrong_count": wrong.wrong_count + stmt.excluded.wrong_count,
+                "last_wrong_at": case(
+                    (stmt.excluded.last_wrong_at > wrong.last_wrong_at, stmt.excluded.last_wrong_at),
+                    else_=wrong.last_wrong_at
+                ),
+            },
+        )
+        rows = [
+            {"user_id": user_id, "question_id": question_id, "wrong_count": count, "last_wrong_at": wrong_at}
+            for (user_id, question_id), (count, wrong_at) in merged.items()
+        ]
+        for start in range(0, len(rows), chunk_size):
+            await db.execute(stmt, rows[start:start + chunk_size])
+        return len(rows)
 
     @staticmethod
     def _generate_encouragement(is_correct: bool, streak: int, score: int) -> str:
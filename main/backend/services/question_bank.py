@@ -0,0 +1,253 @@
+"""
+题库索引引擎
+
+启动时把 questions 表的 (id, module, difficulty) 加载到内存，
+按 (模块, 难度) 分桶保存紧凑的 ID 数组，随机抽题为 O(1)，
+取到 ID 后再按主键读取整行，替代每次请求的 ORDER BY random() 全表排序。
+
+管理员增删改题目时需同步调用 add / remove / move，保持本进程索引与数据库一致。
+多 worker 部署时其他进程（或 seed 脚本）的增删改只写数据库：距上次加载超过
+refresh_seconds 后重新加载，在此之前新题抽不到、已迁移的题仍留在旧桶，
+抽题方需校验读到的行（见 QuestionService.get_random_question）。
+"""
+import asyncio
+import random
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from models.db import Question
+
+
+BucketKey = Tuple[str, int]
+
+
+def matches_filter(question: Question, module: Optional[str], difficulty: Optional[int]) -> bool:
+    """读到的题目行是否满足筛选条件（难度为空按 1 计，与分桶一致）"""
+    if module and question.module != module:
+        return False
+    if difficulty and (question.difficulty or 1) != difficulty:
+        return False
+    return True
+
+
+class QuestionBank:
+    """内存题库索引"""
+
+    def __init__(self, rng: Optional[random.Random] = None, refresh_seconds: float = 0):
+        self._buckets: Dict[BucketKey, array] = {}
+        self._rng = rng or random.Random()
+        self._lock = asyncio.Lock()
+        self.refresh_seconds = refresh_seconds
+        self.loaded = False
+        self._loaded_at: Optional[float] = None
+        # 每次 add/remove/move 递增，用于发现加载期间发生的变更
+        self._version = 0
+
+    @property
+    def stale(self) -> bool:
+        """未加载，或距上次加载已超过刷新周期"""
+        if not self.loaded:
+            return True
+        return (
+            self.refresh_seconds > 0
+            and self._loaded_at is not None
+            and time.monotonic() - self._loaded_at >= self.refresh_seconds
+        )
+
+    async def load(self, db: AsyncSession, batch_size: int = 10000) -> int:
+        """
+        从数据库全量加载题目索引
+
+        Args:
+            db: 数据库会话
+            batch_size: 每批读取的行数
+
+        Returns:
+            int: 加载的题目数量
+        """
+        async with self._lock:
+            return await self._load(db, batch_size)
+
+    async def ensure_loaded(self, db: AsyncSession) -> None:
+        """未加载或已过刷新周期时重新加载；并发调用只有第一个会查询"""
+        if not self.stale:
+            return
+        async with self._lock:
+            # 等锁期间其他协程可能已完成加载
+            if self.stale:
+                await self._load(db)
+
+    async def _load(self, db: AsyncSession, batch_size: int = 10000) -> int:
+        """全量加载（调用方持有 _lock）"""
+        version = self._version
+        buckets: Dict[BucketKey, array] = {}
+        result = await db.stream(
+            select(Question.id, Question.module, Question.difficulty)
+            .execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions(batch_size):
+            for question_id, module, difficulty in rows:
+                key = (module, difficulty or 1)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = array("q")
+                bucket.append(question_id)
+
+        if version != self._version:
+            # 读取期间索引有变更，结果可能是旧的：保留当前索引，下次访问再加载
+            return self.size
+        self._buckets = buckets
+        self.loaded = True
+        self._loaded_at = time.monotonic()
+        return self.size
+
+    @property
+    def size(self) -> int:
+        """索引中的题目总数"""
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def add(self, question_id: int, module: str, difficulty: Optional[int]) -> None:
+        """新增题目到索引"""
+        key = (module, difficulty or 1)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = array("q")
+        bucket.append(question_id)
+        self._version += 1
+
+    def remove(
+        self,
+        question_id: int,
+        module: Optional[str] = None,
+        difficulty: Optional[int] = None
+    ) -> bool:
+        """
+        从索引中移除题目
+
+        已知模块和难度时只扫描对应的桶；未知时扫描所有匹配的桶（仅用于自愈等少见路径）。
+        移除采用"与末尾交换后弹出"，不保持桶内顺序。
+
+        Returns:
+            bool: 是否找到并移除
+        """
+        for key in self._matching_keys(module, difficulty):
+            bucket = self._buckets[key]
+            try:
+                index = bucket.index(question_id)
+            except ValueError:
+                continue
+            last = bucket.pop()
+            if index < len(bucket):
+                bucket[index] = last
+            if not bucket:
+                del self._buckets[key]
+            self._version += 1
+            return True
+        return False
+
+    def move(
+        self,
+        question_id: int,
+        old_module: Optional[str],
+        old_difficulty: Optional[int],
+        new_module: str,
+        new_difficulty: Optional[int]
+    ) -> None:
+        """
+        题目的模块或难度变更后迁移到新桶
+
+        旧模块/难度未知时传 None，按已知部分扫描匹配的桶
+        """
+        if (old_module, old_difficulty or 1) == (new_module, new_difficulty or 1):
+            return
+        self.remove(question_id, old_module, old_difficulty)
+        self.add(question_id, new_module, new_difficulty)
+
+    def pick(
+        self,
+        module: Optional[str] = None,
+        difficulty: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        随机抽取一道题目的 ID
+
+        筛选条件为空时按桶大小加权跨桶抽取；桶数量只与模块×难度组合有关，
+        因此抽题复杂度与题库规模无关。
+
+        Returns:
+            Optional[int]: 题目 ID，没有匹配题目时返回 None
+        """
+        keys = self._matching_keys(module, difficulty)
+        total = sum(len(self._buckets[key]) for key in keys)
+        if total == 0:
+            return None
+        return self._id_at(keys, self._rng.randrange(total))
+
+    def sample(
+        self,
+        module: Optional[str] = None,
+        difficulty: Optional[int] = None,
+        count: int = 1
+    ) -> List[int]:
+        """
+        一次抽取多道互不重复的题目 ID（用于对战预先规划所有回合）
+
+        匹配的题目不足 count 道时，先用完所有不同题目，再从打乱后的题目中循环补齐，
+        只在题量确实不够时才出现重复。
+
+        Returns:
+            List[int]: 题目 ID 列表，没有匹配题目时返回空列表
+        """
+        keys = self._matching_keys(module, difficulty)
+        total = sum(len(self._buckets[key]) for key in keys)
+        if total == 0 or count <= 0:
+            return []
+
+        indices = self._rng.sample(range(total), min(count, total))
+        picked = [self._id_at(keys, index) for index in indices]
+
+        while len(picked) < count:
+            refill = picked[:total]
+            self._rng.shuffle(refill)
+            picked.extend(refill[:count - len(picked)])
+        return picked
+
+    def stats(self) -> Dict[str, int]:
+        """各桶题目数量，键为 "module:difficulty" """
+        return {
+            f"{module}:{difficulty}": len(bucket)
+            for (module, difficulty), bucket in sorted(self._buckets.items())
+        }
+
+    def _id_at(self, keys: List[BucketKey], index: int) -> int:
+        """把跨桶的全局下标映射为题目 ID"""
+        for key in keys:
+            bucket = self._buckets[key]
+            if index < len(bucket):
+                return bucket[index]
+            index -= len(bucket)
+        raise IndexError(index)
+
+    def _matching_keys(
+        self,
+        module: Optional[str],
+        difficulty: Optional[int]
+    ) -> List[BucketKey]:
+        """返回满足筛选条件的桶键"""
+        if module and difficulty:
+            key = (module, difficulty)
+            return [key] if key in self._buckets else []
+        return [
+            key for key in self._buckets
+            if (not module or key[0] == module)
+            and (not difficulty or key[1] == difficulty)
+        ]
+
+
+# 全局题库索引（应用启动时加载，按 QUESTION_BANK_REFRESH_SECONDS 定期重新加载）
+question_bank = QuestionBank(refresh_seconds=settings.QUESTION_BANK_REFRESH_SECONDS)
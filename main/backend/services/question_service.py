@@ -3,16 +3,19 @@
 """
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
 
 from models.db import Question
 from models.schema import QuestionResponse
 from core.exceptions import NotFoundException
+from services.question_bank import matches_filter, question_bank
 
 
 class QuestionService:
     """题目服务类"""
 
+    # 索引与数据库不一致时（如其他进程删除了题目）的最大重试次数
+    MAX_PICK_ATTEMPTS = 3
+
     @staticmethod
     async def get_random_question(
         db: AsyncSession,
@@ -22,23 +25,27 @@ class QuestionService:
         """
         获取随机题目
         可以根据模块和难度筛选
+
+        从内存题库索引中 O(1) 抽取题目 ID，再按主键读取整行。
+        其他 worker 的增删改在索引重新加载前不可见，读到的行与筛选条件不符时纠正索引后重抽
         """
-        # 构建查询
-        query = select(Question)
+        await question_bank.ensure_loaded(db)
 
-        # 添加筛选条件
-        if module:
-            query = query.where(Question.module == module)
-        if difficulty:
-            query = query.where(Question.difficulty == difficulty)
+        for _ in range(QuestionService.MAX_PICK_ATTEMPTS):
+            question_id = question_bank.pick(module, difficulty)
+            if question_id is None:
+                break
 
-        # 随机排序并获取一条
-        query = query.order_by(func.random()).limit(1)
+            question = await db.get(Question, question_id)
+            if question is None:
+                # 题目已被删除但索引未同步，移除后重新抽取
+                question_bank.remove(question_id, module, difficulty)
+                continue
 
-        result = await db.execute(query)
-        question = result.scalar_one_or_none()
+            if matches_filter(question, module, difficulty):
+                return QuestionResponse.model_validate(question)
 
-        if not question:
-            raise NotFoundException("question", 0)
+            # 其他进程修改了模块或难度：迁移到实际的桶后重新抽取
+            question_bank.move(question_id, module, difficulty, question.module, question.difficulty)
 
-        return QuestionResponse.model_validate(question)
+        raise NotFoundException("question", 0)
@@ -1,12 +1,15 @@
 """
 抢答模式业务逻辑
+
+进行中的对战状态保存在 battle_sessions（内存），每回合的判定不读写数据库，
+对战结束时一次性写入统计和明细。多人房间由 battle_rooms 推进，见 services/battle_rooms.py。
 """
 import random
-from typing import Optional, Tuple
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc
 
-from models.db import SpeedQuizBattle, SpeedQuizDetail, Question
+from models.db import SpeedQuizBattle, SpeedQuizStats, Question
 from models.schema import (
     SpeedQuizStartRequest,
     SpeedQuizSubmitRequest,
@@ -15,13 +18,25 @@ from models.schema import (
     SpeedQuizStatsResponse,
     SpeedQuizHistoryResponse,
     SpeedQuizBattleResponse,
-    QuestionResponse
+    SpeedQuizRoomResponse
 )
+from core.pagination import keyset_before, next_cursor
+from services.battle_rooms import RoomManager, battle_rooms
+from services.battle_sessions import BattleSession, BattleSessionStore, RoundQuestion, battle_sessions
+from services.question_bank import matches_filter, question_bank
 
 
 class SpeedQuizService:
     """抢答服务"""
 
+    def __init__(
+        self,
+        sessions: Optional[BattleSessionStore] = None,
+        rooms: Optional[RoomManager] = None
+    ):
+        self.sessions = sessions if sessions is not None else battle_sessions
+        self.rooms = rooms if rooms is not None else battle_rooms
+
     @staticmethod
     def calculate_ai_time(difficulty: int) -> int:
         """计算 AI 答题时间（毫秒）"""
@@ -87,25 +102,58 @@ class SpeedQuizService:
         request: SpeedQuizStartRequest
     ) -> SpeedQuizStartResponse:
         """开始抢答"""
-        # 创建对战记录
+        # 一次性抽好所有回合的题目（同一场对战不重复）
+        questions = await self._draw_questions(
+            db, request.difficulty, request.module, request.rounds
+        )
+        if not questions:
+            raise ValueError("No questions available")
+
+        # 创建对战记录（只插入一行取得 battle_id，统计在对战结束时写入）
         battle = SpeedQuizBattle(
             user_id=user_id,
             difficulty=request.difficulty,
             module=request.module,
-            total_questions=request.rounds
+            total_questions=len(questions),
+            question_ids=",".join(str(q.id) for q in questions)
         )
         db.add(battle)
         await db.commit()
-        await db.refresh(battle)
 
-        # 获取第一题
-        question = await self._get_random_question(db, request.difficulty, request.module)
-        if not question:
-            raise ValueError("No questions available")
+        session = BattleSession(
+            battle_id=battle.id,
+            user_id=user_id,
+            difficulty=request.difficulty,
+            module=request.module,
+            questions=[RoundQuestion.from_question(q) for q in questions]
+        )
+        self.sessions.add(session)
 
         return SpeedQuizStartResponse(
             battle_id=battle.id,
-            question=QuestionResponse.from_orm(question)
+            question=session.current.question
+        )
+
+    async def create_room(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        request: SpeedQuizStartRequest
+    ) -> SpeedQuizRoomResponse:
+        """创建多人抢答房间（创建者为房主），题目一次性抽好，之后对战不访问数据库"""
+        questions = await self._draw_questions(
+            db, request.difficulty, request.module, request.rounds
+        )
+        if not questions:
+            raise ValueError("No questions available")
+
+        room = self.rooms.create(user_id, [RoundQuestion.from_question(q) for q in questions])
+        return SpeedQuizRoomResponse(
+            room_id=room.room_id,
+            host_id=room.host_id,
+            rounds=len(room.questions),
+            round_seconds=room.round_seconds,
+            max_players=room.max_players
         )
 
     async def submit_answer(
@@ -114,28 +162,24 @@ class SpeedQuizService:
         user_id: int,
         request: SpeedQuizSubmitRequest
     ) -> SpeedQuizSubmitResponse:
-        """提交答案"""
-        # 验证对战
-        query = select(SpeedQuizBattle).where(
-            SpeedQuizBattle.id == request.battle_id,
-            SpeedQuizBattle.user_id == user_id
-        )
-        result = await db.execute(query)
-        battle = result.scalar_one_or_none()
-        if not battle:
+        """
+        提交答案
+
+        按内存中的对战会话判定当前回合，不读数据库（会话在其他进程时先从数据库重建，
+        重建的会话每回合立即写入）；最后一回合结束后把对战统计和全部明细在一个事务中写入。
+        """
+        session = await self.sessions.resolve(db, request.battle_id, user_id)
+        if session is None:
             raise ValueError("Battle not found")
 
-        # 获取题目
-        query = select(Question).where(Question.id == request.question_id)
-        result = await db.execute(query)
-        question = result.scalar_one_or_none()
-        if not question:
+        if not session.seek(request.question_id):
             raise ValueError("Question not found")
+        current = session.current
 
         # AI 答题
-        should_correct = self.ai_should_answer_correct(question.difficulty)
-        ai_answer = self.get_ai_answer(question.correct_answer, should_correct)
-        ai_time = self.calculate_ai_time(question.difficulty)
+        should_correct = self.ai_should_answer_correct(current.difficulty)
+        ai_answer = self.get_ai_answer(current.correct_answer, should_correct)
+        ai_time = self.calculate_ai_time(current.difficulty)
 
         # 判定胜负
         winner = self.determine_winner(
@@ -143,89 +187,44 @@ class SpeedQuizService:
             request.answer_time,
             ai_answer,
             ai_time,
-            question.correct_answer
-        )
-
-        # 记录详情
-        detail = SpeedQuizDetail(
-            battle_id=battle.id,
-            question_id=question.id,
-            user_answer=request.answer,
-            user_time=request.answer_time,
-            ai_answer=ai_answer,
-            ai_time=ai_time,
-            correct_answer=question.correct_answer,
-            winner=winner
+            current.correct_answer
         )
-        db.add(detail)
-
-        # 更新对战统计
-        if request.answer == question.correct_answer:
-            battle.user_correct += 1
-        if ai_answer == question.correct_answer:
-            battle.ai_correct += 1
-        if winner == "user":
-            battle.user_wins += 1
-        elif winner == "ai":
-            battle.ai_wins += 1
-
-        await db.commit()
-
-        # 获取下一题
-        count_query = select(func.count()).select_from(SpeedQuizDetail).where(
-            SpeedQuizDetail.battle_id == battle.id
-        )
-        result = await db.execute(count_query)
-        answered_count = result.scalar()
+        session.record_round(request.answer, request.answer_time, ai_answer, ai_time, winner)
+        if not await self.sessions.save_round(db, session):
+            # 会话在其他进程也有持有者，本回合已由对方写入
+            raise ValueError("Question not found")
 
         next_question = None
-        if answered_count < battle.total_questions:
-            next_q = await self._get_random_question(db, battle.difficulty, battle.module)
-            if next_q:
-                next_question = QuestionResponse.from_orm(next_q)
+        if session.finished:
+            await self.sessions.finish(db, session)
+        else:
+            next_question = session.current.question
 
         return SpeedQuizSubmitResponse(
-            is_correct=request.answer == question.correct_answer,
+            is_correct=request.answer == current.correct_answer,
             ai_answer=ai_answer,
             ai_time=ai_time,
-            correct_answer=question.correct_answer,
+            correct_answer=current.correct_answer,
             winner=winner,
             next_question=next_question
         )
 
     async def get_stats(self, db: AsyncSession, user_id: int) -> SpeedQuizStatsResponse:
-        """获取战绩统计"""
-        query = select(SpeedQuizBattle).where(SpeedQuizBattle.user_id == user_id)
-        result = await db.execute(query)
-        battles = result.scalars().all()
-
-        total_battles = len(battles)
-        wins = sum(1 for b in battles if b.user_wins > b.ai_wins)
-        losses = sum(1 for b in battles if b.user_wins < b.ai_wins)
-        win_rate = wins / total_battles if total_battles > 0 else 0.0
-
-        # 最快答题时间
-        battle_ids = [b.id for b in battles]
-        if battle_ids:
-            fastest_query = select(func.min(SpeedQuizDetail.user_time)).where(
-                SpeedQuizDetail.battle_id.in_(battle_ids),
-                SpeedQuizDetail.user_answer == SpeedQuizDetail.correct_answer
+        """获取战绩统计（按主键读取战绩汇总表一行）"""
+        stats = await db.get(SpeedQuizStats, user_id)
+        if stats is None:
+            return SpeedQuizStatsResponse(
+                total_battles=0, wins=0, losses=0, win_rate=0.0, fastest_time=0, max_streak=0
             )
-            result = await db.execute(fastest_query)
-            fastest_time = result.scalar() or 0
-        else:
-            fastest_time = 0
-
-        # 最长连胜
-        max_streak = self._calculate_max_streak(battles)
 
+        win_rate = stats.wins / stats.total_battles if stats.total_battles > 0 else 0.0
         return SpeedQuizStatsResponse(
-            total_battles=total_battles,
-            wins=wins,
-            losses=losses,
+            total_battles=stats.total_battles,
+            wins=stats.wins,
+            losses=stats.losses,
             win_rate=round(win_rate, 2),
-            fastest_time=fastest_time,
-            max_streak=max_streak
+            fastest_time=stats.fastest_time or 0,
+            max_streak=stats.max_streak
         )
 
     async def get_history(
@@ -233,55 +232,71 @@ class SpeedQuizService:
         db: AsyncSession,
         user_id: int,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> SpeedQuizHistoryResponse:
-        """获取历史记录"""
-        query = select(SpeedQuizBattle).where(
-            SpeedQuizBattle.user_id == user_id
-        ).order_by(desc(SpeedQuizBattle.created_at))
+        """
+        获取历史记录
 
-        # 获取总数
-        count_query = select(func.count()).select_from(SpeedQuizBattle).where(
-            SpeedQuizBattle.user_id == user_id
-        )
-        result = await db.execute(count_query)
-        total = result.scalar()
+        按 (created_at, id) 倒序游标分页；未提供 cursor 时兼容页码分页。
+        总数只在首页且 include_total 时计算。
+        """
+        conditions = [SpeedQuizBattle.user_id == user_id]
+        after = keyset_before(SpeedQuizBattle.created_at, SpeedQuizBattle.id, cursor)
+        if after is not None:
+            conditions.append(after)
 
-        # 分页查询
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        # 获取总数
+        total = None
+        if include_total and cursor is None:
+            count_query = select(func.count()).select_from(SpeedQuizBattle).where(
+                SpeedQuizBattle.user_id == user_id
+            )
+            result = await db.execute(count_query)
+            total = result.scalar()
+
+        # 分页查询（多取一行判断是否还有下一页）
+        query = select(SpeedQuizBattle).where(*conditions).order_by(
+            desc(SpeedQuizBattle.created_at), desc(SpeedQuizBattle.id)
+        ).limit(page_size + 1)
+        if cursor is None and page > 1:
+            query = query.offset((page - 1) * page_size)
         result = await db.execute(query)
         battles = result.scalars().all()
+        cursor_token = next_cursor(battles, page_size, "created_at")
 
         return SpeedQuizHistoryResponse(
-            battles=[SpeedQuizBattleResponse.from_orm(b) for b in battles],
+            battles=[SpeedQuizBattleResponse.from_orm(b) for b in battles[:page_size]],
             total=total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=cursor_token
         )
 
-    async def _get_random_question(
+    async def _draw_questions(
         self,
         db: AsyncSession,
         difficulty: int,
-        module: str
-    ) -> Optional[Question]:
-        """随机获取题目"""
-        query = select(Question).where(
-            Question.difficulty == difficulty,
-            Question.module == module
+        module: str,
+        count: int
+    ) -> List[Question]:
+        """抽取一场对战的全部题目，一次查询取回，保持抽取顺序"""
+        await question_bank.ensure_loaded(db)
+        question_ids = question_bank.sample(module, difficulty, count)
+        if not question_ids:
+            return []
+
+        result = await db.execute(
+            select(Question).where(Question.id.in_(set(question_ids)))
         )
-        result = await db.execute(query)
-        questions = result.scalars().all()
-        return random.choice(questions) if questions else None
-
-    def _calculate_max_streak(self, battles: list) -> int:
-        """计算最长连胜"""
-        max_streak = 0
-        current_streak = 0
-        for battle in sorted(battles, key=lambda b: b.created_at):
-            if battle.user_wins > battle.ai_wins:
-                current_streak += 1
-                max_streak = max(max_streak, current_streak)
+        questions_by_id: Dict[int, Question] = {}
+        for question in result.scalars().all():
+            if matches_filter(question, module, difficulty):
+                questions_by_id[question.id] = question
             else:
-                current_streak = 0
-        return max_streak
+                # 其他进程修改了模块或难度：迁移到实际的桶，本场跳过
+                question_bank.move(question.id, module, difficulty, question.module, question.difficulty)
+
+        # 已被删除或不再符合条件、但索引未同步的题目直接跳过
+        return [questions_by_id[qid] for qid in question_ids if qid in questions_by_id]
@@ -0,0 +1,164 @@
+"""
+抢答战绩汇总
+
+speed_quiz_stats 每个用户一行，对战结束时在写入明细的同一事务中增量更新：
+- 胜/负按整场对战 user_wins 与 ai_wins 比较，平局只计入场次
+- 连胜按对战结束顺序累加，非胜场清零
+- 最快用时取答对题目的最小 user_time
+
+回合未答完的对战不计入（此前对战行在开始时即插入，会被计为一场且打断连胜）。
+历史数据由 backfill_speed_quiz_stats 按对战表重新计算，重复执行结果相同。
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import case, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import dialect_insert
+from models.db import SpeedQuizBattle, SpeedQuizDetail, SpeedQuizStats
+
+
+class BattleOutcome(NamedTuple):
+    """一场已结束对战对汇总的贡献"""
+    user_id: int
+    win: bool
+    loss: bool
+    fastest_time: Optional[int]
+
+
+class StatsAccumulator:
+    """按对战顺序累计一个用户的汇总（回填使用，与增量 UPSERT 的规则一致）"""
+
+    __slots__ = ("total_battles", "wins", "losses", "current_streak", "max_streak")
+
+    def __init__(self):
+        self.total_battles = 0
+        self.wins = 0
+        self.losses = 0
+        self.current_streak = 0
+        self.max_streak = 0
+
+    def add(self, user_wins: int, ai_wins: int) -> None:
+        self.total_battles += 1
+        if user_wins > ai_wins:
+            self.wins += 1
+            self.current_streak += 1
+            self.max_streak = max(self.max_streak, self.current_streak)
+        else:
+            if user_wins < ai_wins:
+                self.losses += 1
+            self.current_streak = 0
+
+
+async def record_battles(db: AsyncSession, outcomes: Iterable[BattleOutcome]) -> None:
+    """
+    增量更新战绩汇总（一条 UPSERT 语句，executemany）
+
+    调用方负责提交；同一用户的多场对战按传入顺序依次累计连胜。
+    """
+    outcomes = list(outcomes)
+    if not outcomes:
+        return
+    stmt = dialect_insert(db, SpeedQuizStats.__table__)
+    stats = SpeedQuizStats.__table__.c
+    excluded = stmt.excluded
+    next_streak = stats.current_streak + 1
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "total_battles": stats.total_battles + excluded.total_battles,
+            "wins": stats.wins + excluded.wins,
+            "losses": stats.losses + excluded.losses,
+            "fastest_time": case(
+                (excluded.fastest_time.is_(None), stats.fastest_time),
+                (stats.fastest_time.is_(None), excluded.fastest_time),
+                (excluded.fastest_time < stats.fastest_time, excluded.fastest_time),
+                else_=stats.fastest_time
+            ),
+            "current_streak": case((excluded.wins == 1, next_streak), else_=0),
+            "max_streak": case(
+                ((excluded.wins == 1) & (next_streak > stats.max_streak), next_streak),
+                else_=stats.max_streak
+            ),
+            "updated_at": excluded.updated_at,
+        },
+    )
+    now = datetime.utcnow()
+    await db.execute(stmt, [
+        {
+            "user_id": outcome.user_id,
+            "total_battles": 1,
+            "wins": int(outcome.win),
+            "losses": int(outcome.loss),
+            "fastest_time": outcome.fastest_time,
+            "current_streak": int(outcome.win),
+            "max_streak": int(outcome.win),
+            "updated_at": now,
+        }
+        for outcome in outcomes
+    ])
+
+
+async def backfill_speed_quiz_stats(db: AsyncSession, batch_size: int = 1000) -> int:
+    """
+    按对战表重新计算全部用户的战绩汇总并覆盖写入
+
+    对战按 (user_id, created_at, id) 顺序流式读取，内存中每个用户只保留一个累加器；
+    只统计已认领（finished_at 非空）且写入明细的对战，进行中的对战结束时再由增量更新计入。
+
+    Returns:
+        int: 回填的用户数
+    """
+    battles = SpeedQuizBattle.__table__.c
+    details = SpeedQuizDetail.__table__.c
+    has_details = exists().where(details.battle_id == battles.id)
+
+    fastest_rows = await db.execute(
+        select(SpeedQuizBattle.user_id, func.min(SpeedQuizDetail.user_time))
+        .join(SpeedQuizDetail, SpeedQuizDetail.battle_id == SpeedQuizBattle.id)
+        .where(
+            SpeedQuizBattle.finished_at.isnot(None),
+            SpeedQuizDetail.user_answer == SpeedQuizDetail.correct_answer,
+        )
+        .group_by(SpeedQuizBattle.user_id)
+    )
+    fastest: Dict[int, int] = dict(fastest_rows.all())
+
+    accumulators: Dict[int, StatsAccumulator] = {}
+    stream = await db.stream(
+        select(battles.user_id, battles.user_wins, battles.ai_wins)
+        .where(battles.finished_at.isnot(None), has_details)
+        .order_by(battles.user_id, battles.created_at, battles.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for user_id, user_wins, ai_wins in stream:
+        accumulator = accumulators.get(user_id)
+        if accumulator is None:
+            accumulator = accumulators[user_id] = StatsAccumulator()
+        accumulator.add(user_wins or 0, ai_wins or 0)
+
+    stmt = dialect_insert(db, SpeedQuizStats.__table__)
+    columns = ("total_battles", "wins", "losses", "fastest_time", "current_streak", "max_streak", "updated_at")
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={column: getattr(stmt.excluded, column) for column in columns},
+    )
+    now = datetime.utcnow()
+    rows: List[dict] = [
+        {
+            "user_id": user_id,
+            "total_battles": acc.total_battles,
+            "wins": acc.wins,
+            "losses": acc.losses,
+            "fastest_time": fastest.get(user_id),
+            "current_streak": acc.current_streak,
+            "max_streak": acc.max_streak,
+            "updated_at": now,
+        }
+        for user_id, acc in accumulators.items()
+    ]
+    for start in range(0, len(rows), batch_size):
+        await db.execute(stmt, rows[start:start + batch_size])
+    await db.commit()
+    return len(rows)
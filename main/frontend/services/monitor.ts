@@ -19,6 +19,11 @@ export interface IntelligenceScore {
   knowledge_richness: number
   quality_trend: number
   evolution_frequency: number
+  /** 降采样时桶内总分统计（各维度为桶内最后一条快照） */
+  score_min?: number | null
+  score_max?: number | null
+  score_avg?: number | null
+  samples?: number | null
 }
 
 /**
@@ -36,6 +41,8 @@ export interface Milestone {
 export interface IntelligenceTrendResponse {
   trend: IntelligenceScore[]
   milestones: Milestone[]
+  /** 降采样时间桶: hour/day/week */
+  bucket?: string | null
 }
 
 /**
@@ -142,6 +149,10 @@ export interface KnowledgeItem {
   source: string
   updated_at: string
   tags: string[]
+  /** 检索相关度得分（仅搜索时返回） */
+  score?: number | null
+  /** 命中高亮片段，<mark> 标记命中部分（仅搜索时返回） */
+  highlight?: { title: string; description: string } | null
 }
 
 /**
@@ -0,0 +1,144 @@
+"""
+成就评估引擎单元测试
+
+覆盖：
+- 累计值与各类成就指标
+- 阈值游标只推进、不重复解锁
+- 正确率成就的最少答题数门槛
+- 多进程：总题数取自汇总表 RETURNING，其余累计值过期后重新水合，首次水合不重复计入本题
+"""
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from models.db import Achievement, Question, User  # noqa: E402
+from models.schema import AchievementResponse, AnswerRequest  # noqa: E402
+from services import progress_service as progress_module  # noqa: E402
+from services.progress_service import ProgressService  # noqa: E402
+from services.achievement_engine import (  # noqa: E402
+    AchievementEngine,
+    UserAchievementState,
+    ACCURACY_MIN_QUESTIONS,
+)
+
+
+def achievement(achievement_id: int) -> AchievementResponse:
+    return AchievementResponse(id=achievement_id, name=f"a{achievement_id}", description=None, badge_icon=None)
+
+
+def make_engine() -> AchievementEngine:
+    engine = AchievementEngine()
+    engine._definitions = {
+        "total_questions": [(1, achievement(1)), (3, achievement(2))],
+        "streak": [(2, achievement(3))],
+        "daily_login": [(2, achievement(4))],
+        "accuracy": [(90, achievement(5))],
+        "module_mastery:grammar": [(2, achievement(6))],
+    }
+    engine.loaded = True
+    return engine
+
+
+def answer(state, is_correct=True, module="grammar", streak=0, day=1):
+    state.record_answer(is_correct, module, streak, date(2024, 1, day))
+
+
+class TestThresholds:
+    def test_unlocks_each_threshold_once(self):
+        engine = make_engine()
+        state = UserAchievementState()
+
+        answer(state, streak=1)
+        assert [a.id for a in engine._advance(state)] == [1]
+
+        answer(state, streak=2)
+        assert {a.id for a in engine._advance(state)} == {3, 6}
+
+        answer(state, streak=3)
+        assert [a.id for a in engine._advance(state)] == [2]
+        assert engine._advance(state) == []
+
+    def test_already_unlocked_is_skipped(self):
+        engine = make_engine()
+        state = UserAchievementState()
+        state.unlocked = {1}
+
+        answer(state)
+        assert engine._advance(state) == []
+        assert state.cursors["total_questions"] == 1
+
+    def test_daily_login_counts_distinct_days(self):
+        engine = make_engine()
+        state = UserAchievementState()
+
+        answer(state, day=1)
+        answer(state, day=1)
+        assert state.active_days == 1
+        answer(state, day=2)
+        assert 4 in {a.id for a in engine._advance(state)}
+
+
+class TestAccuracy:
+    def test_accuracy_requires_minimum_questions(self):
+        state = UserAchievementState()
+        answer(state)
+        assert state.metric("accuracy") is None
+
+    def test_accuracy_unlocks_after_minimum(self):
+        engine = make_engine()
+        state = UserAchievementState()
+        for _ in range(ACCURACY_MIN_QUESTIONS):
+            answer(state)
+        assert 5 in {a.id for a in engine._advance(state)}
+
+    def test_unknown_type_is_ignored(self):
+        state = UserAchievementState()
+        assert state.metric("unknown") is None
+
+
+def seed_rows():
+    return [
+        User(id=1, nickname="alice", role="student", total_score=0),
+        Question(
+            id=1, module="grammar", difficulty=1, question_text="q",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        ),
+        Achievement(id=1, name="first", requirement_type="total_questions", requirement_value=1),
+        Achievement(id=2, name="three", requirement_type="total_questions", requirement_value=3),
+        Achievement(id=3, name="grammar", requirement_type="module_mastery:grammar", requirement_value=3),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_workers_see_each_others_answers(make_database, monkeypatch):
+    factory = (await make_database(seed_rows())).factory
+    # 两个进程各自的成就引擎
+    engines = [AchievementEngine(state_ttl_seconds=60), AchievementEngine(state_ttl_seconds=60)]
+
+    async def submit(worker):
+        monkeypatch.setattr(progress_module, "achievement_engine", engines[worker])
+        async with factory() as db:
+            user = await db.get(User, 1)
+            response = await ProgressService.submit_answer(
+                AnswerRequest(question_id=1, answer="A", answer_time=5), user, db
+            )
+        return [a.id for a in response.new_achievements]
+
+    # 首次水合已包含本题，不重复累加
+    assert await submit(0) == [1]
+    assert engines[0]._states[1].total_questions == 1
+
+    assert await submit(1) == []
+    # 总题数来自汇总表，进程 0 立即看到进程 1 的答题
+    assert await submit(0) == [2]
+    assert engines[0]._states[1].module_correct["grammar"] == 2
+
+    # 模块正确数在状态过期重新水合后补齐
+    engines[0]._states[1].hydrated_at -= 60
+    assert await submit(0) == [3]
+    assert engines[0]._states[1].module_correct["grammar"] == 4
@@ -0,0 +1,143 @@
+"""
+闹钟规则索引测试
+
+覆盖：
+- 个性化规则优先于全局规则，生效规则解析不查库
+- 规则增删改、启停后索引同步更新
+- 查询状态时会话规则从索引读取，索引缺失时回查一次
+- 超过刷新周期后重新加载，读到其他进程写入的规则；并发访问只加载一次
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import event  # noqa: E402
+
+from models.db import AlarmRule, AlarmSession, User  # noqa: E402
+from models.schema import AlarmRuleCreate, AlarmRuleUpdate  # noqa: E402
+from services import alarm_service as alarm_module  # noqa: E402
+from services.alarm_service import AlarmRuleIndex, AlarmService  # noqa: E402
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    index = AlarmRuleIndex(refresh_seconds=0)
+    monkeypatch.setattr(alarm_module, "alarm_rules", index)
+    return index
+
+
+def seed_rows():
+    return [
+        User(id=1, nickname="alice", role="student", total_score=0),
+        User(id=2, nickname="bob", role="student", total_score=0),
+    ]
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_effective_rule_follows_rule_changes_without_queries(make_database, rules):
+    factory, reader, _ = await make_database(seed_rows())
+    async with factory() as db:
+        assert await rules.load(db) == 0
+        assert await AlarmService.get_effective_rule("alice", db) is None
+
+        global_rule = await AlarmService.create_rule(
+            AlarmRuleCreate(rule_type="global", study_duration=25, rest_duration=5), db
+        )
+        personal = await AlarmService.create_rule(
+            AlarmRuleCreate(rule_type="personal", student_nickname="alice", study_duration=40, rest_duration=10),
+            db
+        )
+
+        statements = count_queries(reader)
+        assert (await AlarmService.get_effective_rule("alice", db)).id == personal.id
+        assert (await AlarmService.get_effective_rule("bob", db)).id == global_rule.id
+        assert statements == []
+
+        await AlarmService.update_rule(personal.id, AlarmRuleUpdate(study_duration=45), db)
+        assert (await AlarmService.get_effective_rule("alice", db)).study_duration == 45
+
+        await AlarmService.toggle_rule(personal.id, db)
+        assert (await AlarmService.get_effective_rule("alice", db)).id == global_rule.id
+        await AlarmService.toggle_rule(personal.id, db)
+        assert (await AlarmService.get_effective_rule("alice", db)).id == personal.id
+
+        await AlarmService.delete_rule(personal.id, db)
+        assert (await AlarmService.get_effective_rule("alice", db)).id == global_rule.id
+        await AlarmService.update_rule(global_rule.id, AlarmRuleUpdate(is_active=False), db)
+        assert await AlarmService.get_effective_rule("alice", db) is None
+
+
+@pytest.mark.asyncio
+async def test_status_reads_rule_from_index(make_database, rules):
+    factory, reader, _ = await make_database(seed_rows())
+    async with factory() as db:
+        await rules.load(db)
+        await AlarmService.create_rule(
+            AlarmRuleCreate(rule_type="personal", student_nickname="bob", study_duration=30, rest_duration=5), db
+        )
+        await AlarmService.start_session(2, "bob", db)
+
+        statements = count_queries(reader)
+        status = await AlarmService.get_current_status(2, db)
+        assert status.session_type == "studying" and status.rule.study_duration == 30
+        assert len(statements) == 1
+
+        # 其他进程写入的规则：索引中没有时回查一次，之后命中索引
+        now = datetime.utcnow()
+        rule = AlarmRule(rule_type="global", study_duration=20, rest_duration=5, is_active=True)
+        db.add(rule)
+        await db.flush()
+        db.add(AlarmSession(user_id=1, session_type="resting", start_time=now - timedelta(minutes=1),
+                            end_time=now + timedelta(minutes=4), rule_id=rule.id))
+        await db.commit()
+        db.expunge_all()
+        statements.clear()
+        status = await AlarmService.get_current_status(1, db)
+        assert status.is_blocked and status.rule.id == rule.id
+        assert len(statements) == 2
+        assert rules.get(rule.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reload_after_refresh_interval(make_database, monkeypatch):
+    factory, reader, _ = await make_database(seed_rows())
+    index = AlarmRuleIndex(refresh_seconds=60)
+    monkeypatch.setattr(alarm_module, "alarm_rules", index)
+    async with factory() as db:
+        await index.ensure_loaded(db)
+        assert index.loaded
+
+        # 其他进程新增全局规则：刷新周期内仍使用旧索引
+        db.add(AlarmRule(rule_type="global", study_duration=25, rest_duration=5, is_active=True))
+        await db.commit()
+        assert await AlarmService.get_effective_rule("alice", db) is None
+
+        # 模拟超过刷新周期
+        index._loaded_at -= 60
+        assert (await AlarmService.get_effective_rule("alice", db)).study_duration == 25
+
+
+@pytest.mark.asyncio
+async def test_concurrent_ensure_loaded_queries_once(make_database):
+    factory, reader, _ = await make_database(seed_rows())
+    index = AlarmRuleIndex(refresh_seconds=60)
+    statements = count_queries(reader)
+
+    async def access():
+        async with factory() as db:
+            await index.ensure_loaded(db)
+
+    await asyncio.gather(*(access() for _ in range(5)))
+    assert len([s for s in statements if "FROM alarm_rules" in s]) == 1
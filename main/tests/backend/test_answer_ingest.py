@@ -0,0 +1,169 @@
+"""
+答题批量写入管道测试
+
+覆盖：
+- 同步返回的连击/总分与逐题提交规则一致
+- 一批内的答题合并为一次提交，计数器与汇总表正确落库
+- 同一批内重复答错同一题只产生一条错题记录
+- 一批写入失败时，仍有答题排队的用户保留状态（扣回失败的得分），排队的答题写完后才重新读取
+- 排行榜只累加已落库的得分，写入失败的得分不上榜
+- 入队前成就评估失败时扣回得分并丢弃状态，下次答题从数据库重新读取
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from models.db import User, Question, UserProgress, UserProgressSummary, WrongQuestion  # noqa: E402
+from models.schema import AnswerRequest  # noqa: E402
+from services.achievement_engine import achievement_engine  # noqa: E402
+from services import answer_ingest as answer_ingest_module  # noqa: E402
+from services.answer_ingest import AnswerIngestor  # noqa: E402
+from services.leaderboard import LeaderboardService  # noqa: E402
+
+
+async def setup_database(make_database):
+    database = await make_database([
+        User(id=1, nickname="tester", role="student", total_score=0),
+        *(
+            Question(
+                id=i, module="grammar", difficulty=1, question_text="q",
+                option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+            )
+            for i in (1, 2)
+        ),
+    ], mode="production")
+    async with database.factory() as db:
+        await achievement_engine.load(db)
+    return database.factory
+
+
+async def submit(factory, ingestor, question_id: int, choice: str):
+    async with factory() as db:
+        user = await db.get(User, 1)
+        return await ingestor.submit_answer(
+            AnswerRequest(question_id=question_id, answer=choice, answer_time=5), user, db
+        )
+
+
+@pytest.mark.asyncio
+async def test_batched_answers_are_group_committed(make_database):
+    factory = await setup_database(make_database)
+    ingestor = AnswerIngestor(flush_ms=200, durability="commit", session_factory=factory)
+    ingestor.start()
+    try:
+        # 逐条入队（保证作答顺序），在同一个批次窗口内等待提交
+        tasks = []
+        for question_id, choice in [(1, "A"), (2, "A"), (1, "B"), (1, "C")]:
+            tasks.append(asyncio.create_task(submit(factory, ingestor, question_id, choice)))
+            while not tasks[-1].done() and (1 not in ingestor._states or ingestor._states[1].pending < len(tasks)):
+                await asyncio.sleep(0.001)
+        results = await asyncio.gather(*tasks)
+    finally:
+        await ingestor.stop()
+
+    assert [r.streak for r in results] == [1, 2, 0, 0]
+    assert ingestor.batches == 1
+
+    async with factory() as db:
+        user = await db.get(User, 1)
+        assert user.total_score == results[1].total_score
+        assert (user.current_streak, user.best_streak) == (0, 2)
+
+        summary = await db.get(UserProgressSummary, 1)
+        assert (summary.total_questions, summary.correct_answers) == (4, 2)
+
+        assert (await db.execute(select(func.count(UserProgress.id)))).scalar() == 4
+        wrong = (await db.execute(select(WrongQuestion))).scalars().all()
+        assert [(w.question_id, w.wrong_count) for w in wrong] == [(1, 2)]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_keeps_state_with_queued_answers(make_database, monkeypatch):
+    factory = await setup_database(make_database)
+    ingestor = AnswerIngestor(flush_ms=20, max_batch=1, durability="buffered", session_factory=factory)
+    original = ingestor._write_batch
+    submitted = asyncio.Event()
+    failed = asyncio.Event()
+    resumed = asyncio.Event()
+
+    async def flaky(db, batch):
+        if not failed.is_set():
+            # 三题都入队后再让第一批失败
+            await submitted.wait()
+            failed.set()
+            raise RuntimeError("database is locked")
+        await resumed.wait()
+        await original(db, batch)
+
+    monkeypatch.setattr(ingestor, "_write_batch", flaky)
+    board = LeaderboardService(snapshot_seconds=0, session_factory=factory)
+    monkeypatch.setattr(answer_ingest_module, "leaderboard", board)
+    ingestor.start()
+    try:
+        results = [await submit(factory, ingestor, 1, "A") for _ in range(3)]
+        # 尚未落库的得分不上榜
+        assert len(board.board("global")) == 0
+        submitted.set()
+        # 第一批失败后：状态仍在（后两题排队中），总分扣回第一题的得分
+        await failed.wait()
+        state = ingestor._states[1]
+        for _ in range(100):
+            if state.stale:
+                break
+            await asyncio.sleep(0.005)
+        assert state.stale and state.pending == 2
+        assert state.total_score == results[2].total_score - results[0].score
+        assert len(board.board("global")) == 0
+        resumed.set()
+    finally:
+        submitted.set()
+        resumed.set()
+        await ingestor.stop()
+
+    # 排队的答题写完后才丢弃状态，pending 不会变成负数
+    assert 1 not in ingestor._states
+    assert ingestor.failed == 1 and ingestor.flushed == 2
+    async with factory() as db:
+        user = await db.get(User, 1)
+        assert user.total_score == results[1].score + results[2].score
+    # 排行榜只计入写入成功的两题
+    assert board.board("global").items() == [(1, user.total_score)]
+    assert board.board("module:grammar").items() == [(1, user.total_score)]
+
+
+@pytest.mark.asyncio
+async def test_failed_evaluation_discards_state(make_database, monkeypatch):
+    factory = await setup_database(make_database)
+    ingestor = AnswerIngestor(flush_ms=5, durability="commit", session_factory=factory)
+    original = achievement_engine.record
+
+    async def broken(*args, **kwargs):
+        raise RuntimeError("achievement lookup failed")
+
+    ingestor.start()
+    try:
+        first = await submit(factory, ingestor, 1, "A")
+        monkeypatch.setattr(achievement_engine, "record", broken)
+        with pytest.raises(RuntimeError):
+            await submit(factory, ingestor, 2, "A")
+        # 未入队的答题不能让内存中的连击和总分前移
+        assert 1 not in ingestor._states
+
+        monkeypatch.setattr(achievement_engine, "record", original)
+        second = await submit(factory, ingestor, 2, "A")
+        assert second.streak == 2
+        assert second.total_score == first.total_score + second.score
+    finally:
+        await ingestor.stop()
+
+
+def test_unknown_durability_rejected():
+    with pytest.raises(ValueError):
+        AnswerIngestor(durability="never")
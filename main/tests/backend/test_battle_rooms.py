@@ -0,0 +1,218 @@
+"""
+多人抢答房间测试
+
+覆盖：
+- 答题时间由服务端计算，按收到顺序第一个答对的玩家赢得回合，迟到的答案被拒绝
+- 广播只序列化一次，慢玩家被断开（1013）不影响其他玩家
+- 超时无人答对时回合照常结束
+- WebSocket 端点：查询参数 Token 认证、房主开始、抢答回执、无效消息（含非字符串答案）不断开连接
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from core.security import create_access_token  # noqa: E402
+from models.schema import QuestionResponse  # noqa: E402
+from services.battle_rooms import BattleRoom, RoomManager  # noqa: E402
+from services.battle_sessions import RoundQuestion  # noqa: E402
+
+
+class FakeWebSocket:
+    """记录收到的消息；latency 为每次发送耗时（模拟慢客户端）"""
+
+    def __init__(self, latency: float = 0):
+        self.latency = latency
+        self.payloads = []
+        self.closed_with = None
+
+    async def send_text(self, payload: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.payloads.append(payload)
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed_with = code
+
+    @property
+    def messages(self):
+        return [json.loads(p) for p in self.payloads]
+
+    def of_type(self, kind: str):
+        return [m for m in self.messages if m["type"] == kind]
+
+
+def make_questions(count: int = 2):
+    return [
+        RoundQuestion(
+            QuestionResponse(
+                id=i, module="grammar", difficulty=2, question_text=f"q{i}",
+                option_a="a", option_b="b", option_c="c", option_d="d",
+            ),
+            "A",
+            2,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_room(count: int = 2, **kwargs) -> BattleRoom:
+    options = {"round_seconds": 5.0, "queue_size": 8, "intermission": 0}
+    options.update(kwargs)
+    return BattleRoom("room", 1, make_questions(count), **options)
+
+
+async def until(condition, timeout: float = 1.0) -> None:
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.001)
+    await asyncio.wait_for(wait(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_first_correct_buzz_wins_with_server_time():
+    room = make_room()
+    sockets = {user_id: FakeWebSocket() for user_id in (1, 2, 3)}
+    for user_id, ws in sockets.items():
+        room.join(user_id, f"u{user_id}", ws)
+    with pytest.raises(ValueError, match="Only the host"):
+        room.start(2)
+
+    task = asyncio.create_task(room.run())
+    room.start(1)
+    await until(lambda: room.current is not None)
+
+    await asyncio.sleep(0.02)
+    ack = room.submit(2, 1, "B")
+    assert ack["answer_time"] >= 20 and ack["order"] == 1
+    room.submit(3, 1, "A")
+    with pytest.raises(ValueError, match="Question not open"):
+        room.submit(1, 1, "A")
+    with pytest.raises(ValueError, match="Question not open"):
+        room.submit(1, 999, "A")
+
+    await until(lambda: room.round == 1)
+    room.submit(1, 2, "A")
+    await asyncio.wait_for(task, 1)
+    await until(lambda: all(ws.closed_with == 1000 for ws in sockets.values()))
+
+    results = sockets[1].of_type("round_result")
+    assert [r["winner"] for r in results] == [3, 1]
+    assert [b["user_id"] for b in results[0]["buzzes"]] == [2, 3]
+    assert sockets[2].of_type("buzz_ack")[0]["answer_time"] == ack["answer_time"]
+    assert "correct_answer" not in sockets[3].of_type("question")[0]["question"]
+
+    ranking = sockets[2].of_type("finished")[0]["ranking"]
+    assert [(p["user_id"], p["wins"], p["rank"]) for p in ranking] == [(1, 1, 1), (3, 1, 2), (2, 0, 3)]
+
+
+@pytest.mark.asyncio
+async def test_slow_player_dropped_and_timeout_rounds():
+    room = make_room(count=5, queue_size=2, round_seconds=0.01)
+    fast = FakeWebSocket()
+    slow = FakeWebSocket(latency=0.2)
+    room.join(1, "fast", fast)
+    room.join(2, "slow", slow)
+
+    task = asyncio.create_task(room.run())
+    room.start(1)
+    await asyncio.wait_for(task, 1)
+    await until(lambda: slow.closed_with is not None and fast.closed_with is not None)
+
+    assert slow.closed_with == 1013 and room.dropped == 1
+    # 快玩家收到全部 5 题和结果；无人作答的回合超时结束
+    assert len(fast.of_type("question")) == 5 and fast.of_type("finished")
+    assert len(fast.of_type("round_result")) == 5
+    assert all(r["winner"] is None for r in fast.of_type("round_result"))
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once():
+    room = make_room()
+    sockets = [FakeWebSocket() for _ in range(3)]
+    for user_id, ws in enumerate(sockets, 1):
+        room.join(user_id, f"u{user_id}", ws)
+    room.broadcast({"type": "notice"})
+    await until(lambda: all(ws.payloads and json.loads(ws.payloads[-1])["type"] == "notice" for ws in sockets))
+    assert sockets[0].payloads[-1] is sockets[1].payloads[-1] is sockets[2].payloads[-1]
+
+
+@pytest.mark.asyncio
+async def test_manager_removes_idle_room():
+    manager = RoomManager(idle_seconds=0.01, intermission=0)
+    room = manager.create(1, make_questions())
+    assert manager.get(room.room_id) is room
+    await until(lambda: len(manager) == 0)
+    await manager.stop()
+
+
+def test_room_websocket_endpoint():
+    from api.routes.speed_quiz_router import router, service
+
+    manager = RoomManager(round_seconds=5.0, intermission=0)
+    original = service.rooms
+    service.rooms = manager
+
+    def token(user_id: int, nickname: str) -> str:
+        return create_access_token({"sub": user_id, "role": "student", "nickname": nickname})
+
+    app = FastAPI()
+    app.include_router(router)
+    try:
+        with TestClient(app) as client:
+            room = client.portal.call(manager.create, 1, make_questions(1))
+            url = f"/speed-quiz/rooms/{room.room_id}/ws?token="
+            with client.websocket_connect(url + token(1, "alice")) as host, \
+                    client.websocket_connect(url + token(2, "bob")) as guest:
+                assert host.receive_json()["type"] == "joined"
+                assert len(host.receive_json()["room"]["players"]) == 2
+                guest.receive_json()
+
+                # 无法解析或不是 JSON 对象的消息返回 error，连接保持
+                guest.send_text("not json")
+                assert guest.receive_json() == {"type": "error", "detail": "消息格式无效"}
+                guest.send_json(["start"])
+                assert guest.receive_json() == {"type": "error", "detail": "消息格式无效"}
+
+                guest.send_json({"type": "start"})
+                assert guest.receive_json() == {"type": "error", "detail": "Only the host can start"}
+                host.send_json({"type": "start"})
+                question = guest.receive_json()
+                assert question["type"] == "question"
+                host.receive_json()
+
+                # 答案不是字符串（列表/对象）时返回 error，连接保持，本回合仍可作答
+                for bad in (["A"], {"choice": "A"}):
+                    guest.send_json({"type": "answer", "question_id": question["question"]["id"], "answer": bad})
+                    assert guest.receive_json() == {"type": "error", "detail": "Invalid answer"}
+
+                guest.send_json({"type": "answer", "question_id": question["question"]["id"], "answer": "A"})
+                ack = guest.receive_json()
+                assert ack["type"] == "buzz_ack" and ack["order"] == 1
+                result = host.receive_json()
+                assert result["type"] == "round_result" and result["winner"] == 2
+                assert host.receive_json()["ranking"][0]["nickname"] == "bob"
+    finally:
+        service.rooms = original
+
+
+def test_room_websocket_rejects_bad_token():
+    from starlette.websockets import WebSocketDisconnect
+
+    from api.routes.speed_quiz_router import router
+
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/speed-quiz/rooms/missing/ws?token=bad"):
+                pass
+        assert exc.value.code == 1008
@@ -0,0 +1,282 @@
+"""
+抢答对战会话测试
+
+覆盖：
+- 每回合的判定不执行任何 SQL，最后一回合一次性写入统计、明细和战绩汇总
+- 题目 ID / 用户与会话不符时拒绝
+- 过期会话和超出上限被淘汰的会话由清扫写入已完成的回合
+- 停止时写入全部未结束的会话
+- 会话不在本进程时按对战行的题目计划重建，两个进程的回合合并写入，战绩只计入一次
+- 重建的会话每回合立即写入，同一回合只保留先落库的明细；统计按明细重算，明细齐了才认领战绩
+- 写入失败的会话放回队列重试，超过上限后放弃
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import event, func, select  # noqa: E402
+
+from models.db import Question, SpeedQuizBattle, SpeedQuizDetail, SpeedQuizStats, User  # noqa: E402
+from models.schema import SpeedQuizStartRequest, SpeedQuizSubmitRequest  # noqa: E402
+from services.battle_sessions import BattleSessionStore  # noqa: E402
+from services.question_bank import question_bank  # noqa: E402
+from services.speed_quiz_service import SpeedQuizService  # noqa: E402
+
+
+async def setup_database(make_database):
+    database = await make_database([
+        User(id=1, nickname="alice", role="student", total_score=0),
+        User(id=2, nickname="bob", role="student", total_score=0),
+        *(
+            Question(
+                id=i, module="grammar", difficulty=2, question_text=f"q{i}",
+                option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+            )
+            for i in range(1, 11)
+        ),
+    ])
+    async with database.factory() as db:
+        await question_bank.load(db)
+    return database.reader, database.factory
+
+
+def count_statements(engine):
+    statements = []
+    event.listen(
+        engine.sync_engine, "before_cursor_execute",
+        lambda conn, cursor, sql, params, context, many: statements.append(sql)
+    )
+    return statements
+
+
+async def start(service, factory, user_id: int = 1, rounds: int = 5):
+    async with factory() as db:
+        return await service.start_battle(
+            db, user_id, SpeedQuizStartRequest(difficulty=2, module="grammar", rounds=rounds)
+        )
+
+
+async def answer(service, factory, battle_id: int, question_id: int, user_id: int = 1, choice: str = "A"):
+    async with factory() as db:
+        return await service.submit_answer(db, user_id, SpeedQuizSubmitRequest(
+            battle_id=battle_id, question_id=question_id, answer=choice, answer_time=1200
+        ))
+
+
+async def battle_row(factory, battle_id: int):
+    async with factory() as db:
+        battle = await db.get(SpeedQuizBattle, battle_id)
+        details = (await db.execute(
+            select(func.count()).select_from(SpeedQuizDetail).where(SpeedQuizDetail.battle_id == battle_id)
+        )).scalar()
+    return battle, details
+
+
+@pytest.mark.asyncio
+async def test_rounds_resolved_in_memory_and_persisted_once(make_database):
+    reader, factory = await setup_database(make_database)
+    service = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    started = await start(service, factory)
+    statements = count_statements(reader)
+
+    question = started.question
+    seen = {question.id}
+    for _ in range(4):
+        result = await answer(service, factory, started.battle_id, question.id)
+        assert result.correct_answer == "A" and result.is_correct
+        question = result.next_question
+        seen.add(question.id)
+    assert statements == []
+    assert len(seen) == 5
+
+    last = await answer(service, factory, started.battle_id, question.id, choice="B")
+    assert last.next_question is None and not last.is_correct
+    writes = [sql for sql in statements if not sql.lstrip().upper().startswith(("BEGIN", "COMMIT", "SELECT"))]
+    # 明细 INSERT + 按明细重算统计 UPDATE + 认领 UPDATE + 战绩汇总 UPSERT
+    assert [sql.split()[0].upper() for sql in writes] == ["INSERT", "UPDATE", "UPDATE", "INSERT"]
+    assert len(service.sessions) == 0
+
+    battle, details = await battle_row(factory, started.battle_id)
+    assert details == 5
+    assert battle.user_correct == 4
+    assert battle.user_wins + battle.ai_wins <= 5
+
+
+@pytest.mark.asyncio
+async def test_rejects_wrong_question_and_other_user(make_database):
+    reader, factory = await setup_database(make_database)
+    service = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    started = await start(service, factory)
+    with pytest.raises(ValueError, match="Question not found"):
+        await answer(service, factory, started.battle_id, started.question.id + 100)
+    with pytest.raises(ValueError, match="Battle not found"):
+        await answer(service, factory, started.battle_id, started.question.id, user_id=2)
+
+
+@pytest.mark.asyncio
+async def test_expired_and_evicted_sessions_persisted(make_database):
+    reader, factory = await setup_database(make_database)
+    store = BattleSessionStore(ttl_seconds=60, max_sessions=2, session_factory=factory)
+    service = SpeedQuizService(store)
+    first = await start(service, factory)
+    await answer(service, factory, first.battle_id, first.question.id)
+    second = await start(service, factory, user_id=2)
+    third = await start(service, factory)
+    # 第一场被淘汰，等待清扫
+    assert len(store) == 2
+
+    touched_at = store.get(third.battle_id, 1).touched_at
+    assert await store.sweep(now=touched_at + 1) == 1
+    battle, details = await battle_row(factory, first.battle_id)
+    assert details == 1 and battle.user_correct == 1
+
+    # 超过 TTL：两场都过期
+    assert await store.sweep(now=touched_at + 61) == 2
+    assert len(store) == 0
+    _, details = await battle_row(factory, second.battle_id)
+    assert details == 0
+    assert store.persisted == 3
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_open_sessions(make_database):
+    reader, factory = await setup_database(make_database)
+    store = BattleSessionStore(session_factory=factory)
+    service = SpeedQuizService(store)
+    started = await start(service, factory)
+    result = await answer(service, factory, started.battle_id, started.question.id)
+    await answer(service, factory, started.battle_id, result.next_question.id, choice="C")
+
+    await store.stop()
+    battle, details = await battle_row(factory, started.battle_id)
+    assert details == 2
+    assert battle.user_correct == 1
+    # 回合未答完：不认领战绩，重启后可从已落库的回合之后继续
+    assert battle.finished_at is None
+    with pytest.raises(ValueError, match="Question not found"):
+        await answer(service, factory, started.battle_id, started.question.id)
+
+
+@pytest.mark.asyncio
+async def test_other_worker_restores_session(make_database):
+    reader, factory = await setup_database(make_database)
+    # 两个进程各自的会话存储
+    first = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    second = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    started = await start(first, factory)
+    result = await answer(first, factory, started.battle_id, started.question.id)
+
+    # 第二回合落到另一个进程：按题目计划重建并继续
+    result = await answer(second, factory, started.battle_id, result.next_question.id)
+    assert second.sessions.restored == 1
+    result = await answer(second, factory, started.battle_id, result.next_question.id)
+    result = await answer(second, factory, started.battle_id, result.next_question.id)
+    # 已经过去的回合不能重复作答
+    with pytest.raises(ValueError, match="Question not found"):
+        await answer(second, factory, started.battle_id, started.question.id)
+    # 第一个进程的会话仍停在第二回合，之后的回合直接定位
+    last = await answer(first, factory, started.battle_id, result.next_question.id)
+    assert last.next_question is None
+    # 已结束的对战不再重建
+    with pytest.raises(ValueError, match="Battle not found"):
+        await answer(first, factory, started.battle_id, started.question.id)
+
+    # 第二个进程的回合在清扫时写入：统计累加，战绩已由第一个进程计入，不重复
+    assert await second.sessions.sweep(now=float("inf")) == 1
+    battle, details = await battle_row(factory, started.battle_id)
+    assert details == 5 and battle.user_correct == 5 and battle.finished_at is not None
+    async with factory() as db:
+        stats = await db.get(SpeedQuizStats, 1)
+    assert stats.total_battles == 1
+
+
+@pytest.mark.asyncio
+async def test_rounds_split_across_stores_not_duplicated(make_database):
+    reader, factory = await setup_database(make_database)
+    first = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    second = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    third = SpeedQuizService(BattleSessionStore(session_factory=factory))
+    started = await start(first, factory)
+    async with factory() as db:
+        plan = [int(q) for q in (await db.get(SpeedQuizBattle, started.battle_id)).question_ids.split(",")]
+
+    # 第一个进程答了前两回合，还留在内存
+    await answer(first, factory, started.battle_id, plan[0], choice="B")
+    await answer(first, factory, started.battle_id, plan[1])
+
+    # 第二个进程看不到未写入的回合：重建后重答第一回合，立即写入
+    await answer(second, factory, started.battle_id, plan[0])
+    _, details = await battle_row(factory, started.battle_id)
+    assert details == 1
+    # 第三个进程重建后先写入第三回合，第二个进程（重建时该回合尚未落库）再答被拒绝
+    await answer(third, factory, started.battle_id, plan[2])
+    with pytest.raises(ValueError, match="Question not found"):
+        await answer(second, factory, started.battle_id, plan[2])
+
+    await answer(second, factory, started.battle_id, plan[3])
+    last = await answer(second, factory, started.battle_id, plan[4])
+    assert last.next_question is None
+    # 第一个进程的回合尚未写入：明细不齐，不认领战绩
+    battle, details = await battle_row(factory, started.battle_id)
+    assert details == 4 and battle.finished_at is None
+    async with factory() as db:
+        assert await db.get(SpeedQuizStats, 1) is None
+
+    # 第一个进程写入：与已落库回合冲突的第一回合被丢弃，统计按明细重算，明细齐了才认领
+    assert await first.sessions.sweep(now=float("inf")) == 1
+    assert await third.sessions.sweep(now=float("inf")) == 1
+    battle, details = await battle_row(factory, started.battle_id)
+    assert details == 5 and battle.finished_at is not None
+    async with factory() as db:
+        rows = (await db.execute(
+            select(SpeedQuizDetail).where(SpeedQuizDetail.battle_id == started.battle_id)
+        )).scalars().all()
+        stats = await db.get(SpeedQuizStats, 1)
+    assert sorted(d.question_id for d in rows) == sorted(plan)
+    assert [d.user_answer for d in rows if d.question_id == plan[0]] == ["A"]
+    assert battle.user_correct == 5
+    assert battle.user_wins == sum(d.winner == "user" for d in rows)
+    assert battle.ai_wins == sum(d.winner == "ai" for d in rows)
+    assert stats.total_battles == 1
+    assert stats.wins == int(battle.user_wins > battle.ai_wins)
+
+
+@pytest.mark.asyncio
+async def test_failed_persist_is_retried(make_database, monkeypatch):
+    reader, factory = await setup_database(make_database)
+    store = BattleSessionStore(session_factory=factory)
+    service = SpeedQuizService(store)
+    original = store.persist
+    failures = [2]
+
+    async def flaky(db, sessions):
+        if failures[0] > 0:
+            failures[0] -= 1
+            raise RuntimeError("database is locked")
+        await original(db, sessions)
+
+    monkeypatch.setattr(store, "persist", flaky)
+    started = await start(service, factory)
+    await answer(service, factory, started.battle_id, started.question.id)
+
+    # 过期写入失败后放回队列，下一次清扫再失败一次，第三次成功
+    assert await store.sweep(now=float("inf")) == 1
+    assert len(store._evicted) == 1
+    assert await store.sweep() == 1
+    assert await store.sweep() == 1
+    assert store.persisted == 1 and store.failed == 0 and store._evicted == []
+    _, details = await battle_row(factory, started.battle_id)
+    assert details == 1
+
+    # 一直失败：达到上限后放弃
+    failures[0] = BattleSessionStore.MAX_PERSIST_ATTEMPTS
+    second = await start(service, factory)
+    await answer(service, factory, second.battle_id, second.question.id)
+    await store.sweep(now=float("inf"))
+    for _ in range(BattleSessionStore.MAX_PERSIST_ATTEMPTS - 1):
+        await store.sweep()
+    assert store.failed == 1 and store._evicted == []
@@ -0,0 +1,66 @@
+"""
+数据库会话路由单元测试
+
+覆盖：
+- 写语句识别（ORM DML、文本 SQL）
+- development 模式不拆分读写引擎
+- 写过的事务固定使用写引擎，提交或回滚后恢复读引擎
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import select, text, update  # noqa: E402
+
+from core.database import RoutingSession, build_engines  # noqa: E402
+from models.db import User  # noqa: E402
+
+
+class TestWriteDetection:
+    def test_orm_dml_is_write(self):
+        assert RoutingSession._is_write(update(User).values(total_score=0)) is True
+
+    def test_select_is_read(self):
+        assert RoutingSession._is_write(select(User)) is False
+        assert RoutingSession._is_write(None) is False
+
+    def test_text_sql(self):
+        assert RoutingSession._is_write(text("  select 1")) is False
+        assert RoutingSession._is_write(text("DELETE FROM users")) is True
+
+
+class TestBuildEngines:
+    def test_development_mode_has_no_writer(self, tmp_path):
+        reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}", "development")
+        assert writer is None
+        assert reader.pool.__class__.__name__ == "StaticPool"
+
+    def test_production_mode_has_single_connection_writer(self, tmp_path):
+        reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'a.db'}", "production")
+        assert writer.pool.size() == 1
+        assert reader.pool.size() >= 1
+
+
+@pytest.mark.asyncio
+async def test_write_pin_cleared_after_commit_and_rollback(make_database):
+    factory, reader, writer = await make_database(mode="production")
+    async with factory() as db:
+        sync_session = db.sync_session
+        assert sync_session.get_bind(clause=select(User)) is reader.sync_engine
+
+        db.add(User(id=1, nickname="alice", role="student", total_score=0))
+        await db.flush()
+        # 写过后本事务内的读取留在写引擎
+        assert sync_session.get_bind(clause=select(User)) is writer.sync_engine
+        await db.commit()
+        assert sync_session.get_bind(clause=select(User)) is reader.sync_engine
+
+        await db.execute(update(User).where(User.id == 1).values(total_score=5))
+        assert sync_session.get_bind(clause=select(User)) is writer.sync_engine
+        await db.rollback()
+        assert sync_session.get_bind(clause=select(User)) is reader.sync_engine
+        assert (await db.get(User, 1)).total_score == 0
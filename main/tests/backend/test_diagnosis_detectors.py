@@ -0,0 +1,166 @@
+"""
+AST 诊断检测器测试
+
+覆盖：
+- 各内置检测器的命中/不命中情况及行号
+- 作用域规则：循环体、嵌套函数、推导式
+- 检测器注册：自定义检测器在同一次遍历中运行
+- 进程池分析与单进程结果一致；只有进程池 worker 关闭 GC
+"""
+import gc
+import sys
+import textwrap
+from pathlib import Path
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from services import diagnosis_detectors  # noqa: E402
+from services.diagnosis_detectors import Detector, analyze_source, register  # noqa: E402
+from services.monitor_diagnosis import DiagnosisService  # noqa: E402
+
+
+def findings(source: str, title: str):
+    return [f.line for f in analyze_source("sample.py", textwrap.dedent(source)) if f.title == title]
+
+
+def test_await_in_loop_query_reports_exact_line():
+    source = """
+    async def load(db, ids) -> list:
+        for user_id in ids:
+            print(user_id)
+            row = await db.get(User, user_id)
+        rows = [await db.execute(q) for q in queries]
+        await db.execute(select(User))
+        cache = {}
+        for key in ids:
+            cache.get(key)
+    """
+    assert findings(source, "可能存在 N+1 查询问题") == [5, 6]
+
+
+def test_nested_function_resets_loop_scope():
+    source = """
+    def outer(session) -> None:
+        for item in items:
+            def inner() -> None:
+                session.execute(stmt)
+    """
+    assert findings(source, "可能存在 N+1 查询问题") == []
+
+
+def test_unbounded_all():
+    source = """
+    async def handler(db) -> None:
+        result = await db.execute(select(User).order_by(User.id))
+        users = result.scalars().all()
+        stmt = select(Answer).where(Answer.user_id == 1)
+        answers = (await db.execute(stmt)).scalars().all()
+        stmt = stmt.limit(20)
+        page = (await db.execute(stmt)).scalars().all()
+        counts = (await db.execute(select(func.count(User.id)))).all()
+        grouped = (await db.execute(select(func.count(User.id)).group_by(User.role))).all()
+        legacy = db.query(User).filter(User.id > 3).all()
+        unknown = (await db.execute(build_query())).all()
+    """
+    assert findings(source, "未限制行数的 .all() 加载") == [4, 6, 10, 11]
+
+
+def test_missing_limit_on_first_row():
+    source = """
+    async def latest(db) -> None:
+        a = (await db.execute(select(User).order_by(User.id.desc()))).scalars().first()
+        b = (await db.execute(select(User).order_by(User.id.desc()).limit(1))).scalars().first()
+        c = await db.scalar(select(User.id).order_by(User.id))
+        d = (await db.execute(select(User).where(User.id == 1))).scalar()
+        e = db.query(User).order_by(User.id).first()
+    """
+    assert findings(source, "取首行查询缺少 .limit(1)") == [3, 5]
+
+
+def test_sync_io_in_async_function():
+    source = """
+    import time
+
+    async def handler(path) -> None:
+        time.sleep(1)
+        text = path.read_text(encoding="utf-8")
+        await asyncio.to_thread(path.read_text, encoding="utf-8")
+        with open(path) as f:
+            pass
+
+        def sync_helper() -> None:
+            time.sleep(1)
+
+    def plain(path) -> None:
+        time.sleep(1)
+    """
+    assert findings(source, "async 函数中的同步 I/O") == [5, 6, 8]
+
+
+def test_encoding_secret_and_return_type():
+    source = """
+    API_KEY = "sk-1234567890"
+    SECRET_KEY: str = "short"
+    settings = Settings(password="p@ss")
+
+    def load(path):
+        return path.read_text()
+
+    def __init__(self):
+        pass
+    """
+    result = analyze_source("sample.py", textwrap.dedent(source))
+    assert [(f.title, f.line) for f in result if f.category == "security"] == [
+        ("硬编码 API_KEY", 2), ("硬编码密码", 4)
+    ]
+    encoding = [f for f in result if f.title == "文件读取未指定编码"]
+    assert [(f.line, f.auto_fixable) for f in encoding] == [(7, True)]
+    assert findings(source, "函数 load 缺少返回类型注解") == [6]
+    assert analyze_source("broken.py", "def broken(:\n") == []
+
+
+def test_analyze_source_leaves_gc_alone(monkeypatch):
+    # 当前进程内分析（文件少时的路径）不能关闭整个进程的 GC
+    calls = []
+    monkeypatch.setattr(gc, "disable", lambda: calls.append("disable"))
+    monkeypatch.setattr(gc, "enable", lambda: calls.append("enable"))
+    analyze_source("sample.py", "def load(path):\n    return path.read_text()\n")
+    assert calls == []
+
+
+def test_registered_detector_runs_in_same_traversal():
+    class PrintCall(Detector):
+        def visit_Call(self, node) -> None:
+            if getattr(node.func, "id", None) == "print":
+                self.report(node, "quality", "Suggestion", "使用 print", "print", "使用 logging")
+
+    register(PrintCall)
+    try:
+        assert findings("def f() -> None:\n    print(1)\n", "使用 print") == [2]
+    finally:
+        diagnosis_detectors.DETECTORS.remove(PrintCall)
+
+
+def test_process_pool_matches_inline(tmp_path):
+    backend_dir = tmp_path / "main" / "backend"
+    backend_dir.mkdir(parents=True)
+    for i in range(6):
+        (backend_dir / f"module_{i}.py").write_text(textwrap.dedent(f"""
+        async def load_{i}(db, ids):
+            for user_id in ids:
+                await db.get(User, user_id)
+            return open("x").read()
+        """), encoding="utf-8")
+
+    inline = DiagnosisService(project_root=tmp_path, workers=1)
+    inline.scan()
+    pooled = DiagnosisService(project_root=tmp_path, workers=2)
+    pooled.POOL_THRESHOLD = 1
+    try:
+        pooled.scan()
+        assert pooled._executor is not None
+    finally:
+        pooled.close()
+    assert pooled.issues == inline.issues
+    assert len(inline.issues) == 18
@@ -0,0 +1,144 @@
+"""
+进化事件总线测试
+
+覆盖：
+- 发布到所有订阅者，队列满的慢消费者被断开
+- 环形缓冲区续传
+- ORM 插入在提交后发布，回滚不发布
+- 轮询器推送其他引擎（其他 worker、外部脚本）写入的事件，快速路径已发布的不重复推送
+- WebSocket 带 last_event_id 重连时补发缺失事件
+"""
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from core.database import Base, build_engines, build_session_factory  # noqa: E402
+from models.db import MonitorEvolutionEvent  # noqa: E402
+from services.evolution_bus import EvolutionEventBus, EvolutionTailer, evolution_bus  # noqa: E402
+
+
+def message(event_id: str) -> dict:
+    return {"type": "evolution_event", "data": {"id": event_id}}
+
+
+@pytest.mark.asyncio
+async def test_publish_and_drop_slow_consumer():
+    bus = EvolutionEventBus(queue_size=2, replay_size=10)
+    fast = bus.subscribe()
+    slow = bus.subscribe()
+
+    bus.publish(message("e1"), event_id="e1")
+    assert await fast.get() == message("e1")
+    bus.publish(message("e2"), event_id="e2")
+    bus.publish(message("e3"), event_id="e3")
+
+    # slow 队列已有 e1/e2，e3 放不下被断开；fast 不受影响
+    assert await slow.get() is None
+    assert [await fast.get(), await fast.get()] == [message("e2"), message("e3")]
+    assert bus.stats()["subscribers"] == 1
+    assert bus.dropped == 1
+
+    assert bus.replay_after("e1") == [message("e2"), message("e3")]
+    assert bus.replay_after("e3") == []
+    assert bus.replay_after("missing") is None
+
+
+def make_event(event_id: str) -> MonitorEvolutionEvent:
+    return MonitorEvolutionEvent(
+        event_id=event_id, timestamp=datetime(2024, 1, 1), agent="tester",
+        strategy="serial", description="d", reward=80,
+    )
+
+
+@pytest.mark.asyncio
+async def test_orm_insert_publishes_after_commit(tmp_path):
+    reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'bus.db'}", "development")
+    async with reader.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = build_session_factory(reader, writer)
+
+    subscriber = evolution_bus.subscribe()
+    try:
+        async with factory() as db:
+            db.add(make_event("rolled-back"))
+            await db.flush()
+            await db.rollback()
+
+            db.add(make_event("committed"))
+            await db.flush()
+            assert subscriber.queue.empty()
+            await db.commit()
+
+        received = await asyncio.wait_for(subscriber.get(), timeout=1)
+        assert received["data"]["id"] == "committed"
+        assert received["data"]["reward"] == 8.0
+        assert subscriber.queue.empty()
+    finally:
+        evolution_bus.unsubscribe(subscriber)
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_tailer_publishes_rows_from_other_engine(tmp_path, make_database):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'tail.db'}"
+    factory = (await make_database([make_event("history")], url=url)).factory
+    tailer = EvolutionTailer(session_factory=factory)
+    await tailer.reset_watermark()
+
+    subscriber = evolution_bus.subscribe()
+    # 另一个引擎直接执行 SQL：不经过本进程的 ORM 钩子，相当于其他 worker 或外部脚本
+    other = create_async_engine(url)
+    try:
+        async with other.begin() as conn:
+            await conn.execute(text(
+                "INSERT INTO monitor_evolution_events "
+                "(event_id, timestamp, agent, strategy, description, reward, created_at) "
+                "VALUES ('external', '2024-01-02 00:00:00', 'script', 'serial', 'd', 50, '2024-01-02 00:00:00')"
+            ))
+        assert subscriber.queue.empty()
+
+        assert await tailer.poll_once() == 1
+        received = await asyncio.wait_for(subscriber.get(), timeout=1)
+        assert received["data"]["id"] == "external" and received["data"]["reward"] == 5.0
+        assert await tailer.poll_once() == 0
+
+        # 本进程插入：提交后快速路径已发布，轮询读到后不重复推送
+        async with factory() as db:
+            db.add(MonitorEvolutionEvent(
+                event_id="local", timestamp=datetime(2024, 1, 3), agent="tester",
+                strategy="serial", description="d", reward=80,
+            ))
+            await db.commit()
+        assert (await asyncio.wait_for(subscriber.get(), timeout=1))["data"]["id"] == "local"
+        assert await tailer.poll_once() == 1
+        assert subscriber.queue.empty()
+    finally:
+        evolution_bus.unsubscribe(subscriber)
+        await other.dispose()
+
+
+def test_websocket_resume_from_last_event_id():
+    from api.routes.monitor_router import router
+
+    for event_id in ("r1", "r2", "r3"):
+        evolution_bus.publish(message(event_id), event_id=event_id)
+
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        with client.websocket_connect("/monitor/ws/evolution?last_event_id=r1") as ws:
+            assert ws.receive_json() == message("r2")
+            assert ws.receive_json() == message("r3")
+            ws.send_json({"type": "ping"})
+            assert ws.receive_json() == {"type": "pong"}
@@ -0,0 +1,150 @@
+"""
+知识图谱索引测试
+
+覆盖：
+- 规则 / 最佳实践 / 技能三类来源的解析
+- 条目 ID 跨请求稳定
+- 只有 mtime/size 变化的文件会被重新解析，删除的文件从索引移除
+- BM25 检索：中文二元组分词、排序、高亮、随文件变化增量更新
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from services.knowledge_index import KnowledgeIndex  # noqa: E402
+from services.knowledge_search import SearchIndex, highlight, tokenize  # noqa: E402
+
+RULE = """# 后端规则
+
+### 并行开发
+
+- **Agent**: backend-developer
+- **描述**: 接口与前端并行开发，减少等待
+
+### 代码审查
+
+- **Agent**: code-reviewer
+- **描述**: 审查时优先检查 N+1 查询
+"""
+
+STANDARDS = """# 项目规范
+
+### 异常处理最佳实践
+
+统一使用 AppException 子类
+
+### 命名约定
+
+使用蛇形命名
+"""
+
+SKILL = """# 数据库优化
+
+## 概述
+
+为高频查询添加复合索引
+"""
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    claude_dir = tmp_path / ".claude"
+    (claude_dir / "rules").mkdir(parents=True)
+    (claude_dir / "skills" / "db").mkdir(parents=True)
+    (claude_dir / "rules" / "backend.md").write_text(RULE, encoding="utf-8")
+    (claude_dir / "project_standards.md").write_text(STANDARDS, encoding="utf-8")
+    (claude_dir / "skills" / "db" / "SKILL.md").write_text(SKILL, encoding="utf-8")
+    return tmp_path
+
+
+def titles(response, category):
+    return [item.title for item in response.categories[category].items]
+
+
+def test_parses_all_sources(project_root):
+    index = KnowledgeIndex(project_root)
+    graph = index.query()
+
+    assert titles(graph, "strategy") == ["backend-developer - 并行开发", "code-reviewer - 代码审查"]
+    assert titles(graph, "best-practice") == ["异常处理最佳实践"]
+    assert titles(graph, "template") == ["数据库优化"]
+    assert graph.categories["error-handling"].count == 0
+
+    filtered = index.query(category="strategy", search="N+1")
+    assert list(filtered.categories) == ["strategy"]
+    assert titles(filtered, "strategy") == ["code-reviewer - 代码审查"]
+
+
+def test_ids_stable_and_incremental_refresh(project_root):
+    index = KnowledgeIndex(project_root)
+    first = index.query()
+    assert index.parsed_files == 3
+
+    # 无变化：不重新解析，ID 不变
+    assert index.refresh(force=True) is False
+    assert index.parsed_files == 3
+    assert index.query().model_dump() == first.model_dump()
+
+    # 只修改技能文件：只重新解析该文件，其他条目 ID 不变
+    skill_file = project_root / ".claude" / "skills" / "db" / "SKILL.md"
+    skill_file.write_text(SKILL.replace("复合索引", "覆盖索引"), encoding="utf-8")
+    stat = skill_file.stat()
+    os.utime(skill_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.refresh(force=True) is True
+    assert index.parsed_files == 4
+
+    second = index.query()
+    assert second.categories["strategy"].items[0].id == first.categories["strategy"].items[0].id
+    assert second.categories["template"].items[0].id != first.categories["template"].items[0].id
+
+    # 删除文件：条目移除
+    (project_root / ".claude" / "rules" / "backend.md").unlink()
+    assert index.refresh(force=True) is True
+    assert index.query().categories["strategy"].count == 0
+
+
+def test_tokenize_cjk_bigrams():
+    assert tokenize("N+1 查询") == ["n", "1", "查", "询", "查询"]
+    assert tokenize("复合索引", for_query=True) == ["复合", "合索", "索引"]
+    assert tokenize("索", for_query=True) == ["索"]
+
+
+def test_bm25_ranking_and_highlight():
+    index = SearchIndex()
+    index.add("a", "数据库索引", "为高频查询添加复合索引")
+    index.add("b", "前端优化", "减少重复渲染，偶尔需要索引")
+    index.add("c", "部署流程", "使用 Docker 部署")
+
+    ranked = index.search("索引")
+    assert [doc_id for doc_id, _ in ranked] == ["a", "b"]
+    assert ranked[0][1] > ranked[1][1]
+    assert [doc_id for doc_id, _ in index.search("Docker")] == ["c"]
+
+    index.remove("a")
+    assert [doc_id for doc_id, _ in index.search("索引")] == ["b"]
+
+    assert highlight("复合索引 <b>", {"索引"}) == "复合<mark>索引</mark> &lt;b&gt;"
+    assert highlight("Docker 部署", {"docker"}) == "<mark>Docker</mark> 部署"
+
+
+def test_search_updates_with_source_files(project_root):
+    index = KnowledgeIndex(project_root)
+    graph = index.query(search="索引")
+    assert titles(graph, "template") == ["数据库优化"]
+    item = graph.categories["template"].items[0]
+    assert item.score > 0
+    assert "<mark>索引</mark>" in item.highlight["description"]
+
+    skill_file = project_root / ".claude" / "skills" / "db" / "SKILL.md"
+    skill_file.write_text(SKILL.replace("复合索引", "缓存策略"), encoding="utf-8")
+    stat = skill_file.stat()
+    os.utime(skill_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    index.refresh(force=True)
+
+    assert index.query(search="索引").categories["template"].count == 0
+    assert titles(index.query(search="缓存"), "template") == ["数据库优化"]
@@ -0,0 +1,172 @@
+"""
+排行榜测试
+
+覆盖：
+- 有序榜单的名次、前 N 名、"我的排名 ± k" 与全量排序结果一致
+- 答题得分同时更新总榜、模块榜、周榜，跨周清零周榜
+- 快照写入与重启恢复：总榜/抢答榜按数据源重建，模块榜/周榜从快照恢复，过期周榜丢弃
+- 多进程：各进程只累加写入自己的增量，同步后所有进程的榜单一致
+- 未启动定时同步（LEADERBOARD_SNAPSHOT_SECONDS <= 0）时，stop() 仍写入最后一次快照
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from models.db import SpeedQuizStats, User  # noqa: E402
+from services import leaderboard as leaderboard_module  # noqa: E402
+from services.leaderboard import LeaderboardService, RankedBoard, RankedEntry  # noqa: E402
+
+
+def test_ranked_board_matches_full_sort():
+    rng = random.Random(7)
+    board = RankedBoard()
+    scores = {}
+    for _ in range(2000):
+        user_id = rng.randint(1, 200)
+        if rng.random() < 0.3:
+            score = rng.randint(0, 50)
+            board.set(user_id, score)
+            scores[user_id] = score
+        else:
+            delta = rng.randint(1, 20)
+            board.add(user_id, delta)
+            scores[user_id] = scores.get(user_id, 0) + delta
+
+    expected = sorted(((-s, u) for u, s in scores.items() if s > 0))
+    assert len(board) == len(expected)
+    assert board.top(5) == [RankedEntry(i + 1, u, -s) for i, (s, u) in enumerate(expected[:5])]
+    for rank, (neg_score, user_id) in enumerate(expected, 1):
+        assert board.rank(user_id) == rank
+        assert board.score(user_id) == -neg_score
+
+    user_id = expected[1][1]
+    assert [e.rank for e in board.around(user_id, 3)] == [1, 2, 3, 4, 5]
+    last = expected[-1][1]
+    assert [e.user_id for e in board.around(last, 1)] == [expected[-2][1], last]
+
+    board.set(last, 0)
+    assert board.rank(last) is None and board.around(last, 2) == []
+
+
+def test_record_score_updates_scopes_and_rolls_week(monkeypatch):
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W01")
+    service = LeaderboardService()
+    service.record_score(1, "alice", "grammar", 30, total_score=130)
+    service.record_score(2, "bob", "vocabulary", 50, total_score=50)
+    service.record_score(1, "alice", "grammar", 10, total_score=140)
+    service.record_score(2, "bob", "grammar", 0, total_score=50)
+
+    assert service.board("global").items() == [(1, 140), (2, 50)]
+    assert service.board("module:grammar").items() == [(1, 40)]
+    assert service.board("weekly").items() == [(2, 50), (1, 40)]
+
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W02")
+    assert len(service.board("weekly")) == 0
+    service.record_score(2, "bob", "reading", 5)
+    assert service.board("weekly").items() == [(2, 5)]
+    assert service.board("global").items() == [(1, 140), (2, 55)]
+
+
+def seed_rows():
+    return [
+        User(id=1, nickname="alice", role="student", total_score=300),
+        User(id=2, nickname="bob", role="student", total_score=500),
+        User(id=3, nickname="carol", role="student", total_score=0),
+        SpeedQuizStats(user_id=3, total_battles=4, wins=3, losses=1, current_streak=0, max_streak=2),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_and_restore(make_database, monkeypatch):
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W01")
+    factory = (await make_database(seed_rows())).factory
+    service = LeaderboardService(session_factory=factory)
+    async with factory() as db:
+        await service.load(db)
+        assert service.board("global").items() == [(2, 500), (1, 300)]
+        assert service.board("speed_quiz").items() == [(3, 3)]
+
+        service.record_score(3, "carol", "grammar", 20, total_score=20)
+        service.record_score(1, "alice", "grammar", 30, total_score=330)
+        service.record_battle_win(1)
+        assert await service.snapshot(db)
+        assert not await service.snapshot(db)
+
+        total, rank, score, neighbours = await service.around(db, "module:grammar", 3, 1)
+        assert (total, rank, score) == (2, 2, 20)
+        assert [(e["nickname"], e["rank"]) for e in neighbours] == [("alice", 1), ("carol", 2)]
+
+    # 重启：模块榜、周榜从快照恢复
+    restored = LeaderboardService(session_factory=factory)
+    async with factory() as db:
+        await restored.load(db)
+        assert restored.board("module:grammar").items() == [(1, 30), (3, 20)]
+        assert restored.board("weekly").items() == [(1, 30), (3, 20)]
+        assert restored.board("global").items() == [(2, 500), (1, 300)]
+        total, entries = await restored.top(db, "module:grammar", 1)
+        assert total == 2 and entries == [{"rank": 1, "user_id": 1, "nickname": "alice", "score": 30}]
+        assert await restored.top(db, "module:missing", 5) == (0, [])
+
+    # 跨周重启：上一周的周榜快照不再恢复
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W02")
+    next_week = LeaderboardService(session_factory=factory)
+    async with factory() as db:
+        await next_week.load(db)
+        assert len(next_week.board("weekly")) == 0
+        assert len(next_week.board("module:grammar")) == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_converge_after_sync(make_database, monkeypatch):
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W01")
+    factory = (await make_database(seed_rows())).factory
+    workers = [LeaderboardService(session_factory=factory), LeaderboardService(session_factory=factory)]
+    for worker in workers:
+        async with factory() as db:
+            await worker.load(db)
+
+    workers[0].record_score(1, "alice", "grammar", 30, total_score=330)
+    workers[1].record_score(1, "alice", "grammar", 10, total_score=340)
+    workers[1].record_score(2, "bob", "grammar", 25, total_score=525)
+    async with factory() as db:
+        await db.execute(User.__table__.update().where(User.id == 1).values(total_score=340))
+        await db.execute(User.__table__.update().where(User.id == 2).values(total_score=525))
+        await db.commit()
+
+    # 进程 0 写入后，进程 1 同步：快照行是两个进程增量之和，不互相覆盖
+    await workers[0].sync()
+    workers[1].record_score(3, "carol", "grammar", 5, total_score=5)
+    await workers[1].sync()
+    await workers[0].sync()
+    for worker in workers:
+        assert worker.board("module:grammar").items() == [(1, 40), (2, 25), (3, 5)]
+        assert worker.board("weekly").items() == [(1, 40), (2, 25), (3, 5)]
+        assert worker.board("global").items() == [(2, 525), (1, 340)]
+
+    # 同步后本进程的新得分在写入前叠加在快照之上
+    workers[0].record_score(2, "bob", "grammar", 20)
+    async with factory() as db:
+        await workers[0].load(db)
+    assert workers[0].board("module:grammar").items() == [(2, 45), (1, 40), (3, 5)]
+
+
+@pytest.mark.asyncio
+async def test_stop_snapshots_without_timer(make_database, monkeypatch):
+    monkeypatch.setattr(leaderboard_module, "current_week", lambda now=None: "2024-W01")
+    factory = (await make_database(seed_rows())).factory
+    service = LeaderboardService(snapshot_seconds=0, session_factory=factory)
+    service.start()
+    assert not service.running
+    service.record_score(1, "alice", "grammar", 30, total_score=330)
+    await service.stop()
+    assert service.snapshots == 1
+
+    restored = LeaderboardService(session_factory=factory)
+    async with factory() as db:
+        await restored.load(db)
+    assert restored.board("module:grammar").items() == [(1, 30)]
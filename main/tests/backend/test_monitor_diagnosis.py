@@ -0,0 +1,153 @@
+"""
+增量诊断测试
+
+覆盖：
+- 问题 ID 按内容生成，重复诊断 ID 不变
+- 只重新分析内容变化的文件（仅 mtime 变化不重新分析）
+- 结果同步到 monitor_diagnosis 表，消失的问题标记为 fixed
+- 修复请求按 ID 直接查找（内存索引 / 重启后查表）
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import select  # noqa: E402
+
+from core.database import Base, build_engines, build_session_factory  # noqa: E402
+from models.db import MonitorDiagnosis  # noqa: E402
+from services.monitor_diagnosis import DiagnosisService  # noqa: E402
+
+CONFIG = '''from pathlib import Path
+
+API_KEY = "sk-abcdefghijkl"
+
+
+def load(path: Path) -> str:
+    return path.read_text()
+'''
+
+CLEAN = '''def add(a: int, b: int) -> int:
+    return a + b
+'''
+
+
+def touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    backend_dir = tmp_path / "project" / "main" / "backend"
+    backend_dir.mkdir(parents=True)
+    (backend_dir / "config.py").write_text(CONFIG, encoding="utf-8")
+    (backend_dir / "utils.py").write_text(CLEAN, encoding="utf-8")
+    return tmp_path / "project"
+
+
+def make_service(project_root, factory) -> DiagnosisService:
+    service = DiagnosisService(project_root=project_root, session_factory=factory)
+    service.CHECK_INTERVAL = 0
+    return service
+
+
+async def setup_db(tmp_path):
+    reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'diagnosis.db'}", "development")
+    async with reader.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return reader, build_session_factory(reader, writer)
+
+
+async def table_status(reader):
+    async with reader.connect() as conn:
+        rows = (await conn.execute(select(MonitorDiagnosis.issue_id, MonitorDiagnosis.status))).all()
+    return dict(rows)
+
+
+@pytest.mark.asyncio
+async def test_ids_stable_and_only_changed_files_reparsed(project_root, tmp_path):
+    reader, factory = await setup_db(tmp_path)
+    try:
+        service = make_service(project_root, factory)
+        first = await service.run_diagnosis()
+        titles = {issue.title for issue in first}
+        assert {"硬编码 API_KEY", "文件读取未指定编码"} <= titles
+        assert service.parsed_files == 2
+        secret = next(issue for issue in first if issue.category == "security")
+        assert secret.location.endswith("config.py:3")
+
+        # 未变化：不读取文件，ID 不变
+        second = await service.run_diagnosis()
+        assert [i.id for i in second] == [i.id for i in first]
+        assert service.parsed_files == 2
+
+        # 只改 mtime：比对内容哈希后沿用结果
+        touch_later(project_root / "main" / "backend" / "config.py")
+        await service.run_diagnosis()
+        assert service.parsed_files == 2
+
+        # 在密钥上方插入一行：只重新分析该文件，ID 不变、行号更新
+        config = project_root / "main" / "backend" / "config.py"
+        config.write_text("# 配置\n" + CONFIG, encoding="utf-8")
+        touch_later(config)
+        third = await service.run_diagnosis()
+        assert service.parsed_files == 3
+        moved = next(issue for issue in third if issue.id == secret.id)
+        assert moved.location.endswith("config.py:4")
+
+        # 新实例（相当于重启）得到相同 ID
+        restarted = make_service(project_root, factory)
+        assert {i.id for i in await restarted.run_diagnosis()} == {i.id for i in third}
+    finally:
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_issues_persisted_and_resolved(project_root, tmp_path):
+    reader, factory = await setup_db(tmp_path)
+    try:
+        service = make_service(project_root, factory)
+        issues = await service.run_diagnosis()
+        statuses = await table_status(reader)
+        assert statuses == {issue.id: "open" for issue in issues}
+
+        secret = next(issue for issue in issues if issue.category == "security")
+        config = project_root / "main" / "backend" / "config.py"
+        config.write_text(CONFIG.replace('"sk-abcdefghijkl"', 'os.getenv("API_KEY")'), encoding="utf-8")
+        touch_later(config)
+        await service.run_diagnosis()
+
+        statuses = await table_status(reader)
+        assert statuses[secret.id] == "fixed"
+        assert await service.get_issue(secret.id) is None
+    finally:
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_fix_looks_up_issue_by_id(project_root, tmp_path):
+    reader, factory = await setup_db(tmp_path)
+    try:
+        service = make_service(project_root, factory)
+        issues = await service.run_diagnosis()
+        fixable = next(issue for issue in issues if issue.auto_fixable)
+
+        # 重启后内存为空，按唯一键查表
+        restarted = make_service(project_root, factory)
+        issue = await restarted.get_issue(fixable.id)
+        assert issue == fixable
+
+        result = await restarted.auto_fix_issue(issue.id, issue)
+        assert result.changes[0].after.strip() == 'return path.read_text(encoding="utf-8")'
+        assert (await table_status(reader))[fixable.id] == "fixed"
+        assert await restarted.get_issue(fixable.id) is None
+
+        remaining = await restarted.run_diagnosis()
+        assert fixable.id not in {i.id for i in remaining}
+    finally:
+        await reader.dispose()
@@ -0,0 +1,147 @@
+"""
+智能水平计算与快照测试
+
+覆盖：
+- 各维度按输入文件签名缓存，只重新计算输入变化的维度
+- 快照写入 monitor_intelligence 表；current() 随输入文件变化，不固定为已写入的快照
+- 走势按时间桶降采样（最后值 + 最小/最大/平均）
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import select  # noqa: E402
+
+from core.database import Base, build_engines, build_session_factory  # noqa: E402
+from models.db import MonitorIntelligence  # noqa: E402
+from services.intelligence_snapshot import IntelligenceSnapshotWriter  # noqa: E402
+from services.monitor_intelligence import IntelligenceCalculator  # noqa: E402
+from services.monitor_service import MonitorService  # noqa: E402
+
+RULE = """# 规则
+
+### 并行开发洞察
+
+- 平均奖励: 8.0/10
+"""
+
+
+def touch_later(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def project_root(tmp_path):
+    claude_dir = tmp_path / ".claude"
+    (claude_dir / "rules").mkdir(parents=True)
+    (claude_dir / "agents").mkdir()
+    (claude_dir / "rules" / "backend.md").write_text(RULE, encoding="utf-8")
+    (claude_dir / "agents" / "tester.md").write_text("# tester", encoding="utf-8")
+    (claude_dir / "project_standards.md").write_text("### 异常处理最佳实践\n", encoding="utf-8")
+    reviews_dir = tmp_path / "main" / "docs" / "reviews"
+    reviews_dir.mkdir(parents=True)
+    (reviews_dir / "r1.md").write_text("LGTM", encoding="utf-8")
+    return tmp_path
+
+
+def test_dimensions_recomputed_only_when_inputs_change(project_root):
+    calculator = IntelligenceCalculator(project_root)
+    first = calculator.calculate_intelligence_score()
+    assert first.strategy_weight == 0.41  # (1/100 + 8/10) / 2
+    assert first.knowledge_richness == 0.03  # (1 Agent × 10 + 1 最佳实践 × 5) / 500
+    assert first.quality_trend == 0.9
+    baseline = dict(calculator.recomputed)
+
+    calculator.calculate_intelligence_score()
+    assert calculator.recomputed == baseline
+
+    # 只改审查记录：只有 quality_trend 重新计算
+    review = project_root / "main" / "docs" / "reviews" / "r2.md"
+    review.write_text("需要修改", encoding="utf-8")
+    second = calculator.calculate_intelligence_score()
+    assert second.quality_trend == 0.6
+    assert calculator.recomputed["quality_trend"] == baseline["quality_trend"] + 1
+    assert calculator.recomputed["strategy_weight"] == baseline["strategy_weight"]
+
+    # 修改规则文件：strategy_weight 重新计算
+    rule_file = project_root / ".claude" / "rules" / "backend.md"
+    rule_file.write_text(RULE.replace("8.0", "6.0") + "\n### 代码审查洞察\n", encoding="utf-8")
+    touch_later(rule_file)
+    third = calculator.calculate_intelligence_score()
+    assert third.strategy_weight == 0.31  # (2/100 + 6/10) / 2
+    assert calculator.recomputed["knowledge_richness"] == baseline["knowledge_richness"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_written(project_root, tmp_path):
+    reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'monitor.db'}", "development")
+    async with reader.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        snapshot = IntelligenceSnapshotWriter(
+            calculator=IntelligenceCalculator(project_root),
+            session_factory=build_session_factory(reader, writer),
+        )
+        score = await snapshot.write_snapshot()
+        assert snapshot.latest is score
+        assert snapshot.current().quality_trend == score.quality_trend == 0.9
+
+        # 快照写入后输入文件变化：current() 反映最新值，不返回写入时的快照
+        (project_root / "main" / "docs" / "reviews" / "r2.md").write_text("需要修改", encoding="utf-8")
+        assert snapshot.current().quality_trend == 0.6
+
+        async with reader.connect() as conn:
+            rows = (await conn.execute(select(MonitorIntelligence))).all()
+        assert len(rows) == 1
+        assert rows[0].strategy_weight == score.strategy_weight
+        assert rows[0].intelligence_score == score.intelligence_score
+    finally:
+        await reader.dispose()
+
+
+@pytest.mark.asyncio
+async def test_trend_downsampled_from_snapshots(tmp_path):
+    reader, writer = build_engines(f"sqlite+aiosqlite:///{tmp_path / 'trend.db'}", "development")
+    async with reader.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = build_session_factory(reader, writer)
+    try:
+        # 最近 3 天，每 6 小时一条快照，分数逐条上升
+        base = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=2)
+        async with factory() as db:
+            db.add_all([
+                MonitorIntelligence(
+                    timestamp=base + timedelta(hours=6 * i), intelligence_score=3.0 + i * 0.5,
+                    strategy_weight=0.3, knowledge_richness=0.4, quality_trend=0.7,
+                    evolution_frequency=0.1 + i * 0.01,
+                )
+                for i in range(12)
+            ])
+            await db.commit()
+
+        service = MonitorService(session_factory=factory)
+        trend, bucket = await service.get_intelligence_trend(days="7", bucket="day")
+        assert bucket == "day"
+        assert [point.samples for point in trend] == [4, 4, 4]
+        first = trend[0]
+        assert (first.score_min, first.score_max, first.score_avg) == (3.0, 4.5, 3.75)
+        # 各维度取桶内最后一条
+        assert first.intelligence_score == 4.5
+        assert first.evolution_frequency == 0.13
+        assert first.timestamp == base + timedelta(hours=18)
+
+        trend, bucket = await service.get_intelligence_trend(days="7")
+        assert bucket == "hour"
+        assert len(trend) == 12
+
+        trend, bucket = await service.get_intelligence_trend(days="all", bucket="week")
+        assert sum(point.samples for point in trend) == 12
+    finally:
+        await reader.dispose()
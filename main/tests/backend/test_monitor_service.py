@@ -0,0 +1,99 @@
+"""
+监控进化事件流测试
+
+覆盖：
+- since / agent / strategy 过滤
+- include_diff=False 时不返回对比详情
+- 总数缓存：TTL 内新写入的事件不改变缓存的 total，since 查询不走缓存，条目数有上限
+- 断线续传：超出补发上限时要求全量刷新
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from models.db import MonitorEvolutionEvent  # noqa: E402
+from services.monitor_service import MonitorService  # noqa: E402
+
+START = datetime(2024, 1, 1)
+
+
+def make_event(i: int, agent: str, strategy: str) -> MonitorEvolutionEvent:
+    return MonitorEvolutionEvent(
+        event_id=f"evt_{i}", timestamp=START + timedelta(minutes=i), agent=agent,
+        strategy=strategy, description=f"event {i}", reward=50,
+        diff_before="before", diff_after="after", diff_impact="impact",
+    )
+
+
+def seed_rows():
+    return [
+        make_event(i, "backend-developer" if i % 2 else "tester", "parallel" if i < 6 else "serial")
+        for i in range(10)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_evolution_stream_filters(make_database):
+    factory = (await make_database(seed_rows())).factory
+    service = MonitorService(session_factory=factory)
+    stream = await service.get_evolution_stream(limit=3)
+    assert stream.total == 10
+    assert [e.id for e in stream.events] == ["evt_9", "evt_8", "evt_7"]
+    assert stream.events[0].diff.after == "after"
+    assert stream.events[0].reward == 5.0
+
+    stream = await service.get_evolution_stream(agent="tester", strategy="parallel")
+    assert stream.total == 3
+    assert [e.id for e in stream.events] == ["evt_4", "evt_2", "evt_0"]
+
+    stream = await service.get_evolution_stream(since=START + timedelta(minutes=7), include_diff=False)
+    assert stream.total == 2
+    assert [e.id for e in stream.events] == ["evt_9", "evt_8"]
+    assert all(e.diff is None for e in stream.events)
+
+
+@pytest.mark.asyncio
+async def test_evolution_total_is_cached(make_database):
+    factory = (await make_database(seed_rows())).factory
+    service = MonitorService(session_factory=factory)
+    assert (await service.get_evolution_stream()).total == 10
+
+    async with factory() as db:
+        db.add(make_event(10, "tester", "serial"))
+        await db.commit()
+
+    # 总数在 TTL 内沿用缓存，事件列表实时读取
+    stream = await service.get_evolution_stream()
+    assert stream.total == 10
+    assert stream.events[0].id == "evt_10"
+
+    # 增量查询不缓存
+    stream = await service.get_evolution_stream(since=START + timedelta(minutes=9))
+    assert stream.total == 1
+
+    service._count_cache.clear()
+    assert (await service.get_evolution_stream()).total == 11
+
+    # 任意过滤值不会让缓存无限增长
+    service.COUNT_CACHE_MAX_ENTRIES = 3
+    for i in range(10):
+        await service.get_evolution_stream(agent=f"agent-{i}")
+    assert list(service._count_cache) == [("agent-7", None), ("agent-8", None), ("agent-9", None)]
+
+
+@pytest.mark.asyncio
+async def test_events_after_for_resume(make_database):
+    factory = (await make_database(seed_rows())).factory
+    service = MonitorService(session_factory=factory)
+    messages = await service.get_events_after("evt_6", limit=3)
+    assert [m["data"]["id"] for m in messages] == ["evt_7", "evt_8", "evt_9"]
+    assert messages[0]["data"]["diff"]["before"] == "before"
+    assert await service.get_events_after("evt_9", limit=3) == []
+    # 错过的事件超过补发上限：返回 None 让客户端全量刷新，而不是只补发前 limit 条
+    assert await service.get_events_after("evt_6", limit=2) is None
+    assert await service.get_events_after("missing", limit=2) is None
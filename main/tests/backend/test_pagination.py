@@ -0,0 +1,83 @@
+"""
+游标分页单元测试
+
+- 游标编码/解码往返（整数与时间排序值）
+- 非法游标返回 400
+- 游标条件与 OFFSET 分页结果一致（含排序值相同的行）
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import desc, select  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from core.pagination import (  # noqa: E402
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_before,
+    next_cursor,
+)
+from models.db import Base, MonitorEvolutionEvent  # noqa: E402
+
+
+def test_cursor_round_trip():
+    moment = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
+    assert decode_cursor(encode_cursor(7, 3)) == (7, 3)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor("x", 1)[:-2] + "!!"])
+def test_invalid_cursor_rejected(cursor):
+    with pytest.raises(InvalidCursorError) as exc_info:
+        decode_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_keyset_before_without_cursor():
+    assert keyset_before(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id, None) is None
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_match_offset(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            start = datetime(2024, 1, 1)
+            # 每 3 行共用一个时间戳，检验 id 作为次排序键
+            await conn.execute(MonitorEvolutionEvent.__table__.insert(), [
+                {
+                    "event_id": f"evt_{i}", "timestamp": start + timedelta(minutes=i // 3),
+                    "agent": "a", "strategy": "s", "description": "d", "reward": 1.0,
+                    "diff_before": "", "diff_after": "", "diff_impact": "",
+                }
+                for i in range(25)
+            ])
+
+            ordered = select(MonitorEvolutionEvent).order_by(
+                desc(MonitorEvolutionEvent.timestamp), desc(MonitorEvolutionEvent.id)
+            )
+            expected = [row.id for row in (await conn.execute(ordered)).all()]
+
+            seen, cursor, limit = [], None, 4
+            while True:
+                query = ordered
+                condition = keyset_before(MonitorEvolutionEvent.timestamp, MonitorEvolutionEvent.id, cursor)
+                if condition is not None:
+                    query = query.where(condition)
+                rows = (await conn.execute(query.limit(limit + 1))).all()
+                cursor = next_cursor(rows, limit, "timestamp")
+                seen.extend(row.id for row in rows[:limit])
+                if cursor is None:
+                    break
+
+            assert seen == expected
+    finally:
+        await engine.dispose()
@@ -0,0 +1,111 @@
+"""
+学习进度汇总与 ETag 测试
+
+覆盖：
+- 答题时汇总表 UPSERT 累加总数/正确数，跨天后今日完成数重新计数
+- GET /progress：ETag 未变化时 304，答题后或跨天后返回 200 和新的 ETag
+- ETag 和连击按主键读取用户行，不受用户缓存中过期实例的影响（其他 worker 答题）
+"""
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+
+from api.routes.progress_router import router  # noqa: E402
+from core.database import get_db  # noqa: E402
+from core.security import get_current_user  # noqa: E402
+from models.db import Question, User, UserProgressSummary  # noqa: E402
+from models.schema import AnswerRequest  # noqa: E402
+from services import progress_service as progress_module  # noqa: E402
+from services.achievement_engine import achievement_engine  # noqa: E402
+from services.progress_service import ProgressService  # noqa: E402
+
+
+def seed_rows():
+    return [
+        User(id=1, nickname="alice", role="student", total_score=0),
+        Question(
+            id=1, module="grammar", difficulty=1, question_text="q",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        ),
+    ]
+
+
+async def answer(factory, choice: str):
+    async with factory() as db:
+        user = await db.get(User, 1)
+        return await ProgressService.submit_answer(
+            AnswerRequest(question_id=1, answer=choice, answer_time=5), user, db
+        )
+
+
+def make_app(factory, cached_user: User) -> FastAPI:
+    """current_user 固定返回 cached_user，模拟用户缓存中尚未过期的旧快照"""
+    async def override_db():
+        async with factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: cached_user
+    return app
+
+
+@pytest.mark.asyncio
+async def test_summary_upsert_accumulates_and_rolls_day(make_database):
+    factory = (await make_database(seed_rows())).factory
+    async with factory() as db:
+        assert await ProgressService._update_summary(1, 3, 2, db, on_date=date(2024, 1, 31)) == (3, 2)
+        assert await ProgressService._update_summary(1, 2, 1, db, on_date=date(2024, 1, 31)) == (5, 3)
+        assert await ProgressService._update_summary(1, 1, 1, db, on_date=date(2024, 2, 1)) == (6, 4)
+        await db.commit()
+        summary = await db.get(UserProgressSummary, 1)
+        assert (summary.completed_today, summary.last_answer_date) == (1, date(2024, 2, 1))
+
+
+@pytest.mark.asyncio
+async def test_etag_revalidates_after_answer_and_day_rollover(make_database, monkeypatch):
+    factory = (await make_database(seed_rows())).factory
+    async with factory() as db:
+        await achievement_engine.load(db)
+        cached_user = await db.get(User, 1)
+        db.expunge(cached_user)
+
+    transport = ASGITransport(app=make_app(factory, cached_user))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/progress")
+        assert first.status_code == 200 and first.json()["total_questions"] == 0
+        etag = first.headers["etag"]
+
+        revalidated = await client.get("/progress", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+
+        # 其他 worker 处理了一次答题：缓存中的用户实例没有变化，但 ETag 取自数据库
+        await answer(factory, "A")
+        changed = await client.get("/progress", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["streak"] == 1 and changed.json()["completed_today"] == 1
+        assert cached_user.current_streak == 0
+        etag = changed.headers["etag"]
+        assert (await client.get("/progress", headers={"If-None-Match": etag})).status_code == 304
+
+        # 跨天：用户行未变，但今日完成数需要重新计算
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+
+        class Tomorrow(datetime):
+            @classmethod
+            def utcnow(cls):
+                return tomorrow
+
+        monkeypatch.setattr(progress_module, "datetime", Tomorrow)
+        rolled = await client.get("/progress", headers={"If-None-Match": etag})
+        assert rolled.status_code == 200 and rolled.json()["completed_today"] == 0
+        assert rolled.headers["etag"] != etag
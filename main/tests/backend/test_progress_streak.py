@@ -0,0 +1,73 @@
+"""
+连击计数器测试
+
+覆盖：
+- 答对连击 +1 并刷新最佳连击，答错归零，最佳连击保留
+- 每次答题只执行一条 UPDATE ... RETURNING，不再扫描答题记录
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import event  # noqa: E402
+
+from models.db import Question, User  # noqa: E402
+from models.schema import AnswerRequest  # noqa: E402
+from services.achievement_engine import achievement_engine  # noqa: E402
+from services.progress_service import ProgressService  # noqa: E402
+
+
+def seed_rows():
+    return [
+        User(id=1, nickname="alice", role="student", total_score=0),
+        Question(
+            id=1, module="grammar", difficulty=1, question_text="q",
+            option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+        ),
+    ]
+
+
+async def answer(factory, choice: str):
+    async with factory() as db:
+        user = await db.get(User, 1)
+        return await ProgressService.submit_answer(
+            AnswerRequest(question_id=1, answer=choice, answer_time=5), user, db
+        )
+
+
+@pytest.mark.asyncio
+async def test_streak_resets_on_wrong_answer(make_database):
+    factory = (await make_database(seed_rows())).factory
+    async with factory() as db:
+        await achievement_engine.load(db)
+
+    streaks = [(await answer(factory, choice)).streak for choice in "AAABAA"]
+    assert streaks == [1, 2, 3, 0, 1, 2]
+
+    async with factory() as db:
+        user = await db.get(User, 1)
+        assert (user.current_streak, user.best_streak) == (2, 3)
+
+
+@pytest.mark.asyncio
+async def test_streak_update_is_single_statement(make_database):
+    factory, reader, _ = await make_database(seed_rows())
+    statements = []
+    event.listen(reader.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, params, context, many: statements.append(sql))
+
+    async with factory() as db:
+        assert await ProgressService._update_streak(1, True, db) == 1
+        assert await ProgressService._update_streak(1, True, db) == 2
+        assert await ProgressService._update_streak(1, False, db) == 0
+        await db.commit()
+        user = await db.get(User, 1)
+        assert user.best_streak == 2
+
+    updates = [sql for sql in statements if sql.lstrip().upper().startswith("UPDATE")]
+    assert len(updates) == 3 and all("RETURNING" in sql.upper() for sql in updates)
+    assert not any("user_progress" in sql for sql in statements)
@@ -0,0 +1,141 @@
+"""
+题库索引引擎单元测试
+
+覆盖：
+- 按模块/难度分桶抽题
+- 通配筛选跨桶抽题
+- 管理员增删改后的索引同步
+- 多进程：读到的题目与筛选条件不符时迁移后重抽，超过刷新周期后读到其他进程新增的题目
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from models.db import Question  # noqa: E402
+from services import question_service as question_service_module  # noqa: E402
+from services.question_bank import QuestionBank  # noqa: E402
+from services.question_service import QuestionService  # noqa: E402
+
+
+def make_bank() -> QuestionBank:
+    bank = QuestionBank(rng=random.Random(42))
+    bank.add(1, "vocabulary", 1)
+    bank.add(2, "vocabulary", 2)
+    bank.add(3, "grammar", 1)
+    bank.add(4, "grammar", 1)
+    bank.loaded = True
+    return bank
+
+
+class TestPick:
+    def test_pick_respects_module_and_difficulty(self):
+        bank = make_bank()
+        picks = {bank.pick("grammar", 1) for _ in range(50)}
+        assert picks == {3, 4}
+
+    def test_pick_with_wildcards_covers_all_buckets(self):
+        bank = make_bank()
+        picks = {bank.pick() for _ in range(200)}
+        assert picks == {1, 2, 3, 4}
+
+    def test_pick_by_difficulty_only(self):
+        bank = make_bank()
+        picks = {bank.pick(difficulty=1) for _ in range(100)}
+        assert picks == {1, 3, 4}
+
+    def test_pick_returns_none_when_no_match(self):
+        bank = make_bank()
+        assert bank.pick("reading", 3) is None
+
+
+class TestSync:
+    def test_remove_keeps_other_ids(self):
+        bank = make_bank()
+        assert bank.remove(3, "grammar", 1) is True
+        assert {bank.pick("grammar", 1) for _ in range(20)} == {4}
+        assert bank.size == 3
+
+    def test_remove_without_hint_scans_buckets(self):
+        bank = make_bank()
+        assert bank.remove(2) is True
+        assert bank.pick("vocabulary", 2) is None
+
+    def test_remove_missing_id_returns_false(self):
+        bank = make_bank()
+        assert bank.remove(99, "grammar", 1) is False
+
+    def test_move_changes_bucket(self):
+        bank = make_bank()
+        bank.move(1, "vocabulary", 1, "reading", 5)
+        assert bank.pick("vocabulary", 1) is None
+        assert bank.pick("reading", 5) == 1
+        assert bank.size == 4
+
+
+class TestSample:
+    def test_sample_returns_distinct_ids(self):
+        bank = make_bank()
+        ids = bank.sample(count=4)
+        assert sorted(ids) == [1, 2, 3, 4]
+
+    def test_sample_respects_filters(self):
+        bank = make_bank()
+        assert sorted(bank.sample("grammar", 1, 2)) == [3, 4]
+
+    def test_sample_repeats_only_when_pool_too_small(self):
+        bank = make_bank()
+        ids = bank.sample("grammar", 1, 5)
+        assert len(ids) == 5
+        assert set(ids[:2]) == {3, 4}
+
+    def test_sample_empty_pool(self):
+        bank = make_bank()
+        assert bank.sample("reading", 1, 3) == []
+
+
+def make_question(question_id: int, module: str, difficulty: int) -> Question:
+    return Question(
+        id=question_id, module=module, difficulty=difficulty, question_text="q",
+        option_a="a", option_b="b", option_c="c", option_d="d", correct_answer="A",
+    )
+
+
+@pytest.mark.asyncio
+async def test_moved_question_rejected_and_repicked(make_database, monkeypatch):
+    factory = (await make_database([make_question(1, "grammar", 1), make_question(2, "grammar", 1)])).factory
+    bank = QuestionBank(rng=random.Random(7), refresh_seconds=60)
+    monkeypatch.setattr(question_service_module, "question_bank", bank)
+    async with factory() as db:
+        await bank.load(db)
+        # 其他进程把题 1 改成阅读题：本进程索引仍在语法桶
+        question = await db.get(Question, 1)
+        question.module = "reading"
+        await db.commit()
+
+        picks = {(await QuestionService.get_random_question(db, "grammar", 1)).id for _ in range(20)}
+        assert picks == {2}
+        assert bank.stats() == {"grammar:1": 1, "reading:1": 1}
+        assert (await QuestionService.get_random_question(db, "reading")).id == 1
+
+
+@pytest.mark.asyncio
+async def test_reload_after_refresh_interval(make_database, monkeypatch):
+    factory = (await make_database([make_question(1, "grammar", 1)])).factory
+    bank = QuestionBank(refresh_seconds=60)
+    monkeypatch.setattr(question_service_module, "question_bank", bank)
+    async with factory() as db:
+        await bank.ensure_loaded(db)
+        # 其他进程（或 seed 脚本）新增题目：刷新周期内抽不到
+        db.add(make_question(2, "vocabulary", 2))
+        await db.commit()
+        assert bank.pick("vocabulary") is None
+
+        # 模拟超过刷新周期
+        bank._loaded_at -= 60
+        assert (await QuestionService.get_random_question(db, "vocabulary")).id == 2
+        assert bank.size == 2
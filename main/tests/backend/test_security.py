@@ -21,8 +21,11 @@ from core.security import (  # noqa: E402
     verify_password,
     get_password_hash,
     create_access_token,
+    create_user_token,
 )
 from core.config import settings  # noqa: E402
+from core.user_cache import UserCache  # noqa: E402
+from models.db import User  # noqa: E402
 from jose import jwt  # noqa: E402
 
 
@@ -82,3 +85,40 @@ class TestExpirationIsTimezoneAware:
         # 如果 exp 字段能正常 decode 且 > 当前时间，说明时区处理正确
         exp = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
         assert exp > datetime.now(timezone.utc)
+
+
+class TestUserToken:
+    def test_claims_omitted_by_default(self, monkeypatch):
+        monkeypatch.setattr(settings, "TOKEN_EMBED_CLAIMS", False)
+        token = create_user_token(User(id=7, nickname="amy", role="student"))
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        assert payload["sub"] == "7"
+        assert "role" not in payload
+
+    def test_claims_embedded_when_enabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "TOKEN_EMBED_CLAIMS", True)
+        token = create_user_token(User(id=7, nickname="amy", role="student"))
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        assert payload["role"] == "student"
+        assert payload["nickname"] == "amy"
+
+
+class TestUserCache:
+    def test_lru_evicts_oldest(self):
+        cache = UserCache(max_size=2)
+        for user_id in (1, 2, 3):
+            cache.put(User(id=user_id, nickname=f"u{user_id}", role="student", total_score=0))
+        assert list(cache._entries) == [2, 3]
+
+    def test_invalidate_counts_only_present_entries(self):
+        cache = UserCache()
+        cache.put(User(id=1, nickname="u1", role="student", total_score=0))
+        cache.invalidate(1)
+        cache.invalidate(1)
+        assert cache.stats()["invalidations"] == 1
+        assert cache.stats()["size"] == 0
+
+    def test_hit_rate(self):
+        cache = UserCache()
+        cache.hits, cache.misses = 3, 1
+        assert cache.stats()["hit_rate"] == 0.75
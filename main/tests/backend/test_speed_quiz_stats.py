@@ -0,0 +1,124 @@
+"""
+抢答战绩汇总测试
+
+覆盖：
+- 对战结束时增量维护胜负、最快用时和连胜，/stats 只读一行
+- 没有作答或回合未答完的对战不计入
+- 回填按对战表重新计算，与增量结果一致，重复执行结果不变
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from sqlalchemy import delete, event  # noqa: E402
+
+from models.db import SpeedQuizBattle, SpeedQuizStats, User  # noqa: E402
+from models.schema import QuestionResponse  # noqa: E402
+from services.battle_sessions import BattleSession, BattleSessionStore, RoundQuestion  # noqa: E402
+from services.speed_quiz_service import SpeedQuizService  # noqa: E402
+from services.speed_quiz_stats import backfill_speed_quiz_stats  # noqa: E402
+
+
+def seed_rows():
+    return [User(id=1, nickname="alice", role="student", total_score=0)]
+
+
+async def play(factory, store, results, started_at, total_questions=None):
+    """
+    写入一场对战：results 为每回合 (用户答案, 用户用时, 胜者)，正确答案固定为 A
+
+    对战行先插入（与开始对战一致），再由会话存储写入统计、明细和汇总。
+    """
+    async with factory() as db:
+        battle = SpeedQuizBattle(
+            user_id=1, difficulty=2, module="grammar", total_questions=total_questions or len(results),
+            created_at=started_at
+        )
+        db.add(battle)
+        await db.commit()
+    session = BattleSession(battle.id, 1, 2, "grammar", [question(i) for i in range(1, len(results) + 1)])
+    for answer, user_time, winner in results:
+        session.record_round(answer, user_time, "B", 5000, winner)
+    async with factory() as db:
+        await store.persist(db, [session])
+
+
+def question(question_id: int) -> RoundQuestion:
+    return RoundQuestion(
+        QuestionResponse(
+            id=question_id, module="grammar", difficulty=2, question_text="q",
+            option_a="a", option_b="b", option_c="c", option_d="d",
+        ),
+        "A",
+        2,
+    )
+WIN = [("A", 3000, "user"), ("A", 2500, "user"), ("B", 9000, "ai")]
+LOSS = [("B", 1000, "ai"), ("A", 7000, "ai")]
+TIE = [("A", 4000, "user"), ("B", 4000, "ai")]
+
+
+async def read_stats(factory):
+    async with factory() as db:
+        stats = await db.get(SpeedQuizStats, 1)
+        return (stats.total_battles, stats.wins, stats.losses, stats.fastest_time,
+                stats.current_streak, stats.max_streak)
+
+
+@pytest.mark.asyncio
+async def test_incremental_stats_and_single_row_read(make_database):
+    factory, reader, _ = await make_database(seed_rows())
+    store = BattleSessionStore(session_factory=factory)
+    start = datetime(2024, 1, 1)
+    for i, results in enumerate([WIN, WIN, LOSS, WIN, TIE, WIN, WIN, WIN]):
+        await play(factory, store, results, start + timedelta(minutes=i))
+
+    # 没有作答就结束的对战（被清扫）不计入
+    async with factory() as db:
+        abandoned = SpeedQuizBattle(user_id=1, difficulty=2, module="grammar", total_questions=5)
+        db.add(abandoned)
+        await db.commit()
+        await store.persist(db, [BattleSession(abandoned.id, 1, 2, "grammar", [question(i) for i in range(1, 6)])])
+    # 只答了部分回合的对战不计入（明细已写入，但数量不足 total_questions）
+    await play(factory, store, [("A", 1000, "user")], start + timedelta(hours=1), total_questions=5)
+
+    assert await read_stats(factory) == (8, 6, 1, 2500, 3, 3)
+
+    statements = []
+    event.listen(reader.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, params, context, many: statements.append(sql))
+    async with factory() as db:
+        stats = await SpeedQuizService(store).get_stats(db, 1)
+        empty_stats = await SpeedQuizService(store).get_stats(db, 2)
+    assert len([sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]) == 2
+    assert (stats.total_battles, stats.wins, stats.losses, stats.win_rate,
+            stats.fastest_time, stats.max_streak) == (8, 6, 1, 0.75, 2500, 3)
+    assert empty_stats.total_battles == 0 and empty_stats.fastest_time == 0
+
+
+@pytest.mark.asyncio
+async def test_backfill_matches_incremental(make_database):
+    factory, reader, _ = await make_database(seed_rows())
+    store = BattleSessionStore(session_factory=factory)
+    start = datetime(2024, 1, 1)
+    for i, results in enumerate([WIN, LOSS, WIN, WIN, TIE, WIN]):
+        await play(factory, store, results, start + timedelta(minutes=i))
+    # 未答完的对战
+    await play(factory, store, [("A", 1000, "user")], start + timedelta(hours=1), total_questions=5)
+    incremental = await read_stats(factory)
+
+    async with factory() as db:
+        await db.execute(delete(SpeedQuizStats))
+        # 进行中的对战（尚无明细）不计入
+        db.add(SpeedQuizBattle(user_id=1, difficulty=2, module="grammar", total_questions=5))
+        await db.commit()
+        assert await backfill_speed_quiz_stats(db, batch_size=2) == 1
+    assert await read_stats(factory) == incremental == (6, 4, 1, 2500, 1, 2)
+
+    async with factory() as db:
+        await backfill_speed_quiz_stats(db)
+    assert await read_stats(factory) == incremental
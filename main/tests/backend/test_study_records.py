@@ -0,0 +1,91 @@
+"""
+学习日历测试
+
+覆盖：
+- 连续学习天数跨月、跨年计算，分块扫描在块边界处继续
+- 遇到断档即停止扫描；今天没有学习时为 0
+- GET /study-records 只返回所查月份的日汇总
+"""
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+# 让 pytest 能导入 main/backend
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "backend"))
+
+from fastapi import FastAPI  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from api.routes.progress_router import router  # noqa: E402
+from core.database import get_db  # noqa: E402
+from core.security import TokenClaims, get_current_claims  # noqa: E402
+from models.db import User, UserDailyActivity  # noqa: E402
+from services.progress_service import ProgressService  # noqa: E402
+
+
+def seed_rows(days):
+    return [
+        User(id=1, nickname="alice", role="student", total_score=0),
+        *(
+            UserDailyActivity(user_id=1, activity_date=day, questions_completed=5, correct_count=3)
+            for day in days
+        ),
+    ]
+
+
+def day_range(first: date, last: date):
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+@pytest.mark.asyncio
+async def test_consecutive_days_span_months(make_database):
+    # 1 月 20 日断档，此后连续学习到 3 月 2 日（跨两个月末）
+    days = day_range(date(2024, 1, 10), date(2024, 1, 19)) + day_range(date(2024, 1, 21), date(2024, 3, 2))
+    factory = (await make_database(seed_rows(days))).factory
+    async with factory() as db:
+        assert await ProgressService.count_consecutive_days(1, date(2024, 3, 2), db) == 42
+        # 块大小小于连续天数时跨块继续扫描
+        assert await ProgressService.count_consecutive_days(1, date(2024, 3, 2), db, chunk_size=7) == 42
+        assert await ProgressService.count_consecutive_days(1, date(2024, 1, 19), db) == 10
+        # 今天没有学习
+        assert await ProgressService.count_consecutive_days(1, date(2024, 3, 3), db) == 0
+
+
+@pytest.mark.asyncio
+async def test_gap_stops_scan(make_database):
+    days = [date(2023, 12, 30), date(2023, 12, 31), date(2024, 1, 1)] + day_range(date(2023, 1, 1), date(2023, 12, 28))
+    factory, reader, _ = await make_database(seed_rows(days))
+    statements = []
+    event.listen(reader.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, params, context, many: statements.append(sql))
+    async with factory() as db:
+        assert await ProgressService.count_consecutive_days(1, date(2024, 1, 1), db, chunk_size=7) == 3
+    # 第一块内就遇到断档，不再读取更早的记录
+    assert len([sql for sql in statements if "user_daily_activity" in sql]) == 1
+
+
+@pytest.mark.asyncio
+async def test_study_records_returns_requested_month(make_database):
+    days = [date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29), date(2024, 3, 1)]
+    factory = (await make_database(seed_rows(days))).factory
+
+    async def override_db():
+        async with factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_claims] = lambda: TokenClaims(1, "student", "alice")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        body = (await client.get("/study-records", params={"year": 2024, "month": 2})).json()
+        assert [r["date"] for r in body["records"]] == ["2024-02-01", "2024-02-29"]
+        assert body["total_days"] == 2
+        assert body["records"][0] == {"date": "2024-02-01", "questions_completed": 5, "total_score": 30}
+
+        december = (await client.get("/study-records", params={"year": 2023, "month": 12})).json()
+        assert december["records"] == [] and december["total_days"] == 0
@@ -9,6 +9,9 @@ Pytest 配置文件
 
 import sys
 from pathlib import Path
+from typing import NamedTuple
+
+import pytest
 
 # 添加项目根目录到 Python 路径
 project_root = Path(__file__).parent.parent.parent
@@ -20,7 +23,7 @@ try:
     import pytest_asyncio
     pytest_plugins = ('pytest_asyncio',)
 except ImportError:
-    pass
+    pytest_asyncio = None
 
 
 def pytest_configure(config):
@@ -34,3 +37,55 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "slow: 标记为慢速测试"
     )
+
+
+class TempDatabase(NamedTuple):
+    """make_database 创建的测试数据库"""
+    factory: object
+    reader: object
+    writer: object
+
+    @property
+    def engines(self):
+        return [e for e in (self.reader, self.writer) if e is not None]
+
+
+if pytest_asyncio is not None:
+
+    @pytest.fixture
+    def make_database(tmp_path, event_loop):
+        """
+        测试数据库工厂夹具
+
+        用法：database = await make_database(seed_rows, mode="production", url=...)
+        - 按 mode 创建读写引擎（默认 development，单引擎），重建全部表后写入种子行
+        - 未指定 url 时使用 tmp_path 下的 SQLite 文件
+        - 测试结束时在测试所用的事件循环中删除全部表并释放引擎
+        """
+        from core.database import Base, build_engines, build_session_factory
+
+        created = []
+
+        async def make(seed_rows=(), mode: str = "development", url: str = None) -> TempDatabase:
+            url = url or f"sqlite+aiosqlite:///{tmp_path / f'test{len(created)}.db'}"
+            reader, writer = build_engines(url, mode)
+            database = TempDatabase(build_session_factory(reader, writer), reader, writer)
+            created.append(database)
+            async with (writer or reader).begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+            if seed_rows:
+                async with database.factory() as db:
+                    db.add_all(list(seed_rows))
+                    await db.commit()
+            return database
+
+        async def teardown():
+            for database in created:
+                async with (database.writer or database.reader).begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+                for engine in database.engines:
+                    await engine.dispose()
+
+        yield make
+        event_loop.run_until_complete(teardown())